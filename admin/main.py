@@ -1,18 +1,21 @@
 # admin/main.py
 # -*- coding: utf-8 -*-
+import asyncio
 import uvicorn
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, ORJSONResponse
 from pathlib import Path
 from database.db import Session as DbSession, get_db, Session
 from models.models import User, Bot, BotCategory, BotMedia, BugReport, Order
 from admin.routers import messages
 from admin.routers import notifications
+from admin.routers import events
 import logging
 
 # Настроим логирование
@@ -20,9 +23,20 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Добавляем импорты роутеров
-from admin.routers import auth, webhooks, bots, users, payments, reports, changelogs
+from admin.routers import auth, webhooks, bots, users, payments, reports, changelogs, stats
 from admin.middleware.auth_middleware import verify_token, get_token_from_request
-from config.settings import ADMIN_API_HOST, ADMIN_API_PORT, SECRET_KEY, MESSAGES_MEDIA_DIR
+from admin.middleware.concurrency import (
+    RequestConcurrencyMiddleware, configure_db_worker_pool, db_worker_slot, get_db_worker_pool_stats, request_metrics
+)
+from config.settings import ADMIN_API_HOST, ADMIN_API_PORT, SECRET_KEY, MESSAGES_MEDIA_DIR, RECONCILE_INTERVAL
+from services.events import DatabaseWatcher, event_bus
+from payments.gateway import gateway_client, gateway_metrics
+from services.reconciliation import payment_reconciler
+from services import outbox, rollups
+
+# Дневные сводки статистики и сообщения об оплате (outbox) записываются событиями моделей
+rollups.register_listeners()
+outbox.register_listeners()
 
 # Получаем абсолютный путь к директории, где находится файл скрипта
 BASE_DIR = Path(__file__).resolve().parent
@@ -32,6 +46,23 @@ os.makedirs(BASE_DIR / "static", exist_ok=True)
 os.makedirs(BASE_DIR / "static/css", exist_ok=True)
 os.makedirs(BASE_DIR / "static/js", exist_ok=True)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Настройка ресурсов приложения при запуске"""
+    # Одновременная работа маршрутов с БД ограничена размером пула соединений
+    configure_db_worker_pool()
+    # События, записанные в БД ботом, для потока /events
+    watcher = asyncio.create_task(DatabaseWatcher().run())
+    # Сверка заказов, уведомления об оплате которых не пришли
+    reconciler = asyncio.create_task(payment_reconciler.run()) if RECONCILE_INTERVAL > 0 else None
+    yield
+    watcher.cancel()
+    if reconciler:
+        reconciler.cancel()
+    await gateway_client.aclose()
+
+
 # Отключаем временно OpenAPI для решения проблемы с документацией
 app = FastAPI(
     title="SE1DHE Bot Admin API",
@@ -39,9 +70,15 @@ app = FastAPI(
     version="1.0.0",
     docs_url=None,
     redoc_url=None,
-    openapi_url=None
+    openapi_url=None,
+    # JSON ответов API кодируется orjson
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Метрики одновременных запросов
+app.add_middleware(RequestConcurrencyMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -105,7 +142,7 @@ async def categories_page(request: Request):
 
 
 @app.get("/bots/page/create", response_class=HTMLResponse)
-async def create_bot_page(request: Request):
+def create_bot_page(request: Request):
     """Страница создания нового бота"""
     db = DbSession()
     try:
@@ -126,7 +163,7 @@ async def create_bot_page(request: Request):
 
 
 @app.get("/bots/page/{bot_id}/edit", response_class=HTMLResponse)
-async def edit_bot_page(bot_id: int, request: Request):
+def edit_bot_page(bot_id: int, request: Request):
     """Страница редактирования бота"""
     db = DbSession()
     try:
@@ -179,7 +216,7 @@ async def users_page(request: Request):
 
 
 @app.get("/users/page/{user_id}", response_class=HTMLResponse)
-async def user_detail_page(user_id: int, request: Request, db: Session = Depends(get_db)):
+def user_detail_page(user_id: int, request: Request, db: Session = Depends(get_db)):
     """Страница с детальной информацией о пользователе"""
     # Получаем информацию о пользователе
     user = db.query(User).filter(User.id == user_id).first()
@@ -203,7 +240,7 @@ async def payments_page(request: Request):
 
 
 @app.get("/payments/page/{order_id}", response_class=HTMLResponse)
-async def order_detail_page(order_id: int, request: Request):
+def order_detail_page(order_id: int, request: Request):
     """Страница с детальной информацией о заказе"""
     db = DbSession()
     try:
@@ -237,7 +274,7 @@ async def reports_page(request: Request):
 
 
 @app.get("/reports/page/{report_id}", response_class=HTMLResponse)
-async def report_detail_page(report_id: int, request: Request):
+def report_detail_page(report_id: int, request: Request):
     """Страница с детальной информацией о баг-репорте"""
     db = DbSession()
     try:
@@ -265,7 +302,7 @@ async def report_detail_page(report_id: int, request: Request):
 
 # Страницы ченжлогов
 @app.get("/changelogs/page", response_class=HTMLResponse)
-async def changelogs_page(request: Request):
+def changelogs_page(request: Request):
     """Страница с ченжлогами"""
     db = DbSession()
     try:
@@ -287,7 +324,7 @@ async def changelogs_page(request: Request):
 
 
 @app.get("/changelogs/page/{bot_id}", response_class=HTMLResponse)
-async def bot_changelogs_page(bot_id: int, request: Request):
+def bot_changelogs_page(bot_id: int, request: Request):
     """Страница с ченжлогами конкретного бота"""
     db = DbSession()
     try:
@@ -323,7 +360,7 @@ async def error_page(request: Request, message: str = "Unknown error", status_co
     )
 
 @app.get("/messages/page/{user_id}", response_class=HTMLResponse)
-async def message_page(user_id: int, request: Request):
+def message_page(user_id: int, request: Request):
     """Страница для отправки сообщений пользователю"""
     db = DbSession()
     try:
@@ -357,10 +394,30 @@ api_routes = [
     (changelogs.router, "/changelogs", "changelogs"),
     (messages.router, "/messages", "messages"),
     (notifications.router, "/notifications", "notifications"),  # Добавлено
+    (events.router, "/events", "events"),
+    (stats.router, "/stats", "stats"),
 ]
 
+# Поток событий открыт, пока подключен клиент, и не должен занимать место в лимитере работы с БД
+UNLIMITED_PREFIXES = ("/events",)
+
 for router, prefix, tag in api_routes:
-    app.include_router(router, prefix=prefix, tags=[tag], dependencies=[Depends(verify_token)])
+    dependencies = [Depends(verify_token)]
+    if prefix not in UNLIMITED_PREFIXES:
+        dependencies.append(Depends(db_worker_slot))
+    app.include_router(router, prefix=prefix, tags=[tag], dependencies=dependencies)
+
+
+@app.get("/metrics/concurrency", dependencies=[Depends(verify_token)])
+async def concurrency_metrics():
+    """Метрики одновременных запросов и загрузки пула потоков для работы с БД"""
+    return {
+        "requests": request_metrics.snapshot(),
+        "db_worker_pool": get_db_worker_pool_stats(),
+        "events": event_bus.stats(),
+        "payment_gateways": gateway_metrics.snapshot(),
+        "reconciliation": payment_reconciler.metrics()
+    }
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -1,13 +1,27 @@
 # -*- coding: utf-8 -*-
+"""
+Проверка JWT токенов админ-панели.
+
+Подпись и срок действия токена проверяются без обращения к БД. Администратор
+(AdminPrincipal) по идентификатору токена (jti) хранится в памяти
+ADMIN_PRINCIPAL_CACHE_TTL секунд, БД запрашивается только при промахе кеша.
+Выход из системы отзывает токен, revoke_admin_tokens - все токены администратора;
+отзыв проверяется на каждом запросе и сбрасывает кеш.
+"""
+import threading
+import time
+import uuid
+from dataclasses import dataclass
 from fastapi import HTTPException, Depends, status, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from pydantic import BaseModel
-from typing import Optional
-from config.settings import SECRET_KEY, ADMIN_IDS
+from typing import Any, Dict, Optional
+from config.settings import SECRET_KEY, ADMIN_IDS, ADMIN_PRINCIPAL_CACHE_SIZE, ADMIN_PRINCIPAL_CACHE_TTL
 from database.db import Session, get_db, db_session
 from models.models import User
+from utils.cache import LRUCache, MISSING
 import logging
 
 logger = logging.getLogger(__name__)
@@ -35,8 +49,27 @@ class TokenData(BaseModel):
     telegram_id: Optional[int] = None
 
 
+@dataclass(frozen=True)
+class AdminPrincipal:
+    """Администратор, выполняющий запрос (не привязан к сессии БД)"""
+    id: int
+    telegram_id: int
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    language: Optional[str] = None
+
+
+principal_cache = LRUCache(max_size=ADMIN_PRINCIPAL_CACHE_SIZE, ttl=ADMIN_PRINCIPAL_CACHE_TTL)
+
+# Отозванные токены (jti -> время истечения токена) и моменты отзыва всех токенов администратора
+_revoked_tokens: Dict[str, float] = {}
+_revoked_before: Dict[int, float] = {}
+_revocation_lock = threading.Lock()
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    """Создаёт JWT токен"""
+    """Создаёт JWT токен с уникальным идентификатором (jti)"""
     to_encode = data.copy()
 
     if expires_delta:
@@ -44,14 +77,62 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
     return encoded_jwt
 
 
-def verify_token(token: str = Depends(oauth2_scheme)):
-    """Проверяет JWT токен и возвращает данные пользователя"""
+def _token_key(token: str, payload: Dict[str, Any]) -> str:
+    # Токены, выданные до появления jti, кешируются по самому токену
+    return payload.get("jti") or token
+
+
+def revoke_token(token: str):
+    """Отзывает токен (выход из системы) до истечения его срока действия"""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        # Недействительный токен и так не пройдет проверку
+        return
+
+    now = time.time()
+    key = _token_key(token, payload)
+    with _revocation_lock:
+        # Истекшие токены больше не нужно помнить
+        for expired in [jti for jti, expires_at in _revoked_tokens.items() if expires_at <= now]:
+            del _revoked_tokens[expired]
+        _revoked_tokens[key] = float(payload.get("exp", now))
+    principal_cache.delete(key)
+    logger.info(f"Token of admin {payload.get('telegram_id')} revoked")
+
+
+def revoke_admin_tokens(telegram_id: int):
+    """Отзывает все ранее выданные токены администратора"""
+    with _revocation_lock:
+        _revoked_before[int(telegram_id)] = time.time()
+    principal_cache.clear()
+    logger.info(f"All tokens of admin {telegram_id} revoked")
+
+
+def _is_revoked(key: str, telegram_id: int, payload: Dict[str, Any]) -> bool:
+    if key in _revoked_tokens:
+        return True
+    revoked_before = _revoked_before.get(telegram_id)
+    return revoked_before is not None and payload.get("iat", 0) <= revoked_before
+
+
+def load_principal(telegram_id: int) -> Optional[AdminPrincipal]:
+    """Загружает администратора из БД"""
+    with db_session() as db:
+        row = db.query(
+            User.id, User.telegram_id, User.username, User.first_name, User.last_name, User.language
+        ).filter(User.telegram_id == telegram_id).first()
+        return AdminPrincipal(*row) if row else None
+
+
+def verify_token(token: str = Depends(oauth2_scheme)) -> AdminPrincipal:
+    """Проверяет JWT токен и возвращает администратора"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -82,30 +163,28 @@ def verify_token(token: str = Depends(oauth2_scheme)):
             detail="You don't have permission to access this resource"
         )
 
-    # Используем контекстный менеджер для работы с базой данных
-    with db_session() as db:
-        try:
-            user = db.query(User).filter(User.telegram_id == token_data.telegram_id).first()
-            if user is None:
-                logger.warning(f"User with telegram_id {token_data.telegram_id} not found in database")
-                raise credentials_exception
-
-            # Важно: создаем копию пользователя, чтобы избежать ошибок сессии
-            user_copy = User(
-                id=user.id,
-                telegram_id=user.telegram_id,
-                username=user.username,
-                first_name=user.first_name,
-                last_name=user.last_name,
-                language=user.language,
-                created_at=user.created_at,
-                updated_at=user.updated_at
-            )
-            return user_copy
-        except Exception as e:
-            logger.error(f"Error during token verification: {e}")
-            # При любой ошибке поднимаем credentials_exception
-            raise credentials_exception
+    key = _token_key(token, payload)
+    if _is_revoked(key, token_data.telegram_id, payload):
+        logger.warning(f"Revoked token used by telegram_id {token_data.telegram_id}")
+        raise credentials_exception
+
+    principal = principal_cache.get(key)
+    if principal is not MISSING:
+        return principal
+
+    try:
+        principal = load_principal(token_data.telegram_id)
+    except Exception as e:
+        logger.error(f"Error during token verification: {e}")
+        # При любой ошибке поднимаем credentials_exception
+        raise credentials_exception
+
+    if principal is None:
+        logger.warning(f"User with telegram_id {token_data.telegram_id} not found in database")
+        raise credentials_exception
+
+    principal_cache.set(key, principal)
+    return principal
 
 
 async def get_token_from_request(request: Request) -> Optional[str]:
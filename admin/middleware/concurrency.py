@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Ограничение одновременной работы с БД и метрики одновременных запросов админ-панели.
+
+Синхронные маршруты (def) FastAPI выполняет в пуле потоков anyio, и тяжелые запросы
+не блокируют цикл событий: вебхуки платежных систем работают через асинхронную сессию
+и продолжают обрабатываться. Маршруты, работающие с БД, дополнительно занимают место в
+отдельном лимитере размером с пул соединений движка (зависимость db_worker_slot) и
+ждут его в цикле событий, не занимая поток. Общий пул потоков anyio при этом не
+меняется, поэтому медленные выгрузки и статистика не отнимают потоки у авторизации,
+зависимостей и файловых операций других маршрутов.
+"""
+import time
+from typing import AsyncIterator, Dict
+
+from anyio import CapacityLimiter
+from anyio.lowlevel import RunVar
+
+from config.settings import DB_WORKER_THREADS
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Лимитер привязан к циклу событий, как и общий лимитер потоков anyio
+_db_worker_limiter: RunVar[CapacityLimiter] = RunVar("db_worker_limiter")
+
+
+def get_db_worker_limiter() -> CapacityLimiter:
+    """Возвращает лимитер работы с БД текущего цикла событий (создается при первом обращении)"""
+    try:
+        return _db_worker_limiter.get()
+    except LookupError:
+        limiter = CapacityLimiter(DB_WORKER_THREADS)
+        _db_worker_limiter.set(limiter)
+        return limiter
+
+
+def configure_db_worker_pool(total_threads: int = DB_WORKER_THREADS) -> CapacityLimiter:
+    """
+    Устанавливает количество маршрутов, одновременно работающих с БД.
+    Должна вызываться внутри запущенного цикла событий (например, при старте приложения).
+    """
+    limiter = get_db_worker_limiter()
+    limiter.total_tokens = total_threads
+    logger.info(f"DB worker pool size set to {total_threads}")
+    return limiter
+
+
+async def db_worker_slot() -> AsyncIterator[None]:
+    """Зависимость маршрутов, работающих с БД: занимает место в лимитере на время запроса"""
+    async with get_db_worker_limiter():
+        yield
+
+
+def get_db_worker_pool_stats() -> Dict[str, int]:
+    """Возвращает состояние лимитера работы с БД"""
+    limiter = get_db_worker_limiter()
+    statistics = limiter.statistics()
+    return {
+        "size": int(limiter.total_tokens),
+        "busy": statistics.borrowed_tokens,
+        "waiting": statistics.tasks_waiting,
+    }
+
+
+class ConcurrencyMetrics:
+    """Счетчики одновременных HTTP-запросов"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def started(self):
+        self.in_flight += 1
+        self.total_requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self, duration: float):
+        self.in_flight -= 1
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+
+    def snapshot(self) -> Dict[str, float]:
+        completed = self.total_requests - self.in_flight
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "total_requests": self.total_requests,
+            "avg_time_ms": round(self.total_time / completed * 1000, 2) if completed else 0.0,
+            "max_time_ms": round(self.max_time * 1000, 2),
+        }
+
+
+request_metrics = ConcurrencyMetrics()
+
+# Долгоживущие потоки событий не учитываются в метриках длительности запросов
+UNMETERED_PATHS = ("/events",)
+
+
+class RequestConcurrencyMiddleware:
+    """ASGI middleware, учитывающее количество и длительность HTTP-запросов"""
+
+    def __init__(self, app, metrics: ConcurrencyMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNMETERED_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        self.metrics.started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.metrics.finished(time.perf_counter() - started)
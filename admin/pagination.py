@@ -0,0 +1,196 @@
+# admin/pagination.py
+"""
+Курсорная (keyset) пагинация списков админ-панели.
+
+Страница выбирается условием по паре (поле сортировки, id) от последней строки
+предыдущей страницы, поэтому запрос любой страницы читает только limit + 1
+строк по индексу, а не пропускает OFFSET строк. Общее количество считается
+только для первой страницы и не дороже COUNT_LIMIT строк; для больших таблиц
+без фильтров берется оценка по первичному ключу.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Generic, List, Optional, TypeVar
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import Date, DateTime, and_, func, or_, select, text
+from sqlalchemy.orm import Query as OrmQuery, Session
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Сколько строк максимум пересчитывается для поля total
+COUNT_LIMIT = 10000
+
+ItemT = TypeVar("ItemT")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: List[ItemT]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    # Только для первой страницы (без cursor)
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+
+class PageParams:
+    """Параметры страницы (зависимость FastAPI)"""
+
+    def __init__(
+            self,
+            cursor: Optional[str] = Query(None, description="Курсор следующей страницы (next_cursor из ответа)"),
+            limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+            sort: Optional[str] = Query(None, description="Поле сортировки, с '-' - по убыванию (например, -created_at)")
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.sort = sort
+
+
+class DateRange:
+    """Фильтр по дате создания (зависимость FastAPI)"""
+
+    def __init__(
+            self,
+            date_from: Optional[datetime] = Query(None, description="Создано не раньше"),
+            date_to: Optional[datetime] = Query(None, description="Создано не позже")
+    ):
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def apply(self, query: OrmQuery, column) -> OrmQuery:
+        """Добавляет условия по колонке с датой"""
+        if self.date_from is not None:
+            query = query.filter(column >= self.date_from)
+        if self.date_to is not None:
+            query = query.filter(column <= self.date_to)
+        return query
+
+
+def bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class KeysetPaginator:
+    """
+    Пагинация по паре (поле сортировки, первичный ключ).
+
+    Args:
+        model: Модель SQLAlchemy
+        sorts (Dict[str, Any]): Допустимые поля сортировки (имя -> колонка, колонки без NULL)
+        default_sort (str): Сортировка по умолчанию, например "-created_at"
+    """
+
+    def __init__(self, model, sorts: Dict[str, Any], default_sort: str = "-created_at"):
+        self.model = model
+        self.id_column = model.__table__.primary_key.columns.values()[0]
+        self.sorts = sorts
+        self.default_sort = default_sort
+
+    def _parse_sort(self, sort: Optional[str]):
+        sort = sort or self.default_sort
+        descending = sort.startswith("-")
+        name = sort.lstrip("-")
+        if name not in self.sorts:
+            raise bad_request(f"Unknown sort: {name}. Use one of: {', '.join(self.sorts)}")
+        return sort, self.sorts[name], descending
+
+    @staticmethod
+    def encode_cursor(sort: str, value: Any, row_id: Any) -> str:
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        payload = json.dumps([sort, value, row_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, sort: str, column) -> tuple:
+        try:
+            payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_sort, value, row_id = json.loads(payload)
+        except (binascii.Error, ValueError, TypeError):
+            raise bad_request("Invalid cursor")
+        if cursor_sort != sort:
+            raise bad_request("Cursor does not match sort")
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column.type, Date):
+            value = date.fromisoformat(value)
+        return value, row_id
+
+    def paginate(self, db: Session, query: OrmQuery, params: PageParams,
+                 serialize: Callable[[Any], Any], count_total: bool = True) -> Dict[str, Any]:
+        """
+        Возвращает страницу запроса.
+
+        Args:
+            db (Session): Сессия БД
+            query: Запрос модели с уже примененными фильтрами
+            params (PageParams): Курсор, размер страницы и сортировка
+            serialize: Функция преобразования строки в элемент ответа
+            count_total (bool): Считать total для первой страницы (False, если количество уже известно)
+
+        Returns:
+            Dict[str, Any]: items, next_cursor, has_more, total, total_is_estimate
+        """
+        sort, column, descending = self._parse_sort(params.sort)
+        filtered = query
+
+        if params.cursor:
+            value, row_id = self.decode_cursor(params.cursor, sort, column)
+            if descending:
+                query = query.filter(or_(column < value, and_(column == value, self.id_column < row_id)))
+            else:
+                query = query.filter(or_(column > value, and_(column == value, self.id_column > row_id)))
+
+        order = (column.desc(), self.id_column.desc()) if descending else (column.asc(), self.id_column.asc())
+        rows = query.order_by(*order).limit(params.limit + 1).all()
+        has_more = len(rows) > params.limit
+        rows = rows[:params.limit]
+
+        page = {
+            "items": [serialize(row) for row in rows],
+            "next_cursor": None,
+            "has_more": has_more,
+            "total": None,
+            "total_is_estimate": False,
+        }
+        if has_more:
+            last = rows[-1]
+            page["next_cursor"] = self.encode_cursor(sort, getattr(last, column.key), getattr(last, self.id_column.key))
+        if not params.cursor and count_total:
+            page["total"], page["total_is_estimate"] = self.estimate_total(db, filtered)
+        return page
+
+    def estimate_total(self, db: Session, query: OrmQuery):
+        """
+        Количество строк запроса: точное, если их не больше COUNT_LIMIT, иначе оценка.
+
+        Returns:
+            tuple: (количество, является ли оно оценкой)
+        """
+        limited = query.with_entities(self.id_column).order_by(None).limit(COUNT_LIMIT + 1).subquery()
+        count = db.execute(select(func.count()).select_from(limited)).scalar()
+        if count <= COUNT_LIMIT:
+            return count, False
+
+        if query.whereclause is None:
+            return max(self.table_rows_estimate(db), count), True
+        return COUNT_LIMIT, True
+
+    def table_rows_estimate(self, db: Session) -> int:
+        """Оценка размера таблицы без полного подсчета строк"""
+        table = self.model.__table__.name
+        if db.get_bind().dialect.name in ("mysql", "mariadb"):
+            estimate = db.execute(text(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+            ), {"table": table}).scalar()
+            if estimate:
+                return int(estimate)
+        # Автоинкрементные ключи почти без пропусков: разница max(id) и min(id) берется по индексу
+        low, high = db.query(func.min(self.id_column), func.max(self.id_column)).one()
+        return (high - low + 1) if high is not None else 0
@@ -10,7 +10,10 @@ from typing import Optional
 import logging
 import time
 
-from admin.middleware.auth_middleware import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from admin.middleware.auth_middleware import (
+    create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, AdminPrincipal, oauth2_scheme, revoke_admin_tokens,
+    revoke_token, verify_token
+)
 from database.db import Session
 from models.models import User
 from config.settings import BOT_TOKEN, ADMIN_IDS
@@ -77,7 +80,7 @@ async def telegram_login_test(request: Request):
 
 
 @router.get("/telegram-login")
-async def telegram_login(request: Request):
+def telegram_login(request: Request):
     """Аутентификация через данные от Telegram Login Widget (GET запрос)"""
     # Получаем все параметры запроса
     auth_data = dict(request.query_params)
@@ -155,7 +158,7 @@ async def telegram_login(request: Request):
 
 
 @router.post("/telegram-login")
-async def telegram_login_post(auth_data: TelegramAuth):
+def telegram_login_post(auth_data: TelegramAuth):
     """Аутентификация через данные от Telegram Login Widget (POST запрос)"""
     # Преобразуем Pydantic модель в словарь
     auth_dict = auth_data.dict()
@@ -230,4 +233,18 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 @router.get("/logout")
 async def logout(request: Request):
     """Выход из системы"""
-    return templates.TemplateResponse("auth/logout.html", {"request": request})
\ No newline at end of file
+    return templates.TemplateResponse("auth/logout.html", {"request": request})
+
+
+@router.post("/logout")
+def revoke_current_token(token: str = Depends(oauth2_scheme)):
+    """Отзыв текущего токена при выходе из системы"""
+    revoke_token(token)
+    return {"success": True}
+
+
+@router.post("/logout-all")
+def revoke_all_tokens(admin: AdminPrincipal = Depends(verify_token)):
+    """Отзыв всех токенов администратора (выход на всех устройствах)"""
+    revoke_admin_tokens(admin.telegram_id)
+    return {"success": True}
\ No newline at end of file
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, UploadFile, File, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, UploadFile, File, Body, Query
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 import os
@@ -10,9 +10,13 @@ from pydantic import BaseModel
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from admin.utils import serialize_model, validate_file
+from admin.pagination import DateRange, KeysetPaginator, Page, PageParams
+from admin.serializers import BOTS
+from admin.utils import validate_file
 from models.models import Bot, BotCategory, BotMedia
 from database.db import get_db, execute_with_retry
+from services import category_stats
+from services.catalog import bump_catalog_version
 from config.settings import BOT_FILES_DIR, MEDIA_ROOT
 import telegraph
 from config.settings import TELEGRAPH_TOKEN
@@ -65,24 +69,39 @@ class BotResponse(BaseModel):
 
 # Маршруты для категорий ботов
 @router.post("/categories", response_model=BotCategoryResponse)
-async def create_category(category: BotCategoryCreate, db: Session = Depends(get_db)):
+def create_category(category: BotCategoryCreate, db: Session = Depends(get_db)):
     """Создание новой категории ботов"""
     db_category = BotCategory(**category.dict())
     db.add(db_category)
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_category)
     return db_category
 
 
 @router.get("/categories", response_model=List[BotCategoryResponse])
-async def get_categories(db: Session = Depends(get_db)):
+def get_categories(db: Session = Depends(get_db)):
     """Получение списка всех категорий ботов"""
     categories = db.query(BotCategory).all()
     return categories
 
 
+# Объявлен раньше /categories/{category_id}, иначе "stats" разбирается как id категории
+@router.get("/categories/stats")
+def get_categories_stats(db: Session = Depends(get_db)):
+    """Получение статистики по категориям (включая ботов без категории)"""
+    try:
+        return category_stats.get_category_stats(db)
+    except Exception as e:
+        logger.error(f"Error getting categories stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting categories stats: {str(e)}"
+        )
+
+
 @router.get("/categories/{category_id}", response_model=BotCategoryResponse)
-async def get_category(category_id: int, db: Session = Depends(get_db)):
+def get_category(category_id: int, db: Session = Depends(get_db)):
     """Получение информации о конкретной категории ботов"""
     category = db.query(BotCategory).filter(BotCategory.id == category_id).first()
     if not category:
@@ -94,7 +113,7 @@ async def get_category(category_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/categories/{category_id}", response_model=BotCategoryResponse)
-async def update_category(
+def update_category(
         category_id: int,
         category_update: BotCategoryCreate,
         db: Session = Depends(get_db)
@@ -110,13 +129,14 @@ async def update_category(
     for key, value in category_update.dict().items():
         setattr(db_category, key, value)
 
+    bump_catalog_version(db)
     db.commit()
     db.refresh(db_category)
     return db_category
 
 
 @router.delete("/categories/{category_id}")
-async def delete_category(category_id: int, db: Session = Depends(get_db)):
+def delete_category(category_id: int, db: Session = Depends(get_db)):
     """Удаление категории ботов"""
     db_category = db.query(BotCategory).filter(BotCategory.id == category_id).first()
     if not db_category:
@@ -134,67 +154,41 @@ async def delete_category(category_id: int, db: Session = Depends(get_db)):
 
     # Удаляем категорию
     db.delete(db_category)
+    bump_catalog_version(db)
     db.commit()
 
     return {
         "message": f"Category deleted successfully. {len(bots_in_category)} bots were moved to 'No category' state."}
 
 
-@router.get("/categories/stats")
-async def get_categories_stats(db: Session = Depends(get_db)):
-    """Получение статистики по категориям"""
-    try:
-        # Получаем все категории
-        categories = db.query(BotCategory).all()
-
-        # Подготавливаем результат
-        result = []
-
-        # Для каждой категории считаем количество ботов и общую сумму
-        for category in categories:
-            bots_count = db.query(Bot).filter(Bot.category_id == category.id).count()
-            total_price = db.query(func.sum(Bot.price)).filter(Bot.category_id == category.id).scalar() or 0
-
-            result.append({
-                "id": category.id,
-                "name": category.name,
-                "description": category.description,
-                "discount": category.discount,
-                "bots_count": bots_count,
-                "total_price": float(total_price)
-            })
+# Маршруты для ботов
+bots_paginator = KeysetPaginator(Bot, {"created_at": Bot.created_at, "name": Bot.name, "price": Bot.price, "id": Bot.id})
 
-        # Также добавляем статистику для ботов без категории
-        uncategorized_count = db.query(Bot).filter(Bot.category_id == None).count()
-        uncategorized_price = db.query(func.sum(Bot.price)).filter(Bot.category_id == None).scalar() or 0
 
-        result.append({
-            "id": None,
-            "name": "Без категории",
-            "description": None,
-            "discount": 0,
-            "bots_count": uncategorized_count,
-            "total_price": float(uncategorized_price)
-        })
+@router.get("/", response_model=Page[BotResponse])
+def get_bots(
+        page: PageParams = Depends(),
+        dates: DateRange = Depends(),
+        category_id: Optional[int] = Query(None, description="ID категории"),
+        max_price: Optional[float] = Query(None, description="Максимальная цена"),
+        search: Optional[str] = Query(None, description="Часть названия бота"),
+        db: Session = Depends(get_db)
+):
+    """Получение страницы списка ботов"""
+    query = dates.apply(db.query(Bot), Bot.created_at)
 
-        return result
-    except Exception as e:
-        logger.error(f"Error getting categories stats: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error getting categories stats: {str(e)}"
-        )
+    if category_id is not None:
+        query = query.filter(Bot.category_id == category_id)
+    if max_price is not None:
+        query = query.filter(Bot.price <= max_price)
+    if search:
+        query = query.filter(Bot.name.like(f"%{search.strip()}%"))
 
-# Маршруты для ботов
-@router.get("/", response_model=List[BotResponse])
-async def get_bots(db: Session = Depends(get_db)):
-    """Получение списка всех ботов"""
-    bots = db.query(Bot).all()
-    return [serialize_model(bot) for bot in bots]
+    return bots_paginator.paginate(db, BOTS.project(query), page, BOTS.row)
 
 
 @router.get("/count")
-async def get_bots_count(db: Session = Depends(get_db)):
+def get_bots_count(db: Session = Depends(get_db)):
     """Получение количества ботов"""
     try:
         # Обертываем запрос в функцию retry
@@ -210,7 +204,7 @@ async def get_bots_count(db: Session = Depends(get_db)):
 
 
 @router.get("/{bot_id}", response_model=BotResponse)
-async def get_bot(bot_id: int, db: Session = Depends(get_db)):
+def get_bot(bot_id: int, db: Session = Depends(get_db)):
     """Получение информации о конкретном боте"""
     bot = db.query(Bot).filter(Bot.id == bot_id).first()
     if not bot:
@@ -222,7 +216,7 @@ async def get_bot(bot_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", response_model=BotResponse)
-async def create_bot(
+def create_bot(
         name: str = Form(...),
         description: str = Form(...),
         price: float = Form(...),
@@ -264,6 +258,7 @@ async def create_bot(
             support_group_link=support_group_link
         )
         db.add(bot)
+        bump_catalog_version(db)
         db.commit()
         db.refresh(bot)
 
@@ -334,7 +329,7 @@ async def create_bot(
 
 
 @router.get("/{bot_id}/readme-content")
-async def get_readme_content(bot_id: int, db: Session = Depends(get_db)):
+def get_readme_content(bot_id: int, db: Session = Depends(get_db)):
     """Получение содержимого README для бота"""
     try:
         # Получаем информацию о боте
@@ -362,7 +357,7 @@ async def get_readme_content(bot_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{bot_id}", response_model=BotResponse)
-async def update_bot(
+def update_bot(
         bot_id: int,
         name: Optional[str] = Form(None),
         description: Optional[str] = Form(None),
@@ -469,6 +464,7 @@ async def update_bot(
                 # Логируем ошибку, но продолжаем (README не критичен)
                 logger.error(f"Error updating Telegraph page: {e}")
 
+        bump_catalog_version(db)
         db.commit()
         db.refresh(bot)
         return bot
@@ -484,7 +480,7 @@ async def update_bot(
 
 
 @router.delete("/{bot_id}")
-async def delete_bot(bot_id: int, db: Session = Depends(get_db)):
+def delete_bot(bot_id: int, db: Session = Depends(get_db)):
     """Удаление бота"""
     # Получаем бота из БД
     bot = db.query(Bot).filter(Bot.id == bot_id).first()
@@ -499,6 +495,7 @@ async def delete_bot(bot_id: int, db: Session = Depends(get_db)):
 
     # Удаляем бота из БД
     db.delete(bot)
+    bump_catalog_version(db)
     db.commit()
 
     # Удаляем директорию с файлами бота
@@ -511,7 +508,7 @@ async def delete_bot(bot_id: int, db: Session = Depends(get_db)):
 
 # Маршруты для медиафайлов бота
 @router.post("/{bot_id}/media")
-async def add_bot_media(
+def add_bot_media(
         bot_id: int,
         file_type: str = Form(...),  # photo или video
         media_file: UploadFile = File(...),
@@ -561,7 +558,7 @@ async def add_bot_media(
 
 
 @router.get("/{bot_id}/media")
-async def get_bot_media(bot_id: int, db: Session = Depends(get_db)):
+def get_bot_media(bot_id: int, db: Session = Depends(get_db)):
     """Получение списка медиафайлов бота"""
     # Проверяем существование бота
     bot = db.query(Bot).filter(Bot.id == bot_id).first()
@@ -587,7 +584,7 @@ async def get_bot_media(bot_id: int, db: Session = Depends(get_db)):
 
 
 @router.delete("/{bot_id}/media/{media_id}")
-async def delete_bot_media(bot_id: int, media_id: int, db: Session = Depends(get_db)):
+def delete_bot_media(bot_id: int, media_id: int, db: Session = Depends(get_db)):
     """Удаление медиафайла бота"""
     # Получаем медиафайл из БД
     media = db.query(BotMedia).filter(
@@ -621,7 +618,7 @@ async def bots_page(request: Request):
 
 
 @router.get("/page/create", response_class=templates.TemplateResponse)
-async def create_bot_page(request: Request, db: Session = Depends(get_db)):
+def create_bot_page(request: Request, db: Session = Depends(get_db)):
     """Страница создания нового бота"""
     # Получаем список категорий для выпадающего списка
     categories = db.query(BotCategory).all()
@@ -633,7 +630,7 @@ async def create_bot_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/page/{bot_id}/edit", response_class=templates.TemplateResponse)
-async def edit_bot_page(bot_id: int, request: Request, db: Session = Depends(get_db)):
+def edit_bot_page(bot_id: int, request: Request, db: Session = Depends(get_db)):
     """Страница редактирования бота"""
     # Получаем информацию о боте
     bot = db.query(Bot).filter(Bot.id == bot_id).first()
@@ -671,7 +668,7 @@ async def edit_bot_page(bot_id: int, request: Request, db: Session = Depends(get
 # admin/routers/bots.py
 
 @router.post("/{bot_id}/media/bulk", response_model=List[Dict])
-async def add_bot_media_bulk(
+def add_bot_media_bulk(
         bot_id: int,
         media_files: List[UploadFile] = File(...),
         db: Session = Depends(get_db)
@@ -736,7 +733,7 @@ async def add_bot_media_bulk(
 
 
 @router.put("/{bot_id}/media/{media_id}", response_model=Dict)
-async def update_bot_media(
+def update_bot_media(
         bot_id: int,
         media_id: int,
         file_type: str = Form(...),
@@ -777,7 +774,7 @@ async def update_bot_media(
 
 
 @router.post("/{bot_id}/media/reorder", response_model=Dict)
-async def reorder_bot_media(
+def reorder_bot_media(
         bot_id: int,
         order: List[int] = Body(..., embed=True),
         db: Session = Depends(get_db)
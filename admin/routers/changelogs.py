@@ -1,12 +1,13 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Query
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 from typing import List, Optional
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from admin.utils import serialize_model
+from admin.pagination import DateRange, KeysetPaginator, Page, PageParams
+from admin.serializers import CHANGELOGS
 from models.models import Changelog, Bot
 from database.db import get_db
 from sqlalchemy import desc
@@ -32,15 +33,30 @@ class ChangelogResponse(BaseModel):
     created_at: str
 
 
-@router.get("/", response_model=List[ChangelogResponse])
-async def get_changelogs(db: Session = Depends(get_db)):
-    """Получение списка всех ченжлогов"""
-    changelogs = db.query(Changelog).order_by(desc(Changelog.created_at)).all()
-    return [serialize_model(changelog) for changelog in changelogs]
+changelogs_paginator = KeysetPaginator(Changelog, {"created_at": Changelog.created_at, "id": Changelog.id})
+
+
+@router.get("/", response_model=Page[ChangelogResponse])
+def get_changelogs(
+        page: PageParams = Depends(),
+        dates: DateRange = Depends(),
+        bot_id: Optional[int] = Query(None, description="ID бота"),
+        is_notified: Optional[bool] = Query(None, description="Отправлено ли уведомление"),
+        db: Session = Depends(get_db)
+):
+    """Получение страницы списка ченжлогов (по умолчанию - сначала новые)"""
+    query = dates.apply(db.query(Changelog), Changelog.created_at)
+
+    if bot_id is not None:
+        query = query.filter(Changelog.bot_id == bot_id)
+    if is_notified is not None:
+        query = query.filter(Changelog.is_notified == is_notified)
+
+    return changelogs_paginator.paginate(db, CHANGELOGS.project(query), page, CHANGELOGS.row)
 
 
 @router.get("/bot/{bot_id}", response_model=List[ChangelogResponse])
-async def get_bot_changelogs(bot_id: int, db: Session = Depends(get_db)):
+def get_bot_changelogs(bot_id: int, db: Session = Depends(get_db)):
     """Получение списка ченжлогов для конкретного бота"""
     # Проверяем существование бота
     bot = db.query(Bot).filter(Bot.id == bot_id).first()
@@ -55,7 +71,7 @@ async def get_bot_changelogs(bot_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/", response_model=ChangelogResponse)
-async def create_changelog(
+def create_changelog(
         bot_id: int = Form(...),
         version: str = Form(...),
         description: str = Form(...),
@@ -85,7 +101,7 @@ async def create_changelog(
 
 
 @router.put("/{changelog_id}/notify")
-async def mark_as_notified(changelog_id: int, db: Session = Depends(get_db)):
+def mark_as_notified(changelog_id: int, db: Session = Depends(get_db)):
     """Отметить ченжлог как отправленный"""
     # Получаем ченжлог из БД
     changelog = db.query(Changelog).filter(Changelog.id == changelog_id).first()
@@ -103,7 +119,7 @@ async def mark_as_notified(changelog_id: int, db: Session = Depends(get_db)):
 
 
 @router.delete("/{changelog_id}")
-async def delete_changelog(changelog_id: int, db: Session = Depends(get_db)):
+def delete_changelog(changelog_id: int, db: Session = Depends(get_db)):
     """Удаление ченжлога"""
     # Получаем ченжлог из БД
     changelog = db.query(Changelog).filter(Changelog.id == changelog_id).first()
@@ -122,7 +138,7 @@ async def delete_changelog(changelog_id: int, db: Session = Depends(get_db)):
 
 # Страницы админки для управления ченжлогами
 @router.get("/page", response_class=templates.TemplateResponse)
-async def changelogs_page(request: Request, db: Session = Depends(get_db)):
+def changelogs_page(request: Request, db: Session = Depends(get_db)):
     """Страница с ченжлогами"""
     # Получаем список ботов для выпадающего списка
     bots = db.query(Bot).all()
@@ -134,7 +150,7 @@ async def changelogs_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/page/{bot_id}", response_class=templates.TemplateResponse)
-async def bot_changelogs_page(bot_id: int, request: Request, db: Session = Depends(get_db)):
+def bot_changelogs_page(bot_id: int, request: Request, db: Session = Depends(get_db)):
     """Страница с ченжлогами конкретного бота"""
     # Получаем бота из БД
     bot = db.query(Bot).filter(Bot.id == bot_id).first()
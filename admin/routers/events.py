@@ -0,0 +1,48 @@
+# admin/routers/events.py
+from typing import AsyncIterator
+
+import orjson
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+from config.settings import EVENTS_HEARTBEAT_INTERVAL
+from services.events import Event, event_bus
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Через сколько миллисекунд браузер переподключается после обрыва потока
+RECONNECT_DELAY_MS = 5000
+
+
+def format_event(item: Event) -> bytes:
+    """Сообщение в формате Server-Sent Events"""
+    return b"id: %d\nevent: %s\ndata: %s\n\n" % (item.id, item.type.encode(), orjson.dumps(item.data))
+
+
+async def event_stream(request: Request, heartbeat: float = EVENTS_HEARTBEAT_INTERVAL) -> AsyncIterator[bytes]:
+    subscription = event_bus.subscribe()
+    try:
+        yield b"retry: %d\n\n" % RECONNECT_DELAY_MS
+        while not await request.is_disconnected():
+            item = await subscription.get(timeout=heartbeat)
+            if item is None:
+                yield b"event: heartbeat\ndata: {}\n\n"
+            else:
+                yield format_event(item)
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+@router.get("/")
+async def stream_events(request: Request):
+    """
+    Поток событий админ-панели (text/event-stream): order_created, order_paid,
+    bug_report_created, review_created, message_received и heartbeat.
+    """
+    return StreamingResponse(
+        event_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
@@ -408,7 +408,7 @@ async def send_document_message(
 
 
 @router.get("/message-history/{user_id}")
-async def get_message_history(
+def get_message_history(
         user_id: int,
         limit: int = 50,
         db: Session = Depends(get_db)
@@ -458,7 +458,7 @@ async def get_message_history(
 
 
 @router.get("/page/{user_id}")
-async def message_page(
+def message_page(
         user_id: int,
         request: Request,
         db: Session = Depends(get_db)
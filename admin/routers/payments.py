@@ -1,15 +1,19 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
-from typing import List, Optional
+from typing import Optional
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from datetime import datetime
 
-from admin.utils import serialize_model
+from admin.export import ExportParams, export_response
+from admin.pagination import DateRange, KeysetPaginator, Page, PageParams, bad_request
+from admin.serializers import ORDERS
 from models.models import Order, User, Bot, OrderStatus
 from database.db import get_db, execute_with_retry, logger
-from sqlalchemy import func, desc
+from sqlalchemy import desc
+from services import rollups
 
 router = APIRouter()
 
@@ -37,26 +41,79 @@ class PaymentStats(BaseModel):
     cancelled_orders: int
 
 
-@router.get("/", response_model=List[OrderResponse])
-async def get_orders(db: Session = Depends(get_db)):
-    """Получение списка всех заказов"""
-    orders = db.query(Order).all()
-    return [serialize_model(order) for order in orders]
+class OrderFilters:
+    """Фильтры списка и выгрузки заказов (зависимость FastAPI)"""
+
+    def __init__(
+            self,
+            dates: DateRange = Depends(),
+            order_status: Optional[str] = Query(None, alias="status", description="pending, paid или cancelled"),
+            bot_id: Optional[int] = Query(None, description="ID бота"),
+            user_id: Optional[int] = Query(None, description="ID пользователя"),
+            payment_system: Optional[str] = Query(None, description="Платежная система")
+    ):
+        self.dates = dates
+        self.order_status = order_status
+        self.bot_id = bot_id
+        self.user_id = user_id
+        self.payment_system = payment_system
+
+    def query(self, db: Session):
+        """Запрос заказов с примененными фильтрами"""
+        query = self.dates.apply(db.query(Order), Order.created_at)
+
+        if self.order_status:
+            try:
+                query = query.filter(Order.status == OrderStatus(self.order_status))
+            except ValueError:
+                raise bad_request(f"Invalid status. Must be one of: {', '.join([s.value for s in OrderStatus])}")
+        if self.bot_id is not None:
+            query = query.filter(Order.bot_id == self.bot_id)
+        if self.user_id is not None:
+            query = query.filter(Order.user_id == self.user_id)
+        if self.payment_system:
+            query = query.filter(Order.payment_system == self.payment_system)
+        return query
+
+
+orders_paginator = KeysetPaginator(Order, {"created_at": Order.created_at, "amount": Order.amount, "id": Order.id})
+
+
+@router.get("/", response_model=Page[OrderResponse])
+def get_orders(
+        page: PageParams = Depends(),
+        filters: OrderFilters = Depends(),
+        db: Session = Depends(get_db)
+):
+    """Получение страницы списка заказов"""
+    return orders_paginator.paginate(db, ORDERS.project(filters.query(db)), page, ORDERS.row)
+
+
+@router.get("/export")
+def export_orders(
+        params: ExportParams = Depends(),
+        filters: OrderFilters = Depends(),
+        db: Session = Depends(get_db)
+):
+    """Потоковая выгрузка заказов в CSV или NDJSON (с фильтрами списка)"""
+    return export_response(db, filters.query(db), ORDERS, params, "orders")
 
 
 @router.get("/stats", response_model=PaymentStats)
-async def get_payment_stats(db: Session = Depends(get_db)):
+def get_payment_stats(db: Session = Depends(get_db)):
     """Получение статистики платежей"""
-    # Получаем общую сумму продаж
-    total_sales = db.query(func.sum(Order.amount)).filter(
-        Order.status == OrderStatus.PAID
-    ).scalar() or 0
-
-    # Получаем количество заказов
-    total_orders = db.query(Order).count()
-    paid_orders = db.query(Order).filter(Order.status == OrderStatus.PAID).count()
-    pending_orders = db.query(Order).filter(Order.status == OrderStatus.PENDING).count()
-    cancelled_orders = db.query(Order).filter(Order.status == OrderStatus.CANCELLED).count()
+    # Количество и сумма заказов по статусам за все время (из дневных сводок)
+    by_status = {
+        key[0]: values
+        for key, values in rollups.aggregate(db, rollups.ORDERS, None, datetime.utcnow(), group_by=["status"]).items()
+    }
+    empty = {"orders": 0, "amount": 0}
+
+    total_sales = by_status.get(OrderStatus.PAID, empty)["amount"]
+    total_orders = sum(values["orders"] for values in by_status.values())
+    paid_orders = by_status.get(OrderStatus.PAID, empty)["orders"]
+    pending_orders = by_status.get(OrderStatus.PENDING, empty)["orders"]
+    cancelled_orders = by_status.get(OrderStatus.CANCELLED, empty)["orders"]
 
     return PaymentStats(
         total_sales=float(total_sales),
@@ -68,7 +125,7 @@ async def get_payment_stats(db: Session = Depends(get_db)):
 
 
 @router.get("/latest")
-async def get_latest_orders(limit: int = 5, db: Session = Depends(get_db)):
+def get_latest_orders(limit: int = 5, db: Session = Depends(get_db)):
     """Получение последних заказов"""
     try:
         # Обертываем запрос в функцию retry
@@ -102,7 +159,7 @@ async def get_latest_orders(limit: int = 5, db: Session = Depends(get_db)):
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
-async def get_order(order_id: int, db: Session = Depends(get_db)):
+def get_order(order_id: int, db: Session = Depends(get_db)):
     """Получение информации о конкретном заказе"""
     order = db.query(Order).filter(Order.id == order_id).first()
     if not order:
@@ -114,7 +171,7 @@ async def get_order(order_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{order_id}/status")
-async def update_order_status(
+def update_order_status(
         order_id: int,
         status: str,
         db: Session = Depends(get_db)
@@ -152,7 +209,7 @@ async def payments_page(request: Request):
 
 
 @router.get("/page/{order_id}", response_class=templates.TemplateResponse)
-async def order_detail_page(order_id: int, request: Request, db: Session = Depends(get_db)):
+def order_detail_page(order_id: int, request: Request, db: Session = Depends(get_db)):
     """Страница с детальной информацией о заказе"""
     # Получаем информацию о заказе
     order = db.query(Order).filter(Order.id == order_id).first()
@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Body, Query
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import RedirectResponse
 from pathlib import Path
-from typing import List, Optional
+from typing import Optional
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from admin.utils import serialize_model
+from admin.export import ExportParams, export_response
+from admin.pagination import DateRange, KeysetPaginator, Page, PageParams
+from admin.serializers import BUG_REPORTS
 from models.models import BugReport, BugReportMedia, User, Bot
 from database.db import get_db, logger, execute_with_retry
 from sqlalchemy import desc, func
@@ -28,22 +30,66 @@ class BugReportResponse(BaseModel):
     updated_at: str
 
 
-@router.get("/", response_model=List[BugReportResponse])
-async def get_bug_reports(db: Session = Depends(get_db)):
-    """Получение списка всех баг-репортов"""
-    reports = db.query(BugReport).all()
-    return [serialize_model(report) for report in reports]
+class BugReportFilters:
+    """Фильтры списка и выгрузки баг-репортов (зависимость FastAPI)"""
+
+    def __init__(
+            self,
+            dates: DateRange = Depends(),
+            report_status: Optional[str] = Query(None, alias="status", description="new, in_progress или resolved"),
+            bot_id: Optional[int] = Query(None, description="ID бота"),
+            user_id: Optional[int] = Query(None, description="ID пользователя")
+    ):
+        self.dates = dates
+        self.report_status = report_status
+        self.bot_id = bot_id
+        self.user_id = user_id
+
+    def query(self, db: Session):
+        """Запрос баг-репортов с примененными фильтрами"""
+        query = self.dates.apply(db.query(BugReport), BugReport.created_at)
+
+        if self.report_status:
+            query = query.filter(BugReport.status == self.report_status)
+        if self.bot_id is not None:
+            query = query.filter(BugReport.bot_id == self.bot_id)
+        if self.user_id is not None:
+            query = query.filter(BugReport.user_id == self.user_id)
+        return query
+
+
+reports_paginator = KeysetPaginator(BugReport, {"created_at": BugReport.created_at, "id": BugReport.id})
+
+
+@router.get("/", response_model=Page[BugReportResponse])
+def get_bug_reports(
+        page: PageParams = Depends(),
+        filters: BugReportFilters = Depends(),
+        db: Session = Depends(get_db)
+):
+    """Получение страницы списка баг-репортов"""
+    return reports_paginator.paginate(db, BUG_REPORTS.project(filters.query(db)), page, BUG_REPORTS.row)
+
+
+@router.get("/export")
+def export_bug_reports(
+        params: ExportParams = Depends(),
+        filters: BugReportFilters = Depends(),
+        db: Session = Depends(get_db)
+):
+    """Потоковая выгрузка баг-репортов в CSV или NDJSON (с фильтрами списка)"""
+    return export_response(db, filters.query(db), BUG_REPORTS, params, "bug_reports")
 
 
 @router.get("/count")
-async def get_reports_count(db: Session = Depends(get_db)):
+def get_reports_count(db: Session = Depends(get_db)):
     """Получение количества баг-репортов"""
     count = db.query(BugReport).count()
     return {"count": count}
 
 
 @router.get("/latest")
-async def get_latest_reports(limit: int = 5, db: Session = Depends(get_db)):
+def get_latest_reports(limit: int = 5, db: Session = Depends(get_db)):
     """Получение последних баг-репортов"""
     try:
         # Обертываем запрос в функцию retry
@@ -76,7 +122,7 @@ async def get_latest_reports(limit: int = 5, db: Session = Depends(get_db)):
 
 
 @router.get("/{report_id}", response_model=BugReportResponse)
-async def get_bug_report(report_id: int, db: Session = Depends(get_db)):
+def get_bug_report(report_id: int, db: Session = Depends(get_db)):
     """Получение информации о конкретном баг-репорте"""
     report = db.query(BugReport).filter(BugReport.id == report_id).first()
     if not report:
@@ -88,7 +134,7 @@ async def get_bug_report(report_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{report_id}/media")
-async def get_bug_report_media(report_id: int, db: Session = Depends(get_db)):
+def get_bug_report_media(report_id: int, db: Session = Depends(get_db)):
     """Получение медиафайлов баг-репорта"""
     # Проверяем существование баг-репорта
     report = db.query(BugReport).filter(BugReport.id == report_id).first()
@@ -113,7 +159,7 @@ async def get_bug_report_media(report_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{report_id}/status")
-async def update_report_status(
+def update_report_status(
         report_id: int,
         status: str = Form(...),
         db: Session = Depends(get_db)
@@ -149,7 +195,7 @@ async def reports_page(request: Request):
 
 
 @router.get("/page/{report_id}", response_class=templates.TemplateResponse)
-async def report_detail_page(report_id: int, request: Request, db: Session = Depends(get_db)):
+def report_detail_page(report_id: int, request: Request, db: Session = Depends(get_db)):
     """Страница с детальной информацией о баг-репорте"""
     # Получаем информацию о баг-репорте
     report = db.query(BugReport).filter(BugReport.id == report_id).first()
@@ -290,7 +336,7 @@ async def resolve_bug_report(
 
 
 @router.get("/stats")
-async def get_bug_reports_stats(db: Session = Depends(get_db)):
+def get_bug_reports_stats(db: Session = Depends(get_db)):
     """Получение статистики по баг-репортам"""
     # Общее количество баг-репортов
     total_count = db.query(BugReport).count()
@@ -3,8 +3,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from database.db import get_db
-from models.models import User, Order, Bot, Review, BugReport, OrderStatus
-from sqlalchemy import func, desc, and_
+from models.models import User, Order, OrderItem, Bot, OrderStatus
+from services import rollups
+from services.timeseries import GRANULARITIES
+from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import logging
@@ -12,129 +14,144 @@ import logging
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Интервал графика по умолчанию для каждого периода (None - без графика)
+DEFAULT_GRANULARITY = {
+    "day": "day",
+    "week": "day",
+    "month": "day",
+    "year": "month",
+    "all": None,
+}
+
+
+def resolve_range(period: str, start: Optional[datetime], end: Optional[datetime], granularity: Optional[str]):
+    """
+    Определяет диапазон дат и интервал графика.
+
+    Args:
+        period (str): Период: day, week, month, year, all
+        start (Optional[datetime]): Явное начало диапазона (заменяет period)
+        end (Optional[datetime]): Конец диапазона, по умолчанию - текущее время
+        granularity (Optional[str]): Интервал графика: hour, day, week, month
+
+    Returns:
+        tuple: Начало диапазона (или None), конец диапазона и интервал графика (или None)
+    """
+    if granularity is not None and granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown granularity: {granularity}. Use one of: {', '.join(GRANULARITIES)}"
+        )
 
-@router.get("/dashboard")
-async def get_dashboard_stats(
-        period: str = Query("month", description="Период для статистики: day, week, month, year, all"),
-        db: Session = Depends(get_db)
-):
-    """Получение общей статистики для дашборда"""
-    try:
-        # Определяем начальную дату для выборки
-        now = datetime.utcnow()
-        start_date = None
+    end = end or datetime.utcnow()
+    start_date = start
 
+    if start_date is None:
         if period == "day":
-            start_date = now - timedelta(days=1)
+            start_date = end - timedelta(days=1)
         elif period == "week":
-            start_date = now - timedelta(weeks=1)
+            start_date = end - timedelta(weeks=1)
         elif period == "month":
-            start_date = now - timedelta(days=30)
+            start_date = end - timedelta(days=30)
         elif period == "year":
-            start_date = now - timedelta(days=365)
+            start_date = end - timedelta(days=365)
 
-        # Общее количество пользователей
-        total_users = db.query(User).count()
+    if start_date is not None and start_date > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
 
-        # Количество новых пользователей за период
-        new_users = db.query(User).filter(
-            User.created_at >= start_date if start_date else True
-        ).count()
+    if granularity is None:
+        # Для явного диапазона график по дням, иначе - интервал по умолчанию для периода
+        granularity = "day" if start is not None else DEFAULT_GRANULARITY.get(period)
 
-        # Количество заказов и сумма продаж
-        orders_query = db.query(Order)
-        if start_date:
-            orders_query = orders_query.filter(Order.created_at >= start_date)
+    return start_date, end, granularity
 
-        total_orders = orders_query.count()
 
-        paid_orders_query = orders_query.filter(Order.status == OrderStatus.PAID)
-        paid_orders = paid_orders_query.count()
+def range_filter(column, start_date: Optional[datetime], end: datetime) -> list:
+    """Условия WHERE для диапазона дат"""
+    conditions = [column <= end]
+    if start_date is not None:
+        conditions.append(column >= start_date)
+    return conditions
 
-        total_sales = db.query(func.sum(Order.amount)).filter(
-            Order.status == OrderStatus.PAID,
-            Order.created_at >= start_date if start_date else True
-        ).scalar() or 0
+
+def build_series(db: Session, source: rollups.RollupSource, granularity: Optional[str], start_date: Optional[datetime],
+                 end: datetime, where: Optional[Dict] = None) -> List[Dict]:
+    """Строит данные графика по дневным сводкам или возвращает пустой список, если график не нужен"""
+    if granularity is None:
+        return []
+    try:
+        return rollups.series(db, source, granularity, start_date, end, where)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def orders_by_status(db: Session, start_date: Optional[datetime], end: datetime) -> Dict[OrderStatus, Dict]:
+    """Количество и сумма заказов за период по статусам (из дневных сводок)"""
+    return {
+        key[0]: values
+        for key, values in rollups.aggregate(db, rollups.ORDERS, start_date, end, group_by=["status"]).items()
+    }
+
+
+def get_top_bots(db: Session, start_date: Optional[datetime], end: datetime, limit: int) -> List[Dict]:
+    """Боты с наибольшим количеством оплаченных заказов за период (по позициям заказов)"""
+    order_count = func.count(func.distinct(OrderItem.order_id))
+    rows = (db.query(Bot.id, Bot.name, order_count, func.sum(OrderItem.quantity), func.sum(OrderItem.amount))
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(Bot, Bot.id == OrderItem.bot_id)
+            .filter(Order.status == OrderStatus.PAID, *range_filter(Order.created_at, start_date, end))
+            .group_by(Bot.id, Bot.name)
+            .order_by(order_count.desc(), Bot.id)
+            .limit(limit).all())
+    return [
+        {"id": bot_id, "name": name, "order_count": orders, "quantity": int(quantity), "total_amount": float(amount)}
+        for bot_id, name, orders, quantity, amount in rows
+    ]
+
+
+@router.get("/dashboard")
+def get_dashboard_stats(
+        period: str = Query("month", description="Период для статистики: day, week, month, year, all"),
+        start: Optional[datetime] = Query(None, description="Начало диапазона (заменяет period)"),
+        end: Optional[datetime] = Query(None, description="Конец диапазона, по умолчанию - текущее время"),
+        granularity: Optional[str] = Query(None, description="Интервал графика: hour, day, week, month"),
+        db: Session = Depends(get_db)
+):
+    """Получение общей статистики для дашборда"""
+    start_date, end, granularity = resolve_range(period, start, end, granularity)
+    try:
+        # Общее количество пользователей и новые пользователи за период
+        total_users = rollups.totals(db, rollups.USERS, None, end)["registrations"]
+        new_users = rollups.totals(db, rollups.USERS, start_date, end)["registrations"]
+
+        # Количество заказов, оплаченных заказов и сумма продаж
+        by_status = orders_by_status(db, start_date, end)
+        total_orders = sum(values["orders"] for values in by_status.values())
+        paid = by_status.get(OrderStatus.PAID, {"orders": 0, "amount": 0})
+        paid_orders, total_sales = paid["orders"], paid["amount"]
 
         # Конверсия (% оплаченных заказов)
         conversion_rate = (paid_orders / total_orders * 100) if total_orders > 0 else 0
 
         # Популярные боты
-        popular_bots = db.query(
-            Bot.id,
-            Bot.name,
-            func.count(Order.id).label('order_count')
-        ).join(
-            Order, Bot.id == Order.bot_id
-        ).filter(
-            Order.status == OrderStatus.PAID,
-            Order.created_at >= start_date if start_date else True
-        ).group_by(
-            Bot.id, Bot.name
-        ).order_by(
-            desc('order_count')
-        ).limit(5).all()
-
         top_bots = [
-            {
-                "id": bot_id,
-                "name": bot_name,
-                "order_count": count
-            }
-            for bot_id, bot_name, count in popular_bots
+            {"id": bot["id"], "name": bot["name"], "order_count": bot["order_count"]}
+            for bot in get_top_bots(db, start_date, end, 5)
         ]
 
-        # Средняя оценка ботов
-        avg_rating = db.query(func.avg(Review.rating)).scalar() or 0
-
-        # Количество баг-репортов
-        bug_reports_count = db.query(BugReport).filter(
-            BugReport.created_at >= start_date if start_date else True
-        ).count()
-
-        # Данные для графика продаж по дням
-        sales_data = []
-
-        if period in ["day", "week", "month"]:
-            # Группировка по дням
-            days = 1 if period == "day" else (7 if period == "week" else 30)
-            for i in range(days):
-                day_date = now - timedelta(days=days - i - 1)
-                day_start = datetime(day_date.year, day_date.month, day_date.day)
-                day_end = day_start + timedelta(days=1)
-
-                day_sales = db.query(func.sum(Order.amount)).filter(
-                    Order.status == OrderStatus.PAID,
-                    Order.created_at >= day_start,
-                    Order.created_at < day_end
-                ).scalar() or 0
-
-                sales_data.append({
-                    "date": day_start.strftime("%Y-%m-%d"),
-                    "sales": float(day_sales)
-                })
-        elif period == "year":
-            # Группировка по месяцам
-            for i in range(12):
-                month_date = (now.replace(day=1) - timedelta(days=1)).replace(day=1)
-                month_date = month_date.replace(month=((month_date.month - i - 1) % 12 + 1))
-                if month_date.month > now.month:
-                    month_date = month_date.replace(year=now.year - 1)
-
-                next_month = month_date.replace(month=month_date.month % 12 + 1)
-                if next_month.month == 1:
-                    next_month = next_month.replace(year=month_date.year + 1)
-
-                month_sales = db.query(func.sum(Order.amount)).filter(
-                    Order.status == OrderStatus.PAID,
-                    Order.created_at >= month_date,
-                    Order.created_at < next_month
-                ).scalar() or 0
-
-                sales_data.append({
-                    "date": month_date.strftime("%Y-%m"),
-                    "sales": float(month_sales)
-                })
+        # Средняя оценка ботов за период
+        reviews = rollups.totals(db, rollups.REVIEWS, start_date, end)
+        avg_rating = reviews["rating_sum"] / reviews["reviews"] if reviews["reviews"] else 0
+
+        # Количество баг-репортов за период
+        bug_reports_count = rollups.totals(db, rollups.BUG_REPORTS, start_date, end)["reports"]
+
+        # Данные для графика продаж
+        sales_data = [
+            {"date": point["date"], "sales": float(point["amount"])}
+            for point in build_series(db, rollups.ORDERS, granularity, start_date, end, {"status": OrderStatus.PAID})
+        ]
 
         return {
             "total_users": total_users,
@@ -148,6 +165,8 @@ async def get_dashboard_stats(
             "bug_reports_count": bug_reports_count,
             "sales_data": sales_data
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting dashboard stats: {e}")
         raise HTTPException(
@@ -157,32 +176,19 @@ async def get_dashboard_stats(
 
 
 @router.get("/users")
-async def get_users_stats(
+def get_users_stats(
         period: str = Query("month", description="Период для статистики: day, week, month, year, all"),
+        start: Optional[datetime] = Query(None, description="Начало диапазона (заменяет period)"),
+        end: Optional[datetime] = Query(None, description="Конец диапазона, по умолчанию - текущее время"),
+        granularity: Optional[str] = Query(None, description="Интервал графика: hour, day, week, month"),
         db: Session = Depends(get_db)
 ):
     """Получение статистики по пользователям"""
+    start_date, end, granularity = resolve_range(period, start, end, granularity)
     try:
-        # Определяем начальную дату для выборки
-        now = datetime.utcnow()
-        start_date = None
-
-        if period == "day":
-            start_date = now - timedelta(days=1)
-        elif period == "week":
-            start_date = now - timedelta(weeks=1)
-        elif period == "month":
-            start_date = now - timedelta(days=30)
-        elif period == "year":
-            start_date = now - timedelta(days=365)
-
-        # Общее количество пользователей
-        total_users = db.query(User).count()
-
-        # Количество новых пользователей за период
-        new_users = db.query(User).filter(
-            User.created_at >= start_date if start_date else True
-        ).count()
+        # Общее количество пользователей и новые пользователи за период
+        total_users = rollups.totals(db, rollups.USERS, None, end)["registrations"]
+        new_users = rollups.totals(db, rollups.USERS, start_date, end)["registrations"]
 
         # Распределение пользователей по языкам
         language_stats = db.query(
@@ -201,55 +207,18 @@ async def get_users_stats(
             for lang, count in language_stats
         ]
 
-        # Пользователи с заказами
-        users_with_orders = db.query(User.id).join(Order).distinct().count()
-
-        # Активные пользователи (пользователи, у которых есть заказы за период)
-        active_users = db.query(User.id).join(Order).filter(
-            Order.created_at >= start_date if start_date else True
-        ).distinct().count()
-
-        # Данные для графика регистраций по дням
-        registrations_data = []
-
-        if period in ["day", "week", "month"]:
-            # Группировка по дням
-            days = 1 if period == "day" else (7 if period == "week" else 30)
-            for i in range(days):
-                day_date = now - timedelta(days=days - i - 1)
-                day_start = datetime(day_date.year, day_date.month, day_date.day)
-                day_end = day_start + timedelta(days=1)
-
-                day_registrations = db.query(User).filter(
-                    User.created_at >= day_start,
-                    User.created_at < day_end
-                ).count()
-
-                registrations_data.append({
-                    "date": day_start.strftime("%Y-%m-%d"),
-                    "registrations": day_registrations
-                })
-        elif period == "year":
-            # Группировка по месяцам
-            for i in range(12):
-                month_date = (now.replace(day=1) - timedelta(days=1)).replace(day=1)
-                month_date = month_date.replace(month=((month_date.month - i - 1) % 12 + 1))
-                if month_date.month > now.month:
-                    month_date = month_date.replace(year=now.year - 1)
-
-                next_month = month_date.replace(month=month_date.month % 12 + 1)
-                if next_month.month == 1:
-                    next_month = next_month.replace(year=month_date.year + 1)
-
-                month_registrations = db.query(User).filter(
-                    User.created_at >= month_date,
-                    User.created_at < next_month
-                ).count()
-
-                registrations_data.append({
-                    "date": month_date.strftime("%Y-%m"),
-                    "registrations": month_registrations
-                })
+        # Пользователи с заказами и активные пользователи (с заказами за период) одним запросом
+        in_range = range_filter(Order.created_at, start_date, end)
+        users_with_orders, active_users = db.query(
+            func.count(func.distinct(Order.user_id)),
+            func.count(func.distinct(case((and_(*in_range), Order.user_id))))
+        ).one()
+
+        # Данные для графика регистраций
+        registrations_data = [
+            {"date": point["date"], "registrations": point["registrations"]}
+            for point in build_series(db, rollups.USERS, granularity, start_date, end)
+        ]
 
         return {
             "total_users": total_users,
@@ -259,6 +228,8 @@ async def get_users_stats(
             "languages": languages,
             "registrations_data": registrations_data
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting users stats: {e}")
         raise HTTPException(
@@ -268,52 +239,26 @@ async def get_users_stats(
 
 
 @router.get("/sales")
-async def get_sales_stats(
+def get_sales_stats(
         period: str = Query("month", description="Период для статистики: day, week, month, year, all"),
+        start: Optional[datetime] = Query(None, description="Начало диапазона (заменяет period)"),
+        end: Optional[datetime] = Query(None, description="Конец диапазона, по умолчанию - текущее время"),
+        granularity: Optional[str] = Query(None, description="Интервал графика: hour, day, week, month"),
         db: Session = Depends(get_db)
 ):
     """Получение статистики по продажам"""
+    start_date, end, granularity = resolve_range(period, start, end, granularity)
     try:
-        # Определяем начальную дату для выборки
-        now = datetime.utcnow()
-        start_date = None
-
-        if period == "day":
-            start_date = now - timedelta(days=1)
-        elif period == "week":
-            start_date = now - timedelta(weeks=1)
-        elif period == "month":
-            start_date = now - timedelta(days=30)
-        elif period == "year":
-            start_date = now - timedelta(days=365)
-
-        # Фильтр по дате
-        date_filter = Order.created_at >= start_date if start_date else True
-
-        # Общее количество заказов
-        total_orders = db.query(Order).filter(date_filter).count()
-
-        # Количество заказов по статусам
-        paid_orders = db.query(Order).filter(
-            date_filter,
-            Order.status == OrderStatus.PAID
-        ).count()
-
-        pending_orders = db.query(Order).filter(
-            date_filter,
-            Order.status == OrderStatus.PENDING
-        ).count()
-
-        cancelled_orders = db.query(Order).filter(
-            date_filter,
-            Order.status == OrderStatus.CANCELLED
-        ).count()
+        # Количество заказов и сумма по статусам
+        by_status = {
+            order_status: (values["orders"], values["amount"])
+            for order_status, values in orders_by_status(db, start_date, end).items()
+        }
 
-        # Общая сумма продаж
-        total_sales = db.query(func.sum(Order.amount)).filter(
-            date_filter,
-            Order.status == OrderStatus.PAID
-        ).scalar() or 0
+        total_orders = sum(count for count, _ in by_status.values())
+        paid_orders, total_sales = by_status.get(OrderStatus.PAID, (0, 0))
+        pending_orders = by_status.get(OrderStatus.PENDING, (0, 0))[0]
+        cancelled_orders = by_status.get(OrderStatus.CANCELLED, (0, 0))[0]
 
         # Средний чек
         avg_order_value = total_sales / paid_orders if paid_orders > 0 else 0
@@ -322,112 +267,28 @@ async def get_sales_stats(
         conversion_rate = (paid_orders / total_orders * 100) if total_orders > 0 else 0
 
         # Популярные боты
-        popular_bots = db.query(
-            Bot.id,
-            Bot.name,
-            func.count(Order.id).label('order_count'),
-            func.sum(Order.amount).label('total_amount')
-        ).join(
-            Order, Bot.id == Order.bot_id
-        ).filter(
-            date_filter,
-            Order.status == OrderStatus.PAID
-        ).group_by(
-            Bot.id, Bot.name
-        ).order_by(
-            desc('order_count')
-        ).limit(10).all()
-
-        top_bots = [
-            {
-                "id": bot_id,
-                "name": bot_name,
-                "order_count": count,
-                "total_amount": float(amount)
-            }
-            for bot_id, bot_name, count, amount in popular_bots
-        ]
+        top_bots = get_top_bots(db, start_date, end, 10)
 
         # Статистика по платежным системам
-        payment_systems = db.query(
-            Order.payment_system,
-            func.count(Order.id).label('order_count'),
-            func.sum(Order.amount).label('total_amount')
-        ).filter(
-            date_filter,
-            Order.status == OrderStatus.PAID,
-            Order.payment_system != None
-        ).group_by(
-            Order.payment_system
-        ).all()
+        payment_systems = rollups.aggregate(db, rollups.ORDERS, start_date, end, group_by=["payment_system"],
+                                            where={"status": OrderStatus.PAID})
 
         payment_stats = [
             {
-                "payment_system": payment_system or "unknown",
-                "order_count": count,
-                "total_amount": float(amount),
-                "percentage": (count / paid_orders * 100) if paid_orders > 0 else 0
+                "payment_system": payment_system,
+                "order_count": values["orders"],
+                "total_amount": float(values["amount"]),
+                "percentage": (values["orders"] / paid_orders * 100) if paid_orders > 0 else 0
             }
-            for payment_system, count, amount in payment_systems
+            for (payment_system,), values in payment_systems.items()
+            if payment_system and values["orders"] > 0
         ]
 
-        # Данные для графика продаж по дням/месяцам
-        sales_data = []
-
-        if period in ["day", "week", "month"]:
-            # Группировка по дням
-            days = 1 if period == "day" else (7 if period == "week" else 30)
-            for i in range(days):
-                day_date = now - timedelta(days=days - i - 1)
-                day_start = datetime(day_date.year, day_date.month, day_date.day)
-                day_end = day_start + timedelta(days=1)
-
-                day_sales = db.query(func.sum(Order.amount)).filter(
-                    Order.status == OrderStatus.PAID,
-                    Order.created_at >= day_start,
-                    Order.created_at < day_end
-                ).scalar() or 0
-
-                day_orders = db.query(Order).filter(
-                    Order.status == OrderStatus.PAID,
-                    Order.created_at >= day_start,
-                    Order.created_at < day_end
-                ).count()
-
-                sales_data.append({
-                    "date": day_start.strftime("%Y-%m-%d"),
-                    "sales": float(day_sales),
-                    "orders": day_orders
-                })
-        elif period == "year":
-            # Группировка по месяцам
-            for i in range(12):
-                month_date = (now.replace(day=1) - timedelta(days=1)).replace(day=1)
-                month_date = month_date.replace(month=((month_date.month - i - 1) % 12 + 1))
-                if month_date.month > now.month:
-                    month_date = month_date.replace(year=now.year - 1)
-
-                next_month = month_date.replace(month=month_date.month % 12 + 1)
-                if next_month.month == 1:
-                    next_month = next_month.replace(year=month_date.year + 1)
-
-                month_sales = db.query(func.sum(Order.amount)).filter(
-                    Order.status == OrderStatus.PAID,
-                    Order.created_at >= month_date,
-                    Order.created_at < next_month
-                ).scalar() or 0
-
-                month_orders = db.query(Order).filter(
-                    Order.status == OrderStatus.PAID,
-                    Order.created_at >= month_date,
-                    Order.created_at < next_month
-                ).count()
-
-                sales_data.append({
-                    "date": month_date.strftime("%Y-%m"),
-                    "sales": float(month_sales),
-                    "orders": month_orders
-                })
+        # Данные для графика продаж: сумма и количество оплаченных заказов
+        sales_data = [
+            {"date": point["date"], "sales": float(point["amount"]), "orders": point["orders"]}
+            for point in build_series(db, rollups.ORDERS, granularity, start_date, end, {"status": OrderStatus.PAID})
+        ]
 
         return {
             "total_orders": total_orders,
@@ -441,6 +302,8 @@ async def get_sales_stats(
             "payment_stats": payment_stats,
             "sales_data": sales_data
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting sales stats: {e}")
         raise HTTPException(
@@ -1,15 +1,17 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
-from typing import List, Optional
+from typing import Optional
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from admin.utils import serialize_model
-from models.models import User, Order, Review, BugReport
+from admin.export import ExportParams, export_response
+from admin.pagination import MAX_PAGE_SIZE, DateRange, KeysetPaginator, Page, PageParams, bad_request
+from admin.serializers import USERS
+from models.models import User, Bot, Order, OrderStatus, Review, BugReport
 from database.db import get_db
-from sqlalchemy import func
+from sqlalchemy import func, literal, or_, select, union_all
 
 router = APIRouter()
 
@@ -23,7 +25,7 @@ class UserResponse(BaseModel):
     username: Optional[str] = None
     first_name: Optional[str] = None
     last_name: Optional[str] = None
-    language: str
+    language: Optional[str] = None
     created_at: str
 
 
@@ -34,146 +36,254 @@ class UserStats(BaseModel):
     bug_reports_count: int
 
 
-@router.get("/", response_model=List[UserResponse])
-async def get_users(db: Session = Depends(get_db)):
-    """Получение списка всех пользователей"""
-    users = db.query(User).all()
-
-    # Используем serialize_model для правильной сериализации datetime полей
-    serialized_users = [serialize_model(user) for user in users]
-
-    return serialized_users
+class UserFilters:
+    """Фильтры списка и выгрузки пользователей (зависимость FastAPI)"""
+
+    def __init__(
+            self,
+            dates: DateRange = Depends(),
+            language: Optional[str] = Query(None, description="Язык пользователя"),
+            orders_filter: Optional[str] = Query(None, alias="status",
+                                                 description="with_orders - с заказами, no_orders - без заказов"),
+            search: Optional[str] = Query(None, description="Telegram ID или начало username/имени")
+    ):
+        self.dates = dates
+        self.language = language
+        self.orders_filter = orders_filter
+        self.search = search
+
+    def query(self, db: Session):
+        """Запрос пользователей с примененными фильтрами"""
+        query = self.dates.apply(db.query(User), User.created_at)
+
+        if self.language:
+            query = query.filter(User.language == self.language)
+
+        if self.orders_filter:
+            has_orders = db.query(Order.id).filter(Order.user_id == User.id).exists()
+            if self.orders_filter == "with_orders":
+                query = query.filter(has_orders)
+            elif self.orders_filter == "no_orders":
+                query = query.filter(~has_orders)
+            else:
+                raise bad_request("Unknown status. Use with_orders or no_orders")
+
+        if self.search:
+            search = self.search.strip().lstrip("@")
+            if search.isdigit():
+                query = query.filter(User.telegram_id == int(search))
+            else:
+                query = query.filter(or_(User.username.like(f"{search}%"), User.first_name.like(f"{search}%")))
+        return query
+
+
+users_paginator = KeysetPaginator(User, {"created_at": User.created_at, "id": User.id})
+
+
+@router.get("/", response_model=Page[UserResponse])
+def get_users(
+        page: PageParams = Depends(),
+        filters: UserFilters = Depends(),
+        db: Session = Depends(get_db)
+):
+    """Получение страницы списка пользователей"""
+    return users_paginator.paginate(db, USERS.project(filters.query(db)), page, USERS.row)
+
+
+@router.get("/export")
+def export_users(
+        params: ExportParams = Depends(),
+        filters: UserFilters = Depends(),
+        db: Session = Depends(get_db)
+):
+    """Потоковая выгрузка пользователей в CSV или NDJSON (с фильтрами списка)"""
+    return export_response(db, filters.query(db), USERS, params, "users")
 
 
 @router.get("/count")
-async def get_users_count(db: Session = Depends(get_db)):
+def get_users_count(db: Session = Depends(get_db)):
     """Получение количества пользователей"""
     count = db.query(User).count()
     return {"count": count}
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_db)):
     """Получение информации о конкретном пользователе"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = USERS.project(db.query(User)).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    # Используем serialize_model для преобразования datetime в строку
-    return serialize_model(user)
-
-
-@router.get("/{user_id}/stats", response_model=UserStats)
-async def get_user_stats(user_id: int, db: Session = Depends(get_db)):
-    """Получение статистики пользователя"""
-    # Проверяем существование пользователя
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    return USERS.row(user)
+
+
+def user_totals(user_id: int):
+    """
+    Один сгруппированный подзапрос со статистикой пользователя: заказы, отзывы и баг-репорты
+    объединяются в одну выборку (UNION ALL) и суммируются.
+    """
+    activity = union_all(
+        select(Order.user_id.label("user_id"), literal(1).label("orders"), Order.amount.label("spent"),
+               literal(0).label("reviews"), literal(0).label("bug_reports")).where(Order.user_id == user_id),
+        select(Review.user_id, literal(0), literal(0.0), literal(1), literal(0)).where(Review.user_id == user_id),
+        select(BugReport.user_id, literal(0), literal(0.0), literal(0), literal(1)).where(BugReport.user_id == user_id),
+    ).subquery()
+    return select(
+        activity.c.user_id,
+        func.sum(activity.c.orders).label("total_orders"),
+        func.sum(activity.c.spent).label("total_spent"),
+        func.sum(activity.c.reviews).label("reviews_count"),
+        func.sum(activity.c.bug_reports).label("bug_reports_count"),
+    ).group_by(activity.c.user_id).subquery()
+
+
+def load_user_summary(db: Session, user_id: int):
+    """Пользователь и его статистика одним запросом (404, если пользователя нет)"""
+    totals = user_totals(user_id)
+    row = (USERS.project(db.query(User))
+           .add_columns(totals.c.total_orders, totals.c.total_spent, totals.c.reviews_count, totals.c.bug_reports_count)
+           .outerjoin(totals, totals.c.user_id == User.id)
+           .filter(User.id == user_id).first())
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    # Получаем статистику заказов
-    total_orders = db.query(Order).filter(Order.user_id == user_id).count()
-    total_spent = db.query(func.sum(Order.amount)).filter(Order.user_id == user_id).scalar() or 0
-
-    # Получаем количество отзывов
-    reviews_count = db.query(Review).filter(Review.user_id == user_id).count()
+    stats = UserStats(
+        total_orders=row.total_orders or 0,
+        total_spent=float(row.total_spent or 0),
+        reviews_count=row.reviews_count or 0,
+        bug_reports_count=row.bug_reports_count or 0
+    )
+    return USERS.row(row), stats
+
+
+# Последние заказы, отзывы и баг-репорты пользователя (название бота - в том же запросе)
+orders_paginator = KeysetPaginator(Order, {"created_at": Order.created_at})
+reviews_paginator = KeysetPaginator(Review, {"created_at": Review.created_at})
+bug_reports_paginator = KeysetPaginator(BugReport, {"created_at": BugReport.created_at})
+
+
+def orders_query(db: Session, user_id: int, order_status: Optional[str] = None):
+    query = (db.query(Order.id, Order.bot_id, Bot.name.label("bot_name"), Order.amount, Order.status,
+                      Order.payment_system, Order.created_at)
+             .join(Bot, Bot.id == Order.bot_id).filter(Order.user_id == user_id))
+    if order_status:
+        try:
+            query = query.filter(Order.status == OrderStatus(order_status))
+        except ValueError:
+            raise bad_request(f"Unknown status: {order_status}")
+    return query
+
+
+def order_item(row) -> dict:
+    return {
+        "id": row.id,
+        "bot_id": row.bot_id,
+        "bot_name": row.bot_name,
+        "amount": row.amount,
+        "status": row.status.value,
+        "payment_system": row.payment_system,
+        "created_at": row.created_at.isoformat()
+    }
+
+
+def reviews_query(db: Session, user_id: int):
+    return (db.query(Review.id, Review.bot_id, Bot.name.label("bot_name"), Review.text, Review.rating,
+                     Review.created_at)
+            .join(Bot, Bot.id == Review.bot_id).filter(Review.user_id == user_id))
+
+
+def review_item(row) -> dict:
+    return {
+        "id": row.id,
+        "bot_id": row.bot_id,
+        "bot_name": row.bot_name,
+        "text": row.text,
+        "rating": row.rating,
+        "created_at": row.created_at.isoformat()
+    }
+
+
+def bug_reports_query(db: Session, user_id: int):
+    return (db.query(BugReport.id, BugReport.bot_id, Bot.name.label("bot_name"), BugReport.text, BugReport.status,
+                     BugReport.created_at)
+            .join(Bot, Bot.id == BugReport.bot_id).filter(BugReport.user_id == user_id))
+
+
+def bug_report_item(row) -> dict:
+    return {
+        "id": row.id,
+        "bot_id": row.bot_id,
+        "bot_name": row.bot_name,
+        "text": row.text,
+        "status": row.status,
+        "created_at": row.created_at.isoformat()
+    }
+
+
+@router.get("/{user_id}/profile")
+def get_user_profile(
+        user_id: int,
+        limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE, description="Размер первой страницы каждого списка"),
+        db: Session = Depends(get_db)
+):
+    """
+    Профиль пользователя для страницы пользователя: данные, статистика и первые страницы
+    заказов, отзывов и баг-репортов (четыре запроса). Следующие страницы списков -
+    через /{user_id}/orders, /reviews и /bug_reports с next_cursor.
+    """
+    user, stats = load_user_summary(db, user_id)
+    first_page = PageParams(cursor=None, limit=limit, sort=None)
+
+    # Количество записей уже известно из статистики, отдельный COUNT не нужен
+    orders = orders_paginator.paginate(db, orders_query(db, user_id), first_page, order_item, count_total=False)
+    orders["total"] = stats.total_orders
+    reviews = reviews_paginator.paginate(db, reviews_query(db, user_id), first_page, review_item, count_total=False)
+    reviews["total"] = stats.reviews_count
+    bug_reports = bug_reports_paginator.paginate(db, bug_reports_query(db, user_id), first_page, bug_report_item,
+                                                 count_total=False)
+    bug_reports["total"] = stats.bug_reports_count
+
+    return {
+        "user": user,
+        "stats": stats,
+        "orders": orders,
+        "reviews": reviews,
+        "bug_reports": bug_reports
+    }
 
-    # Получаем количество баг-репортов
-    bug_reports_count = db.query(BugReport).filter(BugReport.user_id == user_id).count()
 
-    return UserStats(
-        total_orders=total_orders,
-        total_spent=float(total_spent),
-        reviews_count=reviews_count,
-        bug_reports_count=bug_reports_count
-    )
+@router.get("/{user_id}/stats", response_model=UserStats)
+def get_user_stats(user_id: int, db: Session = Depends(get_db)):
+    """Получение статистики пользователя"""
+    return load_user_summary(db, user_id)[1]
 
 
-@router.get("/{user_id}/orders")
-async def get_user_orders(user_id: int, db: Session = Depends(get_db)):
-    """Получение списка заказов пользователя"""
-    # Проверяем существование пользователя
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+@router.get("/{user_id}/orders", response_model=Page[dict])
+def get_user_orders(
+        user_id: int,
+        page: PageParams = Depends(),
+        order_status: Optional[str] = Query(None, alias="status", description="Статус заказа"),
+        db: Session = Depends(get_db)
+):
+    """Страница заказов пользователя (новые сверху)"""
+    return orders_paginator.paginate(db, orders_query(db, user_id, order_status), page, order_item)
 
-    # Получаем заказы пользователя
-    orders = db.query(Order).filter(Order.user_id == user_id).all()
-
-    return [
-        {
-            "id": order.id,
-            "bot_id": order.bot_id,
-            "bot_name": order.bot.name,
-            "amount": order.amount,
-            "status": order.status.value,
-            "payment_system": order.payment_system,
-            "created_at": order.created_at.isoformat()
-        }
-        for order in orders
-    ]
-
-
-@router.get("/{user_id}/reviews")
-async def get_user_reviews(user_id: int, db: Session = Depends(get_db)):
-    """Получение списка отзывов пользователя"""
-    # Проверяем существование пользователя
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
 
-    # Получаем отзывы пользователя
-    reviews = db.query(Review).filter(Review.user_id == user_id).all()
-
-    return [
-        {
-            "id": review.id,
-            "bot_id": review.bot_id,
-            "bot_name": review.bot.name,
-            "text": review.text,
-            "rating": review.rating,
-            "created_at": review.created_at.isoformat()
-        }
-        for review in reviews
-    ]
-
-
-@router.get("/{user_id}/bug_reports")
-async def get_user_bug_reports(user_id: int, db: Session = Depends(get_db)):
-    """Получение списка баг-репортов пользователя"""
-    # Проверяем существование пользователя
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+@router.get("/{user_id}/reviews", response_model=Page[dict])
+def get_user_reviews(user_id: int, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    """Страница отзывов пользователя (новые сверху)"""
+    return reviews_paginator.paginate(db, reviews_query(db, user_id), page, review_item)
 
-    # Получаем баг-репорты пользователя
-    bug_reports = db.query(BugReport).filter(BugReport.user_id == user_id).all()
 
-    return [
-        {
-            "id": report.id,
-            "bot_id": report.bot_id,
-            "bot_name": report.bot.name,
-            "text": report.text,
-            "status": report.status,
-            "created_at": report.created_at.isoformat()
-        }
-        for report in bug_reports
-    ]
+@router.get("/{user_id}/bug_reports", response_model=Page[dict])
+def get_user_bug_reports(user_id: int, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    """Страница баг-репортов пользователя (новые сверху)"""
+    return bug_reports_paginator.paginate(db, bug_reports_query(db, user_id), page, bug_report_item)
 
 
 # Страницы админки для управления пользователями
@@ -184,7 +294,7 @@ async def users_page(request: Request):
 
 
 @router.get("/page/{user_id}", response_class=templates.TemplateResponse)
-async def user_detail_page(user_id: int, request: Request, db: Session = Depends(get_db)):
+def user_detail_page(user_id: int, request: Request, db: Session = Depends(get_db)):
     """Страница с детальной информацией о пользователе"""
     # Получаем информацию о пользователе
     user = db.query(User).filter(User.id == user_id).first()
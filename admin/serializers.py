@@ -0,0 +1,104 @@
+# admin/serializers.py
+"""
+Сериализаторы моделей для API админ-панели.
+
+Вместо обхода __dict__ ORM-объекта (admin.utils.serialize_model) каждый
+сериализатор выбирает из БД только нужные колонки кортежами и преобразует их
+заранее подобранными по типу колонки функциями: datetime/date - в ISO-строку,
+Enum - в значение, остальные значения передаются как есть.
+"""
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, DateTime, Enum
+from sqlalchemy.orm import Query as OrmQuery
+
+from models.models import Bot, BugReport, Changelog, Order, User
+
+
+def _encoder_for(column) -> Optional[Callable[[Any], Any]]:
+    """Функция преобразования значения колонки (None - значение передается как есть)"""
+    column_type = column.type
+    # Несвязанные методы и dict.__getitem__ заметно быстрее лямбд и обращения к Enum.value
+    if isinstance(column_type, DateTime):
+        return datetime.isoformat
+    if isinstance(column_type, Date):
+        return date.isoformat
+    if isinstance(column_type, Enum) and column_type.enum_class is not None:
+        return {member: member.value for member in column_type.enum_class}.__getitem__
+    return None
+
+
+class ModelSerializer:
+    """
+    Сериализатор набора колонок модели.
+
+    Args:
+        model: Модель SQLAlchemy
+        fields (Sequence[str]): Имена колонок в порядке вывода
+    """
+
+    def __init__(self, model, fields: Sequence[str]):
+        self.model = model
+        self.names: Tuple[str, ...] = tuple(fields)
+        self.columns = [getattr(model, name) for name in self.names]
+        self._encoder_by_index = [_encoder_for(model.__table__.columns[name]) for name in self.names]
+        # Колонки, значения которых нужно преобразовывать
+        self.encoders: List[Tuple[str, Callable[[Any], Any]]] = [
+            (name, encoder) for name, encoder in zip(self.names, self._encoder_by_index) if encoder is not None
+        ]
+
+    def project(self, query: OrmQuery) -> OrmQuery:
+        """Запрос только нужных колонок (строки - кортежи, без загрузки ORM-объектов)"""
+        return query.with_entities(*self.columns)
+
+    def row(self, row: Iterable[Any]) -> Dict[str, Any]:
+        """Словарь для ответа API из строки project()"""
+        data = dict(zip(self.names, row))
+        for name, encode in self.encoders:
+            value = data[name]
+            if value is not None:
+                data[name] = encode(value)
+        return data
+
+    def values(self, row: Iterable[Any]) -> List[Any]:
+        """Преобразованные значения строки project() в порядке names (для выгрузок)"""
+        return [
+            encode(value) if encode is not None and value is not None else value
+            for encode, value in zip(self._encoder_by_index, row)
+        ]
+
+    def instance(self, obj) -> Dict[str, Any]:
+        """Словарь для ответа API из уже загруженного ORM-объекта"""
+        return self.row([getattr(obj, name) for name in self.names])
+
+
+_registry: Dict[type, ModelSerializer] = {}
+
+
+def register(model, fields: Sequence[str]) -> ModelSerializer:
+    """Создает сериализатор модели и добавляет его в реестр"""
+    serializer = ModelSerializer(model, fields)
+    _registry[model] = serializer
+    return serializer
+
+
+def serializer_for(model) -> ModelSerializer:
+    """Сериализатор модели из реестра"""
+    try:
+        return _registry[model]
+    except KeyError:
+        raise LookupError(f"No serializer registered for {model.__name__}")
+
+
+USERS = register(User, ("id", "telegram_id", "username", "first_name", "last_name", "language", "created_at"))
+
+BOTS = register(Bot, ("id", "name", "description", "price", "category_id", "discount", "archive_path",
+                      "readme_url", "support_group_link", "created_at", "updated_at"))
+
+ORDERS = register(Order, ("id", "user_id", "bot_id", "amount", "status", "payment_system", "payment_id",
+                          "created_at", "updated_at"))
+
+BUG_REPORTS = register(BugReport, ("id", "user_id", "bot_id", "status", "text", "created_at", "updated_at"))
+
+CHANGELOGS = register(Changelog, ("id", "bot_id", "version", "description", "is_notified", "created_at"))
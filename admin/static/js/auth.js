@@ -10,8 +10,11 @@ $(document).ready(function() {
     // Обработка выхода из системы
     $('#logout-btn').click(function(e) {
         e.preventDefault();
-        localStorage.removeItem('token');
-        window.location.href = '/';
+        // Отзываем токен на сервере, затем удаляем его из браузера
+        $.post('/auth/logout').always(function() {
+            localStorage.removeItem('token');
+            window.location.href = '/';
+        });
     });
 });
 
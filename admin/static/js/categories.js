@@ -1,54 +1,43 @@
 // admin/static/js/categories.js
 
 $(document).ready(function() {
-    // Загрузка списка категорий
+    // Загрузка списка категорий со статистикой (один запрос)
     function loadCategories() {
-        $.get('/bots/categories', function(data) {
+        $.get('/bots/categories/stats', function(data) {
             var tableBody = $('#categories-table tbody');
             tableBody.empty();
 
             if (data.length === 0) {
-                tableBody.append('<tr><td colspan="6" class="text-center">Нет данных</td></tr>');
-            } else {
-                // Получаем количество ботов в каждой категории
-                $.get('/bots', function(bots) {
-                    // Создаем счетчик для категорий
-                    var categoryCounts = {};
-
-                    // Подсчитываем количество ботов для каждой категории
-                    bots.forEach(function(bot) {
-                        if (bot.category_id) {
-                            if (!categoryCounts[bot.category_id]) {
-                                categoryCounts[bot.category_id] = 0;
-                            }
-                            categoryCounts[bot.category_id]++;
-                        }
-                    });
-
-                    // Отображаем категории с количеством ботов
-                    data.forEach(function(category) {
-                        var botCount = categoryCounts[category.id] || 0;
-
-                        tableBody.append(`
-                            <tr>
-                                <td>${category.id}</td>
-                                <td>${category.name}</td>
-                                <td>${category.description || '-'}</td>
-                                <td>${category.discount}%</td>
-                                <td>${botCount}</td>
-                                <td class="text-center">
-                                    <button class="btn btn-primary btn-sm edit-category" data-id="${category.id}">
-                                        <i class="fas fa-edit"></i>
-                                    </button>
-                                    <button class="btn btn-danger btn-sm delete-category" data-id="${category.id}" data-name="${category.name}">
-                                        <i class="fas fa-trash"></i>
-                                    </button>
-                                </td>
-                            </tr>
-                        `);
-                    });
-                });
+                tableBody.append('<tr><td colspan="10" class="text-center">Нет данных</td></tr>');
+                return;
             }
+
+            data.forEach(function(category) {
+                // Боты без категории - строка без действий
+                var actions = category.id === null ? '' : `
+                    <button class="btn btn-primary btn-sm edit-category" data-id="${category.id}">
+                        <i class="fas fa-edit"></i>
+                    </button>
+                    <button class="btn btn-danger btn-sm delete-category" data-id="${category.id}" data-name="${category.name}">
+                        <i class="fas fa-trash"></i>
+                    </button>
+                `;
+
+                tableBody.append(`
+                    <tr>
+                        <td>${category.id === null ? '-' : category.id}</td>
+                        <td>${category.name}</td>
+                        <td>${category.description || '-'}</td>
+                        <td>${category.discount}%</td>
+                        <td>${category.bots_count}</td>
+                        <td>${category.sales_count}</td>
+                        <td>${category.revenue.toFixed(2)} руб.</td>
+                        <td>${category.avg_rating === null ? '-' : category.avg_rating + ' (' + category.reviews_count + ')'}</td>
+                        <td>${category.open_bugs}</td>
+                        <td class="text-center">${actions}</td>
+                    </tr>
+                `);
+            });
         }).fail(function(error) {
             showAlert('Ошибка при загрузке категорий: ' + error.responseJSON?.detail || 'Неизвестная ошибка', 'danger');
         });
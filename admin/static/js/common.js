@@ -70,10 +70,176 @@ function highlightActiveMenuItem() {
     }
 }
 
+// Курсорная пагинация списков API (ответ: items, next_cursor, has_more, total, total_is_estimate)
+class CursorPager {
+    constructor(url, container, onPage) {
+        this.url = url;
+        this.container = container;
+        this.onPage = onPage;
+        this.params = {};
+        this.cursors = [null];
+        this.total = null;
+        this.totalIsEstimate = false;
+        this.hasMore = false;
+    }
+
+    // Загрузка первой страницы с новыми фильтрами и сортировкой
+    reset(params) {
+        this.params = params || {};
+        this.cursors = [null];
+        this.load();
+    }
+
+    load() {
+        const query = Object.assign({}, this.params);
+        const cursor = this.cursors[this.cursors.length - 1];
+        if (cursor) {
+            query.cursor = cursor;
+        }
+        // Пустые фильтры не передаем
+        Object.keys(query).forEach(function(key) {
+            if (query[key] === '' || query[key] === null || query[key] === undefined) {
+                delete query[key];
+            }
+        });
+
+        $.get(this.url, query, (data) => {
+            if (data.total !== null && data.total !== undefined) {
+                this.total = data.total;
+                this.totalIsEstimate = data.total_is_estimate;
+            }
+            this.hasMore = data.has_more;
+            this.nextCursor = data.next_cursor;
+            this.onPage(data.items, this);
+            this.render();
+        }).fail(function(xhr) {
+            const detail = xhr.responseJSON && xhr.responseJSON.detail;
+            showAlert('Ошибка при загрузке списка: ' + (detail || xhr.statusText), 'danger');
+        });
+    }
+
+    next() {
+        if (this.hasMore) {
+            this.cursors.push(this.nextCursor);
+            this.load();
+        }
+    }
+
+    prev() {
+        if (this.cursors.length > 1) {
+            this.cursors.pop();
+            this.load();
+        }
+    }
+
+    totalText() {
+        if (this.total === null) {
+            return '';
+        }
+        return (this.totalIsEstimate ? '~' : '') + this.total;
+    }
+
+    render() {
+        const container = $(this.container);
+        const pageNumber = this.cursors.length;
+        const prevDisabled = pageNumber > 1 ? '' : ' disabled';
+        const nextDisabled = this.hasMore ? '' : ' disabled';
+        const total = this.totalText();
+
+        container.html(`
+            <li class="page-item${prevDisabled}"><a class="page-link" href="#" data-page="prev">&laquo;</a></li>
+            <li class="page-item active"><span class="page-link">${pageNumber}</span></li>
+            <li class="page-item${nextDisabled}"><a class="page-link" href="#" data-page="next">&raquo;</a></li>
+            ${total ? `<li class="page-item disabled"><span class="page-link">Всего: ${total}</span></li>` : ''}
+        `);
+
+        container.find('.page-link[data-page]').off('click').on('click', (e) => {
+            e.preventDefault();
+            if ($(e.currentTarget).data('page') === 'next') {
+                this.next();
+            } else {
+                this.prev();
+            }
+        });
+    }
+}
+
+// Подписка на поток событий /events (Server-Sent Events).
+// EventSource не умеет передавать заголовок Authorization, поэтому поток читается через fetch.
+// Каждое событие передается обработчикам $(document).on('admin:event', function(e, type, data) {...}).
+window.adminEventsConnected = false;
+
+function subscribeEvents(retryDelay = 1000) {
+    const token = localStorage.getItem('token');
+    if (!token || !window.fetch || !window.TextDecoder) {
+        return;
+    }
+
+    function reconnect(delay) {
+        window.adminEventsConnected = false;
+        setTimeout(function() { subscribeEvents(Math.min(delay * 2, 60000)); }, delay);
+    }
+
+    fetch('/events/', {headers: {'Authorization': 'Bearer ' + token, 'Accept': 'text/event-stream'}})
+        .then(function(response) {
+            if (response.status === 401 || response.status === 403) {
+                return;
+            }
+            if (!response.ok || !response.body) {
+                throw new Error('Event stream unavailable: ' + response.status);
+            }
+
+            window.adminEventsConnected = true;
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            function read() {
+                return reader.read().then(function(result) {
+                    if (result.done) {
+                        // Сервер закрыл поток - переподключаемся без задержки на ошибку
+                        reconnect(1000);
+                        return;
+                    }
+                    buffer += decoder.decode(result.value, {stream: true});
+                    let boundary;
+                    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                        dispatchServerEvent(buffer.slice(0, boundary));
+                        buffer = buffer.slice(boundary + 2);
+                    }
+                    return read();
+                });
+            }
+            return read();
+        })
+        .catch(function(error) {
+            console.error('Event stream error:', error);
+            reconnect(retryDelay);
+        });
+}
+
+// Разбор одного сообщения потока событий
+function dispatchServerEvent(frame) {
+    let type = 'message';
+    let data = '';
+    frame.split('\n').forEach(function(line) {
+        if (line.startsWith('event: ')) {
+            type = line.slice(7);
+        } else if (line.startsWith('data: ')) {
+            data += line.slice(6);
+        }
+    });
+    if (!data || type === 'heartbeat') {
+        return;
+    }
+    $(document).trigger('admin:event', [type, JSON.parse(data)]);
+}
+
 // Инициализация при загрузке страницы
 $(document).ready(function() {
     setupAjaxAuth();
     highlightActiveMenuItem();
+    subscribeEvents();
 
     // Переключение боковой панели
     $("#menu-toggle").click(function(e) {
@@ -18,6 +18,17 @@ $(document).ready(function() {
         $(this).addClass('active');
         loadSalesChart($(this).data('period'));
     });
+
+    // Обновляем счетчики при новых заказах, оплатах и баг-репортах (не чаще раза в 2 секунды)
+    let refreshTimer = null;
+    $(document).on('admin:event', function(e, type) {
+        if (['order_created', 'order_paid', 'bug_report_created'].includes(type) && !refreshTimer) {
+            refreshTimer = setTimeout(function() {
+                refreshTimer = null;
+                loadDashboardData();
+            }, 2000);
+        }
+    });
 });
 
 // Функция для загрузки данных дашборда
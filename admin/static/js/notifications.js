@@ -1,22 +1,37 @@
 // admin/static/js/notifications.js
 
+// Показанные уведомления и дата самого нового из них (для запроса только новых, since=)
+let notificationItems = [];
+let notificationsLatest = null;
+const NOTIFICATIONS_SHOWN = 10;
+
 $(document).ready(function() {
     // Загружаем уведомления при загрузке страницы
     loadNotifications();
 
-    // Обновляем уведомления каждые 30 секунд
-    setInterval(loadNotifications, 30000);
+    // Новые уведомления приходят через поток событий (common.js)
+    $(document).on('admin:event', loadNotifications);
+
+    // Если поток событий недоступен, опрашиваем каждые 30 секунд
+    setInterval(function() {
+        if (!window.adminEventsConnected) {
+            loadNotifications();
+        }
+    }, 30000);
 
     // Обработчик клика на "Отметить все как прочитанные"
     $('#mark-all-read').click(function(e) {
         e.preventDefault();
 
         $.ajax({
-            url: '/notifications/mark-read',
+            url: '/notifications/mark-read' + (notificationsLatest ? '?until=' + encodeURIComponent(notificationsLatest) : ''),
             type: 'POST',
             success: function() {
                 $('#notifications-badge').hide();
                 showAlert('Все уведомления отмечены как прочитанные', 'success');
+                // Перезагружаем список целиком, чтобы обновить отметки прочтения
+                notificationItems = [];
+                notificationsLatest = null;
                 loadNotifications();
             },
             error: function() {
@@ -33,9 +48,18 @@ $(document).ready(function() {
 
 // Функция загрузки уведомлений
 function loadNotifications() {
-    $.get('/notifications', function(data) {
-        const unreadCount = data.unreadCount;
-        const notifications = data.notifications;
+    const params = notificationsLatest ? {since: notificationsLatest} : {};
+
+    $.get('/notifications', params, function(data) {
+        const unreadCount = data.unread_count;
+
+        // Новые уведомления добавляются к уже показанным
+        const fresh = data.notifications.map(n => n.type + ':' + n.id);
+        const notifications = data.notifications.concat(
+            notificationItems.filter(n => !fresh.includes(n.type + ':' + n.id))
+        ).slice(0, NOTIFICATIONS_SHOWN);
+        notificationItems = notifications;
+        notificationsLatest = data.latest;
 
         // Обновляем счетчик непрочитанных уведомлений
         if (unreadCount > 0) {
@@ -96,7 +120,7 @@ function loadNotifications() {
 
                 // Создаем элемент уведомления
                 const notificationItem = `
-                    <a href="${notification.link}" class="dropdown-item notification-item d-flex align-items-center py-2">
+                    <a href="${notification.link}" class="dropdown-item notification-item d-flex align-items-center py-2${notification.is_read ? ' text-muted' : ''}">
                         <div class="me-3">
                             <div class="icon-circle ${badgeClass}">
                                 <i class="fas ${notification.icon} text-white"></i>
@@ -0,0 +1,57 @@
+"""created_at indexes for keyset pagination
+
+Revision ID: 5559b2bf132d
+Revises: 7836a2c5fcf5
+Create Date: 2026-10-18 18:30:00
+
+Списки админ-панели листаются по (created_at, id), поэтому created_at становится
+NOT NULL и получает индекс. create_all не добавляет индексы в уже существующие
+таблицы, поэтому на рабочих базах их создает эта миграция. Пустой created_at
+заполняется из updated_at, а где его нет - текущим временем.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5559b2bf132d'
+down_revision = '7836a2c5fcf5'
+branch_labels = None
+depends_on = None
+
+# Таблица -> (есть ли updated_at, нужен ли индекс по created_at)
+TABLES = {
+    "users": (True, True),
+    "orders": (True, True),
+    "reviews": (False, True),
+    "bug_reports": (True, True),
+    "changelogs": (False, True),
+    "messages": (False, True),
+    "bots": (True, False),
+}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table_name, (has_updated_at, indexed) in TABLES.items():
+        columns = [sa.column("created_at")] + ([sa.column("updated_at")] if has_updated_at else [])
+        table = sa.table(table_name, *columns)
+        fallback = sa.func.coalesce(table.c.updated_at, sa.func.now()) if has_updated_at else sa.func.now()
+        bind.execute(table.update().where(table.c.created_at.is_(None)).values(created_at=fallback))
+
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column("created_at", existing_type=sa.DateTime(), nullable=False)
+
+        index_name = f"ix_{table_name}_created_at"
+        if indexed and index_name not in {index["name"] for index in inspector.get_indexes(table_name)}:
+            op.create_index(index_name, table_name, ["created_at"])
+
+
+def downgrade():
+    for table_name, (_, indexed) in reversed(list(TABLES.items())):
+        if indexed:
+            op.drop_index(f"ix_{table_name}_created_at", table_name=table_name)
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.alter_column("created_at", existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,32 @@
+"""Admin read markers table
+
+Revision ID: 60d847941bd5
+Revises: ba3ac5254bf7
+Create Date: 2026-10-18 18:00:03
+
+Таблица admin_read_markers: до какого момента администратор прочитал уведомления.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '60d847941bd5'
+down_revision = 'ba3ac5254bf7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "admin_read_markers" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "admin_read_markers",
+        sa.Column("admin_telegram_id", sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column("last_read_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("admin_telegram_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("admin_read_markers")
@@ -0,0 +1,43 @@
+"""Outbox messages table
+
+Revision ID: 7836a2c5fcf5
+Revises: cd6fdd1a8ffd
+Create Date: 2026-10-18 18:00:05
+
+Таблица outbox_messages: сообщения пользователям, которые отправляет воркер
+процесса бота (services/outbox.py).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7836a2c5fcf5'
+down_revision = 'cd6fdd1a8ffd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "outbox_messages" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "outbox_messages",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("payload", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_outbox_messages_due", "outbox_messages", ["status", "next_attempt_at"])
+
+
+def downgrade():
+    op.drop_index("ix_outbox_messages_due", table_name="outbox_messages")
+    op.drop_table("outbox_messages")
@@ -0,0 +1,37 @@
+"""FSM states table
+
+Revision ID: 84395710a031
+Revises: a1c9e4d2b7f0
+Create Date: 2026-10-18 18:00:00
+
+Таблица fsm_states для SqlFsmStorage (FSM_STORAGE=sql). На базах, где схему
+создавал database.init_db (create_all), таблица может уже существовать.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '84395710a031'
+down_revision = 'a1c9e4d2b7f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "fsm_states" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "fsm_states",
+        sa.Column("key", sa.String(255), nullable=False),
+        sa.Column("state", sa.String(255), nullable=True),
+        sa.Column("data", sa.Text(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index("ix_fsm_states_expires_at", "fsm_states", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_fsm_states_expires_at", table_name="fsm_states")
+    op.drop_table("fsm_states")
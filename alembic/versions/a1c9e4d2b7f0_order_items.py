@@ -0,0 +1,61 @@
+"""Order items for multi-item orders
+
+Revision ID: a1c9e4d2b7f0
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+Первая миграция: до нее схема создавалась database.init_db (create_all), поэтому
+таблица order_items может уже существовать - тогда она не пересоздается.
+Каждый существующий заказ без позиций получает одну позицию: бот заказа,
+количество 1, цена и сумма - сумма заказа.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c9e4d2b7f0'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Сколько заказов (по диапазону id) заполняется одним запросом
+BACKFILL_BATCH = 5000
+
+
+def upgrade():
+    bind = op.get_bind()
+    if "order_items" not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            "order_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=False),
+            sa.Column("bot_id", sa.Integer(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"]),
+            sa.ForeignKeyConstraint(["bot_id"], ["bots.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+        op.create_index("ix_order_items_bot_id", "order_items", ["bot_id"])
+
+    # Позиции для заказов, созданных до появления order_items
+    orders = sa.table("orders", sa.column("id"), sa.column("bot_id"), sa.column("amount"))
+    items = sa.table("order_items", sa.column("order_id"), sa.column("bot_id"), sa.column("quantity"),
+                     sa.column("price"), sa.column("amount"))
+    max_id = bind.execute(sa.select(sa.func.max(orders.c.id))).scalar() or 0
+    for first_id in range(1, max_id + 1, BACKFILL_BATCH):
+        bind.execute(items.insert().from_select(
+            ["order_id", "bot_id", "quantity", "price", "amount"],
+            sa.select(orders.c.id, orders.c.bot_id, sa.literal(1), orders.c.amount, orders.c.amount)
+            .where(orders.c.id >= first_id, orders.c.id < first_id + BACKFILL_BATCH,
+                   ~sa.exists().where(items.c.order_id == orders.c.id))
+        ))
+
+
+def downgrade():
+    op.drop_index("ix_order_items_bot_id", table_name="order_items")
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_table("order_items")
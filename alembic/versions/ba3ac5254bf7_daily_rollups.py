@@ -0,0 +1,69 @@
+"""Daily rollup tables
+
+Revision ID: ba3ac5254bf7
+Revises: d65ed8934120
+Create Date: 2026-10-18 18:00:02
+
+Дневные сводки заказов, регистраций, отзывов и баг-репортов для статистики.
+Таблицы создаются пустыми: заполнить их по существующим данным можно командой
+python -m services.rollups.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ba3ac5254bf7'
+down_revision = 'd65ed8934120'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "daily_order_stats" not in existing:
+        op.create_table(
+            "daily_order_stats",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("bot_id", sa.Integer(), nullable=False),
+            sa.Column("payment_system", sa.String(50), nullable=False),
+            sa.Column("status", sa.Enum("PENDING", "PAID", "CANCELLED", name="orderstatus"), nullable=False),
+            sa.Column("orders", sa.Integer(), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("day", "bot_id", "payment_system", "status", name="uq_daily_order_stats"),
+        )
+
+    if "daily_user_stats" not in existing:
+        op.create_table(
+            "daily_user_stats",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("registrations", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("day"),
+        )
+
+    if "daily_review_stats" not in existing:
+        op.create_table(
+            "daily_review_stats",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("reviews", sa.Integer(), nullable=False),
+            sa.Column("rating_sum", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("day"),
+        )
+
+    if "daily_bug_report_stats" not in existing:
+        op.create_table(
+            "daily_bug_report_stats",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("reports", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("day"),
+        )
+
+
+def downgrade():
+    op.drop_table("daily_bug_report_stats")
+    op.drop_table("daily_review_stats")
+    op.drop_table("daily_user_stats")
+    op.drop_table("daily_order_stats")
@@ -0,0 +1,41 @@
+"""Payment notifications table
+
+Revision ID: cd6fdd1a8ffd
+Revises: 60d847941bd5
+Create Date: 2026-10-18 18:00:04
+
+Таблица payment_notifications: уникальный ключ (платежная система, транзакция)
+отсекает повторные доставки уведомлений об оплате.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cd6fdd1a8ffd'
+down_revision = '60d847941bd5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "payment_notifications" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "payment_notifications",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("payment_system", sa.String(50), nullable=False),
+        sa.Column("transaction_id", sa.String(255), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(50), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("payment_system", "transaction_id", name="uq_payment_notification"),
+    )
+    op.create_index("ix_payment_notifications_order_id", "payment_notifications", ["order_id"])
+
+
+def downgrade():
+    op.drop_index("ix_payment_notifications_order_id", table_name="payment_notifications")
+    op.drop_table("payment_notifications")
@@ -0,0 +1,34 @@
+"""Cache versions table
+
+Revision ID: d65ed8934120
+Revises: 84395710a031
+Create Date: 2026-10-18 18:00:01
+
+Таблица cache_versions: версия снимка каталога, по которой процессы бота
+узнают об изменениях из админ-панели.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd65ed8934120'
+down_revision = '84395710a031'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if "cache_versions" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade():
+    op.drop_table("cache_versions")
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк зависимости verify_token админ-панели.
+
+Сравнивает:
+- прежний путь: декодирование токена, запрос User в БД и копия User на каждый запрос;
+- новый путь: декодирование токена и AdminPrincipal из кеша по jti
+  (отдельно - промах кеша, когда администратор загружается из БД).
+
+Для каждого пути выводится медиана времени вызова зависимости, а также время
+HTTP-запроса к пустому маршруту, защищенному этой зависимостью (TestClient).
+
+Запуск (из корня проекта):
+    python -m benchmarks.admin_auth --calls 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "se1dhe_bench_admin_auth.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from fastapi import Depends, FastAPI, HTTPException  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from jose import jwt  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+import database.db as database  # noqa: E402
+from admin.middleware.auth_middleware import (  # noqa: E402
+    ALGORITHM, create_access_token, oauth2_scheme, principal_cache, verify_token
+)
+from config.settings import ADMIN_IDS, SECRET_KEY  # noqa: E402
+from models.models import Base, User  # noqa: E402
+
+
+def seed():
+    """Создает схему и пользователей (администратор среди них)"""
+    Base.metadata.drop_all(database.engine)
+    Base.metadata.create_all(database.engine)
+    with database.engine.begin() as conn:
+        conn.execute(insert(User), [{"telegram_id": 1_000_000 + i, "language": "ru"} for i in range(10_000)])
+        conn.execute(insert(User), [{"telegram_id": ADMIN_IDS[0], "username": "admin", "language": "ru"}])
+
+
+def legacy_verify_token(token: str = Depends(oauth2_scheme)):
+    """Прежняя реализация verify_token: запрос в БД и копия User на каждый вызов"""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    telegram_id = payload.get("telegram_id")
+    if int(telegram_id) not in ADMIN_IDS:
+        raise HTTPException(status_code=403)
+    with database.db_session() as db:
+        user = db.query(User).filter(User.telegram_id == telegram_id).first()
+        return User(
+            id=user.id, telegram_id=user.telegram_id, username=user.username, first_name=user.first_name,
+            last_name=user.last_name, language=user.language, created_at=user.created_at, updated_at=user.updated_at
+        )
+
+
+def cold_verify_token(token: str = Depends(oauth2_scheme)):
+    """Новая реализация при промахе кеша"""
+    principal_cache.clear()
+    return verify_token(token)
+
+
+def measure(name: str, run, calls: int):
+    """Вызывает run calls раз и выводит медиану времени вызова"""
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    print(f"{name:<40} median={median * 1_000_000:>9.1f} us  {1 / median:>10,.0f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Admin auth dependency benchmark")
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    seed()
+    token = create_access_token({"sub": "admin", "telegram_id": ADMIN_IDS[0]})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    dependencies = [
+        ("legacy (DB lookup per request)", legacy_verify_token),
+        ("cached principal, cache miss", cold_verify_token),
+        ("cached principal, cache hit", verify_token),
+    ]
+
+    print("dependency call:")
+    for name, dependency in dependencies:
+        measure(name, lambda: dependency(token), args.calls)
+
+    print("HTTP request to an empty protected route:")
+    for name, dependency in dependencies:
+        app = FastAPI()
+
+        @app.get("/ping", dependencies=[Depends(dependency)])
+        def ping():
+            return {}
+
+        client = TestClient(app)
+        measure(name, lambda: client.get("/ping", headers=headers), args.calls)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Нагрузочный бенчмарк обработчиков бота.
+
+Прогоняет несколько тысяч синтетических апдейтов через Dispatcher со всеми
+обработчиками и I18nMiddleware и выводит p50/p99 задержки обработки апдейта.
+Telegram API заменяется StubSession, база данных — SQLite-файлом, а задержка
+сетевой БД эмулируется через --query-latency-ms (пауза выполняется в том потоке,
+где драйвер выполняет запрос: в цикле событий для pymysql/pysqlite и в рабочем
+потоке для aiomysql/aiosqlite).
+
+Запуск (из корня проекта):
+    python -m benchmarks.bot_handlers --updates 3000 --concurrency 100 --query-latency-ms 2
+
+Для сравнения "до/после" запустите тот же скрипт на предыдущей ревизии:
+если в database.db нет async_engine, задержка вешается на синхронный движок.
+Старый синхронный движок требует READ COMMITTED, поэтому для него укажите
+MySQL через BENCH_DATABASE_URL (база будет заполнена заново).
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "se1dhe_bench_handlers.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from sqlalchemy import event  # noqa: E402
+
+import database.db as database  # noqa: E402
+from models.models import Base, Bot, BotCategory, User  # noqa: E402
+
+
+def seed(users: int, bots: int):
+    """Создает схему и наполняет базу тестовыми данными"""
+    Base.metadata.drop_all(database.engine)
+    Base.metadata.create_all(database.engine)
+
+    db = database.session_factory()
+    try:
+        categories = [BotCategory(name=f"Category {i}", discount=0) for i in range(5)]
+        db.add_all(categories)
+        db.flush()
+        db.add_all([
+            Bot(name=f"Bot {i}", description="Benchmark bot", price=100 + i,
+                discount=10 if i % 3 == 0 else 0, category_id=categories[i % 5].id)
+            for i in range(bots)
+        ])
+        db.add_all([
+            User(telegram_id=1_000_000 + i, username=f"user{i}", first_name="Bench", language="ru")
+            for i in range(users)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
+def install_query_latency(latency: float):
+    """Эмулирует сетевую задержку БД для каждого выполняемого запроса"""
+    if latency <= 0:
+        return
+
+    def trace(_statement):
+        time.sleep(latency)
+
+    engines = [database.engine]
+    async_engine = getattr(database, "async_engine", None)
+    if async_engine is not None:
+        engines.append(async_engine.sync_engine)
+
+    for engine in engines:
+        if engine.dialect.name != "sqlite":
+            continue
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, _record):
+            # У aiosqlite настоящее sqlite3-соединение живет в отдельном потоке драйвера
+            driver_connection = getattr(dbapi_connection, "driver_connection", dbapi_connection)
+            raw_connection = getattr(driver_connection, "_conn", driver_connection)
+            raw_connection.set_trace_callback(trace)
+
+
+def install_query_counter():
+    """Подсчитывает запросы к БД; возвращает список-счетчик из одного элемента"""
+    counter = [0]
+
+    def count(*_args):
+        counter[0] += 1
+
+    engines = [database.engine]
+    async_engine = getattr(database, "async_engine", None)
+    if async_engine is not None:
+        engines.append(async_engine.sync_engine)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", count)
+    return counter
+
+
+def build_payloads(count: int, users: int, bots: int):
+    """Генерирует смесь апдейтов (в виде JSON Bot API), похожую на реальный трафик"""
+    rnd = random.Random(42)
+    payloads = []
+    for update_id in range(1, count + 1):
+        telegram_id = 1_000_000 + rnd.randrange(users)
+        user = {"id": telegram_id, "is_bot": False, "first_name": "Bench", "language_code": "ru"}
+        chat = {"id": telegram_id, "type": "private"}
+        message = {"message_id": update_id, "date": 0, "chat": chat, "from": user}
+        kind = rnd.random()
+
+        if kind < 0.45:
+            data = rnd.choice(["category:all", f"category:{rnd.randint(1, 5)}", f"bot:{rnd.randint(1, bots)}",
+                               f"cart:add:{rnd.randint(1, bots)}"])
+            payload = {"update_id": update_id, "callback_query": {
+                "id": str(update_id), "from": user, "chat_instance": "bench",
+                "message": {**message, "text": "menu"}, "data": data
+            }}
+        else:
+            text = rnd.choice(["/start", "/catalog", "/cart", "/help", "Привет, есть вопрос"])
+            payload = {"update_id": update_id, "message": {**message, "text": text}}
+
+        payloads.append(payload)
+    return payloads
+
+
+def build_updates(count: int, users: int, bots: int):
+    """Генерирует апдейты aiogram для прямой подачи в Dispatcher"""
+    from aiogram.types import Update
+
+    return [Update.model_validate(payload, context={}) for payload in build_payloads(count, users, bots)]
+
+
+def create_dispatcher():
+    """Создает диспетчер с теми же middleware и обработчиками, что и bot/main.py"""
+    from aiogram import Dispatcher
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from bot.handlers import register_all_handlers
+    from bot.middlewares.i18n import I18nMiddleware
+    from bot.middlewares.user import UserMiddleware
+
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.update.outer_middleware(UserMiddleware())
+    i18n = I18nMiddleware(bot_dir="bot")
+    dp.message.middleware(i18n)
+    dp.callback_query.middleware(i18n)
+    register_all_handlers(dp)
+    return dp
+
+
+async def run(args):
+    from benchmarks.telegram_stub import create_stub_bot
+
+    startup = time.perf_counter()
+    dp = create_dispatcher()
+    startup = time.perf_counter() - startup
+
+    bot = create_stub_bot(latency=args.api_latency_ms / 1000)
+    updates = build_updates(args.updates, args.users, args.bots)
+    queries = install_query_counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    errors = 0
+
+    async def process(update):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await dp.feed_update(bot, update)
+            except Exception:
+                # Ошибки отдельных обработчиков учитываем, но не прерываем прогон
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(process(update) for update in updates))
+    wall = time.perf_counter() - wall
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"updates:          {len(latencies)} (concurrency {args.concurrency})")
+    print(f"dispatcher setup: {startup * 1000:.1f} ms")
+    print(f"throughput:       {len(latencies) / wall:.1f} updates/s")
+    print(f"p50 latency:      {percentiles[49] * 1000:.2f} ms")
+    print(f"p99 latency:      {percentiles[98] * 1000:.2f} ms")
+    print(f"max latency:      {max(latencies) * 1000:.2f} ms")
+    print(f"handler errors:   {errors}")
+    print(f"api calls:        {len(bot.session.calls)}")
+    print(f"db queries:       {queries[0]} ({queries[0] / len(latencies):.2f} per update)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bots", type=int, default=50)
+    parser.add_argument("--query-latency-ms", type=float, default=2.0)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    seed(args.users, args.bots)
+    install_query_latency(args.query_latency_ms / 1000)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    # Логи обработчиков мешают чтению результатов
+    import logging
+    logging.disable(logging.CRITICAL)
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Микробенчмарк переводов: прежняя реализация против скомпилированного каталога.
+
+Прежняя реализация воспроизводится здесь же:
+- I18nMiddleware создавал новое замыкание translator на каждое событие, делал два
+  поиска по словарям и вызывал str.format(**kwargs);
+- обработчики вызывали свой get_localized_text, который на каждом вызове заново
+  строил вложенный словарь всех текстов модуля (здесь - словарь того же размера).
+
+Запуск (из корня проекта):
+    python -m benchmarks.i18n_catalog --number 200000
+"""
+import argparse
+import sys
+import timeit
+
+from bot.i18n import TranslationCatalog, get_localized_text
+from config.settings import DEFAULT_LANGUAGE
+
+
+def legacy_translator(messages, lang):
+    """Прежний I18nMiddleware._get_translator"""
+
+    def translator(key, kwargs=None):
+        if not kwargs:
+            kwargs = {}
+        message = messages.get(lang, {}).get(key)
+        if not message and lang != DEFAULT_LANGUAGE:
+            message = messages.get(DEFAULT_LANGUAGE, {}).get(key)
+        if not message:
+            return f"MISSING:{key}"
+        try:
+            return message.format(**kwargs)
+        except Exception:
+            return message
+
+    return translator
+
+
+def build_legacy_get_localized_text(catalog: TranslationCatalog, size: int):
+    """Собирает функцию с литералом словаря текстов, как в прежних модулях обработчиков"""
+    keys = sorted(catalog.messages[DEFAULT_LANGUAGE])[:size]
+    texts = {key: {lang: catalog.messages[lang].get(key, "") for lang in catalog.messages} for key in keys}
+    namespace = {}
+    exec(
+        "def get_localized_text(key, lang):\n"
+        f"    texts = {texts!r}\n"
+        "    return texts.get(key, {}).get(lang, f'Missing text: {key}')\n",
+        namespace
+    )
+    return namespace["get_localized_text"]
+
+
+def report(name, legacy, compiled, number):
+    legacy_time = min(timeit.repeat(legacy, number=number, repeat=3)) / number * 1e9
+    compiled_time = min(timeit.repeat(compiled, number=number, repeat=3)) / number * 1e9
+    print(f"{name:<38} legacy {legacy_time:8.0f} ns   compiled {compiled_time:8.0f} ns   "
+          f"x{legacy_time / compiled_time:.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=200000)
+    parser.add_argument("--module-size", type=int, default=20, help="Количество ключей в словаре модуля")
+    args = parser.parse_args(argv)
+
+    catalog = TranslationCatalog()
+    messages = catalog.messages
+    legacy_get_localized_text = build_legacy_get_localized_text(catalog, args.module_size)
+
+    def legacy_event():
+        translator = legacy_translator(messages, "en")
+        translator("cart_title")
+        translator("cart_total", {"total": 199.5})
+
+    def compiled_event():
+        translator = catalog.get_translator("en")
+        translator("cart_title")
+        translator("cart_total", {"total": 199.5})
+
+    report("middleware event (2 lookups)", legacy_event, compiled_event, args.number)
+    report("static text", lambda: legacy_translator(messages, "en")("cart_title"),
+           lambda: catalog.get_translator("en")("cart_title"), args.number)
+    report("fallback to default language", lambda: legacy_translator(messages, "de")("welcome_new"),
+           lambda: catalog.get_translator("de")("welcome_new"), args.number)
+    report("handler get_localized_text", lambda: legacy_get_localized_text("cart_title", "en"),
+           lambda: get_localized_text("cart_title", "en"), args.number)
+    print(f"missing keys: {catalog.missing_report() or 'none'}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
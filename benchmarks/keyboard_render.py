@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Микробенчмарк построения клавиатур меню и каталога.
+
+Для каждого сценария сравниваются построение клавиатуры заново с сериализацией
+(как при каждом колбэке до кеширования) и путь через keyboard_cache
+с MarkupCacheSession, где после первого запроса остаются поиск в кеше и
+готовый JSON. Снимок каталога синтетический, БД не используется.
+
+Запуск (из корня проекта):
+    python -m benchmarks.keyboard_render --number 20000 --bots 30
+"""
+import argparse
+import sys
+import timeit
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+
+from benchmarks.telegram_stub import STUB_BOT_TOKEN
+from bot.keyboards import catalog as catalog_keyboards
+from bot.keyboards import main_menu
+from bot.keyboards.cache import MarkupCacheSession, keyboard_cache
+from services.catalog import BotEntry, CatalogSnapshot, CategoryEntry
+
+
+def build_snapshot(categories: int, bots: int) -> CatalogSnapshot:
+    """Строит синтетический снимок каталога"""
+    category_entries = [CategoryEntry(id=i, name=f"Category {i}", discount=0) for i in range(1, categories + 1)]
+    bot_entries = [
+        BotEntry(id=i, name=f"Bot {i}", description=f"Description {i}", price=100 + i,
+                 discount=10 if i % 3 == 0 else 0, category_id=i % categories + 1)
+        for i in range(1, bots + 1)
+    ]
+    return CatalogSnapshot.build(1, category_entries, bot_entries)
+
+
+def report(name, uncached, cached, number):
+    uncached_time = min(timeit.repeat(uncached, number=number, repeat=3)) / number * 1e6
+    cached_time = min(timeit.repeat(cached, number=number, repeat=3)) / number * 1e6
+    print(f"{name:<20} uncached {uncached_time:8.2f} us   cached {cached_time:8.2f} us   "
+          f"x{uncached_time / cached_time:.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--categories", type=int, default=6)
+    parser.add_argument("--bots", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    snapshot = build_snapshot(args.categories, args.bots)
+    bot_entry = snapshot.bots[0]
+    plain = AiohttpSession()
+    cached = MarkupCacheSession()
+    bot = Bot(token=STUB_BOT_TOKEN, session=plain)
+
+    def send(session, markup):
+        return session.prepare_value(markup, bot=bot, files={})
+
+    scenarios = [
+        ("main menu",
+         lambda: main_menu._render_main_menu_keyboard("en"),
+         lambda: main_menu.get_main_menu_keyboard("en")),
+        ("inline main menu",
+         lambda: main_menu._render_inline_main_menu("en"),
+         lambda: main_menu.get_inline_main_menu("en")),
+        ("categories",
+         lambda: catalog_keyboards._render_categories_keyboard(snapshot),
+         lambda: catalog_keyboards.get_categories_keyboard(snapshot, "en")),
+        ("bots list (all)",
+         lambda: catalog_keyboards._render_bots_keyboard(snapshot, None),
+         lambda: catalog_keyboards.get_bots_keyboard(snapshot, None, "en")),
+        ("bot detail",
+         lambda: catalog_keyboards._render_bot_detail_keyboard(bot_entry),
+         lambda: catalog_keyboards.get_bot_detail_keyboard(snapshot, bot_entry, "en")),
+    ]
+
+    for name, render, lookup in scenarios:
+        report(name, lambda render=render: send(plain, render()),
+               lambda lookup=lookup: send(cached, lookup()), args.number)
+
+    for counter, value in keyboard_cache.stats().items():
+        print(f"{counter + ':':<21}{value}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк сериализации заказов для API админ-панели.
+
+Заполняет SQLite-файл заказами (по умолчанию 100 000) и сравнивает:
+- прежний путь: загрузка ORM-объектов, admin.utils.serialize_model и JSONResponse;
+- новый путь: выборка колонок сериализатора кортежами (admin/serializers.py),
+  преобразование заранее подобранными функциями и ORJSONResponse.
+
+Для каждого пути выводится медиана времени и количество строк в секунду
+отдельно для чтения с сериализацией и для кодирования в JSON.
+
+Запуск (из корня проекта):
+    python -m benchmarks.serializers --orders 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "se1dhe_bench_serializers.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from sqlalchemy import func, insert  # noqa: E402
+
+import database.db as database  # noqa: E402
+from admin.serializers import ORDERS  # noqa: E402
+from admin.utils import serialize_model  # noqa: E402
+from models.models import Base, Bot, Order, OrderStatus, User  # noqa: E402
+
+STATUSES = [OrderStatus.PAID, OrderStatus.PENDING, OrderStatus.CANCELLED]
+
+
+def seed(orders: int):
+    """Создает схему и наполняет базу заказами"""
+    Base.metadata.drop_all(database.engine)
+    Base.metadata.create_all(database.engine)
+
+    now = datetime.utcnow().replace(microsecond=0)
+    with database.engine.begin() as conn:
+        conn.execute(insert(Bot), [{"name": "Bot", "description": "Benchmark bot", "price": 100}])
+        conn.execute(insert(User), [{"telegram_id": 1_000_000 + i, "language": "ru"} for i in range(100)])
+        for offset in range(0, orders, 50_000):
+            conn.execute(insert(Order), [
+                {"user_id": i % 100 + 1, "bot_id": 1, "amount": float(i % 500), "status": STATUSES[i % 3],
+                 "payment_system": "freekassa", "payment_id": f"pay-{i}",
+                 "created_at": now - timedelta(minutes=i), "updated_at": now - timedelta(minutes=i)}
+                for i in range(offset, min(offset + 50_000, orders))
+            ])
+
+
+def seeded_orders() -> int:
+    """Количество заказов в уже заполненной базе (0, если схемы нет)"""
+    db = database.session_factory()
+    try:
+        return db.query(func.count(Order.id)).scalar()
+    except Exception:
+        return 0
+    finally:
+        db.close()
+
+
+def legacy_items(db) -> list:
+    """Прежний путь: ORM-объекты и обход __dict__"""
+    items = []
+    for order in db.query(Order).all():
+        data = serialize_model(order)
+        data["status"] = order.status.value
+        items.append(data)
+    return items
+
+
+def projected_items(db) -> list:
+    """Новый путь: кортежи колонок и сериализатор из реестра"""
+    return [ORDERS.row(row) for row in ORDERS.project(db.query(Order)).all()]
+
+
+def measure(name: str, run, rows: int, repeat: int):
+    """Выполняет сценарий repeat раз и выводит медиану времени и строк в секунду"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        db = database.session_factory()
+        try:
+            started = time.perf_counter()
+            result = run(db)
+            timings.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    median = statistics.median(timings)
+    print(f"{name:<36} median={median * 1000:>8.1f} ms  {rows / median:>12,.0f} rows/s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order serialization benchmark")
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reseed", action="store_true")
+    args = parser.parse_args()
+
+    if args.reseed or seeded_orders() != args.orders:
+        print(f"seeding {args.orders} orders", file=sys.stderr)
+        seed(args.orders)
+
+    print(f"orders: {args.orders}")
+    legacy = measure("serialize_model (ORM objects)", legacy_items, args.orders, args.repeat)
+    projected = measure("ORDERS.row (projected tuples)", projected_items, args.orders, args.repeat)
+    assert legacy == projected, "serializers disagree"
+
+    measure("JSONResponse", lambda _db: JSONResponse(legacy).body, args.orders, args.repeat)
+    measure("ORJSONResponse", lambda _db: ORJSONResponse(projected).body, args.orders, args.repeat)
+    measure("old path total", lambda db: JSONResponse(legacy_items(db)).body, args.orders, args.repeat)
+    measure("new path total", lambda db: ORJSONResponse(projected_items(db)).body, args.orders, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
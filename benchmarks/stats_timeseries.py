@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк графиков статистики админ-панели.
+
+Заполняет SQLite-файл заказами (по умолчанию 1 000 000 за последние два года)
+и для каждого сценария сравнивает прежний способ построения графика (отдельные
+запросы SUM и COUNT на каждый день или месяц) с services.timeseries.time_series,
+который строит весь ряд одним GROUP BY. Выводит количество запросов к БД
+и время построения ряда, а также количество запросов и время /stats/dashboard,
+который читает закрытые дни из дневных сводок (services/rollups.py), поэтому
+его время почти не зависит от количества заказов.
+
+Запуск (из корня проекта):
+    python -m benchmarks.stats_timeseries --orders 1000000
+
+Повторный запуск с тем же --orders использует уже заполненную базу (--reseed, чтобы заполнить заново).
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "se1dhe_bench_stats.db")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{DB_PATH}")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from sqlalchemy import event, func, insert  # noqa: E402
+
+import database.db as database  # noqa: E402
+from admin.routers.stats import get_dashboard_stats  # noqa: E402
+from models.models import Base, Bot, Order, OrderStatus, User  # noqa: E402
+from services import rollups  # noqa: E402
+from services.timeseries import time_series  # noqa: E402
+
+STATUSES = [OrderStatus.PAID, OrderStatus.PAID, OrderStatus.PENDING, OrderStatus.CANCELLED]
+
+
+def seed(orders: int, users: int, bots: int, days: int, now: datetime):
+    """Создает схему и наполняет базу заказами пачками по 50 000 строк"""
+    Base.metadata.drop_all(database.engine)
+    Base.metadata.create_all(database.engine)
+
+    rng = random.Random(42)
+    with database.engine.begin() as conn:
+        conn.execute(insert(Bot), [
+            {"name": f"Bot {i}", "description": "Benchmark bot", "price": 100 + i, "discount": 0}
+            for i in range(bots)
+        ])
+        conn.execute(insert(User), [
+            {"telegram_id": 1_000_000 + i, "username": f"user{i}", "language": "ru",
+             "created_at": now - timedelta(seconds=rng.randrange(days * 86400))}
+            for i in range(users)
+        ])
+
+        batch_size = 50_000
+        for offset in range(0, orders, batch_size):
+            rows = []
+            for _ in range(min(batch_size, orders - offset)):
+                created_at = now - timedelta(seconds=rng.randrange(days * 86400))
+                rows.append({
+                    "user_id": rng.randrange(users) + 1,
+                    "bot_id": rng.randrange(bots) + 1,
+                    "amount": float(rng.randrange(50, 500)),
+                    "status": rng.choice(STATUSES),
+                    "payment_system": rng.choice(["freekassa", "paykassa"]),
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                })
+            conn.execute(insert(Order), rows)
+            print(f"seeded {offset + len(rows)}/{orders} orders", file=sys.stderr)
+
+    # Заказы вставлены в обход ORM, поэтому сводки заполняются так же, как командой python -m services.rollups
+    db = database.session_factory()
+    try:
+        started = time.perf_counter()
+        rollups.backfill(db)
+        print(f"rollups backfill: {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    finally:
+        db.close()
+
+
+def seeded_orders() -> int:
+    """Количество заказов в уже заполненной базе (0, если схемы нет)"""
+    db = database.session_factory()
+    try:
+        return db.query(func.count(Order.id)).scalar()
+    except Exception:
+        return 0
+    finally:
+        db.close()
+
+
+def install_query_counter() -> list:
+    """Считает запросы к БД"""
+    counter = [0]
+
+    def count(*_args):
+        counter[0] += 1
+
+    event.listen(database.engine, "before_cursor_execute", count)
+    return counter
+
+
+def legacy_series(db, start: datetime, buckets: int, step) -> list:
+    """Прежний способ: запросы SUM и COUNT на каждый интервал"""
+    series = []
+    bucket_start = start
+    for _ in range(buckets):
+        bucket_end = step(bucket_start)
+        paid = [Order.status == OrderStatus.PAID, Order.created_at >= bucket_start, Order.created_at < bucket_end]
+        sales = db.query(func.sum(Order.amount)).filter(*paid).scalar() or 0
+        orders = db.query(Order).filter(*paid).count()
+        series.append({"date": bucket_start, "sales": float(sales), "orders": orders})
+        bucket_start = bucket_end
+    return series
+
+
+def next_month(value: datetime) -> datetime:
+    return value.replace(year=value.year + 1, month=1) if value.month == 12 else value.replace(month=value.month + 1)
+
+
+def measure(name: str, run, counter: list, repeat: int):
+    """Выполняет сценарий repeat раз и выводит медиану времени и количество запросов"""
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        db = database.session_factory()
+        try:
+            before = counter[0]
+            started = time.perf_counter()
+            run(db)
+            timings.append(time.perf_counter() - started)
+            queries = counter[0] - before
+        finally:
+            db.close()
+    print(f"{name:<42} queries={queries:>5}  median={statistics.median(timings) * 1000:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stats time series benchmark")
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--bots", type=int, default=50)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--reseed", action="store_true")
+    args = parser.parse_args()
+
+    now = datetime.utcnow().replace(microsecond=0)
+    if args.reseed or seeded_orders() != args.orders:
+        seed(args.orders, args.users, args.bots, args.days, now)
+
+    counter = install_query_counter()
+    paid_metrics = {"sales": func.sum(Order.amount), "orders": func.count(Order.id)}
+    paid = [Order.status == OrderStatus.PAID]
+
+    today = now.replace(hour=0, minute=0, second=0)
+    month_start = now.replace(day=1, hour=0, minute=0, second=0)
+    year_start = month_start
+    for _ in range(11):
+        year_start = (year_start - timedelta(days=1)).replace(day=1)
+    hour_start = now.replace(minute=0, second=0) - timedelta(days=7)
+
+    scenarios = [
+        ("30 days by day", today - timedelta(days=29), 30, lambda value: value + timedelta(days=1), "day"),
+        ("12 months by month", year_start, 12, next_month, "month"),
+        ("7 days by hour", hour_start, 7 * 24 + 1, lambda value: value + timedelta(hours=1), "hour"),
+    ]
+
+    print(f"orders: {args.orders}")
+    for name, start, buckets, step, granularity in scenarios:
+        measure(f"legacy loop, {name}", lambda db: legacy_series(db, start, buckets, step), counter, args.repeat)
+        measure(f"time_series, {name}",
+                lambda db: time_series(db, Order.created_at, granularity, start, now, paid_metrics, paid),
+                counter, args.repeat)
+
+    for period in ("month", "year", "all"):
+        measure(f"/stats/dashboard?period={period}",
+                lambda db: get_dashboard_stats(period=period, start=None, end=None, granularity=None, db=db),
+                counter, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
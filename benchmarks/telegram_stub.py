@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Локальная замена Telegram Bot API для бенчмарков и тестов.
+
+StubSession подключается к aiogram.Bot вместо AiohttpSession: все вызовы API
+обрабатываются в памяти без сети, а отправленные сообщения сохраняются в `calls`.
+"""
+import asyncio
+import datetime
+import itertools
+from typing import Any, List, Optional
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message
+
+STUB_BOT_TOKEN = "123456:STUB-TOKEN"
+
+
+class StubSession(BaseSession):
+    """
+    Сессия aiogram, которая отвечает на запросы локально.
+
+    Args:
+        latency (float): Искусственная задержка ответа API в секундах
+    """
+
+    def __init__(self, latency: float = 0.0, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.calls: List[TelegramMethod] = []
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout: Optional[int] = None) -> Any:
+        self.calls.append(method)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        returning = method.__returning__
+        if returning is Message or Message in getattr(returning, "__args__", ()):
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.datetime.now(),
+                chat=Chat(id=int(chat_id), type="private"),
+                text=getattr(method, "text", None)
+            )
+        return True
+
+    async def stream_content(self, url: str, headers=None, timeout: int = 30, chunk_size: int = 65536,
+                             raise_for_status: bool = True):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def create_stub_bot(latency: float = 0.0) -> Bot:
+    """Создает экземпляр aiogram.Bot, работающий через StubSession"""
+    return Bot(token=STUB_BOT_TOKEN, session=StubSession(latency=latency))
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк режима webhook.
+
+Синтетические апдейты отправляются POST-запросами в приложение bot.webhook
+(через ASGI-транспорт, без сети), ответы Telegram API обрабатывает StubSession.
+Как и Telegram, клиент повторяет доставку обновлений, получивших 503, с растущей паузой.
+Выводятся задержка подтверждения webhook (p50/p99), пропускная способность
+обработки и метрики очереди (глубина, отклоненные обновления).
+
+Запуск (из корня проекта):
+    python -m benchmarks.webhook_ingestion --updates 3000 --concurrency 200 --workers 16 --queue-size 1000
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+from benchmarks.bot_handlers import build_payloads, create_dispatcher, install_query_latency, seed
+
+
+async def run(args):
+    import httpx
+    from benchmarks.telegram_stub import create_stub_bot
+    from bot.webhook import create_webhook_app
+    from config.settings import WEBHOOK_PATH
+
+    dp = create_dispatcher()
+    bot = create_stub_bot(latency=args.api_latency_ms / 1000)
+    app = create_webhook_app(dp, bot, queue_size=args.queue_size, workers=args.workers, secret="", webhook_url="")
+    payloads = build_payloads(args.updates, args.users, args.bots)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    ack_latencies = []
+    statuses = {}
+    redeliveries = 0
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def post(payload):
+                nonlocal redeliveries
+                delay = args.redelivery_delay_ms / 1000
+                while True:
+                    async with semaphore:
+                        started = time.perf_counter()
+                        response = await client.post(WEBHOOK_PATH, json=payload)
+                        ack_latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code != 503:
+                        return
+                    redeliveries += 1
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 5.0)
+
+            wall = time.perf_counter()
+            await asyncio.gather(*(post(payload) for payload in payloads))
+            ingest = time.perf_counter() - wall
+            await app.state.updates.join()
+            wall = time.perf_counter() - wall
+            metrics = app.state.updates.metrics()
+
+    percentiles = statistics.quantiles(ack_latencies, n=100)
+    print(f"posted updates:    {len(payloads)} (concurrency {args.concurrency})")
+    print(f"responses:         {statuses} (redeliveries {redeliveries})")
+    print(f"ingest rate:       {len(payloads) / ingest:.1f} updates/s")
+    print(f"processing rate:   {metrics['processed'] / wall:.1f} updates/s")
+    print(f"ack p50 latency:   {percentiles[49] * 1000:.2f} ms")
+    print(f"ack p99 latency:   {percentiles[98] * 1000:.2f} ms")
+    for name, value in metrics.items():
+        print(f"{name + ':':<19}{value}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--queue-size", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--bots", type=int, default=50)
+    parser.add_argument("--redelivery-delay-ms", type=float, default=100.0)
+    parser.add_argument("--query-latency-ms", type=float, default=2.0)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    seed(args.users, args.bots)
+    install_query_latency(args.query_latency_ms / 1000)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    # Логи обработчиков мешают чтению результатов
+    logging.disable(logging.CRITICAL)
+    sys.exit(main())
@@ -3,125 +3,108 @@ from aiogram import Dispatcher, types
 from aiogram.filters import Command
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.formatting import Text
-from sqlalchemy.orm import Session
-from models.models import Bot, Cart, CartItem, User
-from database.db import Session as DbSession
+from sqlalchemy import select, delete
+from models.models import Bot, Cart, CartItem
+from database.db import AsyncSessionLocal as AsyncDbSession
 from config.settings import DEFAULT_LANGUAGE
 from typing import Dict, List, Optional
+from bot.i18n import Translator, get_catalog, get_localized_text
+from services.cart import CartView, load_cart
+from services.users import UserEntry
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
-async def cmd_cart(message: types.Message):
+async def cmd_cart(message: types.Message, i18n: Translator):
     """
     Обработчик команды /cart
     Показывает содержимое корзины пользователя
     """
-    await show_cart(message)
+    await show_cart(message, i18n)
 
 
 # bot/handlers/cart.py
 
-async def show_cart(message: types.Message):
+def build_cart_message(cart: Optional[CartView], i18n: Translator):
     """
-    Показывает содержимое корзины пользователя
-    """
-    user_id = message.from_user.id
-    i18n = message.bot.get('i18n', lambda x: x)  # Получаем функцию локализации
-
-    db = DbSession()
-    try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
+    Формирует текст и клавиатуру корзины
 
-        if not user:
-            logger.warning(f"User {user_id} not found in database")
-            await message.answer(i18n("error_user_not_found"))
-            return
+    Args:
+        cart (Optional[CartView]): Корзина пользователя
+        i18n (Translator): Функция перевода
 
-        # Получаем корзину пользователя
-        cart = db.query(Cart).filter(Cart.user_id == user.id).first()
-
-        # Если корзины нет или она пуста
-        if not cart or not cart.items:
-            await message.answer(
-                i18n("cart_title") + "\n\n" +
-                i18n("cart_empty"),
-                reply_markup=InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [InlineKeyboardButton(
-                            text=i18n("catalog"),
-                            callback_data="menu:catalog"
-                        )]
-                    ]
-                )
+    Returns:
+        tuple: Текст сообщения и клавиатура
+    """
+    # Если корзины нет или она пуста
+    if not cart or cart.is_empty:
+        return (
+            i18n("cart_title") + "\n\n" + i18n("cart_empty"),
+            InlineKeyboardMarkup(
+                inline_keyboard=[
+                    [InlineKeyboardButton(
+                        text=i18n("catalog"),
+                        callback_data="menu:catalog"
+                    )]
+                ]
             )
-            return
-
-        # Формируем текст с содержимым корзины
-        cart_text = i18n("cart_title") + "\n\n"
-        cart_text += i18n("cart_description") + "\n\n"
-
-        total_price = 0
-
-        # Формируем клавиатуру
-        keyboard = InlineKeyboardMarkup(row_width=2)
-
-        # Добавляем информацию о каждом боте в корзине
-        for item in cart.items:
-            bot = item.bot
+        )
 
-            # Вычисляем цену с учетом скидки
-            price = bot.price
-            if bot.discount > 0:
-                price = price * (1 - bot.discount / 100)
+    # Формируем текст с содержимым корзины
+    cart_text = i18n("cart_title") + "\n\n"
+    cart_text += i18n("cart_description") + "\n\n"
+
+    # Информация о каждом боте в корзине и кнопки удаления
+    remove_buttons = []
+    for line in cart.lines:
+        cart_text += f"• {line.name} x{line.quantity} - {line.total:.2f} руб.\n"
+        remove_buttons.append(InlineKeyboardButton(
+            text=f"❌ {line.name}",
+            callback_data=f"cart:remove:{line.bot_id}"
+        ))
 
-            item_total = price * item.quantity
-            total_price += item_total
+    # Добавляем итоговую стоимость
+    cart_text += "\n" + i18n("cart_total", {"total": cart.total})
 
-            # Информация о боте
-            cart_text += f"• {bot.name} x{item.quantity} - {item_total:.2f} руб.\n"
+    # Кнопки удаления по две в ряд, затем кнопки действий
+    rows = [remove_buttons[i:i + 2] for i in range(0, len(remove_buttons), 2)]
+    rows.append([InlineKeyboardButton(text=i18n("cart_checkout"), callback_data="cart:checkout")])
+    rows.append([InlineKeyboardButton(text=i18n("cart_clear"), callback_data="cart:clear")])
+    rows.append([InlineKeyboardButton(text=i18n("back") + " ◀️", callback_data="menu:main")])
 
-            # Кнопки управления количеством
-            keyboard.add(
-                InlineKeyboardButton(
-                    text=f"❌ {bot.name}",
-                    callback_data=f"cart:remove:{bot.id}"
-                )
-            )
+    return cart_text, InlineKeyboardMarkup(inline_keyboard=rows)
 
-        # Добавляем итоговую стоимость
-        cart_text += "\n" + i18n("cart_total", {"total": total_price})
 
-        # Добавляем кнопки
-        keyboard.add(InlineKeyboardButton(
-            text=i18n("cart_checkout"),
-            callback_data="cart:checkout"
-        ))
+async def show_cart(message: types.Message, i18n: Translator):
+    """
+    Показывает содержимое корзины пользователя
+    """
+    user_id = message.from_user.id
 
-        keyboard.add(InlineKeyboardButton(
-            text=i18n("cart_clear"),
-            callback_data="cart:clear"
-        ))
+    db = AsyncDbSession()
+    try:
+        # Пользователь, корзина и боты загружаются одним запросом
+        cart = await load_cart(db, user_id)
 
-        keyboard.add(InlineKeyboardButton(
-            text=i18n("back") + " ◀️",
-            callback_data="menu:main"
-        ))
+        if not cart:
+            logger.warning(f"User {user_id} not found in database")
+            await message.answer(i18n("error_user_not_found"))
+            return
 
         # Отправляем сообщение
+        cart_text, keyboard = build_cart_message(cart, i18n)
         await message.answer(cart_text, reply_markup=keyboard)
 
     except Exception as e:
         logger.error(f"Error showing cart: {e}")
         await message.answer(i18n("error_general"))
     finally:
-        db.close()
+        await db.close()
 
 
-async def process_cart_callback(callback: types.CallbackQuery):
+async def process_cart_callback(callback: types.CallbackQuery, user: Optional[UserEntry] = None):
     """
     Обработчик callback-запросов для корзины
     """
@@ -133,18 +116,18 @@ async def process_cart_callback(callback: types.CallbackQuery):
 
     # Обрабатываем соответствующее действие
     if action == 'add':
-        await add_to_cart(callback)
+        await add_to_cart(callback, user)
     elif action == 'remove':
-        await remove_from_cart(callback)
+        await remove_from_cart(callback, user)
     elif action == 'clear':
-        await clear_cart(callback)
+        await clear_cart(callback, user)
     elif action == 'checkout':
         await checkout(callback)
     elif action == 'buy_now':
-        await buy_now(callback)
+        await buy_now(callback, user)
 
 
-async def add_to_cart(callback: types.CallbackQuery):
+async def add_to_cart(callback: types.CallbackQuery, user: Optional[UserEntry] = None):
     """
     Добавляет бота в корзину
     """
@@ -153,37 +136,34 @@ async def add_to_cart(callback: types.CallbackQuery):
     user_id = callback.from_user.id
     language = callback.from_user.language_code or DEFAULT_LANGUAGE
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             logger.warning(f"User {user_id} not found in database")
             await callback.message.answer("Пользователь не найден. Пожалуйста, запустите бота командой /start")
             return
 
         # Получаем информацию о боте
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
+        bot = await db.get(Bot, bot_id)
 
         if not bot:
             await callback.message.answer("Бот не найден. Возможно, он был удален.")
             return
 
         # Получаем или создаем корзину
-        cart = db.query(Cart).filter(Cart.user_id == user.id).first()
+        cart = await db.scalar(select(Cart).where(Cart.user_id == user.id))
 
         if not cart:
             cart = Cart(user_id=user.id)
             db.add(cart)
-            db.commit()
-            db.refresh(cart)
+            await db.commit()
+            await db.refresh(cart)
 
         # Проверяем, есть ли уже этот бот в корзине
-        cart_item = db.query(CartItem).filter(
+        cart_item = await db.scalar(select(CartItem).where(
             CartItem.cart_id == cart.id,
             CartItem.bot_id == bot_id
-        ).first()
+        ))
 
         if cart_item:
             # Если бот уже в корзине, увеличиваем количество
@@ -197,10 +177,10 @@ async def add_to_cart(callback: types.CallbackQuery):
             )
             db.add(cart_item)
 
-        db.commit()
+        await db.commit()
 
         # Отправляем сообщение об успешном добавлении
-        message_text = get_localized_text('bot_added_to_cart', language).format(name=bot.name)
+        message_text = get_localized_text('bot_added_to_cart', language, name=bot.name)
 
         # Создаем клавиатуру с кнопками
         keyboard = InlineKeyboardMarkup(
@@ -222,10 +202,10 @@ async def add_to_cart(callback: types.CallbackQuery):
         logger.error(f"Error adding to cart: {e}")
         await callback.message.answer("Произошла ошибка при добавлении в корзину. Пожалуйста, попробуйте позже.")
     finally:
-        db.close()
+        await db.close()
 
 
-async def remove_from_cart(callback: types.CallbackQuery):
+async def remove_from_cart(callback: types.CallbackQuery, user: Optional[UserEntry] = None):
     """
     Удаляет бота из корзины
     """
@@ -234,40 +214,37 @@ async def remove_from_cart(callback: types.CallbackQuery):
     user_id = callback.from_user.id
     language = callback.from_user.language_code or DEFAULT_LANGUAGE
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             logger.warning(f"User {user_id} not found in database")
             await callback.message.answer("Пользователь не найден. Пожалуйста, запустите бота командой /start")
             return
 
         # Получаем корзину
-        cart = db.query(Cart).filter(Cart.user_id == user.id).first()
+        cart = await db.scalar(select(Cart).where(Cart.user_id == user.id))
 
         if not cart:
             await callback.message.answer("Корзина пуста.")
             return
 
         # Получаем информацию о боте
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
+        bot = await db.get(Bot, bot_id)
 
         if not bot:
             await callback.message.answer("Бот не найден. Возможно, он был удален.")
             return
 
         # Удаляем элемент из корзины
-        db.query(CartItem).filter(
+        await db.execute(delete(CartItem).where(
             CartItem.cart_id == cart.id,
             CartItem.bot_id == bot_id
-        ).delete()
+        ))
 
-        db.commit()
+        await db.commit()
 
         # Отправляем сообщение об успешном удалении
-        message_text = get_localized_text('bot_removed_from_cart', language).format(name=bot.name)
+        message_text = get_localized_text('bot_removed_from_cart', language, name=bot.name)
 
         # Обновляем корзину
         await callback.message.answer(message_text)
@@ -277,36 +254,33 @@ async def remove_from_cart(callback: types.CallbackQuery):
         logger.error(f"Error removing from cart: {e}")
         await callback.message.answer("Произошла ошибка при удалении из корзины. Пожалуйста, попробуйте позже.")
     finally:
-        db.close()
+        await db.close()
 
 
-async def clear_cart(callback: types.CallbackQuery):
+async def clear_cart(callback: types.CallbackQuery, user: Optional[UserEntry] = None):
     """
     Очищает корзину пользователя
     """
     user_id = callback.from_user.id
     language = callback.from_user.language_code or DEFAULT_LANGUAGE
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             logger.warning(f"User {user_id} not found in database")
             await callback.message.answer("Пользователь не найден. Пожалуйста, запустите бота командой /start")
             return
 
         # Получаем корзину
-        cart = db.query(Cart).filter(Cart.user_id == user.id).first()
+        cart = await db.scalar(select(Cart).where(Cart.user_id == user.id))
 
         if not cart:
             await callback.message.answer("Корзина уже пуста.")
             return
 
         # Удаляем все элементы из корзины
-        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-        db.commit()
+        await db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
+        await db.commit()
 
         # Отправляем сообщение об успешной очистке
         await callback.message.answer("Корзина очищена.")
@@ -329,7 +303,7 @@ async def clear_cart(callback: types.CallbackQuery):
         logger.error(f"Error clearing cart: {e}")
         await callback.message.answer("Произошла ошибка при очистке корзины. Пожалуйста, попробуйте позже.")
     finally:
-        db.close()
+        await db.close()
 
 
 async def checkout(callback: types.CallbackQuery):
@@ -361,7 +335,7 @@ async def checkout(callback: types.CallbackQuery):
     )
 
 
-async def buy_now(callback: types.CallbackQuery):
+async def buy_now(callback: types.CallbackQuery, user: Optional[UserEntry] = None):
     """
     Покупка бота сразу (добавление в корзину и переход к оформлению)
     """
@@ -374,7 +348,7 @@ async def buy_now(callback: types.CallbackQuery):
     new_callback.data = f"cart:add:{bot_id}"
 
     # Добавляем в корзину
-    await add_to_cart(new_callback)
+    await add_to_cart(new_callback, user)
 
     # Переходим к оформлению заказа
     await checkout(callback)
@@ -387,177 +361,25 @@ async def show_cart_callback(callback: types.CallbackQuery):
     user_id = callback.from_user.id
     language = callback.from_user.language_code or DEFAULT_LANGUAGE
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
+        # Пользователь, корзина и боты загружаются одним запросом
+        cart = await load_cart(db, user_id)
 
-        if not user:
+        if not cart:
             logger.warning(f"User {user_id} not found in database")
             await callback.message.answer("Пользователь не найден. Пожалуйста, запустите бота командой /start")
             return
 
-        # Получаем корзину пользователя
-        cart = db.query(Cart).filter(Cart.user_id == user.id).first()
-
-        # Если корзины нет или она пуста
-        if not cart or not cart.items:
-            await callback.message.edit_text(
-                get_localized_text('cart_title', language) + "\n\n" +
-                get_localized_text('cart_empty', language),
-                reply_markup=InlineKeyboardMarkup(
-                    inline_keyboard=[
-                        [InlineKeyboardButton(
-                            text=get_localized_text('catalog', language),
-                            callback_data="menu:catalog"
-                        )]
-                    ]
-                )
-            )
-            return
-
-        # Формируем текст с содержимым корзины
-        cart_text = get_localized_text('cart_title', language) + "\n\n"
-        cart_text += get_localized_text('cart_description', language) + "\n\n"
-
-        total_price = 0
-
-        # Формируем клавиатуру
-        keyboard = InlineKeyboardMarkup(row_width=2)
-
-        # Добавляем информацию о каждом боте в корзине
-        for item in cart.items:
-            bot = item.bot
-
-            # Вычисляем цену с учетом скидки
-            price = bot.price
-            if bot.discount > 0:
-                price = price * (1 - bot.discount / 100)
-
-            item_total = price * item.quantity
-            total_price += item_total
-
-            # Информация о боте
-            cart_text += f"• {bot.name} x{item.quantity} - {item_total:.2f} руб.\n"
-
-            # Кнопки управления количеством
-            keyboard.add(
-                InlineKeyboardButton(
-                    text=f"❌ {bot.name}",
-                    callback_data=f"cart:remove:{bot.id}"
-                )
-            )
-
-        # Добавляем итоговую стоимость
-        cart_text += "\n" + get_localized_text('cart_total', language).format(total=total_price)
-
-        # Добавляем кнопки
-        keyboard.add(InlineKeyboardButton(
-            text=get_localized_text('cart_checkout', language),
-            callback_data="cart:checkout"
-        ))
-
-        keyboard.add(InlineKeyboardButton(
-            text=get_localized_text('cart_clear', language),
-            callback_data="cart:clear"
-        ))
-
-        keyboard.add(InlineKeyboardButton(
-            text=get_localized_text('back', language) + " ◀️",
-            callback_data="menu:main"
-        ))
-
         # Отправляем сообщение
+        cart_text, keyboard = build_cart_message(cart, get_catalog().get_translator(language))
         await callback.message.edit_text(cart_text, reply_markup=keyboard)
 
     except Exception as e:
         logger.error(f"Error showing cart: {e}")
         await callback.message.answer("Произошла ошибка при загрузке корзины. Пожалуйста, попробуйте позже.")
     finally:
-        db.close()
-
-
-def get_localized_text(key: str, lang: str) -> str:
-    """
-    Заглушка для получения локализованного текста
-    В реальном приложении здесь бы использовалась I18n middleware
-
-    Args:
-        key (str): Ключ текста
-        lang (str): Код языка
-
-    Returns:
-        str: Локализованный текст
-    """
-    # Базовые тексты для корзины
-    texts = {
-        'cart_title': {
-            'ru': '🛍 Корзина',
-            'uk': '🛍 Кошик',
-            'en': '🛍 Cart'
-        },
-        'cart_description': {
-            'ru': 'Ваши выбранные боты:',
-            'uk': 'Ваші вибрані боти:',
-            'en': 'Your selected bots:'
-        },
-        'cart_empty': {
-            'ru': 'Ваша корзина пуста. Перейдите в каталог, чтобы выбрать бота.',
-            'uk': 'Ваш кошик порожній. Перейдіть до каталогу, щоб вибрати бота.',
-            'en': 'Your cart is empty. Go to the catalog to choose a bot.'
-        },
-        'cart_total': {
-            'ru': 'Итого: {total:.2f} руб.',
-            'uk': 'Всього: {total:.2f} руб.',
-            'en': 'Total: {total:.2f} RUB'
-        },
-        'cart_checkout': {
-            'ru': '💳 Оформить заказ',
-            'uk': '💳 Оформити замовлення',
-            'en': '💳 Checkout'
-        },
-        'cart_clear': {
-            'ru': '🗑 Очистить корзину',
-            'uk': '🗑 Очистити кошик',
-            'en': '🗑 Clear Cart'
-        },
-        'catalog': {
-            'ru': '🛒 Перейти в каталог',
-            'uk': '🛒 Перейти до каталогу',
-            'en': '🛒 Go to Catalog'
-        },
-        'bot_added_to_cart': {
-            'ru': '✅ Бот "{name}" добавлен в корзину!',
-            'uk': '✅ Бот "{name}" додано до кошика!',
-            'en': '✅ Bot "{name}" has been added to your cart!'
-        },
-        'bot_removed_from_cart': {
-            'ru': '❌ Бот "{name}" удален из корзины.',
-            'uk': '❌ Бот "{name}" видалено з кошика.',
-            'en': '❌ Bot "{name}" has been removed from your cart.'
-        },
-        'checkout_title': {
-            'ru': '🛒 Оформление заказа',
-            'uk': '🛒 Оформлення замовлення',
-            'en': '🛒 Checkout'
-        },
-        'checkout_description': {
-            'ru': 'Выберите способ оплаты:',
-            'uk': 'Виберіть спосіб оплати:',
-            'en': 'Choose a payment method:'
-        },
-        'back': {
-            'ru': 'Назад',
-            'uk': 'Назад',
-            'en': 'Back'
-        }
-    }
-
-    # Если язык не поддерживается, используем русский
-    if lang not in ['ru', 'uk', 'en']:
-        lang = 'ru'
-
-    return texts.get(key, {}).get(lang, f"Missing text: {key}")
+        await db.close()
 
 
 def register_cart_handlers(dp: Dispatcher):
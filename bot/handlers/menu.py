@@ -4,6 +4,7 @@ from aiogram.utils.formatting import Text
 
 from bot.keyboards.main_menu import get_main_menu_keyboard, get_inline_main_menu
 from config.settings import DEFAULT_LANGUAGE
+from bot.i18n import get_localized_text
 import logging
 
 logger = logging.getLogger(__name__)
@@ -126,52 +127,6 @@ async def process_menu_callback(callback: types.CallbackQuery):
         )
 
 
-def get_localized_text(key: str, lang: str) -> str:
-    """
-    Возвращает локализованный текст по ключу
-
-    Args:
-        key (str): Ключ текста
-        lang (str): Код языка
-
-    Returns:
-        str: Локализованный текст
-    """
-    # Если язык не поддерживается, используем русский
-    if lang not in ['ru', 'uk', 'en']:
-        lang = 'ru'
-
-    texts = {
-        'catalog_header': {
-            'ru': '🛒 <b>Каталог ботов</b>\n\nВыберите категорию или конкретного бота:',
-            'uk': '🛒 <b>Каталог ботів</b>\n\nВиберіть категорію або конкретного бота:',
-            'en': '🛒 <b>Bot Catalog</b>\n\nChoose a category or a specific bot:'
-        },
-        'cart_header': {
-            'ru': '🛍 <b>Корзина</b>\n\nВаши выбранные боты:',
-            'uk': '🛍 <b>Кошик</b>\n\nВаші вибрані боти:',
-            'en': '🛍 <b>Cart</b>\n\nYour selected bots:'
-        },
-        'my_bots_header': {
-            'ru': '🤖 <b>Мои боты</b>\n\nСписок приобретенных вами ботов:',
-            'uk': '🤖 <b>Мої боти</b>\n\nСписок придбаних вами ботів:',
-            'en': '🤖 <b>My Bots</b>\n\nList of bots you have purchased:'
-        },
-        'support_header': {
-            'ru': '🆘 <b>Поддержка</b>\n\nЗадайте ваш вопрос или опишите проблему:',
-            'uk': '🆘 <b>Підтримка</b>\n\nЗадайте ваше питання або опишіть проблему:',
-            'en': '🆘 <b>Support</b>\n\nAsk your question or describe the problem:'
-        },
-        'settings_header': {
-            'ru': '⚙️ <b>Настройки</b>\n\nВы можете изменить язык или другие параметры:',
-            'uk': '⚙️ <b>Налаштування</b>\n\nВи можете змінити мову або інші параметри:',
-            'en': '⚙️ <b>Settings</b>\n\nYou can change language or other settings:'
-        }
-    }
-
-    return texts.get(key, {}).get(lang, f"Missing text: {key}")
-
-
 def register_menu_handlers(dp: Dispatcher):
     """
     Регистрирует обработчики команд меню
@@ -2,13 +2,19 @@
 from aiogram import Dispatcher, types
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.formatting import Text
-from models.models import User, Order, Bot, OrderStatus, Cart
-from database.db import Session as DbSession
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, selectinload
+from models.models import Order, OrderItem
+from database.db import AsyncSessionLocal as AsyncDbSession
 from config.settings import DEFAULT_LANGUAGE
 from payments.freekassa import FreeKassa
 from payments.paykassa import PayKassa
-from typing import Dict
+from typing import Dict, Optional
 
+from bot.i18n import get_localized_text
+from services.cart import load_cart
+from services.checkout import create_order
+from services.payment_webhooks import apply_payment_notification
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,45 +43,26 @@ async def process_freekassa_payment(callback: types.CallbackQuery, user_id: int,
     """
     Обрабатывает оплату через FreeKassa
     """
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        if not user:
+        # Пользователь, корзина и боты загружаются одним запросом, сумма считается за один проход
+        cart = await load_cart(db, user_id)
+        if not cart:
             await callback.message.answer(
                 get_localized_text('error_user_not_found', language)
             )
             return
 
-        # Получаем корзину пользователя
-        cart = db.query(Cart).filter(Cart.user_id == user.id).first()
-        if not cart or not cart.items:
+        if cart.is_empty:
             await callback.message.answer(
                 get_localized_text('cart_empty', language)
             )
             return
 
-        # Рассчитываем общую сумму заказа
-        total_amount = 0
-        for item in cart.items:
-            price = item.bot.price
-            if item.bot.discount > 0:
-                price = price * (1 - item.bot.discount / 100)
-            total_amount += price * item.quantity
-
-        # Создаем новый заказ для первого товара в корзине
-        # (в реальной системе можно создать один заказ на все товары)
-        first_item = cart.items[0]
-        new_order = Order(
-            user_id=user.id,
-            bot_id=first_item.bot_id,
-            amount=total_amount,
-            status=OrderStatus.PENDING,
-            payment_system="freekassa"
-        )
-        db.add(new_order)
-        db.commit()
-        db.refresh(new_order)
+        total_amount = cart.total
+
+        # Заказ со всеми позициями корзины создается в одной транзакции
+        new_order = await create_order(db, cart, "freekassa")
 
         # Инициализируем FreeKassa
         freekassa = FreeKassa()
@@ -110,57 +97,39 @@ async def process_freekassa_payment(callback: types.CallbackQuery, user_id: int,
         logger.error(f"Error processing FreeKassa payment: {e}")
         await callback.message.answer(get_localized_text('error_payment', language))
     finally:
-        db.close()
+        await db.close()
 
 
 async def process_paykassa_payment(callback: types.CallbackQuery, user_id: int, language: str):
     """
     Обрабатывает оплату через PayKassa
     """
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        if not user:
+        # Пользователь, корзина и боты загружаются одним запросом, сумма считается за один проход
+        cart = await load_cart(db, user_id)
+        if not cart:
             await callback.message.answer(
                 get_localized_text('error_user_not_found', language)
             )
             return
 
-        # Получаем корзину пользователя
-        cart = db.query(Cart).filter(Cart.user_id == user.id).first()
-        if not cart or not cart.items:
+        if cart.is_empty:
             await callback.message.answer(
                 get_localized_text('cart_empty', language)
             )
             return
 
-        # Рассчитываем общую сумму заказа
-        total_amount = 0
-        for item in cart.items:
-            price = item.bot.price
-            if item.bot.discount > 0:
-                price = price * (1 - item.bot.discount / 100)
-            total_amount += price * item.quantity
-
-        # Создаем новый заказ для первого товара в корзине
-        first_item = cart.items[0]
-        new_order = Order(
-            user_id=user.id,
-            bot_id=first_item.bot_id,
-            amount=total_amount,
-            status=OrderStatus.PENDING,
-            payment_system="paykassa"
-        )
-        db.add(new_order)
-        db.commit()
-        db.refresh(new_order)
+        total_amount = cart.total
+
+        # Заказ со всеми позициями корзины создается в одной транзакции
+        new_order = await create_order(db, cart, "paykassa")
 
         # Инициализируем PayKassa
         paykassa = PayKassa()
 
         # Создаем платеж
-        payment_data = paykassa.create_payment(
+        payment_data = await paykassa.create_payment(
             order_id=new_order.id,
             amount=total_amount,
             description=f"Оплата заказа #{new_order.id}"
@@ -172,6 +141,10 @@ async def process_paykassa_payment(callback: types.CallbackQuery, user_id: int,
             )
             return
 
+        # Номер счета нужен для сверки статуса заказа, если уведомление об оплате не придет
+        new_order.payment_id = payment_data.get('payment_id')
+        await db.commit()
+
         # Отправляем сообщение с ссылкой на оплату
         await callback.message.answer(
             get_localized_text('payment_processing', language) + "\n\n" +
@@ -194,7 +167,7 @@ async def process_paykassa_payment(callback: types.CallbackQuery, user_id: int,
         logger.error(f"Error processing PayKassa payment: {e}")
         await callback.message.answer(get_localized_text('error_payment', language))
     finally:
-        db.close()
+        await db.close()
 
 
 async def process_payment_cancel(callback: types.CallbackQuery):
@@ -220,244 +193,109 @@ async def process_payment_notification(data: Dict, payment_system: str):
     """
     Обрабатывает уведомления о платежах от платежных систем.
     Этот метод должен быть вызван из FastAPI-обработчика вебхуков.
+
+    Повторные уведомления не меняют заказ (services/payment_webhooks.py), а
+    сообщение пользователю записывается в outbox вместе с оплатой заказа и
+    отправляется процессом бота (services/outbox.py).
     """
     try:
         if payment_system == 'freekassa':
-            # Инициализация FreeKassa
-            freekassa = FreeKassa()
-
             # Проверка подписи
-            if not freekassa.verify_notification(data):
+            if not FreeKassa().verify_notification(data):
                 logger.warning("Invalid FreeKassa notification signature")
                 return {"success": False}
 
             # Получение данных заказа
             order_id = int(data.get('MERCHANT_ORDER_ID'))
             amount = float(data.get('AMOUNT'))
-
-            # Обновление статуса заказа
-            db = DbSession()
-            try:
-                order = db.query(Order).filter(Order.id == order_id).first()
-                if not order:
-                    logger.warning(f"Order {order_id} not found")
-                    return {"success": False}
-
-                order.status = OrderStatus.PAID
-                order.payment_system = "freekassa"
-                order.payment_id = data.get('intid')
-                db.commit()
-
-                # Уведомление пользователя через Telegram-бота
-                await send_payment_notification(order)
-
-                return {"success": True}
-            finally:
-                db.close()
+            transaction_id = data.get('intid')
 
         elif payment_system == 'paykassa':
-            # Инициализация PayKassa
-            paykassa = PayKassa()
-
             # Проверка подписи
-            if not paykassa.verify_notification(data):
+            if not PayKassa().verify_notification(data):
                 logger.warning("Invalid PayKassa notification signature")
                 return {"success": False}
 
             # Получение данных заказа
             order_id = int(data.get('order_id'))
             amount = float(data.get('amount'))
-
-            # Обновление статуса заказа
-            db = DbSession()
-            try:
-                order = db.query(Order).filter(Order.id == order_id).first()
-                if not order:
-                    logger.warning(f"Order {order_id} not found")
-                    return {"success": False}
-
-                order.status = OrderStatus.PAID
-                order.payment_system = "paykassa"
-                order.payment_id = data.get('transaction_id')
-                db.commit()
-
-                # Уведомление пользователя через Telegram-бота
-                await send_payment_notification(order)
-
-                return {"success": True}
-            finally:
-                db.close()
+            transaction_id = data.get('transaction_id')
         else:
             logger.warning(f"Unknown payment system: {payment_system}")
             return {"success": False}
+
+        # Без id транзакции заказ может быть оплачен только одним уведомлением
+        result = await apply_payment_notification(payment_system, str(transaction_id or f"order-{order_id}"),
+                                                  order_id, amount)
+        return {"success": result.success, "status": result.status, "duplicate": result.duplicate}
     except Exception as e:
         logger.error(f"Error processing payment notification: {e}")
         return {"success": False}
 
 
-async def send_payment_notification(order: Order):
-    """Отправляет уведомление пользователю о успешной оплате заказа"""
-    try:
-        # Получаем данные пользователя и бота
-        db = DbSession()
-        try:
-            user = db.query(User).filter(User.id == order.user_id).first()
-            bot_item = db.query(Bot).filter(Bot.id == order.bot_id).first()
-
-            if not user or not bot_item:
-                logger.warning(f"User or bot not found for order {order.id}")
-                return
-
-            # Определяем язык пользователя
-            language = user.language or DEFAULT_LANGUAGE
-
-            # Создаем текст сообщения
-            message_text = get_localized_text('payment_success', language) + "\n\n"
-            message_text += f"**{bot_item.name}**\n"
-            message_text += f"{get_localized_text('order_id', language)}: {order.id}\n"
-            message_text += f"{get_localized_text('amount', language)}: {order.amount} руб.\n\n"
-
-            # Создаем клавиатуру с кнопками
-            keyboard = InlineKeyboardMarkup(
-                inline_keyboard=[
-                    [InlineKeyboardButton(
-                        text=get_localized_text('download_bot', language),
-                        url=f"/download/{bot_item.archive_path}" if bot_item.archive_path else "#"
-                    )],
-                    [InlineKeyboardButton(
-                        text=get_localized_text('read_manual', language),
-                        url=bot_item.readme_url or "#"
-                    )]
-                ]
-            )
-
-            # Добавляем кнопку для группы поддержки, если она указана
-            if bot_item.support_group_link:
-                keyboard.inline_keyboard.append([
-                    InlineKeyboardButton(
-                        text=get_localized_text('join_support_group', language),
-                        url=bot_item.support_group_link
-                    )
-                ])
-
-            # Отправляем сообщение через бота
-            # Предполагается, что бот уже инициализирован и доступен
-            from bot.main import bot
-            await bot.send_message(
-                chat_id=user.telegram_id,
-                text=message_text,
-                reply_markup=keyboard,
-                parse_mode="HTML"
-            )
-
-            logger.info(f"Payment notification sent to user {user.telegram_id} for order {order.id}")
-        finally:
-            db.close()
-    except Exception as e:
-        logger.error(f"Error sending payment notification: {e}")
-
-
-def get_localized_text(key: str, lang: str) -> str:
+async def render_payment_success(payload: Dict) -> Optional[Dict]:
     """
-    Заглушка для получения локализованного текста
-    В реальном приложении здесь бы использовалась I18n middleware
-
-    Args:
-        key (str): Ключ текста
-        lang (str): Код языка
+    Формирует сообщение об успешной оплате заказа (сообщение payment_success из outbox).
 
     Returns:
-        str: Локализованный текст
+        Optional[Dict]: Параметры bot.send_message или None, если заказ не найден
     """
-    # Базовые тексты для платежей
-    texts = {
-        'payment_processing': {
-            'ru': '⏳ Обработка платежа...',
-            'uk': '⏳ Обробка платежу...',
-            'en': '⏳ Processing payment...'
-        },
-        'payment_freekassa_redirect': {
-            'ru': 'Сейчас вы будете перенаправлены на сайт FreeKassa для совершения оплаты.',
-            'uk': 'Зараз вас буде перенаправлено на сайт FreeKassa для здійснення оплати.',
-            'en': 'You will now be redirected to the FreeKassa website to make a payment.'
-        },
-        'payment_paykassa_redirect': {
-            'ru': 'Сейчас вы будете перенаправлены на сайт PayKassa для совершения оплаты.',
-            'uk': 'Зараз вас буде перенаправлено на сайт PayKassa для здійснення оплати.',
-            'en': 'You will now be redirected to the PayKassa website to make a payment.'
-        },
-        'payment_open_link': {
-            'ru': '🔗 Открыть ссылку для оплаты',
-            'uk': '🔗 Відкрити посилання для оплати',
-            'en': '🔗 Open payment link'
-        },
-        'payment_cancelled': {
-            'ru': '❌ Платеж отменен',
-            'uk': '❌ Платіж скасовано',
-            'en': '❌ Payment cancelled'
-        },
-        'payment_success': {
-            'ru': '✅ Оплата успешно прошла! Спасибо за покупку.',
-            'uk': '✅ Оплата успішно пройшла! Дякуємо за покупку.',
-            'en': '✅ Payment successful! Thank you for your purchase.'
-        },
-        'back_to_cart': {
-            'ru': '🛍 Вернуться в корзину',
-            'uk': '🛍 Повернутися до кошика',
-            'en': '🛍 Back to cart'
-        },
-        'error_user_not_found': {
-            'ru': 'Ошибка: пользователь не найден. Пожалуйста, перезапустите бота командой /start.',
-            'uk': 'Помилка: користувача не знайдено. Будь ласка, перезапустіть бота командою /start.',
-            'en': 'Error: user not found. Please restart the bot with the /start command.'
-        },
-        'error_payment': {
-            'ru': 'Произошла ошибка при создании платежа. Пожалуйста, попробуйте позже или обратитесь в поддержку.',
-            'uk': 'Сталася помилка при створенні платежу. Будь ласка, спробуйте пізніше або зверніться до підтримки.',
-            'en': 'An error occurred while creating the payment. Please try again later or contact support.'
-        },
-        'cancel': {
-            'ru': 'Отмена',
-            'uk': 'Скасувати',
-            'en': 'Cancel'
-        },
-        'cart_empty': {
-            'ru': 'Ваша корзина пуста. Перейдите в каталог, чтобы выбрать бота.',
-            'uk': 'Ваш кошик порожній. Перейдіть до каталогу, щоб вибрати бота.',
-            'en': 'Your cart is empty. Go to the catalog to choose a bot.'
-        },
-        'download_bot': {
-            'ru': '📥 Скачать бота',
-            'uk': '📥 Завантажити бота',
-            'en': '📥 Download Bot'
-        },
-        'read_manual': {
-            'ru': '📖 Прочитать инструкцию',
-            'uk': '📖 Прочитати інструкцію',
-            'en': '📖 Read Manual'
-        },
-        'join_support_group': {
-            'ru': '👥 Присоединиться к группе поддержки',
-            'uk': '👥 Приєднатися до групи підтримки',
-            'en': '👥 Join Support Group'
-        },
-        'order_id': {
-            'ru': 'Номер заказа',
-            'uk': 'Номер замовлення',
-            'en': 'Order ID'
-        },
-        'amount': {
-            'ru': 'Сумма',
-            'uk': 'Сума',
-            'en': 'Amount'
-        }
-    }
-
-    # Если язык не поддерживается, используем русский
-    if lang not in ['ru', 'uk', 'en']:
-        lang = 'ru'
-
-    return texts.get(key, {}).get(lang, f"Missing text: {key}")
+    # Заказ с пользователем и позиции с ботами загружаются двумя запросами
+    db = AsyncDbSession()
+    try:
+        order = (await db.execute(
+            select(Order)
+            .options(joinedload(Order.user), joinedload(Order.bot), selectinload(Order.items).joinedload(OrderItem.bot))
+            .where(Order.id == payload["order_id"])
+        )).scalar_one_or_none()
+    finally:
+        await db.close()
+
+    if not order or not order.user or not order.bot:
+        logger.warning(f"User or bot not found for order {payload['order_id']}")
+        return None
+    user = order.user
+    # Заказы, созданные до появления позиций, содержат одного бота
+    bots = [item.bot for item in order.items] or [order.bot]
+
+    # Определяем язык пользователя
+    language = user.language or DEFAULT_LANGUAGE
+
+    # Создаем текст сообщения
+    message_text = get_localized_text('payment_success', language) + "\n\n"
+    for bot_item in bots:
+        message_text += f"**{bot_item.name}**\n"
+    message_text += f"{get_localized_text('order_id', language)}: {order.id}\n"
+    message_text += f"{get_localized_text('amount', language)}: {order.amount} руб.\n\n"
+
+    # Создаем клавиатуру с кнопками для каждого купленного бота
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[])
+    for bot_item in bots:
+        # Если ботов несколько, в кнопках указывается название
+        suffix = f" ({bot_item.name})" if len(bots) > 1 else ""
+        keyboard.inline_keyboard.append([
+            InlineKeyboardButton(
+                text=get_localized_text('download_bot', language) + suffix,
+                url=f"/download/{bot_item.archive_path}" if bot_item.archive_path else "#"
+            )
+        ])
+        keyboard.inline_keyboard.append([
+            InlineKeyboardButton(
+                text=get_localized_text('read_manual', language) + suffix,
+                url=bot_item.readme_url or "#"
+            )
+        ])
+
+        # Добавляем кнопку для группы поддержки, если она указана
+        if bot_item.support_group_link:
+            keyboard.inline_keyboard.append([
+                InlineKeyboardButton(
+                    text=get_localized_text('join_support_group', language) + suffix,
+                    url=bot_item.support_group_link
+                )
+            ])
+
+    return {"text": message_text, "reply_markup": keyboard, "parse_mode": "HTML"}
 
 
 def register_payment_handlers(dp: Dispatcher):
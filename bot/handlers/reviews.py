@@ -5,10 +5,13 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.formatting import Text
-from sqlalchemy.orm import Session
-from models.models import User, Bot, Review
-from database.db import Session as DbSession
+from sqlalchemy import select
+from models.models import Bot, Review
+from database.db import AsyncSessionLocal as AsyncDbSession
 from config.settings import DEFAULT_LANGUAGE
+from bot.i18n import get_localized_text
+from services.users import UserEntry
+from typing import Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,22 +24,18 @@ class ReviewStates(StatesGroup):
     waiting_for_text = State()
 
 
-async def cmd_review(message: types.Message, state: FSMContext):
+async def cmd_review(message: types.Message, state: FSMContext, user: Optional[UserEntry] = None):
     """
     Обработчик команды /review
     Начинает процесс оставления отзыва
     """
     language = message.from_user.language_code or DEFAULT_LANGUAGE
-    user_id = message.from_user.id
 
     # Получаем список ботов, купленных пользователем
     # В реальном приложении здесь должен быть запрос к БД
     # Сейчас используем заглушку
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             await message.answer(
                 get_localized_text('error_user_not_found', language)
@@ -45,7 +44,7 @@ async def cmd_review(message: types.Message, state: FSMContext):
 
         # Здесь должен быть код для получения списка ботов, которые купил пользователь
         # Для заглушки просто берем первые 3 бота из БД
-        purchased_bots = db.query(Bot).limit(3).all()
+        purchased_bots = (await db.scalars(select(Bot).limit(3))).all()
 
         if not purchased_bots:
             await message.answer(
@@ -89,7 +88,7 @@ async def cmd_review(message: types.Message, state: FSMContext):
         logger.error(f"Error in review command: {e}")
         await message.answer(get_localized_text('error_general', language))
     finally:
-        db.close()
+        await db.close()
 
 
 async def process_bot_selection(callback: types.CallbackQuery, state: FSMContext):
@@ -173,12 +172,11 @@ async def process_rating_selection(callback: types.CallbackQuery, state: FSMCont
     await state.set_state(ReviewStates.waiting_for_text)
 
 
-async def process_review_text(message: types.Message, state: FSMContext):
+async def process_review_text(message: types.Message, state: FSMContext, user: Optional[UserEntry] = None):
     """
     Обрабатывает текст отзыва
     """
     language = message.from_user.language_code or DEFAULT_LANGUAGE
-    user_id = message.from_user.id
 
     # Получаем данные из state
     data = await state.get_data()
@@ -186,11 +184,8 @@ async def process_review_text(message: types.Message, state: FSMContext):
     rating = data.get('rating')
 
     # Сохраняем отзыв
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             await message.answer(
                 get_localized_text('error_user_not_found', language)
@@ -198,7 +193,7 @@ async def process_review_text(message: types.Message, state: FSMContext):
             return
 
         # Получаем бота
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
+        bot = await db.get(Bot, bot_id)
 
         if not bot:
             await message.answer(
@@ -215,7 +210,7 @@ async def process_review_text(message: types.Message, state: FSMContext):
         )
 
         db.add(review)
-        db.commit()
+        await db.commit()
 
         # Отправляем подтверждение
         await message.answer(
@@ -237,15 +232,14 @@ async def process_review_text(message: types.Message, state: FSMContext):
         logger.error(f"Error saving review: {e}")
         await message.answer(get_localized_text('error_general', language))
     finally:
-        db.close()
+        await db.close()
 
 
-async def skip_review_text(callback: types.CallbackQuery, state: FSMContext):
+async def skip_review_text(callback: types.CallbackQuery, state: FSMContext, user: Optional[UserEntry] = None):
     """
     Пропускает ввод текста отзыва
     """
     language = callback.from_user.language_code or DEFAULT_LANGUAGE
-    user_id = callback.from_user.id
 
     # Получаем данные из state
     data = await state.get_data()
@@ -256,11 +250,8 @@ async def skip_review_text(callback: types.CallbackQuery, state: FSMContext):
     await callback.answer()
 
     # Сохраняем отзыв без текста
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             await callback.message.edit_text(
                 get_localized_text('error_user_not_found', language)
@@ -268,7 +259,7 @@ async def skip_review_text(callback: types.CallbackQuery, state: FSMContext):
             return
 
         # Получаем бота
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
+        bot = await db.get(Bot, bot_id)
 
         if not bot:
             await callback.message.edit_text(
@@ -285,7 +276,7 @@ async def skip_review_text(callback: types.CallbackQuery, state: FSMContext):
         )
 
         db.add(review)
-        db.commit()
+        await db.commit()
 
         # Отправляем подтверждение
         await callback.message.edit_text(
@@ -307,7 +298,7 @@ async def skip_review_text(callback: types.CallbackQuery, state: FSMContext):
         logger.error(f"Error saving review: {e}")
         await callback.message.edit_text(get_localized_text('error_general', language))
     finally:
-        db.close()
+        await db.close()
 
 
 async def cancel_review(callback: types.CallbackQuery, state: FSMContext):
@@ -336,99 +327,6 @@ async def cancel_review(callback: types.CallbackQuery, state: FSMContext):
     )
 
 
-def get_localized_text(key: str, lang: str) -> str:
-    """
-    Заглушка для получения локализованного текста
-    В реальном приложении здесь бы использовалась I18n middleware
-
-    Args:
-        key (str): Ключ текста
-        lang (str): Код языка
-
-    Returns:
-        str: Локализованный текст
-    """
-    # Базовые тексты для отзывов
-    texts = {
-        'review_select_bot': {
-            'ru': '⭐ Выберите бота, о котором хотите оставить отзыв:',
-            'uk': '⭐ Виберіть бота, про якого хочете залишити відгук:',
-            'en': '⭐ Select the bot you want to review:'
-        },
-        'review_select_rating': {
-            'ru': 'Оцените бота от 1 до 5 звезд:',
-            'uk': 'Оцініть бота від 1 до 5 зірок:',
-            'en': 'Rate the bot from 1 to 5 stars:'
-        },
-        'review_enter_text': {
-            'ru': 'Напишите свой отзыв (или нажмите кнопку "Пропустить" для отзыва без текста):',
-            'uk': 'Напишіть свій відгук (або натисніть кнопку "Пропустити" для відгуку без тексту):',
-            'en': 'Write your review (or press the "Skip" button for a review without text):'
-        },
-        'review_skip_text': {
-            'ru': 'Вы также можете не писать текст, а просто оставить оценку.',
-            'uk': 'Ви також можете не писати текст, а просто залишити оцінку.',
-            'en': 'You can also just leave a rating without writing text.'
-        },
-        'review_skip': {
-            'ru': 'Пропустить',
-            'uk': 'Пропустити',
-            'en': 'Skip'
-        },
-        'review_thanks': {
-            'ru': '✅ Спасибо за ваш отзыв! Он поможет нам сделать наших ботов лучше.',
-            'uk': '✅ Дякуємо за ваш відгук! Він допоможе нам зробити наших ботів кращими.',
-            'en': '✅ Thank you for your review! It will help us make our bots better.'
-        },
-        'review_cancelled': {
-            'ru': '❌ Отзыв отменен.',
-            'uk': '❌ Відгук скасовано.',
-            'en': '❌ Review cancelled.'
-        },
-        'review_no_bots': {
-            'ru': 'У вас нет купленных ботов для оставления отзыва. Посетите каталог, чтобы приобрести бота.',
-            'uk': 'У вас немає куплених ботів для залишення відгуку. Відвідайте каталог, щоб придбати бота.',
-            'en': 'You have no purchased bots to leave a review. Visit the catalog to purchase a bot.'
-        },
-        'error_user_not_found': {
-            'ru': 'Ошибка: пользователь не найден. Пожалуйста, перезапустите бота командой /start.',
-            'uk': 'Помилка: користувача не знайдено. Будь ласка, перезапустіть бота командою /start.',
-            'en': 'Error: user not found. Please restart the bot with the /start command.'
-        },
-        'error_bot_not_found': {
-            'ru': 'Ошибка: бот не найден.',
-            'uk': 'Помилка: бота не знайдено.',
-            'en': 'Error: bot not found.'
-        },
-        'error_general': {
-            'ru': 'Произошла ошибка. Пожалуйста, попробуйте позже или обратитесь в поддержку.',
-            'uk': 'Сталася помилка. Будь ласка, спробуйте пізніше або зверніться до підтримки.',
-            'en': 'An error occurred. Please try again later or contact support.'
-        },
-        'catalog': {
-            'ru': '🛒 Перейти в каталог',
-            'uk': '🛒 Перейти до каталогу',
-            'en': '🛒 Go to catalog'
-        },
-        'back_to_menu': {
-            'ru': '🔙 Вернуться в меню',
-            'uk': '🔙 Повернутися до меню',
-            'en': '🔙 Back to menu'
-        },
-        'cancel': {
-            'ru': 'Отмена',
-            'uk': 'Скасувати',
-            'en': 'Cancel'
-        }
-    }
-
-    # Если язык не поддерживается, используем русский
-    if lang not in ['ru', 'uk', 'en']:
-        lang = 'ru'
-
-    return texts.get(key, {}).get(lang, f"Missing text: {key}")
-
-
 def register_reviews_handlers(dp: Dispatcher):
     """
     Регистрирует обработчики для отзывов
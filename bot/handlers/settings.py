@@ -5,14 +5,13 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.formatting import Text
 
 from config.settings import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES
-from models.user_language import UserLanguage
+from models.user_language import user_languages
+from services.users import user_resolver
+from bot.i18n import get_localized_text
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Инициализируем хранилище языков пользователей
-user_languages = UserLanguage()
-
 
 async def cmd_settings(message: types.Message):
     """
@@ -110,7 +109,9 @@ async def set_language(callback: types.CallbackQuery, new_language: str):
     user_id = callback.from_user.id
 
     # Сохраняем язык
-    user_languages.set_language(user_id, new_language)
+    await user_languages.set_language(user_id, new_language)
+    # Пользователь в кеше UserMiddleware хранит прежний язык
+    user_resolver.forget(user_id)
 
     # Получаем локализованное сообщение на новом языке
     confirmation_text = get_localized_text('settings_language_set', new_language)
@@ -129,59 +130,6 @@ async def set_language(callback: types.CallbackQuery, new_language: str):
     )
 
 
-def get_localized_text(key: str, lang: str) -> str:
-    """
-    Заглушка для получения локализованного текста
-    В реальном приложении здесь бы использовалась I18n middleware
-
-    Args:
-        key (str): Ключ текста
-        lang (str): Код языка
-
-    Returns:
-        str: Локализованный текст
-    """
-    # Базовые тексты для настроек
-    texts = {
-        'settings_title': {
-            'ru': '⚙️ Настройки',
-            'uk': '⚙️ Налаштування',
-            'en': '⚙️ Settings'
-        },
-        'settings_description': {
-            'ru': 'Здесь вы можете настроить параметры бота:',
-            'uk': 'Тут ви можете налаштувати параметри бота:',
-            'en': 'Here you can configure bot settings:'
-        },
-        'settings_language': {
-            'ru': '🌐 Изменить язык',
-            'uk': '🌐 Змінити мову',
-            'en': '🌐 Change language'
-        },
-        'settings_language_title': {
-            'ru': 'Выберите язык:',
-            'uk': 'Виберіть мову:',
-            'en': 'Select language:'
-        },
-        'settings_language_set': {
-            'ru': '✅ Язык успешно изменен на Русский',
-            'uk': '✅ Мову успішно змінено на Українську',
-            'en': '✅ Language successfully changed to English'
-        },
-        'back': {
-            'ru': 'Назад',
-            'uk': 'Назад',
-            'en': 'Back'
-        }
-    }
-
-    # Если язык не поддерживается, используем русский
-    if lang not in ['ru', 'uk', 'en']:
-        lang = 'ru'
-
-    return texts.get(key, {}).get(lang, f"Missing text: {key}")
-
-
 def register_settings_handlers(dp: Dispatcher):
     """
     Регистрирует обработчики для настроек
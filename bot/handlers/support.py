@@ -8,13 +8,16 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.formatting import Text
-from database.db import Session as DbSession
+from database.db import AsyncSessionLocal as AsyncDbSession
 
 
 from config.settings import ADMIN_IDS, DEFAULT_LANGUAGE, MESSAGES_MEDIA_DIR
+from bot.i18n import get_localized_text
+from services.users import UserEntry
+from typing import Optional
 import logging
 
-from models.models import Message, User
+from models.models import Message
 
 logger = logging.getLogger(__name__)
 
@@ -131,60 +134,7 @@ async def cancel_support(callback: types.CallbackQuery, state: FSMContext):
     )
 
 
-def get_localized_text(key: str, lang: str) -> str:
-    """
-    Заглушка для получения локализованного текста
-    В реальном приложении здесь бы использовалась I18n middleware
-
-    Args:
-        key (str): Ключ текста
-        lang (str): Код языка
-
-    Returns:
-        str: Локализованный текст
-    """
-    # Базовые тексты для поддержки
-    texts = {
-        'support_title': {
-            'ru': '🆘 Поддержка',
-            'uk': '🆘 Підтримка',
-            'en': '🆘 Support'
-        },
-        'support_description': {
-            'ru': 'Опишите вашу проблему или задайте вопрос. Наши специалисты ответят вам в ближайшее время.',
-            'uk': 'Опишіть вашу проблему або задайте питання. Наші фахівці відповідять вам найближчим часом.',
-            'en': 'Describe your problem or ask a question. Our specialists will answer you as soon as possible.'
-        },
-        'support_sent': {
-            'ru': '✅ Ваше сообщение отправлено в поддержку! Мы ответим вам в ближайшее время.',
-            'uk': '✅ Ваше повідомлення відправлено в підтримку! Ми відповімо вам найближчим часом.',
-            'en': '✅ Your message has been sent to support! We will answer you as soon as possible.'
-        },
-        'support_cancelled': {
-            'ru': '❌ Обращение в поддержку отменено.',
-            'uk': '❌ Звернення до підтримки скасовано.',
-            'en': '❌ Support request cancelled.'
-        },
-        'back_to_menu': {
-            'ru': '🔙 Вернуться в меню',
-            'uk': '🔙 Повернутися до меню',
-            'en': '🔙 Back to menu'
-        },
-        'cancel': {
-            'ru': 'Отмена',
-            'uk': 'Скасувати',
-            'en': 'Cancel'
-        }
-    }
-
-    # Если язык не поддерживается, используем русский
-    if lang not in ['ru', 'uk', 'en']:
-        lang = 'ru'
-
-    return texts.get(key, {}).get(lang, f"Missing text: {key}")
-
-
-async def process_user_message(message: types.Message):
+async def process_user_message(message: types.Message, user: Optional[UserEntry] = None):
     """
     Обработчик всех текстовых сообщений от пользователей
     Сохраняет сообщения в базу данных для просмотра в админке
@@ -192,11 +142,8 @@ async def process_user_message(message: types.Message):
     user_id = message.from_user.id
     message_text = message.text
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя из базы данных
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             logger.warning(f"User {user_id} not found in database")
             return
@@ -211,16 +158,16 @@ async def process_user_message(message: types.Message):
         )
 
         db.add(user_message)
-        db.commit()
+        await db.commit()
 
     except Exception as e:
         logger.error(f"Error processing user message: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
 
 
-async def process_user_photo(message: types.Message):
+async def process_user_photo(message: types.Message, user: Optional[UserEntry] = None):
     """
     Обработчик фото от пользователей
     Сохраняет фото в базу данных и на диск
@@ -228,11 +175,8 @@ async def process_user_photo(message: types.Message):
     user_id = message.from_user.id
     caption = message.caption or ""
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя из базы данных
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             logger.warning(f"User {user_id} not found in database")
             return
@@ -261,16 +205,16 @@ async def process_user_photo(message: types.Message):
         )
 
         db.add(user_message)
-        db.commit()
+        await db.commit()
 
     except Exception as e:
         logger.error(f"Error processing user photo: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
 
 
-async def process_user_video(message: types.Message):
+async def process_user_video(message: types.Message, user: Optional[UserEntry] = None):
     """
     Обработчик видео от пользователей
     Сохраняет видео в базу данных и на диск
@@ -278,11 +222,8 @@ async def process_user_video(message: types.Message):
     user_id = message.from_user.id
     caption = message.caption or ""
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя из базы данных
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             logger.warning(f"User {user_id} not found in database")
             return
@@ -311,16 +252,16 @@ async def process_user_video(message: types.Message):
         )
 
         db.add(user_message)
-        db.commit()
+        await db.commit()
 
     except Exception as e:
         logger.error(f"Error processing user video: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
 
 
-async def process_user_audio(message: types.Message):
+async def process_user_audio(message: types.Message, user: Optional[UserEntry] = None):
     """
     Обработчик аудио от пользователей
     Сохраняет аудио в базу данных и на диск
@@ -328,11 +269,8 @@ async def process_user_audio(message: types.Message):
     user_id = message.from_user.id
     caption = message.caption or ""
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя из базы данных
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             logger.warning(f"User {user_id} not found in database")
             return
@@ -365,16 +303,16 @@ async def process_user_audio(message: types.Message):
         )
 
         db.add(user_message)
-        db.commit()
+        await db.commit()
 
     except Exception as e:
         logger.error(f"Error processing user audio: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
 
 
-async def process_user_document(message: types.Message):
+async def process_user_document(message: types.Message, user: Optional[UserEntry] = None):
     """
     Обработчик документов от пользователей
     Сохраняет документы в базу данных и на диск
@@ -382,11 +320,8 @@ async def process_user_document(message: types.Message):
     user_id = message.from_user.id
     caption = message.caption or ""
 
-    db = DbSession()
+    db = AsyncDbSession()
     try:
-        # Получаем пользователя из базы данных
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-
         if not user:
             logger.warning(f"User {user_id} not found in database")
             return
@@ -417,13 +352,13 @@ async def process_user_document(message: types.Message):
         )
 
         db.add(user_message)
-        db.commit()
+        await db.commit()
 
     except Exception as e:
         logger.error(f"Error processing user document: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
 
 
 def register_support_handlers(dp: Dispatcher):
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Скомпилированный каталог переводов бота.
+
+Файлы bot/locales/<lang>/messages.json загружаются один раз. Цепочки
+резервных языков (язык пользователя -> язык по умолчанию) разрешаются при
+загрузке, шаблоны str.format разбираются заранее, а для каждого языка создается
+один объект Translator, который переиспользуется всеми обработчиками.
+"""
+import json
+import logging
+from pathlib import Path
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES
+
+logger = logging.getLogger(__name__)
+
+LOCALES_DIR = Path(__file__).resolve().parent / "locales"
+
+
+class Template:
+    """
+    Заранее разобранный шаблон сообщения.
+
+    Строки без подстановок хранятся готовыми к выдаче; для остальных хранится
+    список частей (текст, имя переменной, формат), поэтому при рендеринге не нужно
+    повторно разбирать строку. Сложные поля (атрибуты, индексы, конверсии)
+    обрабатываются обычным str.format.
+    """
+
+    __slots__ = ("text", "parts", "use_format")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.parts: Optional[List[Tuple[str, Optional[str], str]]] = None
+        self.use_format = False
+
+        try:
+            parsed = list(Formatter().parse(text))
+        except ValueError:
+            # Некорректный шаблон выдаем как есть
+            return
+
+        if all(field is None for _, field, _, _ in parsed):
+            self.text = "".join(literal for literal, _, _, _ in parsed)
+        elif all(field is None or (field.isidentifier() and not conversion and "{" not in spec)
+                 for _, field, spec, conversion in parsed):
+            self.parts = [(literal, field, spec or "") for literal, field, spec, _ in parsed]
+        else:
+            self.use_format = True
+
+    def render(self, kwargs: Dict[str, Any]) -> str:
+        if self.parts is None:
+            return self.text.format(**kwargs) if self.use_format else self.text
+
+        chunks = []
+        for literal, field, spec in self.parts:
+            chunks.append(literal)
+            if field is not None:
+                chunks.append(format(kwargs[field], spec))
+        return "".join(chunks)
+
+
+class Translator:
+    """
+    Функция перевода для одного языка.
+
+    Вызывается как translator(key, kwargs=None, **variables).
+    """
+
+    __slots__ = ("lang", "templates")
+
+    def __init__(self, lang: str, templates: Dict[str, Template]):
+        self.lang = lang
+        self.templates = templates
+
+    def __call__(self, key: str, kwargs: Dict[str, Any] = None, **variables: Any) -> str:
+        template = self.templates.get(key)
+        if template is None:
+            return f"MISSING:{key}"
+
+        if kwargs:
+            variables = {**kwargs, **variables} if variables else kwargs
+
+        try:
+            return template.render(variables)
+        except KeyError as e:
+            logger.error(f"Missing variable in translation: {e}")
+            return template.text
+        except Exception as e:
+            logger.error(f"Error formatting translation: {e}")
+            return template.text
+
+
+class TranslationCatalog:
+    """
+    Каталог переводов для всех поддерживаемых языков.
+
+    Args:
+        locales_dir (Path): Директория с файлами локализации
+        languages (List[str]): Поддерживаемые языки
+        default_language (str): Язык, используемый для недостающих ключей
+    """
+
+    def __init__(self, locales_dir: Path = LOCALES_DIR, languages: List[str] = SUPPORTED_LANGUAGES,
+                 default_language: str = DEFAULT_LANGUAGE):
+        self.default_language = default_language
+        self.messages: Dict[str, Dict[str, str]] = {}
+        self.missing: Dict[str, List[str]] = {}
+        self.translators: Dict[str, Translator] = {}
+
+        for lang in languages:
+            self.messages[lang] = self._load_file(Path(locales_dir) / lang / "messages.json")
+
+        self._compile()
+
+    @staticmethod
+    def _load_file(lang_file: Path) -> Dict[str, str]:
+        """Загружает файл локализации"""
+        if not lang_file.exists():
+            logger.warning(f"Locale file not found: {lang_file}")
+            return {}
+
+        try:
+            with open(lang_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            logger.error(f"Invalid JSON in locale file: {lang_file}")
+        except Exception as e:
+            logger.error(f"Error loading locale file {lang_file}: {e}")
+        return {}
+
+    def _compile(self):
+        """Разрешает цепочки резервных языков и компилирует шаблоны"""
+        all_keys = set()
+        for messages in self.messages.values():
+            all_keys.update(messages)
+
+        compiled: Dict[Tuple[str, str], Template] = {}
+        for lang, messages in self.messages.items():
+            chain = [lang] if lang == self.default_language else [lang, self.default_language]
+            templates = {}
+            for key in all_keys:
+                source = next((source for source in chain if self.messages.get(source, {}).get(key)), None)
+                if source is None:
+                    continue
+                if (source, key) not in compiled:
+                    compiled[(source, key)] = Template(self.messages[source][key])
+                templates[key] = compiled[(source, key)]
+
+            self.missing[lang] = sorted(key for key in all_keys if not messages.get(key))
+            self.translators[lang] = Translator(lang, templates)
+
+        for lang, keys in self.missing.items():
+            if keys:
+                logger.info(f"Locale {lang}: {len(keys)} keys fall back or are missing: {', '.join(keys)}")
+
+    def get_translator(self, lang: Optional[str]) -> Translator:
+        """Возвращает функцию перевода для языка (или для языка по умолчанию)"""
+        return self.translators.get(lang) or self.translators[self.default_language]
+
+    def missing_report(self) -> Dict[str, List[str]]:
+        """
+        Возвращает ключи, отсутствующие в каждом языке (для них используется
+        резервный язык или MISSING:<key>).
+        """
+        return {lang: keys for lang, keys in self.missing.items() if keys}
+
+
+_catalog: Optional[TranslationCatalog] = None
+
+
+def get_catalog() -> TranslationCatalog:
+    """Возвращает общий каталог переводов, загружая его при первом обращении"""
+    global _catalog
+    if _catalog is None:
+        _catalog = TranslationCatalog()
+    return _catalog
+
+
+def get_localized_text(key: str, lang: str, **kwargs: Any) -> str:
+    """
+    Возвращает локализованный текст.
+
+    Args:
+        key (str): Ключ текста
+        lang (str): Код языка
+        **kwargs: Переменные для подстановки
+
+    Returns:
+        str: Локализованный текст
+    """
+    return get_catalog().get_translator(lang)(key, kwargs)
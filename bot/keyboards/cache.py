@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Кеш готовых клавиатур бота.
+
+Клавиатуры меню и каталога строятся один раз для каждого ключа
+(язык, версия каталога, раздел) и затем переиспользуются: объекты разметки
+aiogram неизменяемы, поэтому один экземпляр можно отправлять в любом количестве
+сообщений. JSON разметки вычисляется при первой отправке и сохраняется, чтобы
+MarkupCacheSession не сериализовал одну и ту же клавиатуру при каждом запросе.
+"""
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.types import InlineKeyboardMarkup, ReplyKeyboardMarkup
+
+from config.settings import DEFAULT_LANGUAGE, KEYBOARD_CACHE_SIZE, SUPPORTED_LANGUAGES
+from utils.cache import MISSING, LRUCache
+
+Markup = Union[InlineKeyboardMarkup, ReplyKeyboardMarkup]
+
+
+def normalize_language(lang: Optional[str]) -> str:
+    """Возвращает поддерживаемый код языка (или язык по умолчанию)"""
+    return lang if lang in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+
+
+class KeyboardCache:
+    """
+    Кеш клавиатур с вытеснением давно не использованных записей.
+
+    Args:
+        max_size (int): Максимальное количество клавиатур в кеше
+    """
+
+    def __init__(self, max_size: int = KEYBOARD_CACHE_SIZE):
+        self._markups = LRUCache(max_size)
+        # id(разметки) -> (разметка, JSON); разметка хранится для проверки, что id не переиспользован
+        self._payloads = LRUCache(max_size)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Markup]) -> Markup:
+        """
+        Возвращает клавиатуру из кеша или строит ее функцией render.
+
+        Args:
+            key (Hashable): Ключ клавиатуры, например ("categories", lang, version)
+            render (Callable): Функция построения клавиатуры
+
+        Returns:
+            Markup: Клавиатура
+        """
+        markup = self._markups.get(key)
+        if markup is MISSING:
+            markup = render()
+            self._markups.set(key, markup)
+            self._payloads.set(id(markup), (markup, None))
+        return markup
+
+    def get_payload(self, markup: Markup) -> Any:
+        """
+        Возвращает сохраненный JSON клавиатуры: None, если клавиатура из кеша
+        еще не сериализовалась, и MISSING, если клавиатура построена не через кеш.
+        """
+        entry = self._payloads.get(id(markup), None)
+        if entry is not None and entry[0] is markup:
+            return entry[1]
+        return MISSING
+
+    def set_payload(self, markup: Markup, payload: str) -> None:
+        """Сохраняет JSON клавиатуры"""
+        self._payloads.set(id(markup), (markup, payload))
+
+    def clear(self) -> None:
+        """Очищает кеш"""
+        self._markups.clear()
+        self._payloads.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики кеша клавиатур и сериализованных клавиатур"""
+        stats = {}
+        for name, cache in (("markup", self._markups), ("payload", self._payloads)):
+            requests = cache.hits + cache.misses
+            for counter, value in cache.stats().items():
+                stats[f"{name}_{counter}"] = value
+            stats[f"{name}_hit_rate"] = round(cache.hits / requests, 4) if requests else 0.0
+        return stats
+
+
+# Общий кеш клавиатур процесса бота
+keyboard_cache = KeyboardCache()
+
+
+class MarkupCacheSession(AiohttpSession):
+    """
+    HTTP-сессия aiogram, которая отправляет сохраненный JSON для клавиатур
+    из keyboard_cache вместо повторной сериализации.
+    """
+
+    def prepare_value(self, value: Any, bot: Bot, files: Dict[str, Any], _dumps_json: bool = True) -> Any:
+        if _dumps_json and isinstance(value, (InlineKeyboardMarkup, ReplyKeyboardMarkup)):
+            payload = keyboard_cache.get_payload(value)
+            if payload is MISSING:
+                return super().prepare_value(value, bot=bot, files=files, _dumps_json=_dumps_json)
+            if payload is None:
+                payload = super().prepare_value(value, bot=bot, files=files, _dumps_json=_dumps_json)
+                keyboard_cache.set_payload(value, payload)
+            return payload
+        return super().prepare_value(value, bot=bot, files=files, _dumps_json=_dumps_json)
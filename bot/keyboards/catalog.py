@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+from typing import Optional
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+from bot.keyboards.cache import keyboard_cache, normalize_language
+from services.catalog import BotEntry, CatalogSnapshot
+
+
+def get_back_keyboard(text: str, callback_data: str) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру с одной кнопкой возврата
+
+    Args:
+        text (str): Текст кнопки
+        callback_data (str): Данные колбэка кнопки
+
+    Returns:
+        InlineKeyboardMarkup: Клавиатура
+    """
+    return keyboard_cache.get_or_render(
+        ("back", text, callback_data),
+        lambda: InlineKeyboardMarkup(
+            inline_keyboard=[[InlineKeyboardButton(text=text, callback_data=callback_data)]]
+        )
+    )
+
+
+def get_categories_keyboard(snapshot: CatalogSnapshot, lang: str) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру со списком категорий
+
+    Args:
+        snapshot (CatalogSnapshot): Снимок каталога
+        lang (str): Код языка пользователя
+
+    Returns:
+        InlineKeyboardMarkup: Клавиатура категорий
+    """
+    lang = normalize_language(lang)
+    return keyboard_cache.get_or_render(
+        ("categories", lang, snapshot.version),
+        lambda: _render_categories_keyboard(snapshot)
+    )
+
+
+def _render_categories_keyboard(snapshot: CatalogSnapshot) -> InlineKeyboardMarkup:
+    """Строит клавиатуру категорий: по две категории в ряд"""
+    buttons = [
+        InlineKeyboardButton(text=category.name, callback_data=f"category:{category.id}")
+        for category in snapshot.categories
+    ]
+    rows = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+
+    # Кнопка для просмотра всех ботов и кнопка возврата в главное меню
+    rows.append([InlineKeyboardButton(text="Все боты", callback_data="category:all")])
+    rows.append([InlineKeyboardButton(text="◀️ Назад в меню", callback_data="menu:main")])
+
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def get_bots_keyboard(snapshot: CatalogSnapshot, category_id: Optional[int], lang: str) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру со списком ботов категории
+
+    Args:
+        snapshot (CatalogSnapshot): Снимок каталога
+        category_id (Optional[int]): ID категории или None для всех ботов
+        lang (str): Код языка пользователя
+
+    Returns:
+        InlineKeyboardMarkup: Клавиатура ботов
+    """
+    lang = normalize_language(lang)
+    return keyboard_cache.get_or_render(
+        ("bots", lang, snapshot.version, category_id or None),
+        lambda: _render_bots_keyboard(snapshot, category_id)
+    )
+
+
+def _render_bots_keyboard(snapshot: CatalogSnapshot, category_id: Optional[int]) -> InlineKeyboardMarkup:
+    """Строит клавиатуру ботов с ценами"""
+    rows = []
+    for bot in snapshot.bots_in(category_id):
+        # Добавляем информацию о скидке, если она есть
+        discount_info = f" (-{bot.discount}%)" if bot.discount > 0 else ""
+        rows.append([InlineKeyboardButton(
+            text=f"{bot.name} - {bot.final_price:.2f} руб.{discount_info}",
+            callback_data=f"bot:{bot.id}"
+        )])
+
+    # Кнопка возврата к категориям
+    rows.append([InlineKeyboardButton(text="◀️ Назад к категориям", callback_data="menu:catalog")])
+
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def get_bot_detail_keyboard(snapshot: CatalogSnapshot, bot: BotEntry, lang: str) -> InlineKeyboardMarkup:
+    """
+    Возвращает клавиатуру карточки бота
+
+    Args:
+        snapshot (CatalogSnapshot): Снимок каталога
+        bot (BotEntry): Бот из снимка каталога
+        lang (str): Код языка пользователя
+
+    Returns:
+        InlineKeyboardMarkup: Клавиатура карточки бота
+    """
+    lang = normalize_language(lang)
+    return keyboard_cache.get_or_render(
+        ("bot_detail", lang, snapshot.version, bot.id),
+        lambda: _render_bot_detail_keyboard(bot)
+    )
+
+
+def _render_bot_detail_keyboard(bot: BotEntry) -> InlineKeyboardMarkup:
+    """Строит клавиатуру карточки бота: покупка и возврат к списку"""
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="🛒 Добавить в корзину", callback_data=f"cart:add:{bot.id}")],
+            [InlineKeyboardButton(text="💳 Купить сейчас", callback_data=f"cart:buy_now:{bot.id}")],
+            [InlineKeyboardButton(text="◀️ Назад к списку", callback_data=f"category:{bot.category_id or 'all'}")]
+        ]
+    )
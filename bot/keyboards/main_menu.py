@@ -1,7 +1,37 @@
 # -*- coding: utf-8 -*-
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+from bot.keyboards.cache import keyboard_cache, normalize_language
 from config.settings import DEFAULT_LANGUAGE
 
+# Локализация кнопок главного меню
+MENU_BUTTONS = {
+    'catalog': {
+        'ru': '🛒 Каталог',
+        'uk': '🛒 Каталог',
+        'en': '🛒 Catalog'
+    },
+    'cart': {
+        'ru': '🛍 Корзина',
+        'uk': '🛍 Кошик',
+        'en': '🛍 Cart'
+    },
+    'my_bots': {
+        'ru': '🤖 Мои боты',
+        'uk': '🤖 Мої боти',
+        'en': '🤖 My bots'
+    },
+    'support': {
+        'ru': '🆘 Поддержка',
+        'uk': '🆘 Підтримка',
+        'en': '🆘 Support'
+    },
+    'settings': {
+        'ru': '⚙️ Настройки',
+        'uk': '⚙️ Налаштування',
+        'en': '⚙️ Settings'
+    }
+}
+
 
 def get_main_menu_keyboard(lang: str = DEFAULT_LANGUAGE) -> ReplyKeyboardMarkup:
     """
@@ -13,38 +43,13 @@ def get_main_menu_keyboard(lang: str = DEFAULT_LANGUAGE) -> ReplyKeyboardMarkup:
     Returns:
         ReplyKeyboardMarkup: Клавиатура главного меню
     """
-    # Локализация кнопок
-    buttons = {
-        'catalog': {
-            'ru': '🛒 Каталог',
-            'uk': '🛒 Каталог',
-            'en': '🛒 Catalog'
-        },
-        'cart': {
-            'ru': '🛍 Корзина',
-            'uk': '🛍 Кошик',
-            'en': '🛍 Cart'
-        },
-        'my_bots': {
-            'ru': '🤖 Мои боты',
-            'uk': '🤖 Мої боти',
-            'en': '🤖 My bots'
-        },
-        'support': {
-            'ru': '🆘 Поддержка',
-            'uk': '🆘 Підтримка',
-            'en': '🆘 Support'
-        },
-        'settings': {
-            'ru': '⚙️ Настройки',
-            'uk': '⚙️ Налаштування',
-            'en': '⚙️ Settings'
-        }
-    }
+    lang = normalize_language(lang)
+    return keyboard_cache.get_or_render(("main_menu", lang), lambda: _render_main_menu_keyboard(lang))
 
-    # Проверка языка
-    if lang not in ['ru', 'uk', 'en']:
-        lang = DEFAULT_LANGUAGE
+
+def _render_main_menu_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    """Строит клавиатуру главного меню"""
+    buttons = MENU_BUTTONS
 
     # Создаем клавиатуру
     keyboard = ReplyKeyboardMarkup(
@@ -78,38 +83,13 @@ def get_inline_main_menu(lang: str = DEFAULT_LANGUAGE) -> InlineKeyboardMarkup:
     Returns:
         InlineKeyboardMarkup: Инлайн-клавиатура главного меню
     """
-    # Локализация кнопок
-    buttons = {
-        'catalog': {
-            'ru': '🛒 Каталог',
-            'uk': '🛒 Каталог',
-            'en': '🛒 Catalog'
-        },
-        'cart': {
-            'ru': '🛍 Корзина',
-            'uk': '🛍 Кошик',
-            'en': '🛍 Cart'
-        },
-        'my_bots': {
-            'ru': '🤖 Мои боты',
-            'uk': '🤖 Мої боти',
-            'en': '🤖 My bots'
-        },
-        'support': {
-            'ru': '🆘 Поддержка',
-            'uk': '🆘 Підтримка',
-            'en': '🆘 Support'
-        },
-        'settings': {
-            'ru': '⚙️ Настройки',
-            'uk': '⚙️ Налаштування',
-            'en': '⚙️ Settings'
-        }
-    }
+    lang = normalize_language(lang)
+    return keyboard_cache.get_or_render(("inline_main_menu", lang), lambda: _render_inline_main_menu(lang))
+
 
-    # Проверка языка
-    if lang not in ['ru', 'uk', 'en']:
-        lang = DEFAULT_LANGUAGE
+def _render_inline_main_menu(lang: str) -> InlineKeyboardMarkup:
+    """Строит инлайн-клавиатуру главного меню"""
+    buttons = MENU_BUTTONS
 
     # Создаем инлайн клавиатуру
     keyboard = InlineKeyboardMarkup(
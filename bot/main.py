@@ -5,10 +5,16 @@ import sys
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
-from config.settings import BOT_TOKEN
+from config.settings import BOT_TOKEN, BOT_MODE, WEBHOOK_HOST, WEBHOOK_PORT
 from bot.middlewares.i18n import I18nMiddleware
+from bot.middlewares.user import UserMiddleware
+from bot.storage import create_fsm_storage
+from bot.keyboards.cache import MarkupCacheSession
 from bot.handlers import register_all_handlers
+from bot.handlers.payments import render_payment_success
+from payments.gateway import gateway_client
+from services import rollups
+from services.outbox import PAYMENT_SUCCESS, OutboxWorker, register_listeners as register_outbox_listeners
 
 # Настройка логирования
 logging.basicConfig(
@@ -19,23 +25,66 @@ logging.basicConfig(
     ]
 )
 
+# Дневные сводки статистики и сообщения об оплате (outbox) записываются событиями моделей
+rollups.register_listeners()
+register_outbox_listeners()
+
 # Инициализация бота и диспетчера
-bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-storage = MemoryStorage()
+# MarkupCacheSession отправляет готовый JSON для клавиатур из кеша
+bot = Bot(token=BOT_TOKEN, session=MarkupCacheSession(), default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+# Хранилище состояний выбирается настройкой FSM_STORAGE (memory, redis, sql)
+storage = create_fsm_storage()
 dp = Dispatcher(storage=storage)
 
 # Регистрация middleware
+# Пользователь определяется один раз на апдейт и передается i18n и обработчикам
+dp.update.outer_middleware(UserMiddleware())
 i18n = I18nMiddleware(bot_dir="bot")
 dp.message.middleware(i18n)
 dp.callback_query.middleware(i18n)
 
+_handlers_registered = False
+
+
+def setup_dispatcher() -> Dispatcher:
+    """Регистрирует все хэндлеры (один раз) и возвращает диспетчер"""
+    global _handlers_registered
+    if not _handlers_registered:
+        register_all_handlers(dp)
+        _handlers_registered = True
+    return dp
+
 
 async def main():
     # Регистрация всех хэндлеров
-    register_all_handlers(dp)
+    setup_dispatcher()
+
+    # Сообщения, записанные в outbox (например, об оплате заказа через вебхук админ-панели)
+    outbox = asyncio.create_task(OutboxWorker(bot, {PAYMENT_SUCCESS: render_payment_success}).run())
+
+    try:
+        await run()
+    finally:
+        outbox.cancel()
+        # Закрываем соединения с платежными системами
+        await gateway_client.aclose()
+
+
+async def run():
+    """Прием обновлений в режиме webhook или polling"""
+    if BOT_MODE == "webhook":
+        # Обновления принимает ASGI-приложение и передает в тот же диспетчер
+        import uvicorn
+        from bot.webhook import create_webhook_app
+
+        logging.info(f"Starting bot in webhook mode on {WEBHOOK_HOST}:{WEBHOOK_PORT}...")
+        server = uvicorn.Server(uvicorn.Config(create_webhook_app(dp, bot), host=WEBHOOK_HOST, port=WEBHOOK_PORT))
+        await server.serve()
+        return
 
     # Запуск бота
     logging.info("Starting bot...")
+    await bot.delete_webhook()
     await dp.start_polling(bot)
 
 
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import logging
+from typing import Dict, Callable, Any, Awaitable
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from services.users import UserResolver, user_resolver
+
+logger = logging.getLogger(__name__)
+
+
+class UserMiddleware(BaseMiddleware):
+    """
+    Middleware, которая один раз на апдейт находит (или регистрирует) пользователя
+    и передает его обработчикам в data["user"].
+    Регистрируется как outer-middleware апдейтов: отправитель уже определен aiogram
+    в data["event_from_user"].
+    """
+
+    def __init__(self, resolver: UserResolver = user_resolver):
+        self.resolver = resolver
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        """
+        Обрабатывает апдейт, добавляя пользователя в data.
+
+        Args:
+            handler: Обработчик апдейта
+            event: Апдейт
+            data: Данные апдейта
+
+        Returns:
+            Any: Результат обработчика
+        """
+        from_user = data.get("event_from_user")
+        user = None
+        if from_user is not None and not from_user.is_bot:
+            try:
+                user = await self.resolver.resolve(from_user)
+            except Exception as e:
+                # Обработчики сами сообщат пользователю, что он не найден
+                logger.error(f"Error resolving user {from_user.id}: {e}")
+
+        data["user"] = user
+        return await handler(event, data)
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Хранилища состояний FSM для бота.
+
+MemoryStorage теряет диалоги (поддержка, отзывы) при перезапуске и не позволяет
+запускать несколько процессов бота, поэтому доступны постоянные варианты:
+- RedisFsmStorage: состояние и данные хранятся в одном hash-ключе Redis, запись
+  и продление TTL отправляются одним pipeline;
+- SqlFsmStorage: таблица fsm_states в основной базе данных.
+Нужное хранилище выбирается настройкой FSM_STORAGE.
+"""
+import datetime
+import json
+import logging
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import and_, case, delete, null, or_, select
+
+from config.settings import FSM_STORAGE, FSM_STATE_TTL, REDIS_URL
+from database.db import AsyncSessionLocal as AsyncDbSession
+from models.models import FsmState
+
+logger = logging.getLogger(__name__)
+
+STATE_FIELD = "state"
+DATA_FIELD = "data"
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    """Возвращает строковое имя состояния"""
+    return state.state if isinstance(state, State) else state
+
+
+def _decode(value: Any) -> Optional[str]:
+    """Redis без decode_responses возвращает bytes"""
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class RedisFsmStorage(BaseStorage):
+    """
+    Хранилище FSM в Redis (или любом сервере с протоколом Redis).
+
+    Args:
+        redis: Асинхронный клиент redis.asyncio.Redis
+        ttl (int, optional): Время жизни брошенного диалога в секундах
+        key_builder (KeyBuilder, optional): Построитель ключей
+    """
+
+    def __init__(self, redis, ttl: Optional[int] = FSM_STATE_TTL, key_builder: Optional[KeyBuilder] = None):
+        self.redis = redis
+        self.ttl = ttl
+        self.key_builder = key_builder or DefaultKeyBuilder()
+
+    @classmethod
+    def from_url(cls, url: str = REDIS_URL, **kwargs: Any) -> "RedisFsmStorage":
+        """Создает хранилище по URL сервера Redis"""
+        from redis.asyncio import Redis
+
+        return cls(Redis.from_url(url), **kwargs)
+
+    async def _write(self, key: StorageKey, field: str, value: Optional[str]) -> None:
+        """Записывает (или удаляет) поле и продлевает TTL за один запрос к серверу"""
+        redis_key = self.key_builder.build(key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if value is None:
+                pipe.hdel(redis_key, field)
+            else:
+                pipe.hset(redis_key, field, value)
+                if self.ttl:
+                    pipe.expire(redis_key, self.ttl)
+            await pipe.execute()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, STATE_FIELD, _state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return _decode(await self.redis.hget(self.key_builder.build(key), STATE_FIELD))
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._write(key, DATA_FIELD, json.dumps(dict(data)) if data else None)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        value = await self.redis.hget(self.key_builder.build(key), DATA_FIELD)
+        return json.loads(value) if value else {}
+
+    async def get_record(self, key: StorageKey) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Возвращает состояние и данные за один запрос к серверу"""
+        state, data = await self.redis.hmget(self.key_builder.build(key), STATE_FIELD, DATA_FIELD)
+        return _decode(state), json.loads(data) if data else {}
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class SqlFsmStorage(BaseStorage):
+    """
+    Хранилище FSM в таблице fsm_states основной базы данных.
+
+    Args:
+        ttl (int, optional): Время жизни брошенного диалога в секундах
+        key_builder (KeyBuilder, optional): Построитель ключей
+        purge_interval (int): Как часто (в секундах) удалять истекшие записи
+    """
+
+    def __init__(self, ttl: Optional[int] = FSM_STATE_TTL, key_builder: Optional[KeyBuilder] = None,
+                 purge_interval: int = 600):
+        self.ttl = ttl
+        self.key_builder = key_builder or DefaultKeyBuilder()
+        self.purge_interval = purge_interval
+        self._last_purge = time.monotonic()
+
+    def _expires_at(self) -> Optional[datetime.datetime]:
+        return datetime.datetime.utcnow() + datetime.timedelta(seconds=self.ttl) if self.ttl else None
+
+    async def _load(self, key: StorageKey) -> Optional[FsmState]:
+        """Загружает неистекшую запись"""
+        db = AsyncDbSession()
+        try:
+            return await db.scalar(
+                select(FsmState).where(
+                    FsmState.key == self.key_builder.build(key),
+                    or_(FsmState.expires_at.is_(None), FsmState.expires_at > datetime.datetime.utcnow())
+                )
+            )
+        finally:
+            await db.close()
+
+    @staticmethod
+    def _upsert(dialect: str, key: str, now: datetime.datetime, expires_at: Optional[datetime.datetime],
+                values: Dict[str, Optional[str]]):
+        """
+        Вставка или обновление записи одним запросом: параллельные первые записи
+        одного ключа не конфликтуют по первичному ключу. Поля, которые не меняются,
+        сбрасываются, если запись уже истекла.
+        """
+        table = FsmState.__table__
+        expired = and_(table.c.expires_at.isnot(None), table.c.expires_at <= now)
+        kept = [(name, case((expired, null()), else_=table.c[name]))
+                for name in (STATE_FIELD, DATA_FIELD) if name not in values]
+
+        if dialect in ("mysql", "mariadb"):
+            from sqlalchemy.dialects.mysql import insert as dialect_insert
+            statement = dialect_insert(table).values(key=key, expires_at=expires_at, **values)
+            # MySQL применяет присваивания по порядку, поэтому expires_at обновляется последним
+            return statement.on_duplicate_key_update(
+                kept + [(name, statement.inserted[name]) for name in values]
+                + [("expires_at", statement.inserted.expires_at)]
+            )
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            statement = dialect_insert(table).values(key=key, expires_at=expires_at, **values)
+            return statement.on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={**dict(kept), **{name: statement.excluded[name] for name in values},
+                      "expires_at": statement.excluded.expires_at}
+            )
+        raise NotImplementedError(f"SQL FSM storage is not supported for dialect {dialect}")
+
+    async def _write(self, key: StorageKey, **values: Optional[str]) -> None:
+        """Обновляет запись, удаляя ее, когда в ней не осталось ни состояния, ни данных"""
+        storage_key = self.key_builder.build(key)
+        db = AsyncDbSession()
+        try:
+            dialect = (await db.connection()).dialect.name
+            await db.execute(self._upsert(dialect, storage_key, datetime.datetime.utcnow(),
+                                          self._expires_at(), values))
+            if any(value is None for value in values.values()):
+                await db.execute(delete(FsmState).where(
+                    FsmState.key == storage_key, FsmState.state.is_(None), FsmState.data.is_(None)
+                ))
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Error saving FSM state: {e}")
+            await db.rollback()
+            raise
+        finally:
+            await db.close()
+
+        if time.monotonic() - self._last_purge > self.purge_interval:
+            await self.purge_expired()
+
+    async def purge_expired(self) -> int:
+        """Удаляет истекшие записи и возвращает их количество"""
+        self._last_purge = time.monotonic()
+        db = AsyncDbSession()
+        try:
+            result = await db.execute(delete(FsmState).where(FsmState.expires_at <= datetime.datetime.utcnow()))
+            await db.commit()
+            return result.rowcount
+        finally:
+            await db.close()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(key, state=_state_name(state))
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._load(key)
+        return record.state if record else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._write(key, data=json.dumps(dict(data)) if data else None)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._load(key)
+        return json.loads(record.data) if record and record.data else {}
+
+    async def close(self) -> None:
+        pass
+
+
+def create_fsm_storage(kind: str = FSM_STORAGE) -> BaseStorage:
+    """
+    Создает хранилище FSM по названию из настроек.
+
+    Args:
+        kind (str): memory, redis или sql
+
+    Returns:
+        BaseStorage: Хранилище состояний
+    """
+    if kind == "redis":
+        return RedisFsmStorage.from_url(REDIS_URL)
+    if kind == "sql":
+        return SqlFsmStorage()
+    if kind != "memory":
+        logger.warning(f"Unknown FSM storage '{kind}', falling back to memory")
+    return MemoryStorage()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Получение обновлений Telegram через webhook.
+
+Обновления принимаются ASGI-приложением, складываются в ограниченную очередь и
+обрабатываются несколькими воркерами через тот же Dispatcher, что и при polling.
+Если очередь заполнена, webhook отвечает 503 и Telegram повторит доставку позже,
+поэтому перегрузка не приводит к неограниченному росту памяти. Несколько
+экземпляров приложения можно поставить за балансировщик.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from bot.keyboards.cache import keyboard_cache
+from config.settings import WEBHOOK_PATH, WEBHOOK_QUEUE_SIZE, WEBHOOK_SECRET, WEBHOOK_URL, WEBHOOK_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateQueue:
+    """
+    Ограниченная очередь обновлений с пулом воркеров и метриками нагрузки.
+
+    Args:
+        dispatcher (Dispatcher): Диспетчер с зарегистрированными обработчиками
+        bot (Bot): Экземпляр бота
+        maxsize (int): Максимальное количество обновлений в очереди
+        workers (int): Количество одновременно обрабатываемых обновлений
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, maxsize: int = WEBHOOK_QUEUE_SIZE,
+                 workers: int = WEBHOOK_WORKERS):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy_workers = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.total_processing = 0.0
+        self.max_processing = 0.0
+
+    async def start(self) -> None:
+        """Создает очередь и запускает воркеры"""
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Webhook update queue started: size={self.maxsize}, workers={self.workers}")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Дожидается обработки оставшихся обновлений и останавливает воркеры"""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Webhook queue stopped with {self._queue.qsize()} unprocessed updates")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self) -> None:
+        """Ожидает обработки всех обновлений в очереди"""
+        await self._queue.join()
+
+    def submit(self, update: Update) -> bool:
+        """
+        Ставит обновление в очередь.
+
+        Returns:
+            bool: False, если очередь заполнена (обновление нужно доставить повторно)
+        """
+        self.received += 1
+        try:
+            self._queue.put_nowait((time.perf_counter(), update))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            enqueued_at, update = await self._queue.get()
+            started = time.perf_counter()
+            self.total_wait += started - enqueued_at
+            self.busy_workers += 1
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error processing update {update.update_id}: {e}")
+            finally:
+                duration = time.perf_counter() - started
+                self.total_processing += duration
+                self.max_processing = max(self.max_processing, duration)
+                self.busy_workers -= 1
+                self._queue.task_done()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Возвращает метрики очереди и воркеров"""
+        handled = self.processed + self.failed
+        return {
+            "queue_size": self.maxsize,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_depth": self.max_depth,
+            "workers": self.workers,
+            "busy_workers": self.busy_workers,
+            "received": self.received,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.total_wait / handled * 1000, 2) if handled else 0.0,
+            "avg_processing_ms": round(self.total_processing / handled * 1000, 2) if handled else 0.0,
+            "max_processing_ms": round(self.max_processing * 1000, 2),
+        }
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot, queue_size: int = WEBHOOK_QUEUE_SIZE,
+                       workers: int = WEBHOOK_WORKERS, secret: str = WEBHOOK_SECRET,
+                       webhook_url: str = WEBHOOK_URL) -> FastAPI:
+    """
+    Создает ASGI-приложение, принимающее обновления Telegram.
+
+    Args:
+        dispatcher (Dispatcher): Диспетчер с зарегистрированными обработчиками
+        bot (Bot): Экземпляр бота
+        queue_size (int): Размер очереди обновлений
+        workers (int): Количество воркеров
+        secret (str): Секрет из заголовка X-Telegram-Bot-Api-Secret-Token
+        webhook_url (str): Публичный адрес; если указан, webhook регистрируется в Telegram при запуске
+
+    Returns:
+        FastAPI: Приложение webhook
+    """
+    updates = UpdateQueue(dispatcher, bot, maxsize=queue_size, workers=workers)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await updates.start()
+        await dispatcher.emit_startup(bot=bot, dispatcher=dispatcher)
+        if webhook_url:
+            await bot.set_webhook(
+                webhook_url.rstrip("/") + WEBHOOK_PATH,
+                secret_token=secret or None,
+                allowed_updates=dispatcher.resolve_used_update_types()
+            )
+            logger.info(f"Webhook registered: {webhook_url}")
+        try:
+            yield
+        finally:
+            await updates.stop()
+            await dispatcher.emit_shutdown(bot=bot, dispatcher=dispatcher)
+            await bot.session.close()
+
+    def has_secret(request: Request) -> bool:
+        return request.headers.get("X-Telegram-Bot-Api-Secret-Token") == secret
+
+    app = FastAPI(title="SE1DHE Bot Webhook", docs_url=None, redoc_url=None, openapi_url=None, lifespan=lifespan)
+    app.state.updates = updates
+
+    @app.post(WEBHOOK_PATH)
+    async def telegram_webhook(request: Request):
+        """Принимает обновление от Telegram и ставит его в очередь"""
+        if secret and not has_secret(request):
+            return JSONResponse(status_code=401, content={"ok": False})
+
+        update = Update.model_validate(await request.json(), context={"bot": bot})
+        if not updates.submit(update):
+            # Очередь заполнена: Telegram повторит доставку
+            return JSONResponse(status_code=503, content={"ok": False}, headers={"Retry-After": "1"})
+        return {"ok": True}
+
+    @app.get("/metrics")
+    async def webhook_metrics(request: Request):
+        """
+        Метрики очереди обновлений и кеша клавиатур.
+        Доступны только с секретом webhook, без настроенного секрета закрыты.
+        """
+        if not secret or not has_secret(request):
+            return JSONResponse(status_code=401, content={"ok": False})
+        return {**updates.metrics(), "keyboard_cache": keyboard_cache.stats()}
+
+    return app
@@ -1,41 +1,62 @@
 # database/db.py
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
 from sqlalchemy.exc import OperationalError, InterfaceError
-from config.settings import DATABASE_URL
+from config.settings import DATABASE_URL, ASYNC_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW
 import logging
 import time
 import contextlib
 
 logger = logging.getLogger(__name__)
 
-# Оптимизированные настройки для работы с MySQL
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Проверка соединения перед использованием
-    pool_recycle=1800,  # Переподключение каждые 30 минут
-    pool_size=5,  # Уменьшаем размер пула для стабильности
-    max_overflow=10,  # Уменьшаем максимальное количество дополнительных соединений
-    pool_timeout=30,  # Тайм-аут ожидания соединения
-    echo=False,  # Не выводить SQL-запросы в лог
-    isolation_level="READ COMMITTED"  # Уровень изоляции транзакций
-)
+
+def _engine_options(url: str) -> dict:
+    """
+    Возвращает настройки движка для указанного URL.
+    SQLite (используется в тестах и бенчмарках) не поддерживает настройки пула и READ COMMITTED.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"echo": False}
+
+    # Оптимизированные настройки для работы с MySQL
+    return {
+        "pool_pre_ping": True,  # Проверка соединения перед использованием
+        "pool_recycle": 1800,  # Переподключение каждые 30 минут
+        "pool_size": DB_POOL_SIZE,  # Уменьшаем размер пула для стабильности
+        "max_overflow": DB_MAX_OVERFLOW,  # Уменьшаем максимальное количество дополнительных соединений
+        "pool_timeout": 30,  # Тайм-аут ожидания соединения
+        "echo": False,  # Не выводить SQL-запросы в лог
+        "isolation_level": "READ COMMITTED"  # Уровень изоляции транзакций
+    }
+
+
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
 
 # Создаем фабрику сессий
 session_factory = sessionmaker(bind=engine, expire_on_commit=False)
 Session = scoped_session(session_factory)
 
+# Асинхронный движок для обработчиков бота: запросы не блокируют цикл событий aiogram
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+
 Base = declarative_base()
 
 
 def get_db():
     """
     Функция-генератор для получения сессии базы данных с правильным управлением транзакциями.
+
+    Сессия создается напрямую из фабрики, а не через scoped_session: синхронные маршруты
+    FastAPI выполняются в пуле потоков, и потоко-локальный реестр мог бы отдать одну
+    сессию нескольким одновременным запросам.
     """
     db = None
     try:
         # Создаем новую сессию для каждого запроса
-        db = Session()
+        db = session_factory()
         yield db
     except Exception as e:
         logger.error(f"Database error during request: {e}")
@@ -46,15 +67,12 @@ def get_db():
                 logger.error(f"Error during rollback: {rollback_error}")
         raise
     finally:
-        # Всегда закрываем сессию и убираем её из реестра
+        # Всегда закрываем сессию
         if db:
             try:
                 db.close()
             except Exception as close_error:
                 logger.error(f"Error closing database connection: {close_error}")
-            finally:
-                # Обязательно удаляем сессию из реестра потоков
-                Session.remove()
 
 
 @contextlib.contextmanager
@@ -78,6 +96,39 @@ def db_session():
         Session.remove()
 
 
+async def get_async_db():
+    """
+    Асинхронный генератор сессии базы данных (аналог get_db для AsyncSession).
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database error during request: {e}")
+            await db.rollback()
+            raise
+
+
+@contextlib.asynccontextmanager
+async def async_db_session():
+    """
+    Асинхронный контекстный менеджер для работы с сессией базы данных.
+    Использование:
+    async with async_db_session() as session:
+        # Работа с сессией
+    """
+    session = AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Database error in async context manager: {e}")
+        raise
+    finally:
+        await session.close()
+
+
 def execute_with_retry(func, max_retries=3, retry_delay=1):
     """
     Выполнение функции с автоматическим повтором при ошибках соединения.
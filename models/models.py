@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Boolean, Enum, BigInteger
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text, Boolean, Enum, BigInteger, \
+    UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import enum
@@ -23,7 +24,7 @@ class User(Base):
     first_name = Column(String(255), nullable=True)
     last_name = Column(String(255), nullable=True)
     language = Column(String(2), default="ru")
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     # Отношения
@@ -56,7 +57,7 @@ class Bot(Base):
     archive_path = Column(String(500), nullable=True)
     readme_url = Column(String(500), nullable=True)
     support_group_link = Column(String(255), nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     # Отношения
@@ -86,17 +87,34 @@ class Order(Base):
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    bot_id = Column(Integer, ForeignKey("bots.id"), nullable=False)
+    bot_id = Column(Integer, ForeignKey("bots.id"), nullable=False)  # Бот первой позиции заказа
     amount = Column(Float, nullable=False)
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
     payment_system = Column(String(50), nullable=True)
     payment_id = Column(String(255), nullable=True)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     # Отношения
     user = relationship("User", back_populates="orders")
     bot = relationship("Bot", back_populates="orders")
+    items = relationship("OrderItem", back_populates="order", order_by="OrderItem.id")
+
+
+class OrderItem(Base):
+    """Позиция заказа: бот, количество и цена за единицу (с учетом скидки) на момент оформления"""
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    bot_id = Column(Integer, ForeignKey("bots.id"), nullable=False, index=True)
+    quantity = Column(Integer, nullable=False, default=1)
+    price = Column(Float, nullable=False)
+    amount = Column(Float, nullable=False)  # price * quantity
+
+    # Отношения
+    order = relationship("Order", back_populates="items")
+    bot = relationship("Bot")
 
 
 class Review(Base):
@@ -107,7 +125,7 @@ class Review(Base):
     bot_id = Column(Integer, ForeignKey("bots.id"), nullable=False)
     text = Column(Text, nullable=True)
     rating = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
 
     # Отношения
     user = relationship("User", back_populates="reviews")
@@ -122,7 +140,7 @@ class BugReport(Base):
     bot_id = Column(Integer, ForeignKey("bots.id"), nullable=False)
     text = Column(Text, nullable=False)
     status = Column(String(50), default="new")  # new, in_progress, resolved
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
 
     # Отношения
@@ -152,7 +170,7 @@ class Changelog(Base):
     version = Column(String(50), nullable=False)
     description = Column(Text, nullable=False)
     is_notified = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
 
     # Отношения
     bot = relationship("Bot", back_populates="changelog_entries")
@@ -195,10 +213,115 @@ class Message(Base):
     file_path = Column(String(500), nullable=True)
     telegram_message_id = Column(Integer, nullable=True)
     is_from_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
 
     # Отношения
     user = relationship("User", back_populates="messages")
 
 # Добавьте новое отношение в класс User
-User.messages = relationship("Message", back_populates="user")
\ No newline at end of file
+User.messages = relationship("Message", back_populates="user")
+
+class FsmState(Base):
+    """Состояние FSM пользователя (для SqlFsmStorage)"""
+    __tablename__ = "fsm_states"
+
+    key = Column(String(255), primary_key=True)
+    state = Column(String(255), nullable=True)
+    data = Column(Text, nullable=True)  # JSON
+    expires_at = Column(DateTime, nullable=True, index=True)
+
+
+class CacheVersion(Base):
+    """Версия закешированных данных (увеличивается при каждом изменении, например каталога)"""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+class DailyOrderStats(Base):
+    """
+    Дневная сводка заказов: количество и сумма за день (по дате создания заказа)
+    в разрезе бота, платежной системы и статуса. Обновляется при изменении заказов (services/rollups.py)
+    """
+    __tablename__ = "daily_order_stats"
+    __table_args__ = (UniqueConstraint("day", "bot_id", "payment_system", "status", name="uq_daily_order_stats"),)
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    bot_id = Column(Integer, nullable=False)
+    payment_system = Column(String(50), nullable=False, default="")  # "" - платежная система не выбрана
+    status = Column(Enum(OrderStatus), nullable=False)
+    orders = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0)
+
+
+class DailyUserStats(Base):
+    """Дневная сводка регистраций пользователей"""
+    __tablename__ = "daily_user_stats"
+
+    day = Column(Date, primary_key=True)
+    registrations = Column(Integer, nullable=False, default=0)
+
+
+class DailyReviewStats(Base):
+    """Дневная сводка отзывов: количество и сумма оценок (для средней оценки за период)"""
+    __tablename__ = "daily_review_stats"
+
+    day = Column(Date, primary_key=True)
+    reviews = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+
+
+class DailyBugReportStats(Base):
+    """Дневная сводка баг-репортов"""
+    __tablename__ = "daily_bug_report_stats"
+
+    day = Column(Date, primary_key=True)
+    reports = Column(Integer, nullable=False, default=0)
+
+
+class AdminReadMarker(Base):
+    """Момент, до которого администратор прочитал уведомления админ-панели"""
+    __tablename__ = "admin_read_markers"
+
+    admin_telegram_id = Column(BigInteger, primary_key=True)
+    last_read_at = Column(DateTime, nullable=False)
+
+
+class PaymentNotification(Base):
+    """
+    Уведомление платежной системы о транзакции. Уникальный ключ (платежная система, транзакция)
+    отсекает повторные доставки (services/payment_webhooks.py)
+    """
+    __tablename__ = "payment_notifications"
+    __table_args__ = (UniqueConstraint("payment_system", "transaction_id", name="uq_payment_notification"),)
+
+    id = Column(Integer, primary_key=True)
+    payment_system = Column(String(50), nullable=False)
+    transaction_id = Column(String(255), nullable=False)
+    order_id = Column(Integer, nullable=True, index=True)  # Без внешнего ключа: записываются и неизвестные заказы
+    amount = Column(Float, nullable=True)
+    status = Column(String(50), nullable=False)  # paid, already_paid, order_not_found, amount_mismatch
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class OutboxMessage(Base):
+    """
+    Исходящее сообщение пользователю. Записывается в одной транзакции с изменением данных
+    (например, оплатой заказа) и отправляется воркером процесса бота (services/outbox.py)
+    """
+    __tablename__ = "outbox_messages"
+    __table_args__ = (Index("ix_outbox_messages_due", "status", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)  # Тип сообщения, например payment_success
+    chat_id = Column(BigInteger, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    status = Column(String(20), nullable=False, default="pending")  # pending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
@@ -1,9 +1,13 @@
 # -*- coding: utf-8 -*-
 import logging
 from typing import Dict, Optional
-from config.settings import DEFAULT_LANGUAGE
-from database.db import Session as DbSession
+from sqlalchemy import select
+from config.settings import (
+    DEFAULT_LANGUAGE, USER_LANGUAGE_CACHE_SIZE, USER_LANGUAGE_CACHE_TTL, USER_LANGUAGE_NEGATIVE_TTL
+)
+from database.db import AsyncSessionLocal as AsyncDbSession
 from models.models import User
+from utils.cache import LRUCache, MISSING
 
 logger = logging.getLogger(__name__)
 
@@ -11,28 +15,18 @@ logger = logging.getLogger(__name__)
 class UserLanguage:
     """
     Класс для хранения и управления языковыми настройками пользователей.
-    """
 
-    def __init__(self):
-        self.languages: Dict[int, str] = {}
-        # Загружаем языковые настройки из базы данных при инициализации
-        self._load_languages_from_db()
+    Языки загружаются из базы данных по требованию и хранятся в ограниченном LRU-кеше
+    с временем жизни записей. Отсутствие пользователя (или языка) тоже кешируется,
+    но на более короткий срок.
+    """
 
-    def _load_languages_from_db(self):
-        """Загружает языковые настройки пользователей из базы данных"""
-        try:
-            db = DbSession()
-            users = db.query(User).all()
-            for user in users:
-                if user.language:
-                    self.languages[user.telegram_id] = user.language
-            logger.info(f"Loaded language settings for {len(self.languages)} users")
-        except Exception as e:
-            logger.error(f"Error loading language settings from database: {e}")
-        finally:
-            db.close()
+    def __init__(self, max_size: int = USER_LANGUAGE_CACHE_SIZE, ttl: float = USER_LANGUAGE_CACHE_TTL,
+                 negative_ttl: float = USER_LANGUAGE_NEGATIVE_TTL):
+        self.languages = LRUCache(max_size=max_size, ttl=ttl)
+        self.negative_ttl = negative_ttl
 
-    def set_language(self, user_id: int, language: str) -> None:
+    async def set_language(self, user_id: int, language: str) -> None:
         """
         Устанавливает язык для пользователя.
 
@@ -42,24 +36,24 @@ class UserLanguage:
         """
         try:
             # Сохраняем в кеше
-            self.languages[user_id] = language
+            self.languages.set(user_id, language)
 
             # Сохраняем в базе данных
-            db = DbSession()
+            db = AsyncDbSession()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = await db.scalar(select(User).where(User.telegram_id == user_id))
                 if user:
                     user.language = language
-                    db.commit()
+                    await db.commit()
                     logger.info(f"Saved language {language} for user {user_id} in database")
                 else:
                     logger.warning(f"User {user_id} not found in database")
             finally:
-                db.close()
+                await db.close()
         except Exception as e:
             logger.error(f"Error setting language for user {user_id}: {e}")
 
-    def get_language(self, user_id: int) -> Optional[str]:
+    async def get_language(self, user_id: int) -> Optional[str]:
         """
         Возвращает язык пользователя или None, если не установлен.
 
@@ -69,26 +63,32 @@ class UserLanguage:
         Returns:
             Optional[str]: Код языка или None
         """
-        # Проверяем наличие в кеше
-        if user_id in self.languages:
-            return self.languages.get(user_id)
+        # Проверяем наличие в кеше (в том числе закешированное отсутствие языка)
+        language = self.languages.get(user_id)
+        if language is not MISSING:
+            return language
 
-        # Если нет в кеше, пробуем получить из базы данных
+        # Если нет в кеше, загружаем из базы данных только нужные колонки
         try:
-            db = DbSession()
+            db = AsyncDbSession()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
-                if user and user.language:
-                    self.languages[user_id] = user.language
-                    return user.language
+                row = (await db.execute(
+                    select(User.telegram_id, User.language).where(User.telegram_id == user_id)
+                )).first()
             finally:
-                db.close()
+                await db.close()
         except Exception as e:
             logger.error(f"Error getting language for user {user_id}: {e}")
+            return None
 
+        if row and row.language:
+            self.languages.set(user_id, row.language)
+            return row.language
+
+        self.languages.set(user_id, None, ttl=self.negative_ttl)
         return None
 
-    def delete_language(self, user_id: int) -> None:
+    async def delete_language(self, user_id: int) -> None:
         """
         Удаляет языковые настройки пользователя.
 
@@ -96,19 +96,36 @@ class UserLanguage:
             user_id (int): ID пользователя
         """
         # Удаляем из кеша
-        if user_id in self.languages:
-            del self.languages[user_id]
+        self.languages.delete(user_id)
 
         # Удаляем из базы данных (устанавливаем значение по умолчанию)
         try:
-            db = DbSession()
+            db = AsyncDbSession()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = await db.scalar(select(User).where(User.telegram_id == user_id))
                 if user:
                     user.language = DEFAULT_LANGUAGE
-                    db.commit()
+                    await db.commit()
                     logger.info(f"Reset language to default for user {user_id} in database")
             finally:
-                db.close()
+                await db.close()
         except Exception as e:
-            logger.error(f"Error deleting language settings for user {user_id}: {e}")
\ No newline at end of file
+            logger.error(f"Error deleting language settings for user {user_id}: {e}")
+
+    def forget(self, user_id: int) -> None:
+        """
+        Сбрасывает запись кеша, чтобы следующий запрос прочитал язык из базы данных
+        (например, после регистрации пользователя).
+
+        Args:
+            user_id (int): ID пользователя
+        """
+        self.languages.delete(user_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счетчики попаданий и промахов кеша"""
+        return self.languages.stats()
+
+
+# Общий кеш языков для middleware и обработчиков бота
+user_languages = UserLanguage()
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 import hashlib
 import logging
-import requests
 from typing import Dict, Optional
 from fastapi import HTTPException, status
 from config.settings import FREEKASSA_SHOP_ID, FREEKASSA_API_KEY, FREEKASSA_SECRET_KEY
+from payments.gateway import GatewayClient, gateway_client
 
 logger = logging.getLogger(__name__)
 
@@ -12,13 +12,18 @@ logger = logging.getLogger(__name__)
 class FreeKassa:
     """
     Класс для интеграции с платежной системой FreeKassa
+
+    Args:
+        client (GatewayClient, optional): HTTP-клиент (по умолчанию общий для всех платежных систем)
+        base_url (str, optional): Адрес API (для тестового сервера)
     """
 
-    def __init__(self):
+    def __init__(self, client: Optional[GatewayClient] = None, base_url: Optional[str] = None):
         self.shop_id = FREEKASSA_SHOP_ID
         self.api_key = FREEKASSA_API_KEY
         self.secret_key = FREEKASSA_SECRET_KEY
-        self.base_url = "https://api.freekassa.ru/v1"
+        self.base_url = base_url or "https://api.freekassa.ru/v1"
+        self.client = client or gateway_client
 
     def generate_payment_link(self, order_id: int, amount: float, currency: str = "RUB",
                               email: Optional[str] = None, description: str = "Оплата бота") -> str:
@@ -100,7 +105,7 @@ class FreeKassa:
             logger.error(f"Error verifying FreeKassa notification: {e}")
             return False
 
-    def check_payment_status(self, order_id: int) -> Dict:
+    async def check_payment_status(self, order_id: int) -> Dict:
         """
         Проверяет статус платежа через API FreeKassa.
 
@@ -115,8 +120,9 @@ class FreeKassa:
             sign_string = f"{self.shop_id}{self.api_key}{order_id}"
             sign = hashlib.md5(sign_string.encode()).hexdigest()
 
-            # Отправляем API запрос
-            response = requests.get(
+            # Отправляем API запрос (чтение статуса можно повторять)
+            response = await self.client.request(
+                "freekassa", "check_payment_status", "GET",
                 f"{self.base_url}/orders/{order_id}",
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
@@ -127,7 +133,8 @@ class FreeKassa:
 
             if response.status_code != 200:
                 logger.warning(f"FreeKassa API error: {response.text}")
-                return {"success": False, "message": "API error", "status": "unknown"}
+                return {"success": False, "message": "API error", "status": "unknown",
+                        "http_status": response.status_code}
 
             data = response.json()
             logger.info(f"Checked payment status for order {order_id}: {data}")
@@ -136,7 +143,7 @@ class FreeKassa:
                 "success": True,
                 "order_id": order_id,
                 "status": data.get("status", "unknown"),
-                "amount": data.get("amount", 0),
+                "amount": data.get("amount"),
                 "raw_data": data
             }
 
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Общий асинхронный HTTP-клиент платежных систем.
+
+Все запросы к FreeKassa и PayKassa идут через общий httpx.AsyncClient (по
+одному на цикл событий, aclose закрывает все) с пулом keep-alive соединений
+(PAYMENT_HTTP_MAX_CONNECTIONS), таймаутами на каждый вызов, повторами с
+экспоненциальной задержкой и случайным разбросом и гистограммами
+длительности по каждому методу платежной системы.
+
+Повторяются только запросы, которые безопасно повторить: идемпотентные -
+при сетевых ошибках, таймаутах и ответах 429/5xx, неидемпотентные (создание
+платежа) - только если запрос не был отправлен (ошибка подключения).
+"""
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from config.settings import (
+    PAYMENT_HTTP_BACKOFF, PAYMENT_HTTP_CONNECT_TIMEOUT, PAYMENT_HTTP_MAX_CONNECTIONS, PAYMENT_HTTP_RETRIES,
+    PAYMENT_HTTP_TIMEOUT
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Границы интервалов гистограммы длительности запросов в секундах
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Ответы, после которых идемпотентный запрос повторяется
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Ошибки, при которых запрос точно не дошел до платежной системы
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class LatencyHistogram:
+    """Гистограмма длительности вызовов одного метода платежной системы"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+
+    def observe(self, seconds: float, ok: bool = True, retries: int = 0):
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_time += seconds
+        self.retries += retries
+        if not ok:
+            self.errors += 1
+
+    def snapshot(self) -> Dict:
+        # Накопительные значения, как у гистограмм Prometheus: сколько вызовов уложилось в границу
+        cumulative, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            cumulative["+Inf" if bound == float("inf") else str(bound)] = running
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_time_ms": round(self.total_time / self.count * 1000, 2) if self.count else 0.0,
+            "buckets": cumulative,
+        }
+
+
+class GatewayMetrics:
+    """Гистограммы по парам (платежная система, метод)"""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, gateway: str, method: str, seconds: float, ok: bool, retries: int):
+        with self._lock:
+            histogram = self._histograms.setdefault((gateway, method), LatencyHistogram())
+            histogram.observe(seconds, ok, retries)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {f"{gateway}.{method}": histogram.snapshot()
+                    for (gateway, method), histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+gateway_metrics = GatewayMetrics()
+
+
+class GatewayClient:
+    """
+    HTTP-клиент платежных систем.
+
+    Args:
+        timeout (float): Таймаут запроса в секундах
+        connect_timeout (float): Таймаут подключения в секундах
+        max_connections (int): Размер пула соединений
+        retries (int): Количество повторов после первой попытки
+        backoff (float): Базовая задержка между попытками в секундах
+        metrics (GatewayMetrics): Куда записывается длительность вызовов
+    """
+
+    def __init__(self, timeout: float = PAYMENT_HTTP_TIMEOUT, connect_timeout: float = PAYMENT_HTTP_CONNECT_TIMEOUT,
+                 max_connections: int = PAYMENT_HTTP_MAX_CONNECTIONS, retries: int = PAYMENT_HTTP_RETRIES,
+                 backoff: float = PAYMENT_HTTP_BACKOFF, metrics: GatewayMetrics = gateway_metrics):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.retries = retries
+        self.backoff = backoff
+        self.metrics = metrics
+        # Соединения httpx привязаны к циклу событий, поэтому у каждого цикла свой клиент
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Общий клиент текущего цикла событий (создается при первом запросе)"""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            # Клиенты завершенных циклов уже не закрыть штатно, их сокеты закроются при сборке мусора
+            for stale in [other for other in self._clients if other.is_closed()]:
+                del self._clients[stale]
+            client = self._clients[loop] = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return client
+
+    def _delay(self, attempt: int) -> float:
+        # Экспоненциальная задержка со случайным разбросом, чтобы повторы разных запросов не совпадали
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def request(self, gateway: str, method: str, http_method: str, url: str,
+                      idempotent: bool = True, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        Выполняет запрос к платежной системе с повторами.
+
+        Args:
+            gateway (str): Платежная система (для метрик и логов)
+            method (str): Метод платежной системы (для метрик и логов)
+            http_method (str): HTTP-метод
+            url (str): Адрес
+            idempotent (bool): Можно ли повторять запрос, который мог дойти до платежной системы
+            timeout (float, optional): Таймаут этого вызова вместо общего
+
+        Returns:
+            httpx.Response: Ответ последней попытки
+
+        Raises:
+            httpx.HTTPError: Если все попытки завершились сетевой ошибкой
+        """
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, self.timeout.connect))
+
+        started = time.perf_counter()
+        attempt = 0
+        ok = False
+        try:
+            while True:
+                try:
+                    response = await self.client.request(http_method, url, **kwargs)
+                except httpx.HTTPError as e:
+                    retryable = idempotent or isinstance(e, NOT_SENT_ERRORS)
+                    if not retryable or attempt >= self.retries:
+                        logger.error(f"{gateway}.{method} request failed after {attempt + 1} attempts: {e!r}")
+                        raise
+                    logger.warning(f"{gateway}.{method} request error, retrying: {e!r}")
+                else:
+                    if not (idempotent and response.status_code in RETRY_STATUSES and attempt < self.retries):
+                        ok = response.status_code < 400
+                        return response
+                    logger.warning(f"{gateway}.{method} returned {response.status_code}, retrying")
+
+                await asyncio.sleep(self._delay(attempt))
+                attempt += 1
+        finally:
+            self.metrics.observe(gateway, method, time.perf_counter() - started, ok, attempt)
+
+    async def aclose(self):
+        """Закрывает клиенты всех циклов событий"""
+        clients, self._clients = self._clients, {}
+        current = asyncio.get_running_loop()
+        for loop, client in clients.items():
+            if client.is_closed:
+                continue
+            if loop is current:
+                await client.aclose()
+            elif loop.is_running():
+                # Клиент другого потока закрывается в своем цикле событий
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+            else:
+                try:
+                    await client.aclose()
+                except RuntimeError as e:
+                    # Цикл событий уже завершен, его соединения закроются вместе с сокетами
+                    logger.warning(f"Payment gateway client of a closed event loop: {e}")
+
+
+gateway_client = GatewayClient()
@@ -1,12 +1,9 @@
 # -*- coding: utf-8 -*-
 import hashlib
 import logging
-import requests
-import time
-import json
 from typing import Dict, Optional, Union
-from fastapi import HTTPException, status
 from config.settings import PAYKASSA_SHOP_ID, PAYKASSA_API_KEY, PAYKASSA_SECRET_KEY
+from payments.gateway import GatewayClient, gateway_client
 
 logger = logging.getLogger(__name__)
 
@@ -14,21 +11,27 @@ logger = logging.getLogger(__name__)
 class PayKassa:
     """
     Класс для интеграции с платежной системой PayKassa
+
+    Args:
+        client (GatewayClient, optional): HTTP-клиент (по умолчанию общий для всех платежных систем)
+        api_url (str, optional): Адрес API (для тестового сервера)
     """
 
-    def __init__(self):
+    def __init__(self, client: Optional[GatewayClient] = None, api_url: Optional[str] = None):
         self.shop_id = PAYKASSA_SHOP_ID
         self.api_key = PAYKASSA_API_KEY
         self.secret_key = PAYKASSA_SECRET_KEY
-        self.api_url = "https://api.paykassa.app/v1"
+        self.api_url = api_url or "https://api.paykassa.app/v1"
+        self.client = client or gateway_client
 
-    def _make_api_request(self, method: str, params: Dict) -> Dict:
+    async def _make_api_request(self, method: str, params: Dict, idempotent: bool = True) -> Dict:
         """
         Выполняет API запрос к PayKassa.
 
         Args:
             method (str): Метод API
             params (Dict): Параметры запроса
+            idempotent (bool): Можно ли повторять запрос, который мог дойти до PayKassa
 
         Returns:
             Dict: Ответ API
@@ -43,21 +46,22 @@ class PayKassa:
             data.update(params)
 
             # Отправляем POST запрос
-            response = requests.post(self.api_url, json=data)
+            response = await self.client.request("paykassa", method, "POST", self.api_url, json=data,
+                                                 idempotent=idempotent)
             response_data = response.json()
 
             if response.status_code != 200:
                 logger.warning(f"PayKassa API error: {response_data}")
-                return {"status": "error", "message": "API error", "data": response_data}
+                return {"error": True, "status": "error", "message": "API error", "data": response_data}
 
             logger.info(f"PayKassa API response for {method}: {response_data}")
             return response_data
 
         except Exception as e:
             logger.error(f"Error in PayKassa API request: {e}")
-            return {"status": "error", "message": str(e)}
+            return {"error": True, "status": "error", "message": str(e)}
 
-    def create_payment(self, order_id: int, amount: float, currency: str = "RUB",
+    async def create_payment(self, order_id: int, amount: float, currency: str = "RUB",
                        system: str = "card_rub",
                        description: str = "Оплата бота",
                        user_email: Optional[str] = None) -> Dict:
@@ -89,8 +93,8 @@ class PayKassa:
             if user_email:
                 params["email"] = user_email
 
-            # Выполняем API запрос
-            response = self._make_api_request("sci_create_order_get_data", params)
+            # Выполняем API запрос (повторная отправка могла бы создать второй счет)
+            response = await self._make_api_request("sci_create_order_get_data", params, idempotent=False)
 
             if response.get("error"):
                 logger.warning(f"PayKassa payment creation error: {response}")
@@ -154,7 +158,7 @@ class PayKassa:
             logger.error(f"Error verifying PayKassa notification: {e}")
             return False
 
-    def check_payment_status(self, payment_id: Union[str, int]) -> Dict:
+    async def check_payment_status(self, payment_id: Union[str, int]) -> Dict:
         """
         Проверяет статус платежа по его ID.
 
@@ -171,7 +175,7 @@ class PayKassa:
             }
 
             # Выполняем API запрос
-            response = self._make_api_request("sci_confirm_order", params)
+            response = await self._make_api_request("sci_confirm_order", params)
 
             if response.get("error"):
                 logger.warning(f"PayKassa status check error: {response}")
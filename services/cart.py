@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Чтение корзины пользователя.
+
+Пользователь, корзина, позиции и нужные поля ботов загружаются одним
+SELECT с LEFT JOIN; итоговая сумма считается за один проход по строкам.
+Результат используется и для показа корзины, и при оформлении оплаты.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.models import Bot, Cart, CartItem, User
+
+
+@dataclass(frozen=True)
+class CartLine:
+    bot_id: int
+    name: str
+    price: float
+    discount: float
+    quantity: int
+
+    @property
+    def unit_price(self) -> float:
+        """Цена за единицу с учетом скидки бота"""
+        return self.price * (1 - self.discount / 100) if self.discount > 0 else self.price
+
+    @property
+    def total(self) -> float:
+        """Стоимость позиции"""
+        return self.unit_price * self.quantity
+
+
+@dataclass(frozen=True)
+class CartView:
+    user_id: int
+    cart_id: Optional[int]
+    lines: Tuple[CartLine, ...]
+    total: float
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.lines
+
+
+async def load_cart(db: AsyncSession, telegram_id: int) -> Optional[CartView]:
+    """
+    Загружает корзину пользователя одним запросом.
+
+    Args:
+        db (AsyncSession): Сессия БД
+        telegram_id (int): Telegram ID пользователя
+
+    Returns:
+        Optional[CartView]: Корзина или None, если пользователь не найден
+    """
+    rows = (await db.execute(
+        select(User.id, Cart.id, Bot.id, Bot.name, Bot.price, Bot.discount, CartItem.quantity)
+        .select_from(User)
+        .outerjoin(Cart, Cart.user_id == User.id)
+        .outerjoin(CartItem, CartItem.cart_id == Cart.id)
+        .outerjoin(Bot, Bot.id == CartItem.bot_id)
+        .where(User.telegram_id == telegram_id)
+        .order_by(Cart.id, CartItem.id)
+    )).all()
+
+    if not rows:
+        return None
+
+    user_id, cart_id = rows[0][0], rows[0][1]
+    lines = []
+    total = 0.0
+    for _, row_cart_id, bot_id, name, price, discount, quantity in rows:
+        # Берем первую корзину пользователя, как и прежний запрос
+        if bot_id is None or row_cart_id != cart_id:
+            continue
+        line = CartLine(bot_id=bot_id, name=name, price=price, discount=discount or 0, quantity=quantity or 1)
+        lines.append(line)
+        total += line.total
+
+    return CartView(user_id=user_id, cart_id=cart_id, lines=tuple(lines), total=total)
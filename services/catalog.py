@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Снимок каталога ботов в памяти процесса бота.
+
+Категории, боты и цены со скидкой загружаются из БД одним снимком и отдаются
+обработчикам без обращения к базе. Админ-панель при каждом изменении каталога
+увеличивает версию в таблице cache_versions (bump_catalog_version); бот
+сверяет версию не чаще раза в CATALOG_VERSION_CHECK_INTERVAL секунд и
+перезагружает снимок, если она изменилась, а также в любом случае по истечении
+CATALOG_CACHE_TTL.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from config.settings import CATALOG_CACHE_TTL, CATALOG_VERSION_CHECK_INTERVAL
+from database.db import AsyncSessionLocal as AsyncDbSession
+from models.models import Bot, BotCategory, CacheVersion
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_NAME = "catalog"
+
+
+@dataclass(frozen=True)
+class CategoryEntry:
+    id: int
+    name: str
+    discount: float
+
+
+@dataclass(frozen=True)
+class BotEntry:
+    id: int
+    name: str
+    description: str
+    price: float
+    discount: float
+    category_id: Optional[int]
+
+    @property
+    def final_price(self) -> float:
+        """Цена с учетом скидки бота"""
+        return self.price * (1 - self.discount / 100) if self.discount > 0 else self.price
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    categories: Tuple[CategoryEntry, ...]
+    bots: Tuple[BotEntry, ...]
+    categories_by_id: Dict[int, CategoryEntry] = field(default_factory=dict)
+    bots_by_id: Dict[int, BotEntry] = field(default_factory=dict)
+    bots_by_category: Dict[int, Tuple[BotEntry, ...]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, version: int, categories, bots) -> "CatalogSnapshot":
+        by_category: Dict[int, list] = {}
+        for bot in bots:
+            if bot.category_id is not None:
+                by_category.setdefault(bot.category_id, []).append(bot)
+
+        return cls(
+            version=version,
+            categories=tuple(categories),
+            bots=tuple(bots),
+            categories_by_id={category.id: category for category in categories},
+            bots_by_id={bot.id: bot for bot in bots},
+            bots_by_category={category_id: tuple(items) for category_id, items in by_category.items()}
+        )
+
+    def bots_in(self, category_id: Optional[int]) -> Tuple[BotEntry, ...]:
+        """Боты категории или все боты, если категория не указана"""
+        if not category_id:
+            return self.bots
+        return self.bots_by_category.get(category_id, ())
+
+
+def bump_catalog_version(db: Session) -> None:
+    """
+    Увеличивает версию каталога в текущей транзакции.
+    Вызывается админ-панелью перед commit при изменении категорий или ботов.
+    """
+    updated = db.query(CacheVersion).filter(CacheVersion.name == CATALOG_VERSION_NAME).update(
+        {CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False
+    )
+    if not updated:
+        db.add(CacheVersion(name=CATALOG_VERSION_NAME, version=1))
+
+
+class CatalogCache:
+    """
+    Версионируемый read-through кеш каталога.
+
+    Args:
+        ttl (float): Через сколько секунд снимок перезагружается независимо от версии
+        check_interval (float): Как часто сверять версию каталога с БД
+    """
+
+    def __init__(self, ttl: float = CATALOG_CACHE_TTL, check_interval: float = CATALOG_VERSION_CHECK_INTERVAL):
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.loads = 0
+        self.version_checks = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Сбрасывает снимок; следующий запрос загрузит каталог заново"""
+        self._snapshot = None
+
+    async def get_snapshot(self) -> CatalogSnapshot:
+        """Возвращает актуальный снимок каталога"""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked_at < self.check_interval and now - self._loaded_at < self.ttl:
+            return snapshot
+
+        async with self._lock:
+            # Снимок мог обновить другой обработчик, пока мы ждали блокировку
+            now = time.monotonic()
+            snapshot = self._snapshot
+            if snapshot is not None and now - self._checked_at < self.check_interval and now - self._loaded_at < self.ttl:
+                return snapshot
+
+            db = AsyncDbSession()
+            try:
+                version = await db.scalar(
+                    select(CacheVersion.version).where(CacheVersion.name == CATALOG_VERSION_NAME)
+                ) or 0
+                self.version_checks += 1
+
+                if snapshot is None or snapshot.version != version or now - self._loaded_at >= self.ttl:
+                    snapshot = await self._load(db, version)
+                    self._snapshot = snapshot
+                    self._loaded_at = now
+                self._checked_at = now
+                return snapshot
+            finally:
+                await db.close()
+
+    async def _load(self, db, version: int) -> CatalogSnapshot:
+        """Загружает категории и ботов из БД"""
+        categories = [
+            CategoryEntry(id=row.id, name=row.name, discount=row.discount or 0)
+            for row in await db.execute(
+                select(BotCategory.id, BotCategory.name, BotCategory.discount).order_by(BotCategory.id)
+            )
+        ]
+        bots = [
+            BotEntry(id=row.id, name=row.name, description=row.description, price=row.price,
+                     discount=row.discount or 0, category_id=row.category_id)
+            for row in await db.execute(
+                select(Bot.id, Bot.name, Bot.description, Bot.price, Bot.discount, Bot.category_id).order_by(Bot.id)
+            )
+        ]
+        self.loads += 1
+        logger.info(f"Catalog snapshot loaded: version={version}, categories={len(categories)}, bots={len(bots)}")
+        return CatalogSnapshot.build(version, categories, bots)
+
+
+# Общий кеш каталога процесса бота
+catalog_cache = CatalogCache()
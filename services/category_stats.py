@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Статистика категорий ботов для админ-панели.
+
+Количество и сумма цен ботов, продажи и выручка (по позициям заказов),
+средний рейтинг и открытые баг-репорты по каждой категории (и по ботам без
+категории) считаются одним запросом: продажи, отзывы и баг-репорты сначала
+группируются по ботам, затем присоединяются к ботам и группируются по категориям.
+
+Результат хранится в памяти CATEGORY_STATS_CACHE_TTL секунд и сбрасывается
+после commit, изменившего ботов, категории, заказы, отзывы или баг-репорты
+в процессе админ-панели, а также по событиям шины services.events (записи бота).
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import Float, Integer, String, event, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from config.settings import CATEGORY_STATS_CACHE_TTL
+from models.models import Bot, BotCategory, BugReport, Order, OrderItem, OrderStatus, Review
+from services.events import event_bus
+from utils.cache import LRUCache, MISSING
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNCATEGORIZED_NAME = "Без категории"
+
+# Статус закрытого баг-репорта, остальные считаются открытыми
+RESOLVED_BUG_STATUS = "resolved"
+
+STATS_CACHE_KEY = "categories"
+STALE_KEY = "category_stats_stale"
+
+# Модели, изменения которых меняют статистику категорий
+TRACKED_MODELS = (Bot, BotCategory, Order, OrderItem, Review, BugReport)
+# События шины о записях бота, меняющих статистику категорий
+TRACKED_EVENTS = {"order_created", "order_paid", "review_created", "bug_report_created"}
+
+stats_cache = LRUCache(max_size=1, ttl=CATEGORY_STATS_CACHE_TTL)
+
+
+def category_stats_query():
+    """Один запрос: строка на каждую категорию и строка для ботов без категории"""
+    # Продажи считаются по позициям оплаченных заказов: заказ может содержать несколько ботов
+    sales = (select(OrderItem.bot_id, func.sum(OrderItem.quantity).label("sales"),
+                    func.sum(OrderItem.amount).label("revenue"))
+             .join(Order, Order.id == OrderItem.order_id)
+             .where(Order.status == OrderStatus.PAID).group_by(OrderItem.bot_id).subquery())
+    reviews = (select(Review.bot_id, func.count(Review.id).label("reviews"), func.sum(Review.rating).label("rating"))
+               .group_by(Review.bot_id).subquery())
+    bugs = (select(BugReport.bot_id, func.count(BugReport.id).label("open_bugs"))
+            .where(BugReport.status != RESOLVED_BUG_STATUS).group_by(BugReport.bot_id).subquery())
+
+    measures = (
+        func.count(Bot.id).label("bots_count"),
+        func.coalesce(func.sum(Bot.price), 0).label("total_price"),
+        func.coalesce(func.sum(sales.c.sales), 0).label("sales_count"),
+        func.coalesce(func.sum(sales.c.revenue), 0).label("revenue"),
+        func.coalesce(func.sum(reviews.c.reviews), 0).label("reviews_count"),
+        func.coalesce(func.sum(reviews.c.rating), 0).label("rating_sum"),
+        func.coalesce(func.sum(bugs.c.open_bugs), 0).label("open_bugs"),
+    )
+
+    def with_measures(query):
+        return (query.outerjoin(sales, sales.c.bot_id == Bot.id)
+                .outerjoin(reviews, reviews.c.bot_id == Bot.id)
+                .outerjoin(bugs, bugs.c.bot_id == Bot.id))
+
+    categorized = with_measures(
+        select(BotCategory.id, BotCategory.name, BotCategory.description, BotCategory.discount, *measures)
+        .select_from(BotCategory).outerjoin(Bot, Bot.category_id == BotCategory.id)
+    ).group_by(BotCategory.id, BotCategory.name, BotCategory.description, BotCategory.discount)
+
+    # Без GROUP BY агрегаты дают ровно одну строку, даже если ботов без категории нет
+    uncategorized = with_measures(
+        select(literal(None, Integer), literal(UNCATEGORIZED_NAME, String), literal(None, String),
+               literal(0, Float), *measures)
+        .select_from(Bot)
+    ).where(Bot.category_id.is_(None))
+
+    return union_all(categorized, uncategorized)
+
+
+def load_category_stats(db: Session) -> List[Dict[str, Any]]:
+    """Статистика категорий из БД (категории по id, боты без категории последними)"""
+    result = []
+    for row in db.execute(category_stats_query()).all():
+        (category_id, name, description, discount, bots_count, total_price,
+         sales_count, revenue, reviews_count, rating_sum, open_bugs) = row
+        result.append({
+            "id": category_id,
+            "name": name,
+            "description": description,
+            "discount": discount or 0,
+            "bots_count": bots_count,
+            "total_price": float(total_price),
+            "sales_count": int(sales_count),
+            "revenue": float(revenue),
+            "reviews_count": int(reviews_count),
+            "avg_rating": round(rating_sum / reviews_count, 2) if reviews_count else None,
+            "open_bugs": int(open_bugs),
+        })
+    result.sort(key=lambda item: (item["id"] is None, item["id"] or 0))
+    return result
+
+
+def get_category_stats(db: Session) -> List[Dict[str, Any]]:
+    """Статистика категорий из кеша, при промахе - из БД"""
+    stats = stats_cache.get(STATS_CACHE_KEY)
+    if stats is MISSING:
+        stats = load_category_stats(db)
+        stats_cache.set(STATS_CACHE_KEY, stats)
+    return stats
+
+
+def invalidate_category_stats():
+    stats_cache.clear()
+
+
+def _mark_stale(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info[STALE_KEY] = True
+
+
+for _model in TRACKED_MODELS:
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _mark_stale)
+
+
+# Кеш сбрасывается после commit: до него другие запросы еще видят старые данные
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop(STALE_KEY, False):
+        invalidate_category_stats()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_mark(session):
+    session.info.pop(STALE_KEY, None)
+
+
+event_bus.add_listener(lambda item: invalidate_category_stats() if item.type in TRACKED_EVENTS else None)
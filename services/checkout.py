@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Оформление заказа из корзины.
+
+Заказ и все его позиции (order_items) создаются в одной транзакции: сначала
+строка заказа, затем позиции одним пакетным INSERT. Сумма заказа - сумма
+позиций по ценам со скидкой на момент оформления. Поле Order.bot_id хранит
+бота первой позиции для совместимости со старыми заказами и сводками.
+"""
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.models import Order, OrderItem, OrderStatus
+from services.cart import CartView
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def create_order(db: AsyncSession, cart: CartView, payment_system: str) -> Order:
+    """
+    Создает заказ со всеми позициями корзины.
+
+    Args:
+        db (AsyncSession): Сессия БД (изменения фиксируются здесь же)
+        cart (CartView): Непустая корзина пользователя
+        payment_system (str): Выбранная платежная система
+
+    Returns:
+        Order: Созданный заказ в статусе PENDING
+    """
+    if cart.is_empty:
+        raise ValueError("Cannot create an order from an empty cart")
+
+    try:
+        order = Order(user_id=cart.user_id, bot_id=cart.lines[0].bot_id, amount=cart.total,
+                      status=OrderStatus.PENDING, payment_system=payment_system)
+        db.add(order)
+        await db.flush()
+
+        await db.execute(insert(OrderItem), [
+            {"order_id": order.id, "bot_id": line.bot_id, "quantity": line.quantity,
+             "price": line.unit_price, "amount": line.total}
+            for line in cart.lines
+        ])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    logger.info(f"Created order {order.id} with {len(cart.lines)} items for user {cart.user_id}")
+    return order
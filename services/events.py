@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+"""
+Шина событий для push-уведомлений админ-панели.
+
+События (новый заказ, оплата, баг-репорт, отзыв, сообщение пользователя)
+публикуются в шину процесса админ-панели и рассылаются всем подключенным
+к /events администраторам.
+
+Источники событий:
+- изменения через ORM в процессе админ-панели (вебхуки платежных систем,
+  маршруты админки) - события копятся в сессии и публикуются после commit;
+- записи, сделанные процессом бота (баг-репорты, отзывы, сообщения, заказы):
+  у бота своя память, поэтому их находит DatabaseWatcher - один на процесс
+  админ-панели, раз в EVENTS_POLL_INTERVAL секунд и только пока есть
+  подключенные администраторы, независимо от количества открытых вкладок.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, attributes, object_session
+
+from config.settings import EVENTS_POLL_INTERVAL
+from database.db import AsyncSessionLocal as AsyncDbSession
+from models.models import BugReport, Message, Order, OrderStatus, Review
+from utils.cache import LRUCache, MISSING
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Сколько событий может ждать отправки одному подписчику; при переполнении отбрасываются самые старые
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Ключ сессии, в котором копятся события до commit
+PENDING_EVENTS_KEY = "admin_events"
+
+# Записи могут становиться видимыми не в порядке id и времени изменения (транзакции
+# завершаются в разном порядке), поэтому DatabaseWatcher перепроверяет хвост уже
+# просмотренного; повторы отсеиваются по недавно опубликованным событиям
+WATCHER_ID_OVERLAP = 50
+WATCHER_TIME_OVERLAP = timedelta(seconds=30)
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    type: str
+    data: Dict[str, Any]
+    created_at: float = field(default_factory=time.time)
+
+
+class Subscription:
+    """Очередь событий одного подключения (живет в цикле событий, в котором создана)"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def _put(self, item: Event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def get(self, timeout: float) -> Optional[Event]:
+        """Следующее событие или None, если за timeout секунд событий не было"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    """
+    Рассылка событий подписчикам. publish можно вызывать из любого потока
+    (синхронные маршруты выполняются в пуле потоков).
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.published = 0
+        self._subscribers: List[Subscription] = []
+        self._listeners: List[Callable[[Event], None]] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # Недавно опубликованные события (тип, id записи): DatabaseWatcher не публикует их повторно
+        self.recent = LRUCache(max_size=5000)
+
+    def subscribe(self) -> Subscription:
+        """Подписка текущего цикла событий"""
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def add_listener(self, callback: Callable[[Event], None]):
+        """Синхронный обработчик каждого события (например, сброс кеша)"""
+        self._listeners.append(callback)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> Event:
+        item = Event(next(self._ids), event_type, data)
+        self.recent.set((event_type, data.get("id")), True)
+        self.published += 1
+
+        for listener in self._listeners:
+            try:
+                listener(item)
+            except Exception as e:
+                logger.error(f"Event listener failed for {event_type}: {e}")
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, item)
+            except RuntimeError:
+                # Цикл событий подписчика уже закрыт
+                self.unsubscribe(subscription)
+        return item
+
+    def was_published(self, event_type: str, record_id: Any) -> bool:
+        return self.recent.get((event_type, record_id)) is not MISSING
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            dropped = sum(subscription.dropped for subscription in self._subscribers)
+        return {"subscribers": self.subscribers, "published": self.published, "dropped": dropped}
+
+
+event_bus = EventBus()
+
+
+@dataclass(frozen=True)
+class EventSource:
+    """
+    Таблица - источник событий о новых записях.
+
+    where - условие для запроса DatabaseWatcher, accept - то же условие для объекта в памяти.
+    """
+    type: str
+    model: Any
+    fields: Tuple[str, ...]
+    where: Tuple = ()
+    accept: Callable[[Any], bool] = lambda target: True
+
+
+ORDER_FIELDS = ("id", "user_id", "bot_id", "amount", "status", "payment_system")
+
+INSERT_SOURCES = [
+    EventSource("order_created", Order, ORDER_FIELDS),
+    EventSource("bug_report_created", BugReport, ("id", "user_id", "bot_id", "status")),
+    EventSource("review_created", Review, ("id", "user_id", "bot_id", "rating")),
+    # Только сообщения от пользователей (не ответы администраторов)
+    EventSource("message_received", Message, ("id", "user_id", "message_type"),
+                where=(Message.is_from_admin == False,),  # noqa: E712
+                accept=lambda message: not message.is_from_admin),
+]
+
+
+def _plain(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value.value if isinstance(value, OrderStatus) else value for key, value in data.items()}
+
+
+def _queue(target, event_type: str, fields):
+    """Откладывает событие до commit сессии объекта"""
+    session = object_session(target)
+    if session is not None:
+        data = _plain({name: getattr(target, name) for name in fields})
+        session.info.setdefault(PENDING_EVENTS_KEY, []).append((event_type, data))
+
+
+def _register_insert_listener(source: EventSource):
+    def after_insert(mapper, connection, target):
+        if source.accept(target):
+            _queue(target, source.type, source.fields)
+
+    event.listen(source.model, "after_insert", after_insert)
+
+
+for _source in INSERT_SOURCES:
+    _register_insert_listener(_source)
+
+
+@event.listens_for(Order, "after_update")
+def _order_paid(mapper, connection, target):
+    history = attributes.get_history(target, "status")
+    if history.added and target.status == OrderStatus.PAID:
+        _queue(target, "order_paid", ORDER_FIELDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_pending(session):
+    for event_type, data in session.info.pop(PENDING_EVENTS_KEY, []):
+        event_bus.publish(event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
+
+
+class DatabaseWatcher:
+    """
+    Находит записи, сделанные другими процессами (ботом), и публикует по ним события.
+
+    Args:
+        bus (EventBus): Шина событий
+        interval (float): Период проверки в секундах
+        batch_size (int): Максимум новых записей каждого типа за одну проверку
+    """
+
+    def __init__(self, bus: EventBus = event_bus, interval: float = EVENTS_POLL_INTERVAL, batch_size: int = 100):
+        self.bus = bus
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_ids: Dict[str, int] = {}
+        self.paid_since: Optional[datetime] = None
+        # Состояние на момент начала наблюдения: перепроверка хвоста не уходит раньше него
+        self.baseline_ids: Dict[str, int] = {}
+        self.baseline_at: Optional[datetime] = None
+
+    async def _baseline(self, db):
+        """Запоминает текущее состояние, чтобы не рассылать события о старых записях"""
+        for source in INSERT_SOURCES:
+            self.last_ids[source.type] = (await db.execute(select(func.max(source.model.id)))).scalar() or 0
+        self.baseline_ids = dict(self.last_ids)
+        self.paid_since = self.baseline_at = datetime.utcnow()
+
+    async def check(self):
+        """Одна проверка: публикует события о новых записях и оплаченных заказах"""
+        published = 0
+        async with AsyncDbSession() as db:
+            if self.paid_since is None:
+                await self._baseline(db)
+                return 0
+
+            for source in INSERT_SOURCES:
+                columns = [getattr(source.model, name) for name in source.fields]
+                since_id = max(self.last_ids[source.type] - WATCHER_ID_OVERLAP, self.baseline_ids[source.type])
+                rows = (await db.execute(
+                    select(*columns).where(source.model.id > since_id, *source.where)
+                    .order_by(source.model.id).limit(self.batch_size + WATCHER_ID_OVERLAP)
+                )).all()
+                for row in rows:
+                    data = _plain(dict(zip(source.fields, row)))
+                    if not self.bus.was_published(source.type, data["id"]):
+                        self.bus.publish(source.type, data)
+                        published += 1
+                    self.last_ids[source.type] = max(self.last_ids[source.type], data["id"])
+
+            # Оплата меняет существующий заказ, поэтому ищется по времени изменения
+            checked_at = datetime.utcnow()
+            paid_since = max(self.paid_since - WATCHER_TIME_OVERLAP, self.baseline_at)
+            rows = (await db.execute(
+                select(*[getattr(Order, name) for name in ORDER_FIELDS])
+                .where(Order.status == OrderStatus.PAID, Order.updated_at > paid_since)
+                .order_by(Order.updated_at).limit(self.batch_size)
+            )).all()
+            for row in rows:
+                data = _plain(dict(zip(ORDER_FIELDS, row)))
+                if not self.bus.was_published("order_paid", data["id"]):
+                    self.bus.publish("order_paid", data)
+                    published += 1
+            self.paid_since = checked_at
+        return published
+
+    async def run(self):
+        """Проверяет БД, пока есть подписчики; без подписчиков только ждет"""
+        while True:
+            try:
+                if self.bus.subscribers:
+                    await self.check()
+                else:
+                    # После паузы без подписчиков начинаем с текущего состояния
+                    self.paid_since = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Event watcher check failed: {e}")
+            await asyncio.sleep(self.interval)
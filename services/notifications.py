@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Лента уведомлений админ-панели.
+
+Последние заказы, баг-репорты, отзывы и сообщения пользователей выбираются
+четырьмя запросами, пользователь и бот подгружаются в них же (joinedload).
+Собранная лента хранится в памяти NOTIFICATIONS_CACHE_TTL секунд (или до
+ближайшего события шины services.events) и общая для всех администраторов,
+поэтому опрос из каждой открытой вкладки стоит одного запроса отметки
+прочтения (AdminReadMarker) этого администратора.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from config.settings import NOTIFICATIONS_CACHE_TTL
+from models.models import AdminReadMarker, BugReport, Message, Order, Review
+from services.events import event_bus
+from utils.cache import LRUCache, MISSING
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних записей каждого типа попадает в ленту
+FEED_LIMIT_PER_TYPE = 20
+# Сколько уведомлений возвращается за один запрос
+FEED_PAGE_SIZE = 10
+
+FEED_CACHE_KEY = "feed"
+
+feed_cache = LRUCache(max_size=1, ttl=NOTIFICATIONS_CACHE_TTL)
+
+# Новое событие (заказ, баг-репорт, отзыв, сообщение) устаревает ленту раньше TTL
+event_bus.add_listener(lambda item: feed_cache.clear())
+
+
+@dataclass(frozen=True)
+class FeedItem:
+    created_at: datetime
+    data: Dict[str, Any]
+
+
+def _user_name(user) -> str:
+    return user.username or user.first_name or f"ID: {user.id}"
+
+
+def load_feed(db: Session, limit: int = FEED_LIMIT_PER_TYPE) -> List[FeedItem]:
+    """Собирает ленту из БД (новые сверху)"""
+    feed = []
+
+    orders = (db.query(Order).options(joinedload(Order.user), joinedload(Order.bot))
+              .order_by(desc(Order.created_at)).limit(limit).all())
+    for order in orders:
+        feed.append(FeedItem(order.created_at, {
+            "id": order.id,
+            "type": "order",
+            "title": f"Новый заказ #{order.id}",
+            "message": f"Пользователь {_user_name(order.user)} заказал {order.bot.name} за {order.amount} руб.",
+            "status": order.status.value,
+            "link": f"/payments/page/{order.id}",
+            "created_at": order.created_at.isoformat(),
+            "icon": "fa-money-bill"
+        }))
+
+    reports = (db.query(BugReport).options(joinedload(BugReport.user), joinedload(BugReport.bot))
+               .order_by(desc(BugReport.created_at)).limit(limit).all())
+    for report in reports:
+        feed.append(FeedItem(report.created_at, {
+            "id": report.id,
+            "type": "bug_report",
+            "title": f"Новый баг-репорт #{report.id}",
+            "message": f"Пользователь {_user_name(report.user)} сообщил о проблеме с {report.bot.name}",
+            "status": report.status,
+            "link": f"/reports/page/{report.id}",
+            "created_at": report.created_at.isoformat(),
+            "icon": "fa-bug"
+        }))
+
+    reviews = (db.query(Review).options(joinedload(Review.user), joinedload(Review.bot))
+               .order_by(desc(Review.created_at)).limit(limit).all())
+    for review in reviews:
+        feed.append(FeedItem(review.created_at, {
+            "id": review.id,
+            "type": "review",
+            "title": f"Новый отзыв о боте {review.bot.name}",
+            "message": f"Пользователь {_user_name(review.user)} оставил отзыв с рейтингом {review.rating}/5",
+            "rating": review.rating,
+            "link": f"/users/page/{review.user.id}",  # Пока что ссылка на пользователя, можно изменить
+            "created_at": review.created_at.isoformat(),
+            "icon": "fa-star"
+        }))
+
+    # Только сообщения от пользователей (не от админов)
+    messages = (db.query(Message).options(joinedload(Message.user))
+                .filter(Message.is_from_admin == False)  # noqa: E712
+                .order_by(desc(Message.created_at)).limit(limit).all())
+    for message in messages:
+        content = message.content or ""
+        feed.append(FeedItem(message.created_at, {
+            "id": message.id,
+            "type": "message",
+            "title": "Новое сообщение от пользователя",
+            "message": f"Пользователь {_user_name(message.user)} "
+                       f"отправил сообщение: {content[:30] + '...' if len(content) > 30 else content}",
+            "link": f"/messages/page/{message.user.id}",
+            "created_at": message.created_at.isoformat(),
+            "icon": "fa-envelope"
+        }))
+
+    feed.sort(key=lambda item: item.created_at, reverse=True)
+    return feed
+
+
+def get_feed(db: Session) -> List[FeedItem]:
+    """Лента из кеша, при промахе - из БД"""
+    feed = feed_cache.get(FEED_CACHE_KEY)
+    if feed is MISSING:
+        feed = load_feed(db)
+        feed_cache.set(FEED_CACHE_KEY, feed)
+    return feed
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Даты в БД хранятся в UTC без часового пояса"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def get_read_marker(db: Session, admin_telegram_id: int) -> Optional[datetime]:
+    marker = db.get(AdminReadMarker, admin_telegram_id)
+    return marker.last_read_at if marker else None
+
+
+def mark_read(db: Session, admin_telegram_id: int, until: Optional[datetime] = None) -> datetime:
+    """
+    Отмечает прочитанными уведомления администратора, созданные не позже until (по умолчанию - сейчас).
+    Отметка только сдвигается вперед.
+    """
+    until = _naive_utc(until) or datetime.utcnow()
+    for attempt in range(2):
+        marker = db.get(AdminReadMarker, admin_telegram_id)
+        if marker is None:
+            marker = AdminReadMarker(admin_telegram_id=admin_telegram_id, last_read_at=until)
+            db.add(marker)
+        elif marker.last_read_at < until:
+            marker.last_read_at = until
+        try:
+            db.commit()
+            return marker.last_read_at
+        except IntegrityError:
+            # Отметку одновременно создал другой запрос этого администратора
+            db.rollback()
+            if attempt:
+                raise
+    return until
+
+
+def notifications_for(db: Session, admin_telegram_id: int, since: Optional[datetime] = None,
+                      limit: int = FEED_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Уведомления для администратора.
+
+    Args:
+        db (Session): Сессия БД
+        admin_telegram_id (int): Telegram ID администратора
+        since (datetime, optional): Вернуть только уведомления новее этого момента (значение latest из прошлого ответа)
+        limit (int): Максимальное количество уведомлений в ответе
+
+    Returns:
+        Dict[str, Any]: unread_count, notifications (с признаком is_read) и latest - дата самого нового уведомления
+    """
+    since = _naive_utc(since)
+    feed = get_feed(db)
+    last_read_at = get_read_marker(db, admin_telegram_id)
+
+    def is_read(item: FeedItem) -> bool:
+        return last_read_at is not None and item.created_at <= last_read_at
+
+    items = [item for item in feed if since is None or item.created_at > since][:limit]
+    latest = feed[0].created_at if feed else since
+
+    return {
+        "unread_count": sum(1 for item in feed if not is_read(item)),
+        "notifications": [dict(item.data, is_read=is_read(item)) for item in items],
+        "latest": latest.isoformat() if latest else None,
+    }
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Очередь исходящих сообщений пользователям (transactional outbox).
+
+Сообщение записывается в таблицу outbox_messages в той же транзакции, что и
+изменение, о котором оно сообщает: когда заказ переходит в PAID (вебхук
+платежной системы, админ-панель, любой другой процесс), событие маппера
+(register_listeners) добавляет сообщение payment_success. Откат транзакции
+убирает и сообщение, а после commit оно не потеряется, даже если процесс тут
+же завершится.
+
+Отправляет сообщения OutboxWorker в процессе бота:
+- забирает пачку готовых к отправке сообщений (SELECT ... FOR UPDATE SKIP
+  LOCKED) и закрепляет ее за собой на OUTBOX_LEASE секунд, поэтому несколько
+  воркеров не берут одно сообщение;
+- разные чаты отправляет параллельно, а между сообщениями в один чат
+  выдерживает OUTBOX_CHAT_INTERVAL (ограничение Telegram на чат);
+- неудачные отправки повторяет с экспоненциальной задержкой (ответ 429 - через
+  указанное Telegram время, без траты попытки), ошибки, которые повтор не
+  исправит (бот заблокирован, чат не найден), и исчерпанные попытки помечают
+  сообщение failed.
+
+Если воркер упадет между отправкой и записью результата, сообщение вернется в
+очередь по истечении закрепления: доставка гарантируется "хотя бы один раз".
+"""
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import attributes
+
+from config.settings import (
+    OUTBOX_BATCH_SIZE, OUTBOX_CHAT_INTERVAL, OUTBOX_LEASE, OUTBOX_MAX_ATTEMPTS, OUTBOX_POLL_INTERVAL,
+    OUTBOX_RETRY_BACKOFF
+)
+from database.db import AsyncSessionLocal as AsyncDbSession
+from models.models import Order, OrderStatus, OutboxMessage, User
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Состояния сообщения
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+# Типы сообщений
+PAYMENT_SUCCESS = "payment_success"
+
+# Формирует параметры bot.send_message по данным сообщения (None - отправлять нечего)
+Renderer = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class UndeliverableMessage(Exception):
+    """Сообщение нельзя сформировать (неизвестный тип, удаленный заказ)"""
+
+
+# Ошибки, которые повтор не исправит
+PERMANENT_ERRORS = (TelegramForbiddenError, TelegramBadRequest, UndeliverableMessage)
+
+
+def outbox_insert(kind: str, chat_id: Any, payload: Dict[str, Any]):
+    """
+    Запрос, добавляющий сообщение в outbox; выполняется в транзакции вызывающего.
+
+    Args:
+        kind (str): Тип сообщения
+        chat_id: ID чата или подзапрос, который его выбирает
+        payload (Dict): Данные для формирования текста при отправке
+    """
+    return insert(OutboxMessage).values(kind=kind, chat_id=chat_id, payload=json.dumps(payload), status=PENDING,
+                                        attempts=0, next_attempt_at=datetime.utcnow())
+
+
+def _order_paid(mapper, connection, order):
+    history = attributes.get_history(order, "status")
+    if history.added and order.status == OrderStatus.PAID and OrderStatus.PAID not in history.deleted:
+        chat_id = select(User.telegram_id).where(User.id == order.user_id).scalar_subquery()
+        connection.execute(outbox_insert(PAYMENT_SUCCESS, chat_id, {"order_id": order.id}))
+
+
+def register_listeners() -> None:
+    """
+    Подписывает запись сообщений об оплате на изменения заказов. Вызывается при старте каждого
+    процесса, который пишет в базу (админ-панель, бот); повторный вызов ничего не меняет.
+    """
+    if not event.contains(Order, "after_update", _order_paid):
+        event.listen(Order, "after_update", _order_paid)
+
+
+class OutboxWorker:
+    """
+    Отправляет сообщения из outbox через Telegram.
+
+    Args:
+        bot (Bot): Экземпляр бота
+        renderers (Dict[str, Renderer]): Формирование сообщения по его типу
+        batch_size (int): Сколько сообщений забирается за раз
+        poll_interval (float): Пауза между проверками, если очередь пуста (в секундах)
+        max_attempts (int): Количество попыток отправки
+        backoff (float): Базовая задержка повтора (в секундах)
+        chat_interval (float): Минимальный интервал между сообщениями в один чат (в секундах)
+        lease (float): На сколько секунд взятые сообщения закрепляются за воркером
+    """
+
+    def __init__(self, bot: Bot, renderers: Dict[str, Renderer], batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = OUTBOX_POLL_INTERVAL, max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 backoff: float = OUTBOX_RETRY_BACKOFF, chat_interval: float = OUTBOX_CHAT_INTERVAL,
+                 lease: float = OUTBOX_LEASE):
+        self.bot = bot
+        self.renderers = renderers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.chat_interval = chat_interval
+        self.lease = lease
+        # Когда (time.monotonic) в чат можно отправить следующее сообщение
+        self._chat_ready: Dict[int, float] = {}
+
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    async def claim(self) -> List[OutboxMessage]:
+        """Забирает пачку готовых к отправке сообщений и закрепляет ее за воркером"""
+        async with AsyncDbSession() as db:
+            now = datetime.utcnow()
+            messages = (await db.execute(
+                select(OutboxMessage)
+                .where(OutboxMessage.status == PENDING, OutboxMessage.next_attempt_at <= now)
+                .order_by(OutboxMessage.id).limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            for message in messages:
+                message.next_attempt_at = now + timedelta(seconds=self.lease)
+            await db.commit()
+            return list(messages)
+
+    async def _deliver(self, message: OutboxMessage):
+        renderer = self.renderers.get(message.kind)
+        if renderer is None:
+            raise UndeliverableMessage(f"Unknown outbox message kind: {message.kind}")
+        content = await renderer(json.loads(message.payload))
+        if content is None:
+            raise UndeliverableMessage(f"Nothing to send for outbox message {message.id}")
+        await self.bot.send_message(chat_id=message.chat_id, **content)
+
+    def _failure(self, message: OutboxMessage, error: Exception) -> Dict[str, Any]:
+        """Изменения сообщения после неудачной попытки"""
+        attempts = message.attempts + 1
+        if isinstance(error, PERMANENT_ERRORS) or attempts >= self.max_attempts:
+            self.failed += 1
+            logger.error(f"Outbox message {message.id} ({message.kind}) failed after {attempts} attempts: {error!r}")
+            return {"status": FAILED, "attempts": attempts, "last_error": repr(error)}
+
+        self.retried += 1
+        # Экспоненциальная задержка со случайным разбросом, чтобы повторы не приходили одновременно
+        delay = self.backoff * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5)
+        logger.warning(f"Outbox message {message.id} ({message.kind}) attempt {attempts} failed, "
+                       f"retrying in {delay:.1f}s: {error!r}")
+        return {"attempts": attempts, "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay),
+                "last_error": repr(error)}
+
+    async def _send_chat(self, messages: List[OutboxMessage], deadline: float) -> List[Tuple[int, Dict[str, Any]]]:
+        """Отправляет сообщения одного чата по очереди; возвращает изменения для записи в БД"""
+        chat_id = messages[0].chat_id
+        changes = []
+        for index, message in enumerate(messages):
+            ready = self._chat_ready.get(chat_id, 0.0)
+            if ready > deadline:
+                # Не успеваем до конца закрепления: остальные сообщения чата вернутся в очередь
+                postponed = datetime.utcnow() + timedelta(seconds=ready - time.monotonic())
+                changes += [(item.id, {"next_attempt_at": postponed}) for item in messages[index:]]
+                break
+            if ready > time.monotonic():
+                await asyncio.sleep(ready - time.monotonic())
+
+            self._chat_ready[chat_id] = time.monotonic() + self.chat_interval
+            try:
+                await self._deliver(message)
+            except TelegramRetryAfter as e:
+                # Telegram ограничил чат: это и следующие сообщения чата откладываются без траты попыток
+                self._chat_ready[chat_id] = time.monotonic() + e.retry_after
+                retry_at = datetime.utcnow() + timedelta(seconds=e.retry_after)
+                changes += [(item.id, {"next_attempt_at": retry_at, "last_error": repr(e)})
+                            for item in messages[index:]]
+                self.retried += len(messages) - index
+                break
+            except Exception as e:
+                changes.append((message.id, self._failure(message, e)))
+            else:
+                self.sent += 1
+                changes.append((message.id, {"status": SENT, "attempts": message.attempts + 1,
+                                             "sent_at": datetime.utcnow(), "last_error": None}))
+        return changes
+
+    async def _record(self, changes: List[Tuple[int, Dict[str, Any]]]):
+        async with AsyncDbSession() as db:
+            for message_id, values in changes:
+                await db.execute(update(OutboxMessage).where(OutboxMessage.id == message_id).values(**values))
+            await db.commit()
+
+    async def drain_once(self) -> int:
+        """Одна пачка: забирает, отправляет и записывает результат. Возвращает количество взятых сообщений"""
+        messages = await self.claim()
+        if not messages:
+            return 0
+
+        now = time.monotonic()
+        self._chat_ready = {chat_id: ready for chat_id, ready in self._chat_ready.items() if ready > now}
+        # Запас до конца закрепления, чтобы успеть записать результат
+        deadline = now + self.lease / 2
+
+        chats: Dict[int, List[OutboxMessage]] = {}
+        for message in messages:
+            chats.setdefault(message.chat_id, []).append(message)
+        results = await asyncio.gather(*(self._send_chat(chat_messages, deadline) for chat_messages in chats.values()))
+        await self._record([change for chat_changes in results for change in chat_changes])
+        return len(messages)
+
+    async def run(self):
+        """Отправляет сообщения, пока задача не отменена; при пустой очереди ждет poll_interval"""
+        logger.info(f"Outbox worker started: batch={self.batch_size}, chat_interval={self.chat_interval}s")
+        while True:
+            try:
+                claimed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker iteration failed: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def metrics(self) -> Dict[str, int]:
+        return {"sent": self.sent, "retried": self.retried, "failed": self.failed}
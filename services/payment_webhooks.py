@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Обработка уведомлений (вебхуков) платежных систем.
+
+Платежные системы повторяют уведомление, пока не получат ответ, а под
+нагрузкой - и после него, поэтому одно уведомление может прийти много раз,
+в том числе одновременно. Каждое уведомление записывается в таблицу
+payment_notifications с уникальным ключом (платежная система, id транзакции)
+в той же транзакции, что и изменение заказа: повторная доставка принятого
+уведомления упирается в уникальный индекс и получает сохраненный результат
+первой, ничего не меняя. Отклоненное уведомление (заказ еще не записан, сумма
+не совпала) при повторной доставке проверяется заново.
+Заказ читается через SELECT ... FOR UPDATE, поэтому разные транзакции одного
+заказа применяются по очереди и оплаченный заказ не оплачивается повторно.
+Сумма уведомления сверяется с суммой заказа.
+
+Сообщение пользователю об оплате записывается в outbox в той же транзакции
+(services/outbox.py) и отправляется процессом бота, поэтому платежной системе
+отвечают сразу после commit, не дожидаясь Telegram.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from database.db import AsyncSessionLocal as AsyncDbSession
+from models.models import Order, OrderStatus, PaymentNotification
+
+logger = logging.getLogger(__name__)
+
+# Результаты обработки уведомления
+PAID = "paid"
+ALREADY_PAID = "already_paid"
+ORDER_NOT_FOUND = "order_not_found"
+AMOUNT_MISMATCH = "amount_mismatch"
+
+# Результаты, о которых платежной системе отвечают успехом
+ACCEPTED_STATUSES = {PAID, ALREADY_PAID}
+
+# Допустимое расхождение суммы уведомления и заказа (округление копеек)
+AMOUNT_TOLERANCE = 0.01
+
+
+@dataclass(frozen=True)
+class NotificationResult:
+    """Результат обработки уведомления; duplicate - повторная доставка уже обработанной транзакции"""
+    status: str
+    order_id: Optional[int]
+    duplicate: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.status in ACCEPTED_STATUSES
+
+
+def _apply(order: Optional[Order], payment_system: str, transaction_id: str, amount: float) -> str:
+    """Переводит заблокированный заказ в PAID, если уведомление ему соответствует"""
+    if order is None:
+        return ORDER_NOT_FOUND
+    if abs(order.amount - amount) > AMOUNT_TOLERANCE:
+        return AMOUNT_MISMATCH
+    if order.status == OrderStatus.PAID:
+        return ALREADY_PAID
+
+    order.status = OrderStatus.PAID
+    order.payment_system = payment_system
+    order.payment_id = transaction_id
+    return PAID
+
+
+async def apply_payment_notification(payment_system: str, transaction_id: str, order_id: int,
+                                     amount: float, record_rejection: bool = True) -> NotificationResult:
+    """
+    Записывает уведомление и применяет его к заказу в одной транзакции.
+
+    Args:
+        payment_system (str): Платежная система
+        transaction_id (str): Идентификатор транзакции в платежной системе
+        order_id (int): ID заказа
+        amount (float): Оплаченная сумма
+        record_rejection (bool): Записывать ли отклоненное уведомление в журнал (не нужно для
+            транзакции без id платежной системы, чтобы не занимать ключ, под которым придет вебхук)
+
+    Returns:
+        NotificationResult: Результат обработки (для повторной доставки принятого уведомления - результат первой)
+    """
+    db = AsyncDbSession()
+    try:
+        notification = PaymentNotification(payment_system=payment_system, transaction_id=transaction_id,
+                                           order_id=order_id, amount=amount, status=PAID)
+        db.add(notification)
+        try:
+            # Одновременная доставка той же транзакции ждет на уникальном индексе до commit первой
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            same_transaction = (PaymentNotification.payment_system == payment_system,
+                                PaymentNotification.transaction_id == transaction_id)
+            # Отклоненное уведомление проверяется заново с данными повторной доставки; UPDATE блокирует
+            # строку, поэтому одновременные повторы тоже проверяются по очереди
+            reopened = await db.execute(
+                update(PaymentNotification)
+                .where(*same_transaction, PaymentNotification.status.notin_(ACCEPTED_STATUSES))
+                .values(order_id=order_id, amount=amount)
+                .execution_options(synchronize_session=False)
+            )
+            notification = (await db.execute(select(PaymentNotification).where(*same_transaction))).scalar_one()
+            if reopened.rowcount == 0:
+                logger.info(f"Duplicate {payment_system} notification {transaction_id}: {notification.status}")
+                return NotificationResult(notification.status, notification.order_id, duplicate=True)
+
+        order = (await db.execute(select(Order).where(Order.id == order_id).with_for_update())).scalar_one_or_none()
+        notification.status = _apply(order, payment_system, transaction_id, amount)
+        if notification.status in ACCEPTED_STATUSES or record_rejection:
+            await db.commit()
+        else:
+            await db.rollback()
+
+        if notification.status not in ACCEPTED_STATUSES:
+            logger.warning(f"Rejected {payment_system} notification {transaction_id} for order {order_id}: "
+                           f"{notification.status}")
+        return NotificationResult(notification.status, order_id)
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Сверка зависших заказов с платежными системами.
+
+Заказ переходит из PENDING в PAID только по уведомлению платежной системы, и
+если уведомление потерялось, заказ остается неоплаченным навсегда.
+PaymentReconciler раз в RECONCILE_INTERVAL секунд перебирает пачками (по id)
+заказы в PENDING старше RECONCILE_MIN_AGE и запрашивает их статус в платежной
+системе, не более RECONCILE_CONCURRENCY запросов одновременно:
+- оплаченный заказ проводится через apply_payment_notification, как вебхук:
+  журнал уведомлений, блокировка заказа, сверка суммы, сообщение пользователю
+  через outbox. Повторная сверка и опоздавший вебхук заказ не меняют;
+- заказ, отмененный в платежной системе, и неоплаченный заказ старше
+  ORDER_EXPIRE_AFTER отменяются под блокировкой и только если все еще в PENDING.
+
+Если платежная система не ответила, заказ не трогается до следующего прохода.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from config.settings import (
+    ORDER_EXPIRE_AFTER, RECONCILE_BATCH_SIZE, RECONCILE_CONCURRENCY, RECONCILE_INTERVAL, RECONCILE_MIN_AGE
+)
+from database.db import AsyncSessionLocal as AsyncDbSession
+from models.models import Order, OrderStatus
+from payments.freekassa import FreeKassa
+from payments.paykassa import PayKassa
+from services.payment_webhooks import PAID, apply_payment_notification
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Результаты сверки заказа
+RECONCILED_PAID = "paid"
+RECONCILED_CANCELLED = "cancelled"
+RECONCILED_EXPIRED = "expired"
+RECONCILED_UNCHANGED = "unchanged"
+RECONCILED_FAILED = "failed"
+
+# Статусы платежных систем (в нижнем регистре), означающие оплату и отмену платежа
+GATEWAY_PAID_STATUSES = {"paid", "success", "completed", "1"}
+GATEWAY_CANCELLED_STATUSES = {"cancelled", "canceled", "expired", "8", "9"}
+
+# Методы API, которыми платежные системы проверяют статус (ключи гистограмм GatewayMetrics)
+STATUS_METHODS = {"freekassa": "check_payment_status", "paykassa": "sci_confirm_order"}
+
+
+async def cancel_pending_order(order_id: int) -> bool:
+    """
+    Отменяет заказ, если он все еще ожидает оплаты.
+
+    Args:
+        order_id (int): ID заказа
+
+    Returns:
+        bool: True, если заказ отменен этим вызовом
+    """
+    db = AsyncDbSession()
+    try:
+        # Блокировка не дает отменить заказ, который в этот момент оплачивает вебхук
+        order = (await db.execute(select(Order).where(Order.id == order_id).with_for_update())).scalar_one_or_none()
+        if order is None or order.status != OrderStatus.PENDING:
+            return False
+        order.status = OrderStatus.CANCELLED
+        await db.commit()
+        return True
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
+class PaymentReconciler:
+    """
+    Периодическая сверка заказов в PENDING с платежными системами.
+
+    Args:
+        gateways (Dict[str, Any], optional): Клиенты платежных систем по названию (как в Order.payment_system)
+        batch_size (int): Количество заказов в пачке
+        concurrency (int): Количество одновременных запросов к платежным системам
+        min_age (float): Возраст заказа в секундах, с которого он сверяется
+        expire_after (float): Возраст неоплаченного заказа в секундах, после которого он отменяется
+        interval (float): Период сверки в секундах
+    """
+
+    def __init__(self, gateways: Optional[Dict[str, Any]] = None, batch_size: int = RECONCILE_BATCH_SIZE,
+                 concurrency: int = RECONCILE_CONCURRENCY, min_age: float = RECONCILE_MIN_AGE,
+                 expire_after: float = ORDER_EXPIRE_AFTER, interval: float = RECONCILE_INTERVAL):
+        self.gateways = gateways or {"freekassa": FreeKassa(), "paykassa": PayKassa()}
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.min_age = min_age
+        self.expire_after = expire_after
+        self.interval = interval
+        self.runs = 0
+        self.totals = self._empty_stats()
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {"checked": 0, "updated": 0, "paid": 0, "cancelled": 0, "expired": 0, "unchanged": 0, "failed": 0}
+
+    async def _pending_batch(self, after_id: int, created_before: datetime) -> List[Order]:
+        db = AsyncDbSession()
+        try:
+            result = await db.execute(
+                select(Order)
+                .where(Order.status == OrderStatus.PENDING, Order.created_at <= created_before, Order.id > after_id)
+                .order_by(Order.id)
+                .limit(self.batch_size)
+            )
+            return list(result.scalars())
+        finally:
+            await db.close()
+
+    async def _check(self, order: Order) -> Optional[Dict]:
+        """Статус платежа в платежной системе (None - заказ в ней не проверить)"""
+        gateway = self.gateways.get(order.payment_system)
+        if gateway is None:
+            return None
+        if order.payment_system == "paykassa":
+            # PayKassa ищет платеж по номеру счета, который сохраняется при создании платежа
+            if not order.payment_id:
+                return None
+            return await gateway.check_payment_status(order.payment_id)
+        return await gateway.check_payment_status(order.id)
+
+    async def _reconcile(self, order: Order, expire_before: datetime) -> str:
+        result = await self._check(order)
+        expired = order.created_at <= expire_before
+
+        if result is not None and not result.get("success"):
+            # Заказ, о котором платежная система не знает, не оплачен; остальные ошибки - повод спросить позже
+            if result.get("http_status") != 404:
+                logger.warning(f"Reconciliation of order {order.id} failed: {result.get('message')}")
+                return RECONCILED_FAILED
+            result = None
+
+        gateway_status = str(result.get("status")).lower() if result else None
+        if gateway_status in GATEWAY_PAID_STATUSES:
+            raw_data = result.get("raw_data") or {}
+            transaction_id = raw_data.get("intid") or raw_data.get("transaction_id")
+            # Если платежная система не вернула сумму, сверять нечего - заказ оплачен на свою сумму
+            amount = result.get("amount")
+            amount = order.amount if amount in (None, "") else float(amount)
+            # Без id транзакции ключ совпадает с ключом вебхука без id, поэтому отказ под ним не записывается
+            notification = await apply_payment_notification(order.payment_system,
+                                                             str(transaction_id or f"order-{order.id}"), order.id,
+                                                             amount, record_rejection=bool(transaction_id))
+            if notification.status == PAID and not notification.duplicate:
+                return RECONCILED_PAID
+            return RECONCILED_UNCHANGED if notification.success else RECONCILED_FAILED
+
+        if gateway_status in GATEWAY_CANCELLED_STATUSES:
+            return RECONCILED_CANCELLED if await cancel_pending_order(order.id) else RECONCILED_UNCHANGED
+        if expired:
+            return RECONCILED_EXPIRED if await cancel_pending_order(order.id) else RECONCILED_UNCHANGED
+        return RECONCILED_UNCHANGED
+
+    async def run_once(self) -> Dict[str, Any]:
+        """
+        Сверяет все заказы в PENDING старше min_age.
+
+        Returns:
+            Dict[str, Any]: Количество заказов по результатам сверки и длительность прохода
+        """
+        started = time.perf_counter()
+        now = datetime.utcnow()
+        created_before = now - timedelta(seconds=self.min_age)
+        expire_before = now - timedelta(seconds=self.expire_after)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = self._empty_stats()
+
+        async def reconcile(order: Order) -> str:
+            async with semaphore:
+                try:
+                    return await self._reconcile(order, expire_before)
+                except Exception as e:
+                    logger.error(f"Error reconciling order {order.id}: {e}")
+                    return RECONCILED_FAILED
+
+        after_id = 0
+        while True:
+            orders = await self._pending_batch(after_id, created_before)
+            if not orders:
+                break
+            for outcome in await asyncio.gather(*(reconcile(order) for order in orders)):
+                stats[outcome] += 1
+            stats["checked"] += len(orders)
+            after_id = orders[-1].id
+            if len(orders) < self.batch_size:
+                break
+
+        stats["updated"] = stats[RECONCILED_PAID] + stats[RECONCILED_CANCELLED] + stats[RECONCILED_EXPIRED]
+        for key, value in stats.items():
+            self.totals[key] += value
+        self.runs += 1
+        self.last_run = dict(stats, duration_ms=round((time.perf_counter() - started) * 1000, 2),
+                             finished_at=datetime.utcnow().isoformat())
+        if stats["checked"]:
+            logger.info(f"Reconciled pending orders: {self.last_run}")
+        return self.last_run
+
+    async def run(self):
+        """Сверяет заказы раз в interval секунд, пока задача не отменена"""
+        logger.info(f"Payment reconciler started: interval={self.interval}s, concurrency={self.concurrency}")
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Payment reconciliation failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def metrics(self) -> Dict[str, Any]:
+        latency = {}
+        for name, gateway in self.gateways.items():
+            key = f"{name}.{STATUS_METHODS.get(name, 'check_payment_status')}"
+            snapshot = gateway.client.metrics.snapshot()
+            if key in snapshot:
+                latency[name] = snapshot[key]
+        return {"runs": self.runs, "last_run": self.last_run, "totals": self.totals, "gateway_latency": latency}
+
+
+payment_reconciler = PaymentReconciler()
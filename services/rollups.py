@@ -0,0 +1,475 @@
+# -*- coding: utf-8 -*-
+"""
+Дневные сводки заказов, регистраций, отзывов и баг-репортов для статистики
+админ-панели.
+
+Таблицы daily_order_stats и daily_user_stats хранят количество и сумму
+заказов за день (по дате создания) в разрезе бота, платежной системы и
+статуса, а также количество регистраций; daily_review_stats - количество и
+сумму оценок отзывов, daily_bug_report_stats - количество баг-репортов.
+Сводки обновляются в той же транзакции, что и исходные строки (события
+маппера SQLAlchemy, поэтому работают и для админ-панели, и для асинхронных
+сессий бота; процесс подписывает их вызовом register_listeners при старте), а
+заполнить их для уже существующих данных можно командой:
+
+    python -m services.rollups [--start 2024-01-01] [--end 2024-12-31]
+
+Запросы статистики (aggregate, series) берут закрытые дни из сводок, а
+сегодняшний день и неполные дни на границах диапазона - из исходных таблиц.
+"""
+import argparse
+import datetime
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, inspect, insert, select
+from sqlalchemy.orm import Session
+
+from models.models import (
+    BugReport, DailyBugReportStats, DailyOrderStats, DailyReviewStats, DailyUserStats, Order, Review, User
+)
+from services.timeseries import GRANULARITIES, bucket_expression, check_range, fill_series, parse_bucket
+
+logger = logging.getLogger(__name__)
+
+# Поля заказа и отзыва, от которых зависит их строка в сводке
+ORDER_TRACKED_FIELDS = ("created_at", "bot_id", "payment_system", "status", "amount")
+REVIEW_TRACKED_FIELDS = ("created_at", "rating")
+
+# Сколько дней пересчитывается за одну транзакцию при заполнении сводок
+BACKFILL_CHUNK_DAYS = 31
+
+
+@dataclass(frozen=True)
+class RollupSource:
+    """
+    Описание сводки: колонка даты исходной таблицы, колонка дня сводки,
+    метрики и измерения (имя -> выражение для исходной таблицы и для сводки)
+    """
+    column: Any
+    day: Any
+    measures: Dict[str, Tuple[Any, Any]]
+    dimensions: Dict[str, Tuple[Any, Any]]
+
+
+ORDERS = RollupSource(
+    column=Order.created_at,
+    day=DailyOrderStats.day,
+    measures={
+        "orders": (func.count(Order.id), func.sum(DailyOrderStats.orders)),
+        "amount": (func.sum(Order.amount), func.sum(DailyOrderStats.amount)),
+    },
+    dimensions={
+        "bot_id": (Order.bot_id, DailyOrderStats.bot_id),
+        "payment_system": (func.coalesce(Order.payment_system, ""), DailyOrderStats.payment_system),
+        "status": (Order.status, DailyOrderStats.status),
+    },
+)
+
+USERS = RollupSource(
+    column=User.created_at,
+    day=DailyUserStats.day,
+    measures={"registrations": (func.count(User.id), func.sum(DailyUserStats.registrations))},
+    dimensions={},
+)
+
+REVIEWS = RollupSource(
+    column=Review.created_at,
+    day=DailyReviewStats.day,
+    measures={
+        "reviews": (func.count(Review.id), func.sum(DailyReviewStats.reviews)),
+        "rating_sum": (func.sum(Review.rating), func.sum(DailyReviewStats.rating_sum)),
+    },
+    dimensions={},
+)
+
+BUG_REPORTS = RollupSource(
+    column=BugReport.created_at,
+    day=DailyBugReportStats.day,
+    measures={"reports": (func.count(BugReport.id), func.sum(DailyBugReportStats.reports))},
+    dimensions={},
+)
+
+# Сводки и их таблицы (для заполнения по существующим данным)
+ROLLUP_TABLES = (
+    (ORDERS, DailyOrderStats.__table__),
+    (USERS, DailyUserStats.__table__),
+    (REVIEWS, DailyReviewStats.__table__),
+    (BUG_REPORTS, DailyBugReportStats.__table__),
+)
+
+
+# --- Обновление сводок при изменении исходных таблиц ---
+
+def _upsert(connection, table, keys: Dict[str, Any], deltas: Dict[str, Any]) -> None:
+    """Прибавляет deltas к строке сводки с ключом keys, создавая ее при необходимости"""
+    dialect = connection.dialect.name
+    values = {**keys, **deltas}
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table).values(**values)
+        statement = statement.on_duplicate_key_update(
+            **{name: table.c[name] + statement.inserted[name] for name in deltas}
+        )
+    elif dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + statement.excluded[name] for name in deltas}
+        )
+    else:
+        raise NotImplementedError(f"Rollups are not supported for dialect {dialect}")
+    connection.execute(statement)
+
+
+def _order_key(values: Dict[str, Any]) -> Dict[str, Any]:
+    """Ключ строки daily_order_stats для заказа"""
+    return {
+        "day": values["created_at"].date(),
+        "bot_id": values["bot_id"],
+        "payment_system": values["payment_system"] or "",
+        "status": values["status"],
+    }
+
+
+def _apply_order(connection, values: Dict[str, Any], sign: int) -> None:
+    """Добавляет заказ в сводку (sign=1) или убирает его оттуда (sign=-1)"""
+    _upsert(connection, DailyOrderStats.__table__, _order_key(values),
+            {"orders": sign, "amount": sign * (values["amount"] or 0)})
+
+
+def _current_values(order: Order) -> Dict[str, Any]:
+    return {name: getattr(order, name) for name in ORDER_TRACKED_FIELDS}
+
+
+def _order_inserted(mapper, connection, order):
+    _apply_order(connection, _current_values(order), 1)
+
+
+def _order_updated(mapper, connection, order):
+    state = inspect(order)
+    histories = {name: state.attrs[name].history for name in ORDER_TRACKED_FIELDS}
+    if not any(history.deleted for history in histories.values()):
+        return
+
+    new_values = _current_values(order)
+    old_values = {
+        name: history.deleted[0] if history.deleted else new_values[name]
+        for name, history in histories.items()
+    }
+    _apply_order(connection, old_values, -1)
+    _apply_order(connection, new_values, 1)
+
+
+def _order_deleted(mapper, connection, order):
+    _apply_order(connection, _current_values(order), -1)
+
+
+def _user_inserted(mapper, connection, user):
+    _upsert(connection, DailyUserStats.__table__, {"day": user.created_at.date()}, {"registrations": 1})
+
+
+def _user_deleted(mapper, connection, user):
+    _upsert(connection, DailyUserStats.__table__, {"day": user.created_at.date()}, {"registrations": -1})
+
+
+def _apply_review(connection, created_at: datetime.datetime, rating: int, sign: int) -> None:
+    """Добавляет отзыв в сводку (sign=1) или убирает его оттуда (sign=-1)"""
+    _upsert(connection, DailyReviewStats.__table__, {"day": created_at.date()},
+            {"reviews": sign, "rating_sum": sign * rating})
+
+
+def _review_inserted(mapper, connection, review):
+    _apply_review(connection, review.created_at, review.rating, 1)
+
+
+def _review_updated(mapper, connection, review):
+    state = inspect(review)
+    histories = {name: state.attrs[name].history for name in REVIEW_TRACKED_FIELDS}
+    if not any(history.deleted for history in histories.values()):
+        return
+
+    old = {name: history.deleted[0] if history.deleted else getattr(review, name)
+           for name, history in histories.items()}
+    _apply_review(connection, old["created_at"], old["rating"], -1)
+    _apply_review(connection, review.created_at, review.rating, 1)
+
+
+def _review_deleted(mapper, connection, review):
+    _apply_review(connection, review.created_at, review.rating, -1)
+
+
+def _bug_report_inserted(mapper, connection, report):
+    _upsert(connection, DailyBugReportStats.__table__, {"day": report.created_at.date()}, {"reports": 1})
+
+
+def _bug_report_deleted(mapper, connection, report):
+    _upsert(connection, DailyBugReportStats.__table__, {"day": report.created_at.date()}, {"reports": -1})
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    # Старое значение нужно для вычитания строки из прежней строки сводки, даже если атрибут не был загружен
+    return value
+
+
+def register_listeners() -> None:
+    """
+    Подписывает сводки на изменения исходных таблиц. Вызывается при старте каждого процесса,
+    который пишет в базу (админ-панель, бот); повторный вызов ничего не меняет.
+    """
+    listeners = [
+        (Order, "after_insert", _order_inserted),
+        (Order, "after_update", _order_updated),
+        (Order, "after_delete", _order_deleted),
+        (User, "after_insert", _user_inserted),
+        (User, "after_delete", _user_deleted),
+        (Review, "after_insert", _review_inserted),
+        (Review, "after_update", _review_updated),
+        (Review, "after_delete", _review_deleted),
+        (BugReport, "after_insert", _bug_report_inserted),
+        (BugReport, "after_delete", _bug_report_deleted),
+    ]
+    for target, identifier, listener in listeners:
+        if not event.contains(target, identifier, listener):
+            event.listen(target, identifier, listener)
+
+    for model, fields in ((Order, ORDER_TRACKED_FIELDS), (Review, REVIEW_TRACKED_FIELDS)):
+        for name in fields:
+            attribute = getattr(model, name)
+            if not event.contains(attribute, "set", _keep_old_value):
+                event.listen(attribute, "set", _keep_old_value, active_history=True)
+
+
+# --- Чтение статистики ---
+
+def _midnight(day: datetime.date) -> datetime.datetime:
+    return datetime.datetime.combine(day, datetime.time.min)
+
+
+def split_range(
+        start: Optional[datetime.datetime],
+        end: datetime.datetime,
+        now: datetime.datetime
+) -> Tuple[Optional[Tuple[Optional[datetime.date], datetime.date]], List[Tuple]]:
+    """
+    Делит диапазон [start, end] на закрытые дни, которые читаются из сводок,
+    и остатки (сегодняшний день и неполные дни на границах), которые читаются из исходных таблиц.
+
+    Returns:
+        tuple: (первый день или None, день после последнего) для сводок или None,
+            и список отрезков (начало или None, конец, включается ли конец) для исходных таблиц
+    """
+    first_day = None
+    if start is not None:
+        first_day = start.date() if start.time() == datetime.time.min else start.date() + datetime.timedelta(days=1)
+    last_day = min(now.date(), (end + datetime.timedelta(microseconds=1)).date())
+
+    if first_day is not None and first_day >= last_day:
+        return None, [(start, end, True)]
+
+    raw = []
+    if start is not None and start < _midnight(first_day):
+        raw.append((start, _midnight(first_day), False))
+    if _midnight(last_day) <= end:
+        raw.append((_midnight(last_day), end, True))
+    return (first_day, last_day), raw
+
+
+def aggregate(
+        db: Session,
+        source: RollupSource,
+        start: Optional[datetime.datetime],
+        end: datetime.datetime,
+        group_by: Iterable[str] = (),
+        granularity: Optional[str] = None,
+        where: Optional[Dict[str, Any]] = None,
+        now: Optional[datetime.datetime] = None
+) -> Dict[tuple, Dict[str, Any]]:
+    """
+    Суммирует метрики сводки за диапазон.
+
+    Args:
+        db (Session): Сессия БД
+        source (RollupSource): ORDERS, USERS, REVIEWS или BUG_REPORTS
+        start (Optional[datetime]): Начало диапазона; None - за все время
+        end (datetime): Конец диапазона (включительно)
+        group_by (Iterable[str]): Измерения для группировки (bot_id, payment_system, status)
+        granularity (Optional[str]): Группировка по интервалам (hour, day, week, month);
+            начало интервала становится первым элементом ключа
+        where (Optional[Dict[str, Any]]): Условия на измерения (например, {"status": OrderStatus.PAID})
+        now (Optional[datetime]): Текущее время (UTC); сегодняшний день всегда читается из исходной таблицы
+
+    Returns:
+        Dict[tuple, Dict[str, Any]]: Ключ группы -> значения метрик
+    """
+    group_by = list(group_by)
+    where = where or {}
+    now = now or datetime.datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+
+    if granularity == "hour":
+        # Почасовых сводок нет - весь диапазон читается из исходной таблицы
+        rollup_days, raw_ranges = None, [(start, end, True)]
+    else:
+        rollup_days, raw_ranges = split_range(start, end, now)
+
+    def run(side: int, conditions: list) -> None:
+        keys = [source.dimensions[name][side] for name in group_by]
+        if granularity is not None:
+            keys.insert(0, bucket_expression((source.column, source.day)[side], granularity, dialect))
+        measures = [expression[side].label(name) for name, expression in source.measures.items()]
+        conditions += [source.dimensions[name][side] == value for name, value in where.items()]
+
+        query = db.query(*keys, *measures).filter(*conditions)
+        if keys:
+            query = query.group_by(*keys)
+
+        for row in query.all():
+            key = tuple(row[:len(keys)])
+            if granularity is not None:
+                key = (parse_bucket(key[0]),) + key[1:]
+            totals = result.setdefault(key, dict.fromkeys(source.measures, 0))
+            for name in source.measures:
+                totals[name] += row._mapping[name] or 0
+
+    result: Dict[tuple, Dict[str, Any]] = {}
+    if rollup_days is not None:
+        first_day, last_day = rollup_days
+        conditions = [source.day < last_day]
+        if first_day is not None:
+            conditions.append(source.day >= first_day)
+        run(1, conditions)
+
+    for lower, upper, inclusive in raw_ranges:
+        conditions = [source.column <= upper if inclusive else source.column < upper]
+        if lower is not None:
+            conditions.append(source.column >= lower)
+        run(0, conditions)
+
+    if not group_by and granularity is None:
+        result.setdefault((), dict.fromkeys(source.measures, 0))
+    return result
+
+
+def totals(db: Session, source: RollupSource, start: Optional[datetime.datetime], end: datetime.datetime,
+           where: Optional[Dict[str, Any]] = None, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    """Значения метрик за диапазон без группировки"""
+    return aggregate(db, source, start, end, where=where, now=now)[()]
+
+
+def series(
+        db: Session,
+        source: RollupSource,
+        granularity: str,
+        start: Optional[datetime.datetime],
+        end: datetime.datetime,
+        where: Optional[Dict[str, Any]] = None,
+        now: Optional[datetime.datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Временной ряд метрик сводки (аналог services.timeseries.time_series).
+
+    Raises:
+        ValueError: Если интервал неизвестен или в диапазоне больше MAX_BUCKETS интервалов
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    if start is not None:
+        check_range(start, end, granularity)
+
+    rows = {key[0]: values for key, values in aggregate(db, source, start, end, granularity=granularity,
+                                                        where=where, now=now).items()}
+    return fill_series(rows, start, end, granularity, list(source.measures))
+
+
+# --- Заполнение сводок по существующим данным ---
+
+def _rebuild(db: Session, source: RollupSource, table, first_day: datetime.date, last_day: datetime.date) -> int:
+    """Пересчитывает сводку за дни [first_day, last_day) по исходной таблице"""
+    dialect = db.get_bind().dialect.name
+    db.execute(delete(table).where(table.c.day >= first_day, table.c.day < last_day))
+
+    day = bucket_expression(source.column, "day", dialect)
+    dimensions = [expression for expression, _ in source.dimensions.values()]
+    measures = [expression for expression, _ in source.measures.values()]
+    query = select(day, *dimensions, *measures).where(
+        source.column >= _midnight(first_day), source.column < _midnight(last_day)
+    ).group_by(day, *dimensions)
+
+    columns = ["day", *source.dimensions, *source.measures]
+    return db.execute(insert(table).from_select(columns, query)).rowcount
+
+
+def backfill(db: Session, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None,
+             chunk_days: int = BACKFILL_CHUNK_DAYS) -> Dict[str, int]:
+    """
+    Пересчитывает сводки за дни [start, end] по исходным таблицам.
+    Каждые chunk_days дней пересчитываются в отдельной транзакции.
+
+    Args:
+        db (Session): Сессия БД
+        start (Optional[date]): Первый день; по умолчанию - день первой записи исходных таблиц
+        end (Optional[date]): Последний день; по умолчанию - сегодня
+
+    Returns:
+        Dict[str, int]: Количество записанных строк сводок по таблицам
+    """
+    end = end or datetime.datetime.utcnow().date()
+    if start is None:
+        first = [value for value in (db.query(func.min(source.column)).scalar() for source, _ in ROLLUP_TABLES)
+                 if value is not None]
+        start = min(first).date() if first else end
+
+    written = {table.name: 0 for _, table in ROLLUP_TABLES}
+    day = start
+    while day <= end:
+        chunk_end = min(day + datetime.timedelta(days=chunk_days), end + datetime.timedelta(days=1))
+        try:
+            for source, table in ROLLUP_TABLES:
+                written[table.name] += _rebuild(db, source, table, day, chunk_end)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        logger.info(f"Rollups rebuilt for {day} - {chunk_end - datetime.timedelta(days=1)}")
+        day = chunk_end
+    return written
+
+
+def create_rollup_schema(engine) -> None:
+    """Создает таблицы сводок и индексы по дате создания исходных таблиц, если их нет"""
+    for source, table in ROLLUP_TABLES:
+        table.create(engine, checkfirst=True)
+        for index in source.column.table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily stats rollups from orders, users, reviews "
+                                                 "and bug reports")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=None,
+                        help="First day (YYYY-MM-DD), default: first order, registration, review or bug report")
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=None,
+                        help="Last day (YYYY-MM-DD), default: today (UTC)")
+    parser.add_argument("--chunk-days", type=int, default=BACKFILL_CHUNK_DAYS)
+    args = parser.parse_args()
+
+    from database.db import engine, session_factory
+
+    create_rollup_schema(engine)
+    db = session_factory()
+    try:
+        written = backfill(db, args.start, args.end, args.chunk_days)
+    finally:
+        db.close()
+    logger.info(f"Rollups backfill finished: {written}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Временные ряды для статистики админ-панели.
+
+Весь ряд строится одним запросом GROUP BY по ключу интервала (час, день,
+неделя, месяц), вычисленному в SQL; интервалы без данных дополняются
+нулями в Python. Недели начинаются с понедельника, время в UTC.
+"""
+import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.orm import Session
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# Максимальное количество интервалов в одном ряду
+MAX_BUCKETS = 5000
+
+# Формат подписи интервала в ответе API
+LABEL_FORMATS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+    "week": "%Y-%m-%d",
+    "month": "%Y-%m",
+}
+
+
+def truncate(value: datetime.datetime, granularity: str) -> datetime.datetime:
+    """Возвращает начало интервала, в который попадает value"""
+    if granularity == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def next_bucket(value: datetime.datetime, granularity: str) -> datetime.datetime:
+    """Возвращает начало следующего интервала"""
+    if granularity == "hour":
+        return value + datetime.timedelta(hours=1)
+    if granularity == "day":
+        return value + datetime.timedelta(days=1)
+    if granularity == "week":
+        return value + datetime.timedelta(weeks=1)
+    if value.month == 12:
+        return value.replace(year=value.year + 1, month=1)
+    return value.replace(month=value.month + 1)
+
+
+def iter_buckets(start: datetime.datetime, end: datetime.datetime, granularity: str) -> Iterable[datetime.datetime]:
+    """Перебирает начала интервалов от интервала start до интервала end включительно"""
+    bucket = truncate(start, granularity)
+    while bucket <= end:
+        yield bucket
+        bucket = next_bucket(bucket, granularity)
+
+
+def count_buckets(start: datetime.datetime, end: datetime.datetime, granularity: str) -> int:
+    """Количество интервалов в диапазоне (без перебора часов и дней)"""
+    start, end = truncate(start, granularity), truncate(end, granularity)
+    if end < start:
+        return 0
+    if granularity == "month":
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    step = {"hour": 3600, "day": 86400, "week": 7 * 86400}[granularity]
+    return int((end - start).total_seconds()) // step + 1
+
+
+def check_range(start: datetime.datetime, end: datetime.datetime, granularity: str) -> None:
+    """Проверяет, что ряд не слишком длинный"""
+    if count_buckets(start, end, granularity) > MAX_BUCKETS:
+        raise ValueError(f"Too many {granularity} buckets in range, max {MAX_BUCKETS}")
+
+
+def bucket_expression(column, granularity: str, dialect: str):
+    """
+    SQL-выражение начала интервала для колонки с датой.
+
+    Args:
+        column: Колонка (например, Order.created_at)
+        granularity (str): hour, day, week или month
+        dialect (str): Имя диалекта SQLAlchemy (sqlite, mysql, postgresql)
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+
+    if dialect == "sqlite":
+        if granularity == "hour":
+            return func.strftime("%Y-%m-%d %H:00:00", column)
+        if granularity == "day":
+            return func.date(column)
+        if granularity == "week":
+            # Понедельник недели: отступаем на 6 дней и идем к ближайшему понедельнику
+            return func.date(column, "-6 days", "weekday 1")
+        return func.strftime("%Y-%m-01", column)
+
+    if dialect in ("mysql", "mariadb"):
+        # Формат передается литералом: с ONLY_FULL_GROUP_BY выражения в SELECT и GROUP BY должны совпадать
+        if granularity == "hour":
+            return func.date_format(column, literal_column("'%Y-%m-%d %H:00:00'"))
+        if granularity == "day":
+            return func.date(column)
+        if granularity == "week":
+            return func.date(func.subdate(column, func.weekday(column)))
+        return func.date_format(column, literal_column("'%Y-%m-01'"))
+
+    # PostgreSQL и другие СУБД с date_trunc (неделя в date_trunc тоже начинается с понедельника).
+    # Единица передается литералом, а не параметром, чтобы выражения в SELECT и GROUP BY совпадали
+    return func.date_trunc(literal_column(f"'{granularity}'"), column)
+
+
+def parse_bucket(value: Any) -> datetime.datetime:
+    """Приводит ключ интервала из БД к datetime"""
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    return datetime.datetime.fromisoformat(str(value))
+
+
+def time_series(
+        db: Session,
+        column,
+        granularity: str,
+        start: Optional[datetime.datetime],
+        end: datetime.datetime,
+        metrics: Dict[str, Any],
+        filters: Iterable = ()
+) -> List[Dict[str, Any]]:
+    """
+    Строит временной ряд одним запросом GROUP BY.
+
+    Args:
+        db (Session): Сессия БД
+        column: Колонка с датой, по которой строятся интервалы
+        granularity (str): hour, day, week или month
+        start (Optional[datetime]): Начало диапазона (первый интервал может быть неполным);
+            None - с первого интервала с данными
+        end (datetime): Конец диапазона (включительно)
+        metrics (Dict[str, Any]): Имя метрики -> агрегатное выражение (func.sum, func.count)
+        filters (Iterable): Дополнительные условия WHERE
+
+    Returns:
+        List[Dict[str, Any]]: Интервалы в хронологическом порядке: {"date": ..., <метрика>: ...}
+
+    Raises:
+        ValueError: Если в диапазоне больше MAX_BUCKETS интервалов
+    """
+    if start is not None:
+        check_range(start, end, granularity)
+
+    bucket = bucket_expression(column, granularity, db.get_bind().dialect.name).label("bucket")
+    query = db.query(bucket, *(expression.label(name) for name, expression in metrics.items()))
+    query = query.filter(column < next_bucket(truncate(end, granularity), granularity), *filters)
+    if start is not None:
+        query = query.filter(column >= start)
+
+    rows = {parse_bucket(row.bucket): row._mapping for row in query.group_by(bucket).all()}
+    return fill_series(rows, start, end, granularity, list(metrics))
+
+
+def fill_series(
+        rows: Dict[datetime.datetime, Mapping[str, Any]],
+        start: Optional[datetime.datetime],
+        end: datetime.datetime,
+        granularity: str,
+        names: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Превращает значения по интервалам в ряд, дополняя пустые интервалы нулями.
+
+    Args:
+        rows (Dict[datetime, Mapping]): Начало интервала -> значения метрик
+        start (Optional[datetime]): Начало диапазона; None - с первого интервала с данными
+        end (datetime): Конец диапазона (включительно)
+        granularity (str): hour, day, week или month
+        names (List[str]): Имена метрик
+
+    Raises:
+        ValueError: Если в диапазоне больше MAX_BUCKETS интервалов
+    """
+    if start is None:
+        if not rows:
+            return []
+        start = min(rows)
+    check_range(start, end, granularity)
+
+    label_format = LABEL_FORMATS[granularity]
+    series = []
+    for bucket_start in iter_buckets(start, end, granularity):
+        row = rows.get(bucket_start)
+        point = {"date": bucket_start.strftime(label_format)}
+        for name in names:
+            point[name] = (row[name] if row is not None else None) or 0
+        series.append(point)
+    return series
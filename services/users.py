@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Определение пользователя бота по апдейту.
+
+Для каждого апдейта пользователь ищется по telegram_id один раз; результат
+хранится в коротком LRU-кеше. Если пользователя еще нет в базе, он
+регистрируется при первом же апдейте, а изменившиеся имя и username
+сохраняются при следующем обращении к базе.
+"""
+import datetime
+import logging
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+
+from aiogram.types import User as TelegramUser
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from config.settings import DEFAULT_LANGUAGE, SUPPORTED_LANGUAGES, USER_CACHE_SIZE, USER_CACHE_TTL
+from database.db import AsyncSessionLocal as AsyncDbSession
+from models.models import User
+from utils.cache import LRUCache, MISSING
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class UserEntry:
+    id: int
+    telegram_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    language: Optional[str]
+    # True только для апдейта, в котором пользователь был зарегистрирован
+    is_new: bool = False
+
+    def matches(self, from_user: TelegramUser) -> bool:
+        """Совпадают ли имя и username с данными из Telegram"""
+        return (self.username, self.first_name, self.last_name) == (
+            from_user.username, from_user.first_name, from_user.last_name
+        )
+
+
+class UserResolver:
+    """
+    Находит или регистрирует пользователя по данным Telegram.
+
+    Args:
+        max_size (int): Максимальное количество пользователей в кеше
+        ttl (float): Время жизни записи кеша в секундах
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL):
+        self.users = LRUCache(max_size=max_size, ttl=ttl)
+        self.created = 0
+
+    async def resolve(self, from_user: TelegramUser) -> UserEntry:
+        """
+        Возвращает пользователя, при необходимости регистрируя его.
+
+        Args:
+            from_user (TelegramUser): Отправитель апдейта
+
+        Returns:
+            UserEntry: Пользователь
+        """
+        entry = self.users.get(from_user.id)
+        if entry is not MISSING and entry.matches(from_user):
+            return entry
+
+        db = AsyncDbSession()
+        try:
+            entry, created = await self._load_or_create(db, from_user)
+        finally:
+            await db.close()
+
+        self.users.set(from_user.id, entry)
+        return replace(entry, is_new=True) if created else entry
+
+    async def _load_or_create(self, db, from_user: TelegramUser):
+        """Загружает пользователя, обновляет профиль или регистрирует нового"""
+        query = select(
+            User.id, User.telegram_id, User.username, User.first_name, User.last_name, User.language
+        ).where(User.telegram_id == from_user.id)
+
+        row = (await db.execute(query)).first()
+        if row is None:
+            language = from_user.language_code if from_user.language_code in SUPPORTED_LANGUAGES else DEFAULT_LANGUAGE
+            user = User(
+                telegram_id=from_user.id,
+                username=from_user.username,
+                first_name=from_user.first_name,
+                last_name=from_user.last_name,
+                language=language
+            )
+            db.add(user)
+            try:
+                await db.flush()
+                entry = UserEntry(id=user.id, telegram_id=user.telegram_id, username=user.username,
+                                  first_name=user.first_name, last_name=user.last_name, language=user.language)
+                await db.commit()
+            except IntegrityError:
+                # Пользователя одновременно зарегистрировал другой апдейт
+                await db.rollback()
+                row = (await db.execute(query)).one()
+            else:
+                self.created += 1
+                logger.info(f"Registering new user: {from_user.id}")
+                return entry, True
+
+        entry = UserEntry(id=row.id, telegram_id=row.telegram_id, username=row.username,
+                          first_name=row.first_name, last_name=row.last_name, language=row.language)
+        if not entry.matches(from_user):
+            await db.execute(
+                update(User).where(User.id == entry.id).values(
+                    username=from_user.username,
+                    first_name=from_user.first_name,
+                    last_name=from_user.last_name,
+                    updated_at=datetime.datetime.utcnow()
+                )
+            )
+            await db.commit()
+            entry = replace(entry, username=from_user.username, first_name=from_user.first_name,
+                            last_name=from_user.last_name)
+        return entry, False
+
+    def forget(self, telegram_id: int) -> None:
+        """Сбрасывает запись кеша (например, после смены языка)"""
+        self.users.delete(telegram_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики кеша и количество зарегистрированных пользователей"""
+        return {**self.users.stats(), "created": self.created}
+
+
+# Общий кеш пользователей процесса бота
+user_resolver = UserResolver()
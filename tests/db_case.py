@@ -0,0 +1,110 @@
+"""
+Общая основа тестов, работающих с временной базой SQLite.
+
+База создается в файле, а не в памяти, чтобы синхронный и асинхронный движки
+видели одни и те же данные.
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.models import Base
+
+
+def create_database(expire_on_commit: bool = True) -> Tuple[str, Engine, sessionmaker]:
+    """Временный файл SQLite со схемой моделей: путь, движок и фабрика сессий"""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return path, engine, sessionmaker(bind=engine, expire_on_commit=expire_on_commit)
+
+
+def remove_database(path: str, engine: Engine):
+    engine.dispose()
+    os.remove(path)
+
+
+def async_engine_for(path: str):
+    return create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+
+def record_queries(engine) -> List[str]:
+    """Список, в который записывается каждый SQL-запрос движка (синхронного или асинхронного)"""
+    queries = []
+    event.listen(getattr(engine, "sync_engine", engine), "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: queries.append(statement))
+    return queries
+
+
+def override_admin_db(session_factory, principal=None):
+    """
+    Подключает админ-панель к тестовой базе и пропускает проверку токена.
+
+    Returns:
+        TestClient: Клиент админ-панели; переопределения снимает app.dependency_overrides.clear()
+    """
+    from fastapi.testclient import TestClient
+
+    from admin.main import app
+    from admin.middleware.auth_middleware import verify_token
+    from database.db import get_db
+
+    def override_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[verify_token] = lambda: principal if principal is not None else {"telegram_id": 1}
+    app.dependency_overrides[get_db] = override_db
+    return TestClient(app)
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """
+    Тест с отдельной базой на каждый тестовый метод.
+
+    setUp создает self.path, self.engine и self.Session; наследники заполняют
+    базу после super().setUp(). Все, что подключают методы ниже, снимается
+    после tearDown наследника.
+    """
+
+    expire_on_commit = True
+
+    def setUp(self):
+        self.path, self.engine, self.Session = create_database(self.expire_on_commit)
+        self.addCleanup(remove_database, self.path, self.engine)
+
+    def record_queries(self, engine=None) -> List[str]:
+        return record_queries(engine if engine is not None else self.engine)
+
+    def admin_client(self, principal=None):
+        from admin.main import app
+
+        self.addCleanup(app.dependency_overrides.clear)
+        return override_admin_db(self.Session, principal)
+
+    def async_sessions(self, expire_on_commit: bool = False) -> async_sessionmaker:
+        """Асинхронная фабрика сессий той же базы на весь тест (движок в self.async_engine)"""
+        self.async_engine = async_engine_for(self.path)
+        self.addCleanup(lambda engine=self.async_engine: asyncio.run(engine.dispose()))
+        return async_sessionmaker(bind=self.async_engine, class_=AsyncSession, expire_on_commit=expire_on_commit)
+
+    @asynccontextmanager
+    async def open_async_sessions(self, expire_on_commit: bool = False):
+        """Асинхронная фабрика сессий, движок (self.async_engine) закрывается в том же цикле событий"""
+        engine = self.async_engine = async_engine_for(self.path)
+        try:
+            yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=expire_on_commit)
+        finally:
+            await engine.dispose()
@@ -0,0 +1,93 @@
+import unittest
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from admin.middleware import auth_middleware
+from admin.middleware.auth_middleware import (
+    AdminPrincipal, create_access_token, principal_cache, revoke_admin_tokens, revoke_token, verify_token
+)
+from models.models import User
+from db_case import DatabaseTestCase
+
+ADMIN_ID = 1259547081
+
+
+class TestAdminPrincipalCache(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.Session() as db:
+            db.add(User(telegram_id=ADMIN_ID, username="admin", language="ru"))
+            db.commit()
+
+        @contextmanager
+        def test_session():
+            db = self.Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        self.patcher = patch.object(auth_middleware, "db_session", test_session)
+        self.patcher.start()
+        principal_cache.clear()
+
+        self.queries = self.record_queries()
+
+    def tearDown(self):
+        self.patcher.stop()
+        principal_cache.clear()
+        auth_middleware._revoked_tokens.clear()
+        auth_middleware._revoked_before.clear()
+
+    def token(self, telegram_id: int = ADMIN_ID) -> str:
+        return create_access_token({"sub": "admin", "telegram_id": telegram_id})
+
+    def test_db_queried_only_on_cache_miss(self):
+        token = self.token()
+        principal = verify_token(token)
+        self.assertEqual(principal, AdminPrincipal(id=1, telegram_id=ADMIN_ID, username="admin", language="ru"))
+
+        for _ in range(10):
+            self.assertIs(verify_token(token), principal)
+        self.assertEqual(len(self.queries), 1)
+
+        # У другого токена того же администратора своя запись кеша
+        verify_token(self.token())
+        self.assertEqual(len(self.queries), 2)
+
+    def test_logout_revokes_token(self):
+        token, other = self.token(), self.token()
+        verify_token(token)
+        revoke_token(token)
+
+        with self.assertRaises(HTTPException) as ctx:
+            verify_token(token)
+        self.assertEqual(ctx.exception.status_code, 401)
+        self.assertEqual(verify_token(other).telegram_id, ADMIN_ID)
+
+    def test_revoke_all_tokens_of_admin(self):
+        old = self.token()
+        verify_token(old)
+        revoke_admin_tokens(ADMIN_ID)
+
+        with self.assertRaises(HTTPException):
+            verify_token(old)
+        # Токены, выданные после отзыва, действуют
+        self.assertEqual(verify_token(self.token()).telegram_id, ADMIN_ID)
+
+    def test_rejected_tokens(self):
+        with self.assertRaises(HTTPException) as ctx:
+            verify_token(self.token(telegram_id=42))
+        self.assertEqual(ctx.exception.status_code, 403)
+
+        with self.assertRaises(HTTPException) as ctx:
+            verify_token(self.token(telegram_id=7838299933))
+        # Администратора нет в БД - отказ не кешируется
+        self.assertEqual(ctx.exception.status_code, 401)
+        self.assertEqual(len(principal_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
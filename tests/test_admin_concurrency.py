@@ -0,0 +1,94 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httpx
+from anyio import to_thread
+
+from admin.main import app
+from admin.middleware.auth_middleware import verify_token
+from admin.middleware.concurrency import configure_db_worker_pool, get_db_worker_pool_stats, request_metrics
+from database.db import get_db
+
+
+class SlowSession(MagicMock):
+    """Сессия, каждый запрос которой блокирует поток, как тяжелый SQL"""
+
+    def query(self, *args, **kwargs):
+        time.sleep(0.3)
+        return MagicMock()
+
+
+class QuickSession(MagicMock):
+    def query(self, *args, **kwargs):
+        time.sleep(0.05)
+        return MagicMock()
+
+
+def slow_db():
+    yield SlowSession()
+
+
+class TestAdminConcurrency(unittest.TestCase):
+    def setUp(self):
+        app.dependency_overrides[verify_token] = lambda: {"telegram_id": 1}
+        app.dependency_overrides[get_db] = slow_db
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+
+    def test_heavy_dashboard_does_not_block_webhook(self):
+        async def scenario():
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                finished = {}
+
+                async def call(name, coro):
+                    await coro
+                    finished[name] = time.perf_counter()
+
+                started = time.perf_counter()
+                dashboard = asyncio.create_task(call("dashboard", client.get("/stats/dashboard")))
+                await asyncio.sleep(0.05)
+                webhook = asyncio.create_task(call("webhook", client.post(
+                    "/webhooks/freekassa", data={"MERCHANT_ORDER_ID": "1"}
+                )))
+                await asyncio.gather(dashboard, webhook)
+                return {name: moment - started for name, moment in finished.items()}
+
+        with patch('admin.routers.webhooks.process_payment_notification') as mock_process:
+            mock_process.return_value = {"success": True}
+            timings = asyncio.run(scenario())
+
+        self.assertLess(timings["webhook"], 0.3)
+        self.assertGreater(timings["dashboard"], timings["webhook"])
+        self.assertGreaterEqual(request_metrics.peak_in_flight, 2)
+
+    def test_db_routes_use_dedicated_limiter(self):
+        app.dependency_overrides[get_db] = lambda: QuickSession()
+
+        async def scenario():
+            configure_db_worker_pool(1)
+            default_tokens = to_thread.current_default_thread_limiter().total_tokens
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                started = time.perf_counter()
+                requests = [asyncio.create_task(client.get("/stats/dashboard")) for _ in range(2)]
+                await asyncio.sleep(0.1)
+                stats = get_db_worker_pool_stats()
+                finished = []
+                for request in asyncio.as_completed(requests):
+                    await request
+                    finished.append(time.perf_counter() - started)
+                return default_tokens, stats, finished
+
+        default_tokens, stats, (first, second) = asyncio.run(scenario())
+        # Общий пул потоков anyio не меняется, второй запрос ждет место в лимитере БД
+        self.assertEqual(default_tokens, 40)
+        self.assertEqual((stats["size"], stats["busy"], stats["waiting"]), (1, 1, 1))
+        self.assertGreaterEqual(second, first * 1.8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from models.models import Base, User
+from bot.handlers import start
+from bot.i18n import get_localized_text
+from services.users import UserResolver
+
+
+class TestAsyncHandlers(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        asyncio.run(self._create_schema())
+
+    def tearDown(self):
+        asyncio.run(self.engine.dispose())
+
+    async def _create_schema(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    def _make_message(self, user_id=42, username="tester"):
+        message = MagicMock()
+        message.from_user.id = user_id
+        message.from_user.username = username
+        message.from_user.first_name = "Test"
+        message.from_user.last_name = None
+        message.from_user.language_code = "ru"
+        message.answer = AsyncMock()
+        return message
+
+    async def _get_user(self, telegram_id):
+        async with self.session_factory() as db:
+            return await db.scalar(select(User).where(User.telegram_id == telegram_id))
+
+    def test_cmd_start_registers_and_updates_user(self):
+        resolver = UserResolver()
+
+        async def scenario():
+            with patch('services.users.AsyncDbSession', self.session_factory):
+                message = self._make_message()
+                await start.cmd_start(message, await resolver.resolve(message.from_user))
+                created = await self._get_user(42)
+                renamed = self._make_message(username="renamed")
+                await start.cmd_start(renamed, await resolver.resolve(renamed.from_user))
+                updated = await self._get_user(42)
+            return message, renamed, created, updated
+
+        message, renamed, created, updated = asyncio.run(scenario())
+        self.assertIsNotNone(created)
+        self.assertEqual(created.language, "ru")
+        self.assertEqual(updated.id, created.id)
+        self.assertEqual(updated.username, "renamed")
+        self.assertEqual(message.answer.call_args.args[0], get_localized_text("welcome_new", "ru"))
+        self.assertEqual(renamed.answer.call_args.args[0], get_localized_text("welcome_back", "ru"))
+
+
+if __name__ == "__main__":
+    unittest.main()
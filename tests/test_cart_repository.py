@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from bot.handlers.cart import show_cart
+from bot.i18n import get_catalog
+from models.models import Bot, Cart, CartItem, User
+from services.cart import load_cart
+from db_case import DatabaseTestCase
+
+
+class TestCartRepository(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.Session() as db:
+            buyer = User(telegram_id=100, username="buyer")
+            db.add_all([buyer, User(telegram_id=200, username="no_cart")])
+            db.flush()
+            cart = Cart(user_id=buyer.id)
+            db.add(cart)
+            db.flush()
+            for i in range(1, 11):
+                bot = Bot(name=f"Bot {i}", description="", price=100, discount=10 if i % 2 else 0)
+                db.add(bot)
+                db.flush()
+                db.add(CartItem(cart_id=cart.id, bot_id=bot.id, quantity=2 if i == 1 else 1))
+            db.commit()
+
+        self.sessions = self.async_sessions(expire_on_commit=True)
+        self.queries = self.record_queries(self.async_engine)
+
+    def load(self, telegram_id):
+        async def scenario():
+            async with self.sessions() as db:
+                return await load_cart(db, telegram_id)
+        return asyncio.run(scenario())
+
+    def test_cart_is_loaded_with_single_query(self):
+        cart = self.load(100)
+        self.assertEqual(len(self.queries), 1)
+        self.assertEqual(len(cart.lines), 10)
+        self.assertEqual(cart.lines[0].quantity, 2)
+        # 5 ботов по 90 (одна позиция x2) и 5 ботов по 100
+        self.assertAlmostEqual(cart.total, 6 * 90 + 5 * 100)
+
+    def test_user_without_cart_and_unknown_user(self):
+        self.assertTrue(self.load(200).is_empty)
+        self.assertIsNone(self.load(300))
+
+    def test_show_cart_uses_one_query(self):
+        message = MagicMock()
+        message.from_user.id = 100
+        message.answer = AsyncMock()
+
+        with patch("bot.handlers.cart.AsyncDbSession", self.sessions):
+            asyncio.run(show_cart(message, get_catalog().get_translator("en")))
+
+        self.assertEqual(len(self.queries), 1)
+        text = message.answer.call_args.args[0]
+        keyboard = message.answer.call_args.kwargs["reply_markup"]
+        self.assertIn("• Bot 1 x2 - 180.00 руб.", text)
+        self.assertIn("1040.00", text)
+        self.assertEqual(keyboard.inline_keyboard[-3][0].callback_data, "cart:checkout")
+
+
+if __name__ == "__main__":
+    unittest.main()
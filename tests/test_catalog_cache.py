@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from models.models import Bot, BotCategory
+from services.catalog import CatalogCache, bump_catalog_version
+from db_case import DatabaseTestCase
+
+
+class TestCatalogCache(DatabaseTestCase):
+    expire_on_commit = False
+
+    def setUp(self):
+        super().setUp()
+        with self.Session() as db:
+            category = BotCategory(name="Games", discount=0)
+            db.add(category)
+            db.flush()
+            db.add_all([
+                Bot(name="Quiz", description="Quiz bot", price=100, discount=10, category_id=category.id),
+                Bot(name="Shop", description="Shop bot", price=50, discount=0),
+            ])
+            db.commit()
+
+        sessions = self.async_sessions(expire_on_commit=True)
+        self.queries = self.record_queries(self.async_engine)
+        self.patcher = patch('services.catalog.AsyncDbSession', sessions)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_steady_state_is_served_from_memory(self):
+        cache = CatalogCache(ttl=300, check_interval=300)
+
+        async def scenario():
+            return [await cache.get_snapshot() for _ in range(50)]
+
+        snapshots = asyncio.run(scenario())
+        self.assertEqual(cache.loads, 1)
+        self.assertEqual(len(self.queries), 3)  # версия, категории, боты
+        snapshot = snapshots[-1]
+        self.assertEqual([bot.name for bot in snapshot.bots_in(snapshot.categories[0].id)], ["Quiz"])
+        self.assertEqual([bot.name for bot in snapshot.bots_in(None)], ["Quiz", "Shop"])
+        self.assertAlmostEqual(snapshot.bots_by_id[1].final_price, 90)
+
+    def test_version_bump_triggers_reload(self):
+        cache = CatalogCache(ttl=300, check_interval=0)
+
+        async def scenario():
+            first = await cache.get_snapshot()
+            unchanged = await cache.get_snapshot()
+            with self.Session() as db:
+                db.query(Bot).filter(Bot.name == "Shop").update({Bot.price: 75})
+                bump_catalog_version(db)
+                db.commit()
+            return first, unchanged, await cache.get_snapshot()
+
+        first, unchanged, reloaded = asyncio.run(scenario())
+        self.assertIs(first, unchanged)
+        self.assertEqual(cache.loads, 2)
+        self.assertEqual(reloaded.version, first.version + 1)
+        self.assertEqual(reloaded.bots_by_id[2].price, 75)
+
+    def test_ttl_fallback_reloads_without_version_change(self):
+        cache = CatalogCache(ttl=0, check_interval=0)
+
+        async def scenario():
+            await cache.get_snapshot()
+            await cache.get_snapshot()
+
+        asyncio.run(scenario())
+        self.assertEqual(cache.loads, 2)
+
+    def test_admin_mutation_bumps_version(self):
+        cache = CatalogCache(ttl=300, check_interval=0)
+        client = self.admin_client()
+        version_before = asyncio.run(cache.get_snapshot()).version
+        response = client.post("/bots/categories", json={"name": "Tools"})
+        snapshot = asyncio.run(cache.get_snapshot())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(snapshot.version, version_before + 1)
+        self.assertIn("Tools", [category.name for category in snapshot.categories])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+from models.models import Bot, BotCategory, BugReport, Order, OrderItem, OrderStatus, Review, User
+from services import category_stats
+from services.events import event_bus
+from db_case import DatabaseTestCase
+
+
+class TestCategoryStats(DatabaseTestCase):
+    expire_on_commit = False
+
+    def setUp(self):
+        super().setUp()
+        with self.Session() as db:
+            user = User(telegram_id=100)
+            games, tools, empty = (BotCategory(name="Games", discount=10), BotCategory(name="Tools"),
+                                   BotCategory(name="Empty"))
+            db.add_all([user, games, tools, empty])
+            db.flush()
+            bots = [Bot(name="A", description="Bot", price=100, category=games),
+                    Bot(name="B", description="Bot", price=200, category=games),
+                    Bot(name="C", description="Bot", price=50, category=tools),
+                    Bot(name="D", description="Bot", price=30)]
+            db.add_all(bots)
+            db.flush()
+            db.add_all([
+                # Один заказ на два бота категории Games: продажи считаются по позициям
+                Order(user_id=user.id, bot_id=bots[0].id, amount=270, status=OrderStatus.PAID,
+                      items=[OrderItem(bot_id=bots[0].id, quantity=1, price=90, amount=90),
+                             OrderItem(bot_id=bots[1].id, quantity=1, price=180, amount=180)]),
+                Order(user_id=user.id, bot_id=bots[1].id, amount=180, status=OrderStatus.PENDING,
+                      items=[OrderItem(bot_id=bots[1].id, quantity=1, price=180, amount=180)]),
+                Order(user_id=user.id, bot_id=bots[3].id, amount=30, status=OrderStatus.PAID,
+                      items=[OrderItem(bot_id=bots[3].id, quantity=1, price=30, amount=30)]),
+                Review(user_id=user.id, bot_id=bots[0].id, rating=5),
+                Review(user_id=user.id, bot_id=bots[0].id, rating=4),
+                Review(user_id=user.id, bot_id=bots[1].id, rating=3),
+                BugReport(user_id=user.id, bot_id=bots[0].id, text="Bug", status="new"),
+                BugReport(user_id=user.id, bot_id=bots[1].id, text="Bug", status="in_progress"),
+                BugReport(user_id=user.id, bot_id=bots[2].id, text="Bug", status="resolved"),
+            ])
+            db.commit()
+
+        category_stats.invalidate_category_stats()
+        self.client = self.admin_client(User(id=1, telegram_id=1))
+        self.queries = self.record_queries()
+
+    def tearDown(self):
+        category_stats.invalidate_category_stats()
+
+    def test_single_query_stats(self):
+        response = self.client.get("/bots/categories/stats")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.queries), 1)
+
+        stats = {item["name"]: item for item in response.json()}
+        self.assertEqual(list(stats), ["Games", "Tools", "Empty", "Без категории"])
+        self.assertEqual(stats["Games"], {
+            "id": 1, "name": "Games", "description": None, "discount": 10, "bots_count": 2, "total_price": 300.0,
+            "sales_count": 2, "revenue": 270.0, "reviews_count": 3, "avg_rating": 4.0, "open_bugs": 2,
+        })
+        self.assertEqual((stats["Tools"]["bots_count"], stats["Tools"]["open_bugs"]), (1, 0))
+        self.assertEqual((stats["Empty"]["bots_count"], stats["Empty"]["avg_rating"]), (0, None))
+        self.assertEqual((stats["Без категории"]["bots_count"], stats["Без категории"]["revenue"]), (1, 30.0))
+
+    def test_cache_invalidated_on_mutations(self):
+        self.client.get("/bots/categories/stats")
+        self.queries.clear()
+        self.client.get("/bots/categories/stats")
+        self.assertEqual(self.queries, [])
+
+        # Изменение категории через админ-панель сбрасывает кеш после commit
+        self.client.put("/bots/categories/2", json={"name": "Utilities", "discount": 0})
+        names = [item["name"] for item in self.client.get("/bots/categories/stats").json()]
+        self.assertIn("Utilities", names)
+
+        # Откат изменений кеш не сбрасывает
+        with self.Session() as db:
+            db.add(Review(user_id=1, bot_id=3, rating=1))
+            db.flush()
+            db.rollback()
+        self.queries.clear()
+        self.client.get("/bots/categories/stats")
+        self.assertEqual(self.queries, [])
+
+        # Запись, сделанная ботом, приходит событием шины
+        with self.engine.begin() as conn:
+            conn.execute(Review.__table__.insert().values(user_id=1, bot_id=3, rating=1))
+        event_bus.publish("review_created", {"id": 4})
+        tools = self.client.get("/bots/categories/stats").json()[1]
+        self.assertEqual((tools["reviews_count"], tools["avg_rating"]), (1, 1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
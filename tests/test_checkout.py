@@ -0,0 +1,116 @@
+import asyncio
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from models.models import Bot, Cart, CartItem, Order, OrderItem, OrderStatus, User
+from services.cart import CartLine, CartView, load_cart
+from services.checkout import create_order
+from db_case import DatabaseTestCase
+
+ALEMBIC_DIR = Path(__file__).resolve().parent.parent / "alembic"
+
+
+class TestCheckout(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.Session() as db:
+            user = User(telegram_id=100)
+            bots = [Bot(name="Quiz", description="Bot", price=100, discount=10),
+                    Bot(name="Shop", description="Bot", price=50),
+                    Bot(name="Poll", description="Bot", price=30)]
+            db.add_all([user] + bots)
+            db.flush()
+            db.add(Cart(user_id=user.id, items=[CartItem(bot_id=bots[0].id, quantity=2),
+                                                CartItem(bot_id=bots[1].id, quantity=1)]))
+            db.commit()
+
+    def run_async(self, scenario):
+        async def main():
+            async with self.open_async_sessions() as sessions:
+                statements = self.record_queries(self.async_engine)
+                async with sessions() as db:
+                    return await scenario(db), statements
+
+        return asyncio.run(main())
+
+    def test_order_with_all_lines_in_one_transaction(self):
+        async def scenario(db):
+            cart = await load_cart(db, 100)
+            return await create_order(db, cart, "freekassa")
+
+        order, statements = self.run_async(scenario)
+        # Все позиции добавляются одним INSERT
+        self.assertEqual(len([s for s in statements if s.startswith("INSERT INTO order_items")]), 1)
+
+        with self.Session() as db:
+            order = db.get(Order, order.id)
+            self.assertEqual((order.amount, order.bot_id, order.status), (230.0, 1, OrderStatus.PENDING))
+            self.assertEqual([(item.bot_id, item.quantity, item.price, item.amount) for item in order.items],
+                             [(1, 2, 90.0, 180.0), (2, 1, 50.0, 50.0)])
+
+    def test_failed_lines_roll_back_order(self):
+        cart = CartView(user_id=1, cart_id=1, total=80.0, lines=(
+            CartLine(bot_id=2, name="Shop", price=50, discount=0, quantity=1),
+            CartLine(bot_id=None, name="Broken", price=30, discount=0, quantity=1),
+        ))
+
+        async def scenario(db):
+            with self.assertRaises(IntegrityError):
+                await create_order(db, cart, "paykassa")
+
+        self.run_async(scenario)
+        with self.Session() as db:
+            self.assertEqual(db.scalars(select(Order)).all(), [])
+
+    def test_top_bots_count_every_line(self):
+        with self.Session() as db:
+            db.add_all([
+                Order(user_id=1, bot_id=1, amount=230, status=OrderStatus.PAID,
+                      items=[OrderItem(bot_id=1, quantity=2, price=90, amount=180),
+                             OrderItem(bot_id=2, quantity=1, price=50, amount=50)]),
+                Order(user_id=1, bot_id=2, amount=50, status=OrderStatus.PAID,
+                      items=[OrderItem(bot_id=2, quantity=1, price=50, amount=50)]),
+                Order(user_id=1, bot_id=3, amount=30, status=OrderStatus.PENDING,
+                      items=[OrderItem(bot_id=3, quantity=1, price=30, amount=30)]),
+            ])
+            db.commit()
+
+        client = self.admin_client(User(id=1, telegram_id=1))
+        top_bots = client.get("/stats/sales", params={"period": "all"}).json()["top_bots"]
+        # Второй бот первого заказа тоже считается проданным
+        self.assertEqual(top_bots, [
+            {"id": 2, "name": "Shop", "order_count": 2, "quantity": 2, "total_amount": 100.0},
+            {"id": 1, "name": "Quiz", "order_count": 1, "quantity": 2, "total_amount": 180.0},
+        ])
+
+    def test_migration_backfills_existing_orders(self):
+        with self.Session() as db:
+            db.add_all([
+                Order(user_id=1, bot_id=1, amount=230, status=OrderStatus.PAID,
+                      items=[OrderItem(bot_id=1, quantity=2, price=90, amount=180),
+                             OrderItem(bot_id=2, quantity=1, price=50, amount=50)]),
+                # Заказы, созданные до появления позиций
+                Order(user_id=1, bot_id=2, amount=45, status=OrderStatus.PAID),
+                Order(user_id=1, bot_id=3, amount=30, status=OrderStatus.PENDING),
+            ])
+            db.commit()
+
+        config = Config()
+        config.set_main_option("script_location", str(ALEMBIC_DIR))
+        with patch("config.settings.DATABASE_URL", f"sqlite:///{self.path}"):
+            command.upgrade(config, "head")
+
+        with self.Session() as db:
+            items = db.execute(select(OrderItem.order_id, OrderItem.bot_id, OrderItem.quantity, OrderItem.amount)
+                               .order_by(OrderItem.id)).all()
+        self.assertEqual(items, [(1, 1, 2, 180.0), (1, 2, 1, 50.0), (2, 2, 1, 45.0), (3, 3, 1, 30.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import asyncio
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlalchemy import insert, update
+
+from admin.routers.events import event_stream, format_event
+from models.models import Bot, BugReport, Message, Order, OrderStatus, Review, User
+from services.events import DatabaseWatcher, Event, EventBus, event_bus
+from db_case import DatabaseTestCase
+
+
+class DisconnectingRequest:
+    """Запрос, клиент которого отключается после заданного количества проверок"""
+
+    def __init__(self, checks: int):
+        self.checks = checks
+
+    async def is_disconnected(self) -> bool:
+        self.checks -= 1
+        return self.checks < 0
+
+
+class TestEventBus(unittest.TestCase):
+    def test_fan_out_to_subscribers(self):
+        bus = EventBus(queue_size=2)
+
+        async def scenario():
+            first, second = bus.subscribe(), bus.subscribe()
+            for i in range(3):
+                bus.publish("order_created", {"id": i})
+            await asyncio.sleep(0)
+            received = [[(await sub.get(0.1)).data["id"] for _ in range(2)] for sub in (first, second)]
+            timeout = await first.get(0.01)
+            bus.unsubscribe(second)
+            return received, timeout
+
+        received, timeout = asyncio.run(scenario())
+        # Переполненная очередь отбрасывает самые старые события
+        self.assertEqual(received, [[1, 2], [1, 2]])
+        self.assertIsNone(timeout)
+        self.assertEqual(bus.stats(), {"subscribers": 1, "published": 3, "dropped": 1})
+        self.assertTrue(bus.was_published("order_created", 2))
+
+    def test_stream_format_and_heartbeat(self):
+        self.assertEqual(format_event(Event(7, "order_paid", {"id": 3, "status": "paid"})),
+                         b'id: 7\nevent: order_paid\ndata: {"id":3,"status":"paid"}\n\n')
+
+        async def scenario():
+            frames = []
+            async for frame in event_stream(DisconnectingRequest(checks=2), heartbeat=0.01):
+                frames.append(frame)
+                if len(frames) == 1:
+                    event_bus.publish("bug_report_created", {"id": 5})
+            return frames
+
+        frames = asyncio.run(scenario())
+        self.assertEqual(frames[0], b"retry: 5000\n\n")
+        self.assertIn(b"event: bug_report_created", frames[1])
+        self.assertEqual(frames[2], b"event: heartbeat\ndata: {}\n\n")
+        # После отключения клиента подписка снимается
+        self.assertEqual(event_bus.subscribers, 0)
+
+
+class TestEventSources(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.engine.begin() as conn:
+            conn.execute(insert(User), [{"telegram_id": 100}])
+            conn.execute(insert(Bot), [{"name": "Bot", "description": "Bot", "price": 100}])
+            conn.execute(insert(Order), [{"user_id": 1, "bot_id": 1, "amount": 100, "status": OrderStatus.PENDING}])
+
+        self.patcher = patch('services.events.AsyncDbSession', self.async_sessions(expire_on_commit=True))
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_orm_commit_publishes_events(self):
+        async def scenario():
+            subscription = event_bus.subscribe()
+            try:
+                db = self.Session()
+                try:
+                    db.add(BugReport(user_id=1, bot_id=1, text="Bug"))
+                    db.add(Message(user_id=1, message_type="text", content="Reply", is_from_admin=True))
+                    db.rollback()
+
+                    db.add(Message(user_id=1, message_type="text", content="Reply", is_from_admin=True))
+                    db.add(BugReport(user_id=1, bot_id=1, text="Bug"))
+                    db.get(Order, 1).status = OrderStatus.PAID
+                    db.commit()
+                finally:
+                    db.close()
+
+                events = []
+                while (item := await subscription.get(0.05)) is not None:
+                    events.append((item.type, item.data))
+                return events
+            finally:
+                event_bus.unsubscribe(subscription)
+
+        events = asyncio.run(scenario())
+        # Откаченные изменения и ответы администраторов событий не создают
+        self.assertEqual([event_type for event_type, _ in events], ["bug_report_created", "order_paid"])
+        self.assertEqual(events[1][1], {"id": 1, "user_id": 1, "bot_id": 1, "amount": 100.0,
+                                        "status": "paid", "payment_system": None})
+
+    def test_watcher_finds_rows_written_by_other_process(self):
+        bus = EventBus()
+        watcher = DatabaseWatcher(bus)
+
+        async def scenario():
+            await watcher.check()
+
+            # Отзыв уже опубликован через ORM в этом процессе
+            bus.publish("review_created", {"id": 1})
+            with self.engine.begin() as conn:
+                conn.execute(insert(BugReport), [{"user_id": 1, "bot_id": 1, "text": "Bug"}])
+                conn.execute(insert(Review), [{"user_id": 1, "bot_id": 1, "rating": 5}])
+                conn.execute(insert(Message), [
+                    {"user_id": 1, "message_type": "text", "is_from_admin": True},
+                    {"user_id": 1, "message_type": "photo", "is_from_admin": False},
+                ])
+                conn.execute(update(Order).values(status=OrderStatus.PAID, updated_at=datetime.utcnow()))
+
+            subscription = bus.subscribe()
+            found = await watcher.check()
+            repeated = await watcher.check()
+            events = []
+            while (item := await subscription.get(0.01)) is not None:
+                events.append((item.type, item.data["id"]))
+            return found, repeated, events
+
+        found, repeated, events = asyncio.run(scenario())
+        self.assertEqual((found, repeated), (3, 0))
+        self.assertEqual(events, [("bug_report_created", 1), ("message_received", 2), ("order_paid", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+import tracemalloc
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from admin.export import iter_export
+from admin.main import app
+from admin.pagination import DateRange
+from admin.routers.payments import OrderFilters
+from admin.serializers import ORDERS
+from models.models import Bot, BugReport, Order, OrderStatus, User
+from db_case import create_database, override_admin_db, remove_database
+
+SEEDED_ORDERS = 200_000
+
+
+class TestExport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Сотни тысяч заказов вставляются один раз на весь класс
+        cls.path, cls.engine, cls.Session = create_database(expire_on_commit=False)
+
+        base = datetime(2024, 3, 1)
+        with cls.engine.begin() as conn:
+            conn.execute(insert(Bot), [{"name": "Quiz", "description": "Quiz bot", "price": 100}])
+            conn.execute(insert(User), [
+                {"telegram_id": 1000 + i, "username": f"user{i}", "first_name": "Имя, \"в кавычках\"",
+                 "language": "ru" if i % 2 else "en", "created_at": base + timedelta(days=i)}
+                for i in range(10)
+            ])
+            conn.execute(insert(BugReport), [
+                {"user_id": 1, "bot_id": 1, "text": "Не работает\nкнопка", "status": "new" if i % 2 else "resolved",
+                 "created_at": base}
+                for i in range(4)
+            ])
+            # Заказы вставляются в обход ORM, чтобы не тратить время на пересчет сводок
+            statuses = [OrderStatus.PAID, OrderStatus.PENDING, OrderStatus.CANCELLED]
+            for offset in range(0, SEEDED_ORDERS, 50_000):
+                conn.execute(insert(Order), [
+                    {"user_id": i % 10 + 1, "bot_id": 1, "amount": float(i % 500), "status": statuses[i % 3],
+                     "payment_system": "freekassa", "created_at": base + timedelta(seconds=i)}
+                    for i in range(offset, offset + 50_000)
+                ])
+
+    @classmethod
+    def tearDownClass(cls):
+        remove_database(cls.path, cls.engine)
+
+    def setUp(self):
+        self.client = override_admin_db(self.Session)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+
+    def test_users_csv_with_filters(self):
+        response = self.client.get("/users/export", params={"language": "ru"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/csv"))
+        self.assertIn('filename="users.csv"', response.headers["content-disposition"])
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        self.assertEqual([row["id"] for row in rows], ["2", "4", "6", "8", "10"])
+        self.assertEqual(rows[0]["first_name"], "Имя, \"в кавычках\"")
+        self.assertEqual(rows[0]["created_at"], "2024-03-02T00:00:00")
+
+    def test_bug_reports_ndjson(self):
+        response = self.client.get("/reports/export", params={"format": "ndjson", "status": "new"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [2, 4])
+        self.assertEqual(rows[0]["text"], "Не работает\nкнопка")
+
+    def test_orders_export_uses_list_filters(self):
+        response = self.client.get("/payments/export", params={
+            "format": "ndjson", "status": "paid", "user_id": 1, "date_to": "2024-03-01T00:01:00"
+        })
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [1, 31, 61])
+        self.assertEqual(rows[0]["status"], "paid")
+
+        self.assertEqual(self.client.get("/payments/export", params={"format": "xml"}).status_code, 422)
+        self.assertEqual(self.client.get("/payments/export", params={"status": "unknown"}).status_code, 400)
+
+    def test_large_export_memory_is_constant(self):
+        filters = OrderFilters(dates=DateRange(None, None), order_status=None, bot_id=None, user_id=None,
+                               payment_system=None)
+        db = self.Session()
+
+        rows = 0
+        size = 0
+        tracemalloc.start()
+        try:
+            for chunk in iter_export(db, filters.query(db), ORDERS, "csv"):
+                rows += chunk.count(b"\n")
+                size += len(chunk)
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(rows, SEEDED_ORDERS + 1)  # заголовок + строки
+        # Выгружено больше 10 МБ, а в памяти одновременно держится только одна пачка строк
+        self.assertGreater(size, 10 * 1024 * 1024)
+        self.assertLess(peak, 5 * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
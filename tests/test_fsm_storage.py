@@ -0,0 +1,115 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+import fakeredis
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+
+from bot.storage import RedisFsmStorage, SqlFsmStorage
+from db_case import async_engine_for, create_database, remove_database
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+class DialogStates(StatesGroup):
+    waiting_for_text = State()
+
+
+class TestRedisFsmStorage(unittest.TestCase):
+    def test_state_is_shared_between_processes(self):
+        async def scenario():
+            server = fakeredis.FakeServer()
+            first = RedisFsmStorage(fakeredis.FakeAsyncRedis(server=server), ttl=3600)
+            second = RedisFsmStorage(fakeredis.FakeAsyncRedis(server=server), ttl=3600)
+
+            await first.set_state(KEY, DialogStates.waiting_for_text)
+            await first.set_data(KEY, {"bot_id": 7, "rating": 5})
+            record = await second.get_record(KEY)
+            state = await second.get_state(KEY)
+            data = await second.get_data(KEY)
+            ttl = await second.redis.ttl(second.key_builder.build(KEY))
+
+            await second.set_state(KEY, None)
+            await second.set_data(KEY, {})
+            exists = await first.redis.exists(first.key_builder.build(KEY))
+            await first.close()
+            await second.close()
+            return record, state, data, ttl, exists
+
+        record, state, data, ttl, exists = asyncio.run(scenario())
+        self.assertEqual(record, ("DialogStates:waiting_for_text", {"bot_id": 7, "rating": 5}))
+        self.assertEqual(state, "DialogStates:waiting_for_text")
+        self.assertEqual(data, {"bot_id": 7, "rating": 5})
+        self.assertTrue(0 < ttl <= 3600)
+        self.assertEqual(exists, 0)
+
+
+class TestSqlFsmStorage(unittest.TestCase):
+    def setUp(self):
+        # Файловая база: параллельные записи идут через разные соединения
+        self.path, self.sync_engine, _ = create_database()
+        self.engine = async_engine_for(self.path)
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.patcher = patch('bot.storage.AsyncDbSession', self.session_factory)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        asyncio.run(self.engine.dispose())
+        remove_database(self.path, self.sync_engine)
+
+    def test_state_roundtrip_and_cleanup(self):
+        async def scenario():
+            storage = SqlFsmStorage(ttl=3600)
+            await storage.set_state(KEY, DialogStates.waiting_for_text)
+            await storage.update_data(KEY, {"bot_id": 7})
+            saved = (await storage.get_state(KEY), await storage.get_data(KEY))
+
+            await storage.set_state(KEY, None)
+            await storage.set_data(KEY, {})
+            purged = await storage.purge_expired()
+            return saved, await storage.get_state(KEY), purged
+
+        saved, cleared, purged = asyncio.run(scenario())
+        self.assertEqual(saved, ("DialogStates:waiting_for_text", {"bot_id": 7}))
+        self.assertIsNone(cleared)
+        self.assertEqual(purged, 0)
+
+    def test_concurrent_first_writes_do_not_conflict(self):
+        async def scenario():
+            storage = SqlFsmStorage(ttl=3600)
+            other_key = StorageKey(bot_id=1, chat_id=43, user_id=43)
+            await asyncio.gather(
+                storage.set_state(KEY, DialogStates.waiting_for_text),
+                storage.set_state(KEY, DialogStates.waiting_for_text),
+            )
+            await asyncio.gather(
+                storage.set_state(other_key, DialogStates.waiting_for_text),
+                storage.set_data(other_key, {"bot_id": 7}),
+            )
+            return (await storage.get_state(KEY),
+                    (await storage.get_state(other_key), await storage.get_data(other_key)))
+
+        state, other = asyncio.run(scenario())
+        self.assertEqual(state, "DialogStates:waiting_for_text")
+        self.assertEqual(other, ("DialogStates:waiting_for_text", {"bot_id": 7}))
+
+    def test_abandoned_state_expires(self):
+        async def scenario():
+            storage = SqlFsmStorage(ttl=1)
+            await storage.set_state(KEY, DialogStates.waiting_for_text)
+            time.sleep(1.1)
+            expired_state = await storage.get_state(KEY)
+            purged = await storage.purge_expired()
+            return expired_state, purged
+
+        expired_state, purged = asyncio.run(scenario())
+        self.assertIsNone(expired_state)
+        self.assertEqual(purged, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
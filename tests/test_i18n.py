@@ -0,0 +1,52 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from bot.i18n import Template, TranslationCatalog, get_catalog, get_localized_text
+
+
+class TestTranslationCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        locales = {
+            "ru": {"hello": "Привет, {name}!", "total": "Итого: {total:.2f} руб.", "only_ru": "Только ru"},
+            "en": {"hello": "Hello, {name}!", "braces": "{{literal}}"},
+        }
+        for lang, messages in locales.items():
+            (Path(self.tmp.name) / lang).mkdir()
+            with open(Path(self.tmp.name) / lang / "messages.json", "w", encoding="utf-8") as f:
+                json.dump(messages, f, ensure_ascii=False)
+        self.catalog = TranslationCatalog(Path(self.tmp.name), languages=["ru", "en"], default_language="ru")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fallback_chain_is_resolved_at_load(self):
+        en = self.catalog.get_translator("en")
+        self.assertEqual(en("hello", name="Bob"), "Hello, Bob!")
+        self.assertEqual(en("only_ru"), "Только ru")
+        self.assertEqual(en("total", {"total": 5}), "Итого: 5.00 руб.")
+        self.assertEqual(en("unknown"), "MISSING:unknown")
+        self.assertIs(en.templates["only_ru"], self.catalog.get_translator("ru").templates["only_ru"])
+
+    def test_translators_are_cached_and_unknown_language_uses_default(self):
+        self.assertIs(self.catalog.get_translator("en"), self.catalog.get_translator("en"))
+        self.assertIs(self.catalog.get_translator("de"), self.catalog.get_translator("ru"))
+
+    def test_missing_key_report(self):
+        self.assertEqual(self.catalog.missing_report(), {"en": ["only_ru", "total"], "ru": ["braces"]})
+
+    def test_templates(self):
+        self.assertEqual(Template("{{literal}}").render({}), "{literal}")
+        self.assertEqual(Template("{a}-{b:>3}").render({"a": 1, "b": 2}), "1-  2")
+        self.assertEqual(Template("{user.name}").render({"user": type("U", (), {"name": "x"})}), "x")
+        self.assertEqual(self.catalog.get_translator("ru")("hello"), "Привет, {name}!")
+
+    def test_project_locales_have_all_handler_keys(self):
+        self.assertEqual(get_catalog().missing_report(), {})
+        self.assertEqual(get_localized_text("cart_total", "en", total=10), "Total: 10.00 RUB")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup
+
+from benchmarks.telegram_stub import STUB_BOT_TOKEN
+from bot.handlers.catalog import show_bots_list
+from bot.keyboards.cache import KeyboardCache, MarkupCacheSession
+from bot.keyboards.catalog import get_bots_keyboard, get_categories_keyboard
+from bot.keyboards.main_menu import get_inline_main_menu, get_main_menu_keyboard
+from services.catalog import BotEntry, CatalogSnapshot, CategoryEntry
+
+
+def make_snapshot(version=1, price=100):
+    categories = [CategoryEntry(id=1, name="Games", discount=0), CategoryEntry(id=2, name="Shops", discount=0)]
+    bots = [
+        BotEntry(id=1, name="Quiz", description="", price=price, discount=10, category_id=1),
+        BotEntry(id=2, name="Shop", description="", price=50, discount=0, category_id=2),
+    ]
+    return CatalogSnapshot.build(version, categories, bots)
+
+
+class TestKeyboardCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = KeyboardCache(max_size=16)
+        self.patchers = [patch(f"{module}.keyboard_cache", self.cache)
+                         for module in ("bot.keyboards.cache", "bot.keyboards.catalog", "bot.keyboards.main_menu")]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_markups_are_reused_per_language_and_version(self):
+        snapshot = make_snapshot()
+        self.assertIs(get_categories_keyboard(snapshot, "en"), get_categories_keyboard(snapshot, "en"))
+        self.assertIs(get_main_menu_keyboard("de"), get_main_menu_keyboard("ru"))
+        self.assertIsNot(get_inline_main_menu("en"), get_inline_main_menu("ru"))
+
+        updated = get_bots_keyboard(make_snapshot(version=2, price=200), None, "en")
+        self.assertIsNot(get_bots_keyboard(snapshot, None, "en"), updated)
+        self.assertEqual(updated.inline_keyboard[0][0].text, "Quiz - 180.00 руб. (-10%)")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["markup_hits"], 2)
+        self.assertEqual(stats["markup_misses"], 6)
+
+    def test_categories_layout(self):
+        rows = get_categories_keyboard(make_snapshot(), "ru").inline_keyboard
+        self.assertEqual([[button.callback_data for button in row] for row in rows],
+                         [["category:1", "category:2"], ["category:all"], ["menu:main"]])
+
+    def test_session_serializes_cached_markup_once(self):
+        session = MarkupCacheSession()
+        bot = Bot(token=STUB_BOT_TOKEN, session=session)
+        markup = get_inline_main_menu("en")
+
+        first = session.prepare_value(markup, bot=bot, files={})
+        self.assertIs(session.prepare_value(markup, bot=bot, files={}), first)
+        self.assertEqual(json.loads(first)["inline_keyboard"][0][0]["callback_data"], "menu:catalog")
+
+        # Клавиатуры, построенные не через кеш, сериализуются как обычно
+        other = InlineKeyboardMarkup(inline_keyboard=[])
+        self.assertEqual(session.prepare_value(other, bot=bot, files={}), '{"inline_keyboard": []}')
+        self.assertEqual(self.cache.stats()["payload_size"], 1)
+
+    def test_bots_list_handler_sends_cached_markup(self):
+        snapshot = make_snapshot()
+        callback = MagicMock()
+        callback.from_user.language_code = "en"
+        callback.message.edit_text = AsyncMock()
+
+        with patch("bot.handlers.catalog.catalog_cache.get_snapshot", AsyncMock(return_value=snapshot)):
+            asyncio.run(show_bots_list(callback, 1))
+            asyncio.run(show_bots_list(callback, 1))
+
+        first, second = [call.kwargs["reply_markup"] for call in callback.message.edit_text.call_args_list]
+        self.assertIs(first, second)
+        self.assertEqual([row[0].callback_data for row in first.inline_keyboard], ["bot:1", "menu:catalog"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from datetime import datetime, timedelta
+
+from admin.main import app
+from admin.middleware.auth_middleware import verify_token
+from models.models import Bot, BugReport, Message, Order, OrderStatus, Review, User
+from services import notifications
+from db_case import DatabaseTestCase
+
+BASE = datetime(2024, 3, 1, 10)
+
+
+class TestNotifications(DatabaseTestCase):
+    expire_on_commit = False
+
+    def setUp(self):
+        super().setUp()
+        # У каждой записи свои пользователь и бот: при ленивой загрузке это дало бы по два запроса на запись
+        with self.Session() as db:
+            users = [User(telegram_id=100 + i, username=f"user{i}") for i in range(8)]
+            bots = [Bot(name=f"Bot {i}", description="Bot", price=100) for i in range(8)]
+            db.add_all(users + bots)
+            db.flush()
+            for i in range(8):
+                db.add_all([
+                    Order(user_id=users[i].id, bot_id=bots[i].id, amount=100, status=OrderStatus.PAID,
+                          created_at=BASE + timedelta(minutes=4 * i)),
+                    BugReport(user_id=users[i].id, bot_id=bots[i].id, text="Bug",
+                              created_at=BASE + timedelta(minutes=4 * i + 1)),
+                    Review(user_id=users[i].id, bot_id=bots[i].id, rating=5,
+                           created_at=BASE + timedelta(minutes=4 * i + 2)),
+                    Message(user_id=users[i].id, message_type="photo", content=None,
+                            created_at=BASE + timedelta(minutes=4 * i + 3)),
+                ])
+            db.commit()
+
+        notifications.feed_cache.clear()
+        self.client = self.admin_client(User(id=1, telegram_id=1))
+        self.queries = self.record_queries()
+
+    def tearDown(self):
+        notifications.feed_cache.clear()
+
+    def test_feed_query_count(self):
+        response = self.client.get("/notifications/")
+        self.assertEqual(response.status_code, 200)
+        # 4 запроса ленты (пользователь и бот загружаются в них же) + отметка прочтения
+        self.assertEqual(len(self.queries), 5)
+
+        data = response.json()
+        self.assertEqual(len(data["notifications"]), notifications.FEED_PAGE_SIZE)
+        self.assertEqual(data["unread_count"], 32)
+        self.assertEqual(data["notifications"][0]["type"], "message")
+        self.assertEqual(data["notifications"][1]["message"], "Пользователь user7 оставил отзыв с рейтингом 5/5")
+
+        # Пока лента в кеше, опрос стоит только запроса отметки прочтения
+        self.queries.clear()
+        for _ in range(5):
+            self.client.get("/notifications/")
+        self.assertEqual(len(self.queries), 5)
+
+    def test_since_returns_only_new_items(self):
+        latest = self.client.get("/notifications/").json()["latest"]
+        self.assertEqual(latest, (BASE + timedelta(minutes=31)).isoformat())
+
+        data = self.client.get("/notifications/", params={"since": latest}).json()
+        self.assertEqual((data["notifications"], data["latest"]), ([], latest))
+
+        data = self.client.get("/notifications/", params={"since": (BASE + timedelta(minutes=29)).isoformat()}).json()
+        self.assertEqual([item["type"] for item in data["notifications"]], ["message", "review"])
+
+    def test_read_markers_are_per_admin(self):
+        until = (BASE + timedelta(minutes=27)).isoformat()
+        response = self.client.post("/notifications/mark-read", params={"until": until})
+        self.assertEqual(response.json(), {"success": True, "last_read_at": until})
+
+        data = self.client.get("/notifications/").json()
+        self.assertEqual(data["unread_count"], 4)
+        self.assertEqual([item["is_read"] for item in data["notifications"][:5]], [False] * 4 + [True])
+
+        # Отметка не сдвигается назад
+        self.client.post("/notifications/mark-read", params={"until": BASE.isoformat()})
+        self.assertEqual(self.client.get("/notifications/").json()["unread_count"], 4)
+
+        # У другого администратора своя отметка
+        app.dependency_overrides[verify_token] = lambda: User(id=2, telegram_id=2)
+        self.assertEqual(self.client.get("/notifications/").json()["unread_count"], 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+from sqlalchemy import select
+
+from models.models import Bot, Order, OrderStatus, OutboxMessage, User
+from services import outbox
+from services.outbox import OutboxWorker, outbox_insert
+from db_case import DatabaseTestCase
+
+
+class FlakyBot:
+    """Бот, который записывает отправки и выбрасывает заданные ошибки для отдельных сообщений"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors.get(text):
+            raise self.errors[text].pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+async def render_text(payload):
+    return {"text": payload["text"]}
+
+
+class TestOutbox(DatabaseTestCase):
+    def setUp(self):
+        outbox.register_listeners()
+        super().setUp()
+        with self.Session() as db:
+            user = User(telegram_id=100)
+            bot = Bot(name="Bot", description="Bot", price=100)
+            db.add_all([user, bot])
+            db.flush()
+            db.add(Order(user_id=user.id, bot_id=bot.id, amount=100.0, status=OrderStatus.PENDING))
+            db.commit()
+
+    def run_async(self, scenario):
+        async def main():
+            async with self.open_async_sessions() as sessions:
+                with patch.object(outbox, "AsyncDbSession", sessions):
+                    return await scenario()
+
+        return asyncio.run(main())
+
+    def add_messages(self, *messages):
+        with self.engine.begin() as conn:
+            for chat_id, text in messages:
+                conn.execute(outbox_insert("text", chat_id, {"text": text}))
+
+    def test_written_with_order_status_change(self):
+        with self.Session() as db:
+            db.get(Order, 1).status = OrderStatus.PAID
+            db.flush()
+            db.rollback()
+        with self.Session() as db:
+            self.assertEqual(db.scalars(select(OutboxMessage)).all(), [])
+
+            db.get(Order, 1).status = OrderStatus.PAID
+            db.commit()
+            # Изменение уже оплаченного заказа сообщение не дублирует
+            db.get(Order, 1).amount = 90.0
+            db.get(Order, 1).status = OrderStatus.PAID
+            db.commit()
+
+            messages = db.scalars(select(OutboxMessage)).all()
+            self.assertEqual([(m.kind, m.chat_id, json.loads(m.payload), m.status) for m in messages],
+                             [("payment_success", 100, {"order_id": 1}, "pending")])
+
+    def test_worker_rate_limit_and_retries(self):
+        self.add_messages((1, "a1"), (1, "a2"), (1, "a3"), (2, "b1"), (3, "c1"), (4, "d1"), (5, "e1"))
+        method = SendMessage(chat_id=1, text="")
+        bot = FlakyBot({
+            "c1": [TelegramNetworkError(method, "timeout")],
+            "d1": [TelegramForbiddenError(method, "bot was blocked by the user")],
+            "e1": [TelegramRetryAfter(method, "Too Many Requests", retry_after=0)],
+        })
+        worker = OutboxWorker(bot, {"text": render_text}, backoff=0, chat_interval=0.1)
+
+        async def scenario():
+            drained = []
+            while True:
+                claimed = await worker.drain_once()
+                if not claimed:
+                    return drained
+                drained.append(claimed)
+
+        self.assertEqual(self.run_async(scenario), [7, 2])
+
+        times = {text: sent_at for _, text, sent_at in bot.sent}
+        # Сообщения в один чат разнесены по времени, другие чаты их не ждут
+        self.assertGreaterEqual(times["a2"] - times["a1"], 0.09)
+        self.assertGreaterEqual(times["a3"] - times["a2"], 0.09)
+        self.assertLess(times["b1"], times["a2"])
+
+        with self.Session() as db:
+            rows = {json.loads(m.payload)["text"]: (m.status, m.attempts) for m in db.scalars(select(OutboxMessage))}
+        self.assertEqual(rows, {
+            "a1": ("sent", 1), "a2": ("sent", 1), "a3": ("sent", 1), "b1": ("sent", 1),
+            "c1": ("sent", 2), "d1": ("failed", 1), "e1": ("sent", 1),
+        })
+        self.assertEqual(worker.metrics(), {"sent": 6, "retried": 2, "failed": 1})
+
+    def test_unacknowledged_batch_is_redelivered(self):
+        self.add_messages((1, "a1"))
+        worker = OutboxWorker(FlakyBot({}), {"text": render_text}, lease=0.2)
+
+        async def scenario():
+            # Воркер забрал сообщение и упал до записи результата
+            first = await worker.claim()
+            during_lease = await worker.claim()
+            await asyncio.sleep(0.25)
+            return len(first), len(during_lease), len(await worker.claim())
+
+        self.assertEqual(self.run_async(scenario), (1, 0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
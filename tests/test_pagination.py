@@ -0,0 +1,98 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from admin import pagination
+from models.models import Bot, Order, OrderStatus, User
+from db_case import DatabaseTestCase
+
+
+class TestKeysetPagination(DatabaseTestCase):
+    expire_on_commit = False
+
+    def setUp(self):
+        super().setUp()
+        # Одинаковые даты у соседних строк проверяют порядок по id внутри одного значения сортировки
+        base = datetime(2024, 3, 1)
+        with self.Session() as db:
+            bot = Bot(name="Quiz", description="Quiz bot", price=100)
+            db.add(bot)
+            users = [
+                User(telegram_id=1000 + i, username=f"user{i}", language="ru" if i % 2 else "en",
+                     created_at=base + timedelta(hours=i // 3))
+                for i in range(23)
+            ]
+            db.add_all(users)
+            db.flush()
+            db.add_all([
+                Order(user_id=users[i % 5].id, bot_id=bot.id, amount=float(10 + i % 4),
+                      status=OrderStatus.PAID if i % 3 else OrderStatus.PENDING,
+                      created_at=base + timedelta(hours=i // 2))
+                for i in range(17)
+            ])
+            db.commit()
+
+        self.client = self.admin_client()
+
+    def _walk(self, url, **params):
+        pages = []
+        response = self.client.get(url, params=params)
+        while True:
+            self.assertEqual(response.status_code, 200, response.text)
+            page = response.json()
+            pages.append(page)
+            if not page["has_more"]:
+                return pages
+            response = self.client.get(url, params={**params, "cursor": page["next_cursor"]})
+
+    def test_users_pages_have_no_gaps_or_duplicates(self):
+        pages = self._walk("/users/", limit=4)
+        ids = [item["id"] for page in pages for item in page["items"]]
+
+        self.assertEqual(len(pages), 6)
+        self.assertEqual(sorted(ids), list(range(1, 24)))
+        self.assertEqual(len(ids), len(set(ids)))
+        # Сначала новые, при равной дате - больший id
+        self.assertEqual(ids[:4], [23, 22, 21, 20])
+        self.assertEqual(pages[0]["total"], 23)
+        self.assertIsNone(pages[1]["total"])
+
+    def test_orders_sorted_by_amount_with_filters(self):
+        pages = self._walk("/payments/", limit=3, sort="amount", status="paid")
+        items = [item for page in pages for item in page["items"]]
+
+        self.assertEqual(len(items), 11)
+        self.assertEqual(pages[0]["total"], 11)
+        self.assertTrue(all(item["status"] == "paid" for item in items))
+        keys = [(item["amount"], item["id"]) for item in items]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_users_filters(self):
+        page = self.client.get("/users/", params={"language": "en", "status": "with_orders"}).json()
+        self.assertEqual(sorted(item["id"] for item in page["items"]), [1, 3, 5])
+
+        page = self.client.get("/users/", params={"search": "@user1"}).json()
+        self.assertEqual(page["total"], 11)  # user1, user10..user19
+
+    def test_invalid_cursor_and_sort(self):
+        self.assertEqual(self.client.get("/users/", params={"cursor": "not-a-cursor"}).status_code, 400)
+        self.assertEqual(self.client.get("/users/", params={"sort": "password"}).status_code, 400)
+        self.assertEqual(self.client.get("/payments/", params={"status": "unknown"}).status_code, 400)
+
+        # Курсор другой сортировки не применяется молча
+        cursor = self.client.get("/payments/", params={"limit": 2}).json()["next_cursor"]
+        response = self.client.get("/payments/", params={"cursor": cursor, "sort": "amount"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_total_is_capped(self):
+        with patch.object(pagination, "COUNT_LIMIT", 5):
+            page = self.client.get("/users/", params={"language": "ru"}).json()
+            self.assertEqual((page["total"], page["total_is_estimate"]), (5, True))
+
+            # Без фильтров берется оценка размера таблицы
+            page = self.client.get("/users/").json()
+            self.assertEqual((page["total"], page["total_is_estimate"]), (23, True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+import unittest
+
+import httpx
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from payments.freekassa import FreeKassa
+from payments.gateway import GatewayClient, GatewayMetrics
+from payments.paykassa import PayKassa
+
+
+class MockGateway:
+    """Локальный сервер, отвечающий как FreeKassa и PayKassa"""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.failures = failures
+        self.delay = delay
+        self.requests = []
+        self.peers = set()
+        app = web.Application()
+        app.router.add_get("/v1/orders/{order_id}", self.freekassa_order)
+        app.router.add_post("/paykassa", self.paykassa)
+        self.server = TestServer(app, host="127.0.0.1")
+
+    async def _respond(self, request, payload):
+        self.requests.append(request.path)
+        self.peers.add(request.transport.get_extra_info("peername"))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            return web.json_response({"error": "busy"}, status=503)
+        return web.json_response(payload)
+
+    async def freekassa_order(self, request):
+        order_id = int(request.match_info["order_id"])
+        return await self._respond(request, {"status": "paid", "amount": 100.0, "order_id": order_id})
+
+    async def paykassa(self, request):
+        data = await request.json()
+        return await self._respond(request, {"error": False, "data": {
+            "invoice_id": f"INV-{data['order_id']}", "url": f"https://pay.example/{data['order_id']}"
+        }})
+
+    def url(self, path: str) -> str:
+        return str(self.server.make_url(path))
+
+
+class TestGatewayClient(unittest.TestCase):
+    def run_with(self, gateway: MockGateway, scenario):
+        async def main():
+            await gateway.server.start_server()
+            try:
+                return await scenario()
+            finally:
+                await self.client.aclose()
+                await gateway.server.close()
+        return asyncio.run(main())
+
+    def setUp(self):
+        self.metrics = GatewayMetrics()
+        self.client = GatewayClient(timeout=0.5, retries=2, backoff=0.01, metrics=self.metrics)
+
+    def test_keep_alive_and_histogram(self):
+        gateway = MockGateway()
+
+        async def scenario():
+            freekassa = FreeKassa(client=self.client, base_url=gateway.url("/v1"))
+            return [await freekassa.check_payment_status(order_id) for order_id in range(1, 6)]
+
+        results = self.run_with(gateway, scenario)
+        self.assertEqual([result["status"] for result in results], ["paid"] * 5)
+        # Все запросы прошли через одно keep-alive соединение
+        self.assertEqual(len(gateway.peers), 1)
+
+        stats = self.metrics.snapshot()["freekassa.check_payment_status"]
+        self.assertEqual((stats["count"], stats["errors"], stats["retries"]), (5, 0, 0))
+        self.assertEqual(stats["buckets"]["+Inf"], 5)
+
+    def test_retries_idempotent_requests(self):
+        gateway = MockGateway(failures=2)
+
+        async def scenario():
+            freekassa = FreeKassa(client=self.client, base_url=gateway.url("/v1"))
+            return await freekassa.check_payment_status(7)
+
+        result = self.run_with(gateway, scenario)
+        self.assertTrue(result["success"])
+        self.assertEqual(len(gateway.requests), 3)
+        self.assertEqual(self.metrics.snapshot()["freekassa.check_payment_status"]["retries"], 2)
+
+    def test_payment_creation_is_not_repeated(self):
+        gateway = MockGateway(failures=1)
+
+        async def scenario():
+            paykassa = PayKassa(client=self.client, api_url=gateway.url("/paykassa"))
+            failed = await paykassa.create_payment(order_id=1, amount=100.0)
+            created = await paykassa.create_payment(order_id=2, amount=100.0)
+            return failed, created
+
+        failed, created = self.run_with(gateway, scenario)
+        # Ответ 503 мог означать созданный счет, поэтому повторной отправки нет
+        self.assertFalse(failed["success"])
+        self.assertEqual(created["payment_url"], "https://pay.example/2")
+        self.assertEqual(len(gateway.requests), 2)
+
+    def test_timeout_is_bounded(self):
+        gateway = MockGateway(delay=1.0)
+
+        async def scenario():
+            with self.assertRaises(httpx.TimeoutException):
+                await self.client.request("freekassa", "check_payment_status", "GET", gateway.url("/v1/orders/1"),
+                                          timeout=0.1)
+
+        started = time.perf_counter()
+        self.run_with(gateway, scenario)
+        # Три попытки по 0.1 с и короткие паузы между ними, а не ожидание ответа
+        self.assertLess(time.perf_counter() - started, 0.9)
+        self.assertEqual(self.metrics.snapshot()["freekassa.check_payment_status"]["errors"], 1)
+
+    def test_clients_of_every_loop_are_closed(self):
+        # Цикл событий другого потока (например, бот и админ-панель в одном процессе)
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever)
+        thread.start()
+
+        async def get_client():
+            return self.client.client
+
+        try:
+            other = asyncio.run_coroutine_threadsafe(get_client(), loop).result()
+
+            async def scenario():
+                current = self.client.client
+                # Тот же цикл получает тот же клиент
+                self.assertIs(self.client.client, current)
+                await self.client.aclose()
+                return current
+
+            current = asyncio.run(scenario())
+            self.assertIsNot(current, other)
+            self.assertTrue(current.is_closed)
+            self.assertTrue(other.is_closed)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import unittest
+from unittest.mock import patch
+
+import httpx
+from sqlalchemy import select
+
+from admin.main import app
+from bot.handlers import payments as payment_handlers
+from models.models import Bot, Order, OrderStatus, OutboxMessage, PaymentNotification, User
+from payments.freekassa import FreeKassa
+from services import outbox, payment_webhooks
+from db_case import DatabaseTestCase
+
+
+def freekassa_form(order_id: int, amount: str, intid: str) -> dict:
+    """Уведомление FreeKassa с верной подписью"""
+    secret_key = FreeKassa().secret_key
+    sign = hashlib.md5(f"1:{amount}:{secret_key}:{order_id}".encode()).hexdigest()
+    return {"MERCHANT_ID": "1", "AMOUNT": amount, "MERCHANT_ORDER_ID": str(order_id), "intid": intid, "SIGN": sign}
+
+
+class RecordingBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class TestPaymentWebhooks(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.Session() as db:
+            user = User(telegram_id=100)
+            bot = Bot(name="Shop Bot", description="Bot", price=100)
+            db.add_all([user, bot])
+            db.flush()
+            db.add_all([Order(user_id=user.id, bot_id=bot.id, amount=100.0, status=OrderStatus.PENDING),
+                        Order(user_id=user.id, bot_id=bot.id, amount=250.0, status=OrderStatus.PENDING)])
+            db.commit()
+
+    def run_webhooks(self, forms):
+        """Отправляет уведомления параллельно, затем отправляет сообщения из outbox"""
+        async def main():
+            bot = RecordingBot()
+            async with self.open_async_sessions() as sessions:
+                with patch.object(payment_webhooks, "AsyncDbSession", sessions), \
+                        patch.object(outbox, "AsyncDbSession", sessions), \
+                        patch.object(payment_handlers, "AsyncDbSession", sessions):
+                    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+                        responses = await asyncio.gather(
+                            *[client.post("/webhooks/freekassa", data=form) for form in forms]
+                        )
+                    worker = outbox.OutboxWorker(bot, {outbox.PAYMENT_SUCCESS: payment_handlers.render_payment_success},
+                                                 chat_interval=0)
+                    while await worker.drain_once():
+                        pass
+                return [response.json() for response in responses], bot.sent
+
+        return asyncio.run(main())
+
+    def test_parallel_duplicates_are_applied_once(self):
+        # Сотни повторов одной транзакции и несколько других транзакций того же заказа одновременно
+        forms = [freekassa_form(1, "100.00", "TX-1")] * 300 + [freekassa_form(1, "100.00", f"TX-{i}")
+                                                                for i in range(2, 6)]
+        responses, sent = self.run_webhooks(forms)
+
+        # Платежная система получает успешный ответ на каждую доставку, пользователь - одно сообщение
+        self.assertEqual(responses, [{"success": 1}] * len(forms))
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(sent[0][0], 100)
+        self.assertIn("Shop Bot", sent[0][1])
+
+        with self.Session() as db:
+            order = db.get(Order, 1)
+            self.assertEqual((order.status, order.payment_system), (OrderStatus.PAID, "freekassa"))
+            statuses = dict(db.execute(select(PaymentNotification.transaction_id, PaymentNotification.status)).all())
+            self.assertEqual(db.scalars(select(OutboxMessage.status)).all(), ["sent"])
+        self.assertEqual(sorted(statuses.values()), ["already_paid"] * 4 + ["paid"])
+        # Заказ оплачен той транзакцией, которая первой получила блокировку
+        self.assertEqual(statuses[order.payment_id], "paid")
+
+    def test_amount_mismatch_is_rejected(self):
+        forms = [freekassa_form(2, "1.00", "TX-7")] * 3 + [freekassa_form(99, "100.00", "TX-8")]
+        responses, sent = self.run_webhooks(forms)
+
+        self.assertEqual([response["success"] for response in responses], [0] * 4)
+        self.assertEqual(sent, [])
+        with self.Session() as db:
+            self.assertEqual(db.get(Order, 2).status, OrderStatus.PENDING)
+            self.assertEqual(sorted(db.scalars(select(PaymentNotification.status)).all()),
+                             ["amount_mismatch", "order_not_found"])
+
+    def test_rejected_notification_is_reevaluated(self):
+        # Уведомление пришло раньше, чем заказ записан в базу
+        responses, _ = self.run_webhooks([freekassa_form(3, "40.00", "TX-9")])
+        self.assertEqual(responses[0]["success"], 0)
+
+        with self.Session() as db:
+            db.add(Order(user_id=1, bot_id=1, amount=40.0, status=OrderStatus.PENDING))
+            db.commit()
+
+        # Повторная доставка той же транзакции проводит заказ один раз
+        responses, sent = self.run_webhooks([freekassa_form(3, "40.00", "TX-9")] * 5)
+        self.assertEqual(responses, [{"success": 1}] * 5)
+        self.assertEqual(len(sent), 1)
+        with self.Session() as db:
+            self.assertEqual(db.get(Order, 3).status, OrderStatus.PAID)
+            self.assertEqual(db.scalars(select(PaymentNotification.status)).all(), ["paid"])
+
+
+if __name__ == "__main__":
+    unittest.main()
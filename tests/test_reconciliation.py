@@ -0,0 +1,174 @@
+import asyncio
+import datetime
+import unittest
+from unittest.mock import patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from sqlalchemy import select
+
+from models.models import Bot, Order, OrderStatus, OutboxMessage, PaymentNotification, User
+from payments.freekassa import FreeKassa
+from payments.gateway import GatewayClient, GatewayMetrics
+from payments.paykassa import PayKassa
+from services import outbox, payment_webhooks, reconciliation, rollups
+from services.reconciliation import PaymentReconciler
+from db_case import DatabaseTestCase
+
+
+class MockGateway:
+    """Локальный сервер со статусами платежей FreeKassa (по id заказа) и PayKassa (по номеру счета)"""
+
+    def __init__(self, freekassa, paykassa, delay: float = 0.02):
+        self.freekassa = freekassa
+        self.paykassa = paykassa
+        self.delay = delay
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        app = web.Application()
+        app.router.add_get("/v1/orders/{order_id}", self.freekassa_order)
+        app.router.add_post("/paykassa", self.paykassa_order)
+        self.server = TestServer(app, host="127.0.0.1")
+
+    async def _respond(self, response):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        status, payload = response
+        return web.json_response(payload, status=status)
+
+    async def freekassa_order(self, request):
+        return await self._respond(self.freekassa.get(int(request.match_info["order_id"]),
+                                                      (404, {"error": "Order not found"})))
+
+    async def paykassa_order(self, request):
+        data = await request.json()
+        return await self._respond(self.paykassa[data["invoice_id"]])
+
+    def url(self, path: str) -> str:
+        return str(self.server.make_url(path))
+
+
+class TestReconciliation(DatabaseTestCase):
+    def setUp(self):
+        outbox.register_listeners()
+        rollups.register_listeners()
+        super().setUp()
+        now = datetime.datetime.utcnow()
+        hour_ago, two_days_ago = now - datetime.timedelta(hours=1), now - datetime.timedelta(days=2)
+        with self.Session() as db:
+            user = User(telegram_id=100)
+            bot = Bot(name="Bot", description="Bot", price=100)
+            db.add_all([user, bot])
+            db.flush()
+            orders = [
+                # 1: оплачен, но вебхук потерялся
+                ("freekassa", None, 100.0, hour_ago),
+                # 2: отменен в платежной системе
+                ("freekassa", None, 100.0, hour_ago),
+                # 3: платеж не начинался, заказ устарел
+                ("freekassa", None, 100.0, two_days_ago),
+                # 4: платеж не начинался, ждем дальше
+                ("freekassa", None, 100.0, hour_ago),
+                # 5: создан только что, еще не сверяется
+                ("freekassa", None, 100.0, now),
+                # 6: оплачен через PayKassa
+                ("paykassa", "INV-6", 50.0, hour_ago),
+                # 7: счет PayKassa не создан, заказ устарел
+                ("paykassa", None, 50.0, two_days_ago),
+                # 8: платежная система недоступна - устаревший заказ не трогаем
+                ("freekassa", None, 100.0, two_days_ago),
+                # 9: сумма оплаты не совпадает
+                ("freekassa", None, 100.0, hour_ago),
+            ] + [("freekassa", None, 100.0, hour_ago)] * 6
+            db.add_all([Order(user_id=user.id, bot_id=bot.id, amount=amount, status=OrderStatus.PENDING,
+                              payment_system=payment_system, payment_id=payment_id, created_at=created_at)
+                        for payment_system, payment_id, amount, created_at in orders])
+            db.add(Order(user_id=user.id, bot_id=bot.id, amount=100.0, status=OrderStatus.PAID,
+                         payment_system="freekassa", created_at=hour_ago))
+            # 17: оплачен, но платежная система не вернула ни суммы, ни id транзакции
+            # 18: сумма не совпадает, id транзакции нет
+            db.add_all([Order(user_id=user.id, bot_id=bot.id, amount=70.0, status=OrderStatus.PENDING,
+                              payment_system="freekassa", created_at=hour_ago) for _ in range(2)])
+            db.commit()
+
+        self.gateway = MockGateway(
+            freekassa={
+                1: (200, {"status": "paid", "amount": 100.0, "intid": "FK-1"}),
+                2: (200, {"status": "cancelled", "amount": 100.0}),
+                8: (503, {"error": "busy"}),
+                9: (200, {"status": "paid", "amount": 1.0, "intid": "FK-9"}),
+                **{order_id: (200, {"status": "new", "amount": 100.0}) for order_id in range(10, 16)},
+                17: (200, {"status": "paid"}),
+                18: (200, {"status": "paid", "amount": 1.0}),
+            },
+            paykassa={"INV-6": (200, {"error": False, "data": {"status": "paid", "amount": "50.00",
+                                                                "transaction_id": "PK-6"}})},
+        )
+
+    def run_reconciler(self, runs: int = 1):
+        async def main():
+            client = GatewayClient(timeout=1, retries=0, metrics=GatewayMetrics())
+            await self.gateway.server.start_server()
+            try:
+                reconciler = PaymentReconciler(
+                    gateways={"freekassa": FreeKassa(client=client, base_url=self.gateway.url("/v1")),
+                              "paykassa": PayKassa(client=client, api_url=self.gateway.url("/paykassa"))},
+                    batch_size=4, concurrency=3, min_age=600, expire_after=86400,
+                )
+                async with self.open_async_sessions() as sessions:
+                    with patch.object(reconciliation, "AsyncDbSession", sessions), \
+                            patch.object(payment_webhooks, "AsyncDbSession", sessions), \
+                            patch.object(outbox, "AsyncDbSession", sessions):
+                        results = [await reconciler.run_once() for _ in range(runs)]
+                return results, reconciler.metrics()
+            finally:
+                await client.aclose()
+                await self.gateway.server.close()
+
+        return asyncio.run(main())
+
+    def test_pending_orders_are_resolved(self):
+        (first, second), metrics = self.run_reconciler(runs=2)
+
+        with self.Session() as db:
+            statuses = {order.id: order.status for order in db.scalars(select(Order))}
+            payment_ids = {order.id: order.payment_id for order in db.scalars(select(Order))}
+            messages = db.scalars(select(OutboxMessage.payload)).all()
+            notifications = db.execute(select(PaymentNotification.transaction_id, PaymentNotification.status)
+                                       .order_by(PaymentNotification.id)).all()
+
+        self.assertEqual({order_id for order_id, status in statuses.items() if status == OrderStatus.PAID},
+                         {1, 6, 16, 17})
+        self.assertEqual({order_id for order_id, status in statuses.items() if status == OrderStatus.CANCELLED},
+                         {2, 3, 7})
+        self.assertEqual((payment_ids[1], payment_ids[6]), ("FK-1", "PK-6"))
+        # Сообщение об оплате - по одному на каждый проведенный сверкой заказ
+        self.assertEqual(sorted(messages), ['{"order_id": 17}', '{"order_id": 1}', '{"order_id": 6}'])
+        # Отказ без id транзакции не записан и не помешает вебхуку заказа 18
+        self.assertEqual(sorted(notifications), [("FK-1", "paid"), ("FK-9", "amount_mismatch"),
+                                                 ("PK-6", "paid"), ("order-17", "paid")])
+
+        self.assertEqual({key: first[key] for key in ("checked", "updated", "paid", "cancelled", "expired",
+                                                      "unchanged", "failed")},
+                         {"checked": 16, "updated": 6, "paid": 3, "cancelled": 1, "expired": 2,
+                          "unchanged": 7, "failed": 3})
+        # Повторная сверка ничего не меняет: остались ожидающие, недоступная система и расхождение суммы
+        self.assertEqual((second["checked"], second["updated"], second["failed"]), (10, 0, 3))
+
+        # Запросы к платежным системам ограничены семафором
+        self.assertLessEqual(self.gateway.max_in_flight, 3)
+        self.assertGreater(self.gateway.max_in_flight, 1)
+        self.assertEqual(metrics["runs"], 2)
+        self.assertEqual(metrics["totals"]["paid"], 3)
+        self.assertEqual(metrics["gateway_latency"]["freekassa"]["count"], 14 + 10)
+        self.assertEqual(metrics["gateway_latency"]["paykassa"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import asyncio
+import unittest
+from datetime import date, datetime
+
+from sqlalchemy import delete, insert
+
+from models.models import (
+    Bot, BugReport, DailyBugReportStats, DailyOrderStats, DailyReviewStats, DailyUserStats, Order, OrderStatus, Review,
+    User
+)
+from services import rollups
+from db_case import DatabaseTestCase
+
+
+class TestRollups(DatabaseTestCase):
+    expire_on_commit = False
+
+    def setUp(self):
+        rollups.register_listeners()
+        super().setUp()
+        with self.Session() as db:
+            self.user = User(telegram_id=1, username="buyer", created_at=datetime(2024, 3, 1, 8))
+            self.bot = Bot(name="Quiz", description="Quiz bot", price=100)
+            db.add_all([self.user, self.bot])
+            db.commit()
+
+    def _order(self, db, amount, created_at, order_status=OrderStatus.PENDING, payment_system=None):
+        order = Order(user_id=self.user.id, bot_id=self.bot.id, amount=amount, status=order_status,
+                      payment_system=payment_system, created_at=created_at)
+        db.add(order)
+        db.commit()
+        return order
+
+    def _rollup_rows(self):
+        with self.Session() as db:
+            return sorted(
+                (row.day, row.payment_system, row.status.value, row.orders, row.amount)
+                for row in db.query(DailyOrderStats).all() if row.orders
+            )
+
+    def test_order_changes_are_tracked(self):
+        with self.Session() as db:
+            order = self._order(db, 100, datetime(2024, 3, 1, 10))
+            self._order(db, 40, datetime(2024, 3, 2, 11), OrderStatus.PAID, "paykassa")
+            self.assertEqual(self._rollup_rows(), [
+                (date(2024, 3, 1), "", "pending", 1, 100),
+                (date(2024, 3, 2), "paykassa", "paid", 1, 40),
+            ])
+
+            # Оплата заказа переносит его в строку оплаченных, день остается днем создания
+            order.status = OrderStatus.PAID
+            order.payment_system = "freekassa"
+            db.commit()
+            self.assertEqual(self._rollup_rows(), [
+                (date(2024, 3, 1), "freekassa", "paid", 1, 100),
+                (date(2024, 3, 2), "paykassa", "paid", 1, 40),
+            ])
+
+            db.delete(order)
+            db.commit()
+        self.assertEqual(self._rollup_rows(), [(date(2024, 3, 2), "paykassa", "paid", 1, 40)])
+
+        with self.Session() as db:
+            self.assertEqual(db.get(DailyUserStats, date(2024, 3, 1)).registrations, 1)
+
+    def test_async_session_updates_are_tracked(self):
+        with self.Session() as db:
+            order_id = self._order(db, 70, datetime(2024, 3, 5, 9)).id
+
+        async def pay():
+            async with self.open_async_sessions(expire_on_commit=True) as sessions, sessions() as db:
+                order = await db.get(Order, order_id)
+                order.status = OrderStatus.PAID
+                await db.commit()
+
+        asyncio.run(pay())
+        self.assertEqual(self._rollup_rows(), [(date(2024, 3, 5), "", "paid", 1, 70)])
+
+    def test_backfill_rebuilds_rollups_from_orders(self):
+        # Заказы, добавленные в обход ORM, в сводки не попадают, пока их не пересчитать
+        with self.engine.begin() as conn:
+            conn.execute(insert(Order), [
+                {"user_id": self.user.id, "bot_id": self.bot.id, "amount": 10.0 * i, "status": OrderStatus.PAID,
+                 "payment_system": "freekassa", "created_at": datetime(2024, 3, 1 + i % 3, 12)}
+                for i in range(1, 7)
+            ])
+            conn.execute(delete(DailyUserStats))
+        self.assertEqual(self._rollup_rows(), [])
+
+        with self.Session() as db:
+            written = rollups.backfill(db, chunk_days=2)
+            self.assertEqual(written, {"daily_order_stats": 3, "daily_user_stats": 1, "daily_review_stats": 0,
+                                       "daily_bug_report_stats": 0})
+            self.assertEqual(rollups.totals(db, rollups.USERS, None, datetime(2024, 3, 10))["registrations"], 1)
+        self.assertEqual(self._rollup_rows(), [
+            (date(2024, 3, 1), "freekassa", "paid", 2, 90),
+            (date(2024, 3, 2), "freekassa", "paid", 2, 50),
+            (date(2024, 3, 3), "freekassa", "paid", 2, 70),
+        ])
+
+    def test_today_and_partial_days_are_read_from_orders(self):
+        with self.Session() as db:
+            self._order(db, 100, datetime(2024, 3, 1, 10), OrderStatus.PAID)
+            self._order(db, 50, datetime(2024, 3, 2, 10), OrderStatus.PAID)
+            self._order(db, 20, datetime(2024, 3, 3, 10), OrderStatus.PAID)
+
+        now = datetime(2024, 3, 3, 12)
+        rollup_days, raw_ranges = rollups.split_range(datetime(2024, 3, 1, 12), now, now)
+        self.assertEqual(rollup_days, (date(2024, 3, 2), date(2024, 3, 3)))
+        self.assertEqual(raw_ranges, [(datetime(2024, 3, 1, 12), datetime(2024, 3, 2), False),
+                                      (datetime(2024, 3, 3), now, True)])
+
+        # Испорченная строка сводки за сегодня не влияет на результат: сегодняшний день читается из orders
+        with self.engine.begin() as conn:
+            conn.execute(DailyOrderStats.__table__.update()
+                         .where(DailyOrderStats.day == date(2024, 3, 3)).values(orders=99, amount=999))
+
+        with self.Session() as db:
+            self.assertEqual(rollups.totals(db, rollups.ORDERS, datetime(2024, 3, 1), now, now=now),
+                             {"orders": 3, "amount": 170})
+            self.assertEqual(rollups.totals(db, rollups.ORDERS, datetime(2024, 3, 1, 12), now, now=now),
+                             {"orders": 2, "amount": 70})
+            series = rollups.series(db, rollups.ORDERS, "day", datetime(2024, 3, 1), now,
+                                    where={"status": OrderStatus.PAID}, now=now)
+        self.assertEqual([(point["date"], point["amount"]) for point in series],
+                         [("2024-03-01", 100), ("2024-03-02", 50), ("2024-03-03", 20)])
+
+    def test_reviews_and_bug_reports_are_tracked(self):
+        with self.Session() as db:
+            review = Review(user_id=self.user.id, bot_id=self.bot.id, rating=5, created_at=datetime(2024, 3, 1, 10))
+            db.add_all([review,
+                        Review(user_id=self.user.id, bot_id=self.bot.id, rating=2, created_at=datetime(2024, 3, 4, 9)),
+                        BugReport(user_id=self.user.id, bot_id=self.bot.id, text="Crash",
+                                  created_at=datetime(2024, 3, 4, 12))])
+            db.commit()
+
+            # Изменение оценки переносится в сводку
+            review.rating = 3
+            db.commit()
+            self.assertEqual((db.get(DailyReviewStats, date(2024, 3, 1)).reviews,
+                              db.get(DailyReviewStats, date(2024, 3, 1)).rating_sum), (1, 3))
+            self.assertEqual(db.get(DailyBugReportStats, date(2024, 3, 4)).reports, 1)
+
+            now = datetime(2024, 3, 10)
+            # Только отзывы за период
+            self.assertEqual(rollups.totals(db, rollups.REVIEWS, datetime(2024, 3, 3), now, now=now),
+                             {"reviews": 1, "rating_sum": 2})
+            self.assertEqual(rollups.totals(db, rollups.REVIEWS, None, now, now=now), {"reviews": 2, "rating_sum": 5})
+
+            db.delete(review)
+            db.commit()
+            self.assertEqual(rollups.totals(db, rollups.REVIEWS, None, now, now=now), {"reviews": 1, "rating_sum": 2})
+            self.assertEqual(rollups.totals(db, rollups.BUG_REPORTS, datetime(2024, 3, 5), now, now=now),
+                             {"reports": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from datetime import datetime
+
+from admin.serializers import ORDERS, USERS, serializer_for
+from admin.utils import serialize_model
+from models.models import Bot, Order, OrderStatus, Review, User
+from db_case import DatabaseTestCase
+
+
+class TestSerializers(DatabaseTestCase):
+    expire_on_commit = False
+
+    def setUp(self):
+        super().setUp()
+        with self.Session() as db:
+            user = User(telegram_id=1, username="buyer", created_at=datetime(2024, 3, 1, 8, 30))
+            bot = Bot(name="Quiz", description="Quiz bot", price=100)
+            db.add_all([user, bot])
+            db.flush()
+            db.add(Order(user_id=user.id, bot_id=bot.id, amount=150, status=OrderStatus.PAID,
+                         payment_system="freekassa", created_at=datetime(2024, 3, 2, 10)))
+            db.commit()
+
+    def test_projected_row_matches_legacy_serializer(self):
+        with self.Session() as db:
+            row = ORDERS.project(db.query(Order)).one()
+            order = db.query(Order).one()
+            legacy = serialize_model(order)
+            legacy["status"] = order.status.value
+
+            data = ORDERS.row(row)
+            self.assertEqual(data, {name: legacy[name] for name in ORDERS.names})
+            self.assertEqual(ORDERS.instance(order), data)
+            # Выбираются только колонки сериализатора, ORM-объекты в сессию не загружаются
+            self.assertNotIsInstance(row, Order)
+
+        self.assertEqual(data["status"], "paid")
+        self.assertEqual(data["created_at"], "2024-03-02T10:00:00")
+        self.assertIsNone(data["payment_id"])
+
+    def test_values_keep_field_order(self):
+        with self.Session() as db:
+            row = USERS.project(db.query(User)).one()
+        self.assertEqual(USERS.values(row), [1, 1, "buyer", None, None, "ru", "2024-03-01T08:30:00"])
+
+    def test_registry(self):
+        self.assertIs(serializer_for(Order), ORDERS)
+        with self.assertRaises(LookupError):
+            serializer_for(Review)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import func
+
+from models.models import Bot, BugReport, Order, OrderItem, OrderStatus, Review, User
+from services import rollups
+from services.timeseries import MAX_BUCKETS, count_buckets, time_series
+from db_case import DatabaseTestCase
+
+
+class TestStatsTimeSeries(DatabaseTestCase):
+    expire_on_commit = False
+
+    def setUp(self):
+        rollups.register_listeners()
+        super().setUp()
+        with self.Session() as db:
+            user = User(telegram_id=1, username="buyer", created_at=datetime(2024, 1, 30, 12))
+            bot = Bot(name="Quiz", description="Quiz bot", price=100)
+            db.add_all([user, bot])
+            db.flush()
+            db.add_all([
+                Order(user_id=user.id, bot_id=bot.id, amount=amount, status=order_status, created_at=created_at,
+                      items=[OrderItem(bot_id=bot.id, quantity=1, price=amount, amount=amount)])
+                for amount, order_status, created_at in [
+                    (100, OrderStatus.PAID, datetime(2024, 1, 29, 10, 15)),   # понедельник
+                    (50, OrderStatus.PAID, datetime(2024, 1, 29, 10, 45)),
+                    (70, OrderStatus.PAID, datetime(2024, 2, 1, 0, 0)),
+                    (999, OrderStatus.PENDING, datetime(2024, 2, 1, 9, 0)),
+                    (30, OrderStatus.PAID, datetime(2024, 2, 12, 23, 59)),
+                ]
+            ])
+            db.add_all([Review(user_id=user.id, bot_id=bot.id, rating=5, created_at=datetime(2019, 6, 1, 12)),
+                        Review(user_id=user.id, bot_id=bot.id, rating=3, created_at=datetime(2024, 2, 1, 12)),
+                        BugReport(user_id=user.id, bot_id=bot.id, text="Crash", created_at=datetime(2024, 2, 2, 12))])
+            db.commit()
+
+        self.queries = self.record_queries()
+
+    def _series(self, granularity, start, end):
+        with self.Session() as db:
+            return time_series(db, Order.created_at, granularity, start, end,
+                               {"sales": func.sum(Order.amount), "orders": func.count(Order.id)},
+                               [Order.status == OrderStatus.PAID])
+
+    def test_buckets_are_filled_for_each_granularity(self):
+        start, end = datetime(2024, 1, 29), datetime(2024, 2, 12, 23, 59, 59)
+
+        days = self._series("day", start, end)
+        self.assertEqual(len(days), 15)
+        self.assertEqual(days[0], {"date": "2024-01-29", "sales": 150, "orders": 2})
+        self.assertEqual(days[1], {"date": "2024-01-30", "sales": 0, "orders": 0})
+        self.assertEqual(days[-1], {"date": "2024-02-12", "sales": 30, "orders": 1})
+
+        weeks = self._series("week", start, end)
+        self.assertEqual([point["date"] for point in weeks], ["2024-01-29", "2024-02-05", "2024-02-12"])
+        self.assertEqual([point["sales"] for point in weeks], [220, 0, 30])
+
+        months = self._series("month", start, end)
+        self.assertEqual(months, [{"date": "2024-01", "sales": 150, "orders": 2},
+                                  {"date": "2024-02", "sales": 100, "orders": 2}])
+
+        hours = self._series("hour", datetime(2024, 1, 29, 9), datetime(2024, 1, 29, 11, 30))
+        self.assertEqual([(point["date"], point["orders"]) for point in hours],
+                         [("2024-01-29 09:00", 0), ("2024-01-29 10:00", 2), ("2024-01-29 11:00", 0)])
+        self.assertEqual(len(self.queries), 4)
+
+    def test_open_start_begins_at_first_bucket_with_data(self):
+        months = self._series("month", None, datetime(2024, 3, 5))
+        self.assertEqual([point["date"] for point in months], ["2024-01", "2024-02", "2024-03"])
+
+    def test_too_many_buckets_are_rejected(self):
+        start = datetime(2000, 1, 1)
+        self.assertGreater(count_buckets(start, datetime(2024, 1, 1), "hour"), MAX_BUCKETS)
+        with self.assertRaises(ValueError):
+            self._series("hour", start, datetime(2024, 1, 1))
+
+    def test_dashboard_uses_constant_number_of_queries(self):
+        client = self.admin_client()
+        counts = []
+        for start in ("2024-01-01T00:00:00", "2020-01-01T00:00:00"):
+            self.queries.clear()
+            response = client.get("/stats/dashboard", params={
+                "start": start, "end": "2024-12-31T23:59:59", "granularity": "day"
+            })
+            self.assertEqual(response.status_code, 200)
+            counts.append(len([query for query in self.queries if query.lstrip().upper().startswith("SELECT")]))
+
+        data = response.json()
+        self.assertEqual(len(data["sales_data"]), 1827)
+        self.assertEqual(data["total_orders"], 5)
+        self.assertEqual(data["paid_orders"], 4)
+        self.assertEqual(data["total_sales"], 250.0)
+        self.assertEqual(data["new_users"], 1)
+        self.assertEqual(data["top_bots"], [{"id": 1, "name": "Quiz", "order_count": 4}])
+        # Отзыв 2019 года в период не входит
+        self.assertEqual((data["avg_rating"], data["bug_reports_count"]), (3.0, 1))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_invalid_granularity_returns_400(self):
+        response = self.admin_client().get("/stats/sales", params={"granularity": "minute"})
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
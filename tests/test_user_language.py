@@ -0,0 +1,99 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from models.models import Base, User
+from models.user_language import UserLanguage
+from utils.cache import LRUCache, MISSING
+from db_case import record_queries
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set(1, "ru")
+        cache.set(2, "en")
+        cache.get(1)
+        cache.set(3, "uk")
+
+        self.assertIs(cache.get(2), MISSING)
+        self.assertEqual(cache.get(1), "ru")
+        self.assertEqual(cache.get(3), "uk")
+        self.assertEqual(cache.evictions, 1)
+
+    def test_ttl_expiry_and_counters(self):
+        cache = LRUCache(max_size=10, ttl=0.05)
+        cache.set("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+        time.sleep(0.06)
+        self.assertIs(cache.get("key"), MISSING)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+class TestUserLanguage(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        self.session_factory = async_sessionmaker(bind=self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.statements = record_queries(self.engine)
+        asyncio.run(self._prepare())
+        self.statements.clear()
+
+    def tearDown(self):
+        asyncio.run(self.engine.dispose())
+
+    async def _prepare(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with self.session_factory() as db:
+            db.add(User(telegram_id=100, first_name="Test", language="en"))
+            await db.commit()
+
+    def _run(self, coro):
+        async def scenario():
+            with patch('models.user_language.AsyncDbSession', self.session_factory):
+                return await coro
+        return asyncio.run(scenario())
+
+    def test_construction_does_not_touch_database(self):
+        UserLanguage()
+        self.assertEqual(self.statements, [])
+
+    def test_loads_on_demand_and_caches(self):
+        user_languages = UserLanguage()
+
+        async def scenario():
+            return [await user_languages.get_language(100) for _ in range(3)]
+
+        self.assertEqual(self._run(scenario()), ["en", "en", "en"])
+        self.assertEqual(len(self.statements), 1)
+        self.assertNotIn("first_name", self.statements[0])
+        self.assertEqual(user_languages.stats()["hits"], 2)
+        self.assertEqual(user_languages.stats()["misses"], 1)
+
+    def test_unknown_user_is_negatively_cached(self):
+        user_languages = UserLanguage(negative_ttl=60)
+
+        async def scenario():
+            return [await user_languages.get_language(999) for _ in range(2)]
+
+        self.assertEqual(self._run(scenario()), [None, None])
+        self.assertEqual(len(self.statements), 1)
+
+    def test_set_language_updates_cache_and_database(self):
+        user_languages = UserLanguage()
+
+        async def scenario():
+            await user_languages.set_language(100, "uk")
+            cached = await user_languages.get_language(100)
+            fresh = await UserLanguage().get_language(100)
+            return cached, fresh
+
+        self.assertEqual(self._run(scenario()), ("uk", "uk"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from aiogram import Dispatcher
+from aiogram.types import Update
+
+from benchmarks.telegram_stub import create_stub_bot
+from bot.middlewares.user import UserMiddleware
+from models.models import User
+from services import rollups
+from services.users import UserResolver
+from db_case import DatabaseTestCase
+
+
+def message_update(update_id, telegram_id=100, username="alice", text="hi"):
+    user = {"id": telegram_id, "is_bot": False, "first_name": "Alice", "username": username, "language_code": "en"}
+    return Update.model_validate({"update_id": update_id, "message": {
+        "message_id": update_id, "date": 0, "chat": {"id": telegram_id, "type": "private"}, "from": user, "text": text
+    }}, context={})
+
+
+class TestUserMiddleware(DatabaseTestCase):
+    def setUp(self):
+        rollups.register_listeners()
+        super().setUp()
+        sessions = self.async_sessions()
+        self.queries = self.record_queries(self.async_engine)
+        self.patcher = patch("services.users.AsyncDbSession", sessions)
+        self.patcher.start()
+
+        self.resolver = UserResolver(max_size=100, ttl=60)
+        self.seen = []
+        self.dp = Dispatcher()
+        self.dp.update.outer_middleware(UserMiddleware(self.resolver))
+
+        @self.dp.message()
+        async def handler(message, user):
+            self.seen.append(user)
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def feed(self, *updates):
+        async def scenario():
+            bot = create_stub_bot()
+            for update in updates:
+                await self.dp.feed_update(bot, update)
+        asyncio.run(scenario())
+
+    def test_first_sight_registers_user_once(self):
+        self.feed(message_update(1), message_update(2), message_update(3))
+
+        first, second, third = self.seen
+        self.assertTrue(first.is_new)
+        self.assertFalse(second.is_new)
+        self.assertEqual(first.id, third.id)
+        self.assertEqual(first.language, "en")
+        # Поиск, INSERT и строка дневной сводки регистраций для первого апдейта, дальше пользователь берется из кеша
+        self.assertEqual(len([q for q in self.queries if q.startswith(("SELECT", "INSERT", "UPDATE"))]), 3)
+        with self.Session() as db:
+            self.assertEqual(db.query(User).count(), 1)
+
+    def test_existing_user_costs_one_select_and_profile_changes_are_saved(self):
+        with self.Session() as db:
+            db.add(User(telegram_id=100, username="old", first_name="Alice", language="uk"))
+            db.commit()
+
+        self.feed(message_update(1, username="old"), message_update(2, username="old"))
+        self.assertEqual(len(self.queries), 1)
+        self.assertFalse(self.seen[0].is_new)
+        self.assertEqual(self.seen[0].language, "uk")
+
+        self.feed(message_update(3, username="alice"))
+        self.assertEqual(self.seen[-1].username, "alice")
+        with self.Session() as db:
+            self.assertEqual(db.query(User).one().username, "alice")
+
+    def test_forget_reloads_user(self):
+        self.feed(message_update(1))
+        with self.Session() as db:
+            db.query(User).update({User.language: "ru"})
+            db.commit()
+        self.resolver.forget(100)
+        self.feed(message_update(2))
+        self.assertEqual(self.seen[-1].language, "ru")
+
+
+if __name__ == "__main__":
+    unittest.main()
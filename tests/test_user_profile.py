@@ -0,0 +1,62 @@
+import unittest
+from datetime import datetime, timedelta
+
+from models.models import Bot, BugReport, Order, OrderStatus, Review, User
+from db_case import DatabaseTestCase
+
+BASE = datetime(2024, 3, 1, 10)
+
+
+class TestUserProfile(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # Каждая запись о своем боте: при ленивой загрузке бота это дало бы запрос на запись
+        with self.Session() as db:
+            user, other = User(telegram_id=100, username="user"), User(telegram_id=200)
+            bots = [Bot(name=f"Bot {i}", description="Bot", price=100) for i in range(15)]
+            db.add_all([user, other] + bots)
+            db.flush()
+            for i in range(15):
+                db.add(Order(user_id=user.id, bot_id=bots[i].id, amount=10 * (i + 1),
+                             status=OrderStatus.PAID if i % 3 else OrderStatus.PENDING,
+                             created_at=BASE + timedelta(minutes=i)))
+            for i in range(4):
+                db.add(Review(user_id=user.id, bot_id=bots[i].id, rating=i + 1, created_at=BASE + timedelta(minutes=i)))
+            db.add(BugReport(user_id=user.id, bot_id=bots[0].id, text="Bug"))
+            db.add(Order(user_id=other.id, bot_id=bots[0].id, amount=1000, status=OrderStatus.PAID))
+            db.commit()
+
+        self.client = self.admin_client(User(id=1, telegram_id=1))
+        self.queries = self.record_queries()
+
+    def test_profile_in_four_queries(self):
+        response = self.client.get("/users/1/profile", params={"limit": 10})
+        self.assertEqual(response.status_code, 200)
+        # Пользователь со статистикой + первые страницы трех списков
+        self.assertEqual(len(self.queries), 4)
+
+        data = response.json()
+        self.assertEqual(data["user"]["username"], "user")
+        self.assertEqual(data["stats"], {"total_orders": 15, "total_spent": 1200.0,
+                                         "reviews_count": 4, "bug_reports_count": 1})
+        orders = data["orders"]
+        self.assertEqual((len(orders["items"]), orders["has_more"], orders["total"]), (10, True, 15))
+        self.assertEqual(orders["items"][0]["bot_name"], "Bot 14")
+        self.assertEqual([item["rating"] for item in data["reviews"]["items"]], [4, 3, 2, 1])
+        self.assertFalse(data["bug_reports"]["has_more"])
+
+        # Следующая страница и фильтр заказов - через отдельный маршрут
+        rest = self.client.get("/users/1/orders", params={"limit": 10, "cursor": orders["next_cursor"]}).json()
+        self.assertEqual([item["bot_name"] for item in rest["items"]], [f"Bot {i}" for i in range(4, -1, -1)])
+        pending = self.client.get("/users/1/orders", params={"status": "pending"}).json()
+        self.assertEqual(pending["total"], 5)
+
+    def test_missing_user(self):
+        self.assertEqual(self.client.get("/users/99/profile").status_code, 404)
+        self.assertEqual(self.client.get("/users/99/stats").status_code, 404)
+        self.assertEqual(self.client.get("/users/2/stats").json(),
+                         {"total_orders": 1, "total_spent": 1000.0, "reviews_count": 0, "bug_reports_count": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+
+import httpx
+from aiogram import Dispatcher
+
+from benchmarks.telegram_stub import create_stub_bot
+from bot.webhook import create_webhook_app
+from config.settings import WEBHOOK_PATH
+
+
+def make_update(update_id):
+    user = {"id": 42, "is_bot": False, "first_name": "Test"}
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": 0, "chat": {"id": 42, "type": "private"}, "from": user, "text": "hi"
+    }}
+
+
+class TestWebhookMode(unittest.TestCase):
+    def _run(self, scenario, block_handlers=False, **app_kwargs):
+        handled = []
+        release = None
+        dp = Dispatcher()
+
+        @dp.message()
+        async def on_message(message):
+            if block_handlers:
+                await release.wait()
+            handled.append(message.message_id)
+
+        app = create_webhook_app(dp, create_stub_bot(), webhook_url="", **app_kwargs)
+
+        async def wrapper():
+            nonlocal release
+            release = asyncio.Event()
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    result = await scenario(app, client)
+                    release.set()
+                    await app.state.updates.join()
+                    return result
+
+        return asyncio.run(wrapper()), handled, app.state.updates.metrics()
+
+    def test_updates_are_fed_into_dispatcher(self):
+        async def scenario(app, client):
+            return [(await client.post(WEBHOOK_PATH, json=make_update(i),
+                                       headers={"X-Telegram-Bot-Api-Secret-Token": "secret"})).status_code
+                    for i in range(1, 6)]
+
+        statuses, handled, metrics = self._run(scenario, secret="secret", workers=2)
+        self.assertEqual(statuses, [200] * 5)
+        self.assertEqual(sorted(handled), [1, 2, 3, 4, 5])
+        self.assertEqual(metrics["processed"], 5)
+
+    def test_rejects_invalid_secret(self):
+        async def scenario(app, client):
+            return (await client.post(WEBHOOK_PATH, json=make_update(1))).status_code
+
+        status, handled, _ = self._run(scenario, secret="secret")
+        self.assertEqual(status, 401)
+        self.assertEqual(handled, [])
+
+    def test_metrics_require_secret(self):
+        async def scenario(app, client):
+            anonymous = await client.get("/metrics")
+            authorized = await client.get("/metrics", headers={"X-Telegram-Bot-Api-Secret-Token": "secret"})
+            return anonymous.status_code, authorized.status_code, authorized.json()
+
+        (anonymous, authorized, body), _, _ = self._run(scenario, secret="secret")
+        self.assertEqual(anonymous, 401)
+        self.assertEqual(authorized, 200)
+        self.assertIn("queue_depth", body)
+
+    def test_full_queue_applies_backpressure(self):
+        async def scenario(app, client):
+            statuses = []
+            for i in range(1, 4):
+                statuses.append((await client.post(WEBHOOK_PATH, json=make_update(i))).status_code)
+                # Даем воркеру забрать первое обновление из очереди
+                await asyncio.sleep(0.01)
+            return statuses
+
+        statuses, handled, metrics = self._run(scenario, block_handlers=True, secret="", workers=1, queue_size=1)
+        self.assertEqual(statuses, [200, 200, 503])
+        self.assertEqual(sorted(handled), [1, 2])
+        self.assertEqual(metrics["rejected"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()